@@ -21,6 +21,7 @@ from auth.auth_service import sar_auth
 from tenancy.tenant_service import sar_tenant_resolver
 from role_enforcement.rbac_service import sar_rbac
 from pymongo import MongoClient
+from mongo_pool import shared_client
 import os
 import logging
 
@@ -160,14 +161,10 @@ class MongoAuditStorage(AuditStorageBackend):
     def _connect(self):
         """Establish MongoDB connection"""
         try:
-            self._client = MongoClient(self.mongodb_uri)
+            self._client = shared_client(self.mongodb_uri, MongoClient, appname="bhiv-runtime-core")
             self._db = self._client[self.db_name]
             self._collection = self._db[self.collection_name]
-            # Create index for efficient queries
-            self._collection.create_index([("timestamp", -1)])
-            self._collection.create_index([("user_id", 1)])
-            self._collection.create_index([("tenant_id", 1)])
-            self._collection.create_index([("event_type", 1)])
+            # audit_logs indexes are managed by the gateway index manifest
             logger.info(f"✅ Connected to MongoDB audit logs collection: {self.collection_name}")
         except Exception as e:
             logger.error(f"❌ Failed to connect to MongoDB for audit logs: {e}")
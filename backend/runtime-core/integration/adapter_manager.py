@@ -11,6 +11,7 @@ from .adapters.base_adapter import BaseIntegrationAdapter
 import os
 import jwt
 from pymongo import MongoClient
+from mongo_pool import shared_client
 from pymongo.collection import Collection
 from datetime import datetime
 
@@ -76,14 +77,7 @@ class AdapterManager:
                 logger.warning("MONGODB_URI/DATABASE_URL not configured, skipping MongoDB integration")
                 return
             
-            self._mongo_client = MongoClient(
-                mongodb_uri,
-                serverSelectionTimeoutMS=5000,
-                maxPoolSize=10,
-                minPoolSize=2,
-                connectTimeoutMS=10000,
-                socketTimeoutMS=20000,
-            )
+            self._mongo_client = shared_client(mongodb_uri, MongoClient, appname="bhiv-runtime-core")
             
             # Test connection
             self._mongo_client.admin.command('ping')
@@ -92,10 +86,7 @@ class AdapterManager:
             self._db = self._mongo_client[db_name]
             self._adapter_events_collection = self._db.adapter_events
             
-            # Create indexes for efficient queries
-            self._adapter_events_collection.create_index([("event_type", 1)])
-            self._adapter_events_collection.create_index([("timestamp", -1)])
-            self._adapter_events_collection.create_index([("tenant_id", 1)])
+            # adapter_events indexes are reconciled from the gateway index manifest
             
             logger.info(f"✅ Connected to MongoDB for adapter event logging: {db_name}")
         except Exception as e:
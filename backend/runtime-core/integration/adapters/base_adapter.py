@@ -8,6 +8,7 @@ from typing import Any, Dict, Optional
 import os
 import jwt
 from pymongo import MongoClient
+from mongo_pool import shared_client
 from pymongo.collection import Collection
 from datetime import datetime
 
@@ -56,14 +57,7 @@ class BaseIntegrationAdapter(ABC):
                 logger.warning("MONGODB_URI/DATABASE_URL not configured, skipping MongoDB integration")
                 return
             
-            self._mongo_client = MongoClient(
-                mongodb_uri,
-                serverSelectionTimeoutMS=5000,
-                maxPoolSize=10,
-                minPoolSize=2,
-                connectTimeoutMS=10000,
-                socketTimeoutMS=20000,
-            )
+            self._mongo_client = shared_client(mongodb_uri, MongoClient, appname="bhiv-runtime-core")
             
             # Test connection
             self._mongo_client.admin.command('ping')
@@ -72,11 +66,7 @@ class BaseIntegrationAdapter(ABC):
             self._db = self._mongo_client[db_name]
             self._integration_logs_collection = self._db.integration_logs
             
-            # Create indexes for efficient queries
-            self._integration_logs_collection.create_index([("adapter_name", 1)])
-            self._integration_logs_collection.create_index([("event_id", 1)])
-            self._integration_logs_collection.create_index([("timestamp", -1)])
-            self._integration_logs_collection.create_index([("tenant_id", 1)])
+            # integration_logs indexes: services/gateway/app/index_manifest.py
             
             logger.info(f"✅ Connected to MongoDB for integration logging: {db_name}")
         except Exception as e:
@@ -5,6 +5,7 @@ This is the main entry point for the SAR that integrates all components.
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import os
 import sys
 from typing import Optional
@@ -12,6 +13,8 @@ from typing import Optional
 # Add the runtime-core directory to the path so imports work correctly
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from mongo_pool import pool_metrics
+
 app = FastAPI(
     title="Sovereign Application Runtime (SAR)",
     version="1.0.0",
@@ -62,6 +65,11 @@ async def readiness_check():
         "timestamp": __import__('datetime').datetime.now().isoformat()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """MongoDB connection-pool metrics in Prometheus text format"""
+    return pool_metrics.prometheus_text("runtime-core")
+
 # Import and include all SAR modules
 try:
     from auth.router import router as auth_router
@@ -0,0 +1,296 @@
+"""
+Shared MongoDB client factory with connection-pool telemetry
+
+Every module that needs MongoDB gets its client from shared_client(), so a
+process holds one pool per URI instead of one per manager/adapter. Pool size,
+wait-queue timeout and wire compression come from the environment, and a CMAP
+listener records checkout latency, connections in use and wait-queue depth
+for export on /metrics.
+
+Environment:
+    MONGO_MAX_POOL_SIZE               connections per server (default 20)
+    MONGO_MIN_POOL_SIZE               warm connections kept open (default 2)
+    MONGO_MAX_IDLE_TIME_MS            close idle connections after (default 300000)
+    MONGO_MAX_CONNECTING              concurrent connection handshakes (driver default)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS       max wait for a free connection (default 10000)
+    MONGO_COMPRESSORS                 e.g. "zstd,snappy,zlib" (default none)
+    MONGO_ZLIB_COMPRESSION_LEVEL      -1..9 when zlib is used
+    MONGO_SERVER_SELECTION_TIMEOUT_MS default 5000
+    MONGO_CONNECT_TIMEOUT_MS          default 10000
+    MONGO_SOCKET_TIMEOUT_MS           default 20000
+
+NOTE: copies of this module live in the agent, langgraph and runtime-core
+services (each is its own build context); keep them in sync.
+"""
+import importlib.util
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import MongoClient
+from pymongo.monitoring import ConnectionPoolListener
+
+logger = logging.getLogger(__name__)
+
+# Checkout latency histogram buckets (seconds)
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Python packages the optional wire compressors need
+_COMPRESSOR_MODULES = {"snappy": "snappy", "zstd": "zstandard", "zlib": "zlib"}
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={value!r}")
+        return default
+
+
+def _compressors() -> Optional[str]:
+    requested = [c.strip().lower() for c in os.getenv("MONGO_COMPRESSORS", "").split(",") if c.strip()]
+    usable = []
+    for name in requested:
+        module = _COMPRESSOR_MODULES.get(name)
+        if module and importlib.util.find_spec(module) is not None:
+            usable.append(name)
+        else:
+            logger.warning(f"MongoDB compressor '{name}' unavailable, skipping")
+    return ",".join(usable) or None
+
+
+def pool_options() -> Dict[str, Any]:
+    """Client keyword arguments for pooling, timeouts and compression"""
+    options = {
+        "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 20),
+        "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 2),
+        "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS", 300000),
+        "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000),
+        "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 10000),
+        "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS", 20000),
+    }
+    max_connecting = _env_int("MONGO_MAX_CONNECTING", None)
+    if max_connecting:
+        options["maxConnecting"] = max_connecting
+    compressors = _compressors()
+    if compressors:
+        options["compressors"] = compressors
+        zlib_level = _env_int("MONGO_ZLIB_COMPRESSION_LEVEL", None)
+        if zlib_level is not None and "zlib" in compressors:
+            options["zlibCompressionLevel"] = zlib_level
+    return options
+
+
+class _PoolStats:
+    __slots__ = ("open", "in_use", "waiting", "max_waiting", "checkouts", "failures",
+                 "cleared", "buckets", "latency_sum", "max_pool_size")
+
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkouts = 0
+        self.failures: Dict[str, int] = defaultdict(int)
+        self.cleared = 0
+        self.buckets = [0] * (len(CHECKOUT_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.max_pool_size = None
+
+
+class PoolMetrics(ConnectionPoolListener):
+    """CMAP listener aggregating per-server pool statistics.
+
+    Callbacks run on driver threads, so every update takes a lock and does
+    only constant work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[str, _PoolStats] = defaultdict(_PoolStats)
+        # Fallback for drivers whose checked-out event carries no duration
+        self._checkout_started: Dict[Tuple[str, int], float] = {}
+
+    @staticmethod
+    def _key(address) -> str:
+        host, port = address
+        return f"{host}:{port}"
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pools[self._key(event.address)].max_pool_size = (event.options or {}).get("maxPoolSize")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pools[self._key(event.address)].cleared += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop(self._key(event.address), None)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pools[self._key(event.address)].open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            stats = self._pools[self._key(event.address)]
+            stats.open = max(0, stats.open - 1)
+
+    def connection_check_out_started(self, event):
+        key = self._key(event.address)
+        with self._lock:
+            stats = self._pools[key]
+            stats.waiting += 1
+            stats.max_waiting = max(stats.max_waiting, stats.waiting)
+            self._checkout_started[(key, threading.get_ident())] = time.monotonic()
+
+    def connection_check_out_failed(self, event):
+        key = self._key(event.address)
+        with self._lock:
+            stats = self._pools[key]
+            stats.waiting = max(0, stats.waiting - 1)
+            stats.failures[str(event.reason)] += 1
+            self._checkout_started.pop((key, threading.get_ident()), None)
+
+    def connection_checked_out(self, event):
+        key = self._key(event.address)
+        with self._lock:
+            started = self._checkout_started.pop((key, threading.get_ident()), None)
+            duration = getattr(event, "duration", None)
+            if duration is None:
+                duration = time.monotonic() - started if started is not None else 0.0
+            stats = self._pools[key]
+            stats.waiting = max(0, stats.waiting - 1)
+            stats.in_use += 1
+            stats.checkouts += 1
+            stats.latency_sum += duration
+            for i, bound in enumerate(CHECKOUT_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[i] += 1
+                    break
+            else:
+                stats.buckets[-1] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            stats = self._pools[self._key(event.address)]
+            stats.in_use = max(0, stats.in_use - 1)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Point-in-time pool statistics keyed by server address"""
+        with self._lock:
+            return {
+                address: {
+                    "max_pool_size": s.max_pool_size,
+                    "open": s.open,
+                    "in_use": s.in_use,
+                    "wait_queue_depth": s.waiting,
+                    "wait_queue_depth_max": s.max_waiting,
+                    "checkouts": s.checkouts,
+                    "checkout_failures": dict(s.failures),
+                    "cleared": s.cleared,
+                    "checkout_seconds_avg": round(s.latency_sum / s.checkouts, 6) if s.checkouts else 0.0,
+                }
+                for address, s in self._pools.items()
+            }
+
+    def prometheus_text(self, service: str) -> str:
+        """Render pool statistics in the Prometheus text exposition format"""
+        with self._lock:
+            pools = [(address, s, list(s.buckets), dict(s.failures)) for address, s in self._pools.items()]
+
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        def labels(address, **extra):
+            pairs = [f'service="{service}"', f'address="{address}"'] + [f'{k}="{v}"' for k, v in extra.items()]
+            return "{" + ",".join(pairs) + "}"
+
+        metric("mongodb_pool_max_size", "gauge", "Configured maximum pool size",
+               [f"mongodb_pool_max_size{labels(a)} {s.max_pool_size or 0}" for a, s, _, _ in pools])
+        metric("mongodb_pool_connections_open", "gauge", "Open connections",
+               [f"mongodb_pool_connections_open{labels(a)} {s.open}" for a, s, _, _ in pools])
+        metric("mongodb_pool_connections_in_use", "gauge", "Connections checked out",
+               [f"mongodb_pool_connections_in_use{labels(a)} {s.in_use}" for a, s, _, _ in pools])
+        metric("mongodb_pool_wait_queue_depth", "gauge", "Operations waiting for a connection",
+               [f"mongodb_pool_wait_queue_depth{labels(a)} {s.waiting}" for a, s, _, _ in pools])
+        metric("mongodb_pool_wait_queue_depth_max", "gauge", "Highest wait-queue depth seen",
+               [f"mongodb_pool_wait_queue_depth_max{labels(a)} {s.max_waiting}" for a, s, _, _ in pools])
+        metric("mongodb_pool_cleared_total", "counter", "Pool clears (server errors, failovers)",
+               [f"mongodb_pool_cleared_total{labels(a)} {s.cleared}" for a, s, _, _ in pools])
+        metric("mongodb_pool_checkout_failures_total", "counter", "Failed checkouts by reason",
+               [f"mongodb_pool_checkout_failures_total{labels(a, reason=r)} {n}"
+                for a, _, _, failures in pools for r, n in failures.items()])
+
+        samples = []
+        for address, s, buckets, _ in pools:
+            cumulative = 0
+            for bound, count in zip(CHECKOUT_BUCKETS, buckets):
+                cumulative += count
+                samples.append(f"mongodb_pool_checkout_seconds_bucket{labels(address, le=bound)} {cumulative}")
+            samples.append(f"mongodb_pool_checkout_seconds_bucket{labels(address, le='+Inf')} {s.checkouts}")
+            samples.append(f"mongodb_pool_checkout_seconds_sum{labels(address)} {s.latency_sum:.6f}")
+            samples.append(f"mongodb_pool_checkout_seconds_count{labels(address)} {s.checkouts}")
+        metric("mongodb_pool_checkout_seconds", "histogram", "Time to check a connection out of the pool", samples)
+        return "\n".join(lines) + "\n"
+
+
+pool_metrics = PoolMetrics()
+
+_clients: Dict[Tuple[type, str], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(uri: str, client_class: type = MongoClient, **overrides) -> Any:
+    """Process-wide client for a URI, created on first use.
+
+    Args:
+        uri: MongoDB connection string
+        client_class: MongoClient or motor's AsyncIOMotorClient
+        **overrides: Extra client options (only applied on creation)
+
+    Returns:
+        The shared client; callers must not close it (use close_shared_clients)
+    """
+    key = (client_class, uri)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            options = pool_options()
+            options.update(overrides)
+            client = client_class(uri, event_listeners=[pool_metrics], **options)
+            _clients[key] = client
+            logger.info(
+                f"MongoDB pool created ({client_class.__name__}): maxPoolSize={options['maxPoolSize']}, "
+                f"waitQueueTimeoutMS={options['waitQueueTimeoutMS']}, compressors={options.get('compressors')}"
+            )
+    return client
+
+
+def close_shared_clients() -> None:
+    """Close every shared client (shutdown and tests)"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
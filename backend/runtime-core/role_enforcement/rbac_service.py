@@ -14,6 +14,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 import os
 from pymongo import MongoClient
+from mongo_pool import shared_client
 from auth.auth_service import get_auth, SARAuthentication
 from tenancy.tenant_service import get_tenant_info, TenantResolver
 
@@ -108,15 +109,12 @@ class SARRoleEnforcement:
     def _connect_to_mongodb(self):
         """Establish MongoDB connection for role data storage"""
         try:
-            self._client = MongoClient(self.config.mongodb_uri)
+            self._client = shared_client(self.config.mongodb_uri, MongoClient, appname="bhiv-runtime-core")
             self._db = self._client[self.config.mongodb_db_name]
             self._roles_collection = self._db[self.config.roles_collection_name]
             self._assignments_collection = self._db[self.config.role_assignments_collection_name]
             
-            # Create indexes for efficient queries
-            self._roles_collection.create_index([("name", 1)], unique=True)
-            self._assignments_collection.create_index([("user_id", 1), ("role_name", 1), ("tenant_id", 1)])
-            self._assignments_collection.create_index([("user_id", 1)])
+            # roles / role_assignments indexes come from the gateway index manifest
             
             logger.info("✅ Connected to MongoDB for role enforcement data")
         except Exception as e:
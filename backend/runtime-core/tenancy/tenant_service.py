@@ -14,6 +14,7 @@ import jwt
 from datetime import datetime, timezone
 import re
 from pymongo import MongoClient
+from mongo_pool import shared_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -81,13 +82,9 @@ class TenantResolver:
     def _connect_to_mongodb(self):
         """Establish MongoDB connection for tenant data storage"""
         try:
-            self._client = MongoClient(self.config.mongodb_uri)
+            self._client = shared_client(self.config.mongodb_uri, MongoClient, appname="bhiv-runtime-core")
             self._db = self._client[self.config.mongodb_db_name]
-            # Create indexes for efficient queries
-            if self._db is not None:
-                self._db.clients.create_index([("tenant_id", 1)])
-                self._db.users.create_index([("tenant_id", 1)])
-                self._db.candidates.create_index([("tenant_id", 1)])
+            # tenant_id indexes come from the gateway index manifest
             logger.info("✅ Connected to MongoDB for tenant data")
         except Exception as e:
             logger.error(f"❌ Failed to connect to MongoDB for tenant data: {e}")
@@ -17,6 +17,7 @@ from concurrent.futures import ThreadPoolExecutor
 import logging
 from enum import Enum
 from pymongo import MongoClient
+from mongo_pool import shared_client
 import time
 
 logger = logging.getLogger(__name__)
@@ -148,15 +149,10 @@ class MongoWorkflowStorage(WorkflowStorageBackend):
     def _connect(self):
         """Establish MongoDB connection"""
         try:
-            self._client = MongoClient(self.mongodb_uri)
+            self._client = shared_client(self.mongodb_uri, MongoClient, appname="bhiv-runtime-core")
             self._db = self._client[self.db_name]
             self._collection = self._db[self.collection_name]
-            # Create indexes for efficient queries
-            self._collection.create_index([("instance_id", 1)], unique=True)
-            self._collection.create_index([("tenant_id", 1)])
-            self._collection.create_index([("workflow_name", 1)])
-            self._collection.create_index([("status", 1)])
-            self._collection.create_index([("created_at", -1)])
+            # Indexes for this collection are declared in services/gateway/app/index_manifest.py
             logger.info(f"✅ Connected to MongoDB workflow collection: {self.collection_name}")
         except Exception as e:
             logger.error(f"❌ Failed to connect to MongoDB for workflow storage: {e}")
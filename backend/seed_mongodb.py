@@ -8,6 +8,11 @@ import os
 from dotenv import load_dotenv
 from bson import ObjectId
 import random
+import sys
+
+# Canonical skill dictionary lives with the gateway service
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'services', 'gateway'))
+from app.skills import skill_fields
 
 # Load environment variables
 load_dotenv()
@@ -133,7 +138,8 @@ def seed_candidates(job_ids):
             "status": random.choice(["active", "shortlisted", "interviewed", "hired"]),
             "match_score": random.randint(50, 100),
             "created_at": datetime.utcnow() - timedelta(days=random.randint(0, 30)),
-            "updated_at": datetime.utcnow()
+            "updated_at": datetime.utcnow(),
+            **skill_fields(selected_skills)
         })
     
     result = db.candidates.insert_many(candidates)
@@ -148,11 +154,11 @@ def seed_job_applications(job_ids, candidate_ids):
     for candidate_id in candidate_ids[:15]:  # First 15 candidates apply
         job_id = random.choice(job_ids)
         applications.append({
-            "candidate_id": candidate_id,
-            "job_id": job_id,
+            "candidate_id": str(candidate_id),  # Reference ids are stored as strings
+            "job_id": str(job_id),
             "status": random.choice(["pending", "reviewed", "shortlisted", "rejected", "hired"]),
             "match_score": random.randint(50, 100),
-            "applied_at": datetime.utcnow() - timedelta(days=random.randint(0, 20)),
+            "applied_date": datetime.utcnow() - timedelta(days=random.randint(0, 20)),
             "updated_at": datetime.utcnow(),
             "notes": "Application submitted via portal"
         })
@@ -547,6 +553,7 @@ def create_indexes():
     db.candidates.create_index("email", unique=True)
     db.candidates.create_index("status")
     db.candidates.create_index("created_at")
+    db.candidates.create_index("skill_ids")
     print("   ✅ Candidates indexes created")
     
     # Jobs indexes
@@ -557,6 +564,7 @@ def create_indexes():
     
     # Job applications indexes
     db.job_applications.create_index([("candidate_id", 1), ("job_id", 1)])
+    db.job_applications.create_index([("candidate_id", 1), ("applied_date", -1)])
     db.job_applications.create_index("status")
     print("   ✅ Job applications indexes created")
     
@@ -1,16 +1,19 @@
 from fastapi import FastAPI, HTTPException, Depends, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 # MongoDB imports (migrated from psycopg2/PostgreSQL)
 from database import get_mongo_db, get_collection
+from mongo_pool import pool_metrics
+from skills import categorize_skills, normalize_skills, skill_names
 from bson import ObjectId
 import os
 import json
 import sys
 import logging
 import jwt
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 # Import configuration
@@ -162,8 +165,16 @@ if PHASE3_AVAILABLE and Phase3SemanticEngine:
 else:
     print("INFO: Running in fallback mode without Phase 3 engine")
 
+def candidate_skill_ids(candidate: Dict[str, Any]) -> List[int]:
+    """Canonical skill ids for a candidate (stored at write time, parsed for legacy docs)"""
+    stored = candidate.get('skill_ids')
+    if isinstance(stored, list):
+        return stored
+    return normalize_skills(candidate.get('technical_skills'))
+
 class MatchRequest(BaseModel):
     job_id: str
+    candidate_ids: Optional[List[str]] = None  # Restrict scoring to these candidates (incremental updates)
 
 class CandidateScore(BaseModel):
     candidate_id: str
@@ -224,6 +235,11 @@ def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/metrics", tags=["Core API Endpoints"], summary="Prometheus Metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """MongoDB connection-pool metrics in Prometheus text format"""
+    return pool_metrics.prometheus_text("agent")
+
 @app.get("/test-db", tags=["System Diagnostics"], summary="Database Connectivity Test")
 def test_database(auth = Depends(auth_dependency)):
     db = None
@@ -298,10 +314,14 @@ async def match_candidates(request: MatchRequest, auth = Depends(auth_dependency
         job_location = job_doc.get('location', '')
         job_level = job_doc.get('experience_level', '')
         job_requirements = job_doc.get('requirements', '')
+        job_skill_ids = set(normalize_skills(job_requirements))
         logger.info(f"Processing job: {job_title}")
         
-        # Get all candidates (MongoDB version)
-        candidates_cursor = db.candidates.find({}).sort('created_at', -1)
+        # Get all candidates (MongoDB version), or only the requested subset
+        candidate_query = {}
+        if request.candidate_ids:
+            candidate_query = {'_id': {'$in': [ObjectId(cid) for cid in request.candidate_ids if ObjectId.is_valid(cid)]}}
+        candidates_cursor = db.candidates.find(candidate_query).sort('created_at', -1)
         candidates = list(candidates_cursor)
         logger.info(f"Found {len(candidates)} candidates for Phase 3 matching")
         
@@ -342,6 +362,7 @@ async def match_candidates(request: MatchRequest, auth = Depends(auth_dependency
                 'location': cand.get('location', ''),
                 'experience_years': cand.get('experience_years', 0),
                 'technical_skills': cand.get('technical_skills', ''),
+                'skill_ids': candidate_skill_ids(cand),
                 'seniority_level': cand.get('seniority_level', ''),
                 'education_level': cand.get('education_level', '')
             })
@@ -362,14 +383,8 @@ async def match_candidates(request: MatchRequest, auth = Depends(auth_dependency
                 # Simple scoring based on basic criteria
                 score = 0.5  # Base score
                 
-                # Basic skill matching
-                candidate_skills = (candidate.get('technical_skills') or '').lower()
-                job_requirements = (job_requirements or '').lower()
-                
-                skill_keywords = ['python', 'java', 'javascript', 'react', 'sql']
-                matched_skills = [skill for skill in skill_keywords if skill in candidate_skills and skill in job_requirements]
-                
-                if matched_skills:
+                # Basic skill matching on canonical skill ids
+                if job_skill_ids.intersection(candidate['skill_ids']):
                     score += 0.3
                 
                 # Experience matching
@@ -399,15 +414,9 @@ async def match_candidates(request: MatchRequest, auth = Depends(auth_dependency
             display_score = 45 + (semantic_score * 50)
             
             # Extract matched skills
-            skills_match = []
-            if candidate_data.get('technical_skills'):
-                skills_text = candidate_data['technical_skills'].lower()
-                job_req_lower = (job_requirements or '').lower()
-                
-                tech_keywords = ['python', 'java', 'javascript', 'react', 'node', 'sql', 'mongodb', 'aws', 'docker']
-                for skill in tech_keywords:
-                    if skill in skills_text and skill in job_req_lower:
-                        skills_match.append(skill.title())
+            skills_match = skill_names(
+                s for s in candidate_data.get('skill_ids', []) if s in job_skill_ids
+            )
             
             # Create reasoning
             reasoning_parts = []
@@ -430,6 +439,7 @@ async def match_candidates(request: MatchRequest, auth = Depends(auth_dependency
                 "name": candidate_data['name'],
                 "email": candidate_data['email'],
                 "score": round(display_score, 1),
+                "raw_score": round(display_score, 1),
                 "skills_match": ", ".join(skills_match[:5]),
                 "experience_match": f"{candidate_data.get('experience_years', 0)}y - Phase 3 matched",
                 "location_match": score_breakdown.get('location_match', 0) > 0.5,
@@ -440,13 +450,15 @@ async def match_candidates(request: MatchRequest, auth = Depends(auth_dependency
         # Sort by score
         scored_candidates.sort(key=lambda x: x["score"], reverse=True)
         
-        # Apply score differentiation
-        for i in range(1, len(scored_candidates)):
-            if scored_candidates[i]["score"] >= scored_candidates[i-1]["score"]:
-                scored_candidates[i]["score"] = round(scored_candidates[i-1]["score"] - 0.8, 1)
+        # Apply score differentiation. A requested subset keeps its raw scores: its
+        # positions say nothing about the full ranking the caller merges it into
+        if not request.candidate_ids:
+            for i in range(1, len(scored_candidates)):
+                if scored_candidates[i]["score"] >= scored_candidates[i-1]["score"]:
+                    scored_candidates[i]["score"] = round(scored_candidates[i-1]["score"] - 0.8, 1)
         
-        # Get top candidates
-        top_candidates = scored_candidates[:10]
+        # Get top candidates (a requested subset is returned in full)
+        top_candidates = scored_candidates if request.candidate_ids else scored_candidates[:10]
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
@@ -548,6 +560,7 @@ async def batch_match_jobs(request: BatchMatchRequest, auth = Depends(auth_depen
                 'location': cand.get('location', ''),
                 'experience_years': cand.get('experience_years', 0),
                 'technical_skills': cand.get('technical_skills', ''),
+                'skill_ids': candidate_skill_ids(cand),
                 'seniority_level': cand.get('seniority_level', ''),
                 'education_level': cand.get('education_level', '')
             })
@@ -556,19 +569,16 @@ async def batch_match_jobs(request: BatchMatchRequest, auth = Depends(auth_depen
         batch_results = {}
         for job in jobs:
             job_id = job['id']
-            job_requirements = (job.get('requirements') or '').lower()
+            job_skill_ids = set(normalize_skills(job.get('requirements')))
             job_location = job.get('location', '')
             
             # Detailed matching for each job
             job_matches = []
             for i, candidate in enumerate(candidates[:5]):  # Limit to top 5 for performance
-                candidate_skills = (candidate.get('technical_skills') or '').lower()
                 candidate_location = candidate.get('location', '')
                 
                 # Calculate skill matches
-                skill_keywords = ['python', 'java', 'javascript', 'react', 'node', 'sql', 'aws']
-                matched_skills = [skill for skill in skill_keywords 
-                                if skill in candidate_skills and skill in job_requirements]
+                matched_skills = skill_names(s for s in candidate['skill_ids'] if s in job_skill_ids)
                 
                 # Location matching
                 location_match = job_location.lower() in candidate_location.lower() if job_location and candidate_location else False
@@ -675,21 +685,7 @@ def analyze_candidate(candidate_id: str, auth = Depends(auth_dependency)):
         education = candidate.get('education_level', '')
         location = candidate.get('location', '')
         
-        skill_categories = {
-            'Programming': ['python', 'java', 'javascript', 'c++', 'go'],
-            'Web Development': ['react', 'node', 'html', 'css', 'django'],
-            'Data Science': ['pandas', 'numpy', 'tensorflow', 'machine learning', 'ai'],
-            'Cloud': ['aws', 'azure', 'docker', 'kubernetes'],
-            'Database': ['sql', 'mysql', 'postgresql', 'mongodb']
-        }
-        
-        skills_lower = (skills or "").lower()
-        categorized_skills = {}
-        
-        for category, skill_list in skill_categories.items():
-            found_skills = [skill for skill in skill_list if skill in skills_lower]
-            if found_skills:
-                categorized_skills[category] = found_skills
+        categorized_skills = categorize_skills(candidate_skill_ids(candidate))
         
         # Phase 3: Semantic skill extraction
         semantic_skills = []
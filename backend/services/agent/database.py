@@ -10,6 +10,8 @@ from typing import Optional
 import os
 import logging
 
+from mongo_pool import shared_client, close_shared_clients
+
 logger = logging.getLogger(__name__)
 
 # Global MongoDB client and database instances
@@ -20,7 +22,7 @@ _mongo_db: Optional[Database] = None
 def get_mongo_client() -> MongoClient:
     """
     Get or create MongoDB client (sync)
-    Uses singleton pattern for connection reuse
+    Shared per process; pool settings come from MONGO_* env vars (see mongo_pool)
     """
     global _mongo_client
     
@@ -33,14 +35,7 @@ def get_mongo_client() -> MongoClient:
             )
         
         try:
-            _mongo_client = MongoClient(
-                mongodb_uri,
-                serverSelectionTimeoutMS=5000,
-                maxPoolSize=10,
-                minPoolSize=2,
-                connectTimeoutMS=10000,
-                socketTimeoutMS=20000,
-            )
+            _mongo_client = shared_client(mongodb_uri, MongoClient, appname="bhiv-agent")
             # Test connection
             _mongo_client.admin.command('ping')
             logger.info("MongoDB client (sync) initialized and connected")
@@ -90,7 +85,7 @@ def close_mongo_connections():
     global _mongo_client, _mongo_db
     
     if _mongo_client:
-        _mongo_client.close()
+        close_shared_clients()
         _mongo_client = None
         logger.info("MongoDB client closed")
     
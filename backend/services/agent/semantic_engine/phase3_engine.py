@@ -15,6 +15,7 @@ from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 # MongoDB imports (migrated from SQLAlchemy)
 from pymongo import MongoClient
+from mongo_pool import shared_client
 
 logger = logging.getLogger(__name__)
 
@@ -73,7 +74,7 @@ class Phase3SemanticEngine:
         if not mongodb_uri:
             raise ValueError("DATABASE_URL or MONGODB_URI environment variable is required")
         
-        client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
+        client = shared_client(mongodb_uri, MongoClient, appname="bhiv-agent")
         db_name = os.getenv("MONGODB_DB_NAME", "bhiv_hr")
         return client[db_name]
     
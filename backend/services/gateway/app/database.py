@@ -8,6 +8,8 @@ from typing import Optional
 import os
 import logging
 
+from app.mongo_pool import shared_client, close_shared_clients
+
 logger = logging.getLogger(__name__)
 
 # Global MongoDB client and database instances
@@ -18,7 +20,7 @@ _mongo_db: Optional[AsyncIOMotorDatabase] = None
 def get_mongo_client() -> AsyncIOMotorClient:
     """
     Get or create MongoDB client (async)
-    Uses singleton pattern for connection reuse
+    Shared per process; pool settings come from MONGO_* env vars (see app.mongo_pool)
     """
     global _mongo_client
     
@@ -31,14 +33,7 @@ def get_mongo_client() -> AsyncIOMotorClient:
             )
         
         try:
-            _mongo_client = AsyncIOMotorClient(
-                mongodb_uri,
-                serverSelectionTimeoutMS=5000,
-                maxPoolSize=10,
-                minPoolSize=2,
-                connectTimeoutMS=10000,
-                socketTimeoutMS=20000,
-            )
+            _mongo_client = shared_client(mongodb_uri, AsyncIOMotorClient, appname="bhiv-gateway")
             logger.info("MongoDB client (async) initialized")
         except Exception as e:
             logger.error(f"Failed to initialize MongoDB client: {e}")
@@ -76,7 +71,7 @@ async def close_mongo_connections():
     global _mongo_client, _mongo_db
     
     if _mongo_client:
-        _mongo_client.close()
+        close_shared_clients()
         _mongo_client = None
         logger.info("MongoDB client closed")
     
@@ -32,6 +32,22 @@ def convert_id_to_objectid(id_value: Any) -> ObjectId:
     raise ValueError(f"Cannot convert {type(id_value)} to ObjectId")
 
 
+def normalize_ref_id(id_value: Any) -> str:
+    """
+    Canonical form for ids stored as references in other documents
+    (job_applications.candidate_id/job_id): the plain string, never an ObjectId
+    
+    Args:
+        id_value: ObjectId, string or integer id
+        
+    Returns:
+        String id
+    """
+    if isinstance(id_value, ObjectId):
+        return str(id_value)
+    return str(id_value).strip()
+
+
 def convert_objectid_to_str(doc: Dict[str, Any]) -> Dict[str, Any]:
     """
     Convert _id ObjectId to string 'id' field for API responses
@@ -208,3 +224,52 @@ async def delete_one(
     collection = db[collection_name]
     result = await collection.delete_one(query)
     return result.deleted_count > 0
+
+
+def shaped_projection(fields: List[str], defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build a $project stage body that emits 'id' as a string and every listed
+    field even when missing (null or the given default), so API rows can be
+    returned straight from the aggregation without per-document rebuilding
+    
+    Args:
+        fields: Field names to include
+        defaults: Optional per-field default for missing/null values
+        
+    Returns:
+        $project specification
+    """
+    defaults = defaults or {}
+    projection: Dict[str, Any] = {"_id": 0, "id": {"$toString": "$_id"}}
+    for field in fields:
+        projection[field] = {"$ifNull": [f"${field}", {"$literal": defaults.get(field)}]}
+    return projection
+
+
+def lookup_by_id(from_collection: str, local_field: str, as_field: str, fields: List[str]) -> Dict[str, Any]:
+    """
+    Build a projected $lookup that joins on _id whether the local field holds
+    an ObjectId or its string form
+    
+    Args:
+        from_collection: Collection to join
+        local_field: Field holding the foreign id
+        as_field: Output array field
+        fields: Fields to keep from the joined document
+        
+    Returns:
+        $lookup stage
+    """
+    return {"$lookup": {
+        "from": from_collection,
+        "let": {"ref": f"${local_field}"},
+        "pipeline": [
+            {"$match": {"$expr": {"$eq": [
+                "$_id",
+                {"$convert": {"input": "$$ref", "to": "objectId", "onError": "$$ref", "onNull": None}}
+            ]}}},
+            {"$project": {field: 1 for field in fields}},
+            {"$limit": 1}
+        ],
+        "as": as_field
+    }}
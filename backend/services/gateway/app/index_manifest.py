@@ -0,0 +1,326 @@
+"""
+Declarative MongoDB index manifest
+
+Every index the gateway, agent, langgraph and runtime-core services rely on is
+declared here, next to the query it serves. Deploys reconcile the live
+database against this list (create_mongodb_indexes.py, and the gateway on
+startup); services no longer create indexes from their constructors.
+
+Reconciliation matches indexes by key pattern and options, not by name, so
+indexes created by older scripts under other names are recognised. It only
+creates by default; dropping conflicting or unmanaged indexes is opt-in.
+
+When adding a hot query, add its index here and its shape to the catalogue in
+app/query_plans.py so explain_hot_queries.py covers it.
+"""
+import logging
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from pymongo import IndexModel
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: Tuple[Tuple[str, Any], ...]
+    name: str
+    services: Tuple[str, ...]
+    unique: bool = False
+    sparse: bool = False
+    expire_after_seconds: Optional[int] = None
+    partial_filter: Optional[Dict[str, Any]] = None
+
+    def options(self) -> Dict[str, Any]:
+        """Options that must match for an existing index to count as this one"""
+        return {
+            "unique": self.unique,
+            "sparse": self.sparse,
+            "expireAfterSeconds": self.expire_after_seconds,
+            "partialFilterExpression": self.partial_filter,
+        }
+
+    def model(self) -> IndexModel:
+        kwargs: Dict[str, Any] = {"name": self.name}
+        if self.unique:
+            kwargs["unique"] = True
+        if self.sparse:
+            kwargs["sparse"] = True
+        if self.expire_after_seconds is not None:
+            kwargs["expireAfterSeconds"] = self.expire_after_seconds
+        if self.partial_filter is not None:
+            kwargs["partialFilterExpression"] = self.partial_filter
+        return IndexModel(list(self.keys), **kwargs)
+
+
+# Collections whose names runtime-core reads from the environment
+WORKFLOW_COLLECTION = os.getenv("WORKFLOW_COLLECTION", "workflows")
+RBAC_ROLES_COLLECTION = os.getenv("RBAC_ROLES_COLLECTION", "roles")
+RBAC_ASSIGNMENTS_COLLECTION = os.getenv("RBAC_ASSIGNMENTS_COLLECTION", "role_assignments")
+
+GATEWAY = ("gateway",)
+AGENT = ("agent",)
+LANGGRAPH = ("langgraph",)
+RUNTIME_CORE = ("runtime-core",)
+
+INDEXES: Tuple[IndexSpec, ...] = (
+    # ----- candidates -----
+    # Login / registration duplicate check
+    IndexSpec("candidates", (("email", 1),), "email_unique", GATEWAY, unique=True),
+    # Candidate list, agent pool load, "new this week", pool version
+    IndexSpec("candidates", (("created_at", 1),), "created_at_index", GATEWAY + AGENT),
+    # Pool version for match result caching
+    IndexSpec("candidates", (("updated_at", 1),), "updated_at_index", GATEWAY),
+    # $all / $in skill filters (multikey)
+    IndexSpec("candidates", (("skill_ids", 1),), "skill_ids_index", GATEWAY),
+    # Legacy string ids used when the path id is not an ObjectId
+    IndexSpec("candidates", (("id", 1),), "legacy_id_index", GATEWAY + AGENT, sparse=True),
+    IndexSpec("candidates", (("tenant_id", 1),), "tenant_id_index", RUNTIME_CORE),
+
+    # ----- jobs -----
+    # Public job list ($match status, $sort created_at) and active job counts
+    IndexSpec("jobs", (("status", 1), ("created_at", -1)), "status_created_at_index", GATEWAY),
+    IndexSpec("jobs", (("id", 1),), "legacy_id_index", GATEWAY + AGENT, sparse=True),
+
+    # ----- job_applications -----
+    # My Applications (match candidate_id, sort applied_date) and per-candidate counts
+    IndexSpec("job_applications", (("candidate_id", 1), ("applied_date", -1)), "candidate_applied_date", GATEWAY),
+    # Duplicate application check
+    IndexSpec("job_applications", (("job_id", 1), ("candidate_id", 1)), "job_candidate", GATEWAY),
+    # Recruiter shortlisted count
+    IndexSpec("job_applications", (("status", 1),), "status_index", GATEWAY),
+
+    # ----- interviews / offers / feedback -----
+    IndexSpec("interviews", (("candidate_id", 1), ("interview_date", -1)), "candidate_interview_date_index", GATEWAY),
+    IndexSpec("interviews", (("interview_date", -1),), "interview_date_index", GATEWAY),
+    # Pending / scheduled interview counts
+    IndexSpec("interviews", (("status", 1), ("interview_date", 1)), "status_interview_date_index", GATEWAY),
+    IndexSpec("offers", (("candidate_id", 1), ("created_at", -1)), "candidate_created_at_index", GATEWAY),
+    IndexSpec("offers", (("created_at", -1),), "created_at_index", GATEWAY),
+    IndexSpec("feedback", (("candidate_id", 1), ("created_at", -1)), "candidate_created_at_index", GATEWAY + AGENT),
+    IndexSpec("feedback", (("created_at", -1),), "created_at_index", GATEWAY),
+
+    # ----- clients / users -----
+    IndexSpec("clients", (("email", 1),), "email_unique", GATEWAY, unique=True),
+    IndexSpec("clients", (("client_id", 1),), "client_id_unique", GATEWAY + RUNTIME_CORE, unique=True),
+    IndexSpec("clients", (("client_code", 1),), "client_code_unique", GATEWAY, unique=True),
+    IndexSpec("clients", (("tenant_id", 1),), "tenant_id_index", RUNTIME_CORE),
+    IndexSpec("users", (("email", 1),), "email_unique", GATEWAY, unique=True),
+    IndexSpec("users", (("user_id", 1),), "user_id_index", RUNTIME_CORE, sparse=True),
+    IndexSpec("users", (("tenant_id", 1),), "tenant_id_index", RUNTIME_CORE),
+    # One 2FA state document per user; also the replay check's filter
+    IndexSpec("user_2fa", (("user_id", 1),), "user_id_unique", GATEWAY, unique=True),
+
+    # ----- gateway support collections -----
+    IndexSpec("matching_cache", (("job_id", 1),), "idx_matching_cache_job_id", GATEWAY, unique=True),
+    IndexSpec("matching_cache", (("expires_at", 1),), "idx_matching_cache_ttl", GATEWAY, expire_after_seconds=0),
+    IndexSpec("matching_cache", (("created_at", 1),), "idx_matching_cache_created_at", GATEWAY),
+    IndexSpec("rate_limits", (("client_ip", 1), ("endpoint", 1)), "client_ip_endpoint_index", GATEWAY),
+    IndexSpec("rate_limits", (("expires_at", 1),), "expires_at_ttl", GATEWAY, expire_after_seconds=0),
+    IndexSpec("csp_violations", (("timestamp", 1),), "timestamp_index", GATEWAY),
+    IndexSpec("schema_version", (("applied_at", -1),), "applied_at_index", GATEWAY),
+
+    # ----- langgraph -----
+    IndexSpec("langgraph_checkpoints", (("thread_id", 1), ("thread_ts", -1)), "thread_id_thread_ts_index", LANGGRAPH),
+    # Retention passes read what was created since their watermark
+    IndexSpec("langgraph_checkpoints", (("created_at", 1),), "created_at_index", LANGGRAPH),
+    IndexSpec("langgraph_checkpoint_writes",
+              (("thread_id", 1), ("checkpoint_ns", 1), ("thread_ts", 1), ("task_id", 1), ("idx", 1)),
+              "checkpoint_task_idx_unique", LANGGRAPH, unique=True),
+    IndexSpec("langgraph_checkpoint_blobs", (("thread_id", 1), ("checkpoint_ns", 1), ("channel", 1), ("version", 1)),
+              "channel_version_unique", LANGGRAPH, unique=True),
+    IndexSpec("workflows", (("workflow_id", 1),), "workflow_id_index", LANGGRAPH, sparse=True),
+    IndexSpec("workflows", (("started_at", -1),), "started_at_index", LANGGRAPH),
+    # Active workflow list and old workflow cleanup
+    IndexSpec("workflows", (("status", 1), ("started_at", -1)), "status_started_at_index", LANGGRAPH),
+    IndexSpec("workflows", (("completed_at", 1),), "completed_at_index", LANGGRAPH, sparse=True),
+    IndexSpec("rl_predictions", (("candidate_id", 1), ("job_id", 1)), "candidate_job_index", LANGGRAPH),
+    IndexSpec("rl_predictions", (("candidate_id", 1), ("created_at", -1)), "candidate_created_at_index", LANGGRAPH),
+    IndexSpec("rl_predictions", (("created_at", -1),), "created_at_index", LANGGRAPH),
+    # $lookup foreignField from rl_predictions
+    IndexSpec("rl_feedback", (("prediction_id", 1),), "prediction_id_index", LANGGRAPH),
+    IndexSpec("rl_feedback", (("created_at", -1),), "created_at_index", LANGGRAPH),
+    # Feedback history pages: candidate_id / job_id are denormalized from the prediction
+    IndexSpec("rl_feedback", (("candidate_id", 1), ("created_at", -1)), "candidate_created_at_index", LANGGRAPH),
+    IndexSpec("rl_feedback", (("job_id", 1), ("created_at", -1)), "job_created_at_index", LANGGRAPH),
+    IndexSpec("rl_model_performance", (("evaluation_date", -1),), "evaluation_date_index", LANGGRAPH),
+    # Retrained weight snapshots: the one active version (swapped in at startup) and the newest first
+    IndexSpec("rl_model_snapshots", (("active", 1),), "active_unique", LANGGRAPH, unique=True,
+              partial_filter={"active": True}),
+    IndexSpec("rl_model_snapshots", (("created_at", -1),), "created_at_index", LANGGRAPH),
+    # Status callbacks and polls upsert by SID; uniqueness drops out-of-order updates
+    IndexSpec("notification_deliveries", (("message_sid", 1),), "message_sid_unique", LANGGRAPH, unique=True),
+    IndexSpec("notification_deliveries", (("created_at", 1),), "created_at_ttl", LANGGRAPH,
+              expire_after_seconds=90 * 24 * 3600),
+
+    # ----- runtime-core -----
+    # langgraph stores its own documents (without instance_id) in the same
+    # collection by default, so uniqueness only applies to runtime-core ones
+    IndexSpec(WORKFLOW_COLLECTION, (("instance_id", 1),), "instance_id_unique", RUNTIME_CORE, unique=True,
+              partial_filter={"instance_id": {"$exists": True}}),
+    IndexSpec(WORKFLOW_COLLECTION, (("tenant_id", 1), ("status", 1)), "tenant_status_index", RUNTIME_CORE),
+    IndexSpec(WORKFLOW_COLLECTION, (("workflow_name", 1),), "workflow_name_index", RUNTIME_CORE),
+    IndexSpec(WORKFLOW_COLLECTION, (("created_at", -1),), "created_at_index", RUNTIME_CORE),
+    # Audit queries filter by tenant and page newest first
+    IndexSpec("audit_logs", (("tenant_id", 1), ("timestamp", -1)), "tenant_timestamp_index", RUNTIME_CORE),
+    IndexSpec("audit_logs", (("timestamp", -1),), "timestamp_index", RUNTIME_CORE),
+    IndexSpec("audit_logs", (("user_id", 1),), "user_id_index", RUNTIME_CORE),
+    IndexSpec("audit_logs", (("event_type", 1),), "event_type_index", RUNTIME_CORE),
+    IndexSpec("audit_logs", (("event_id", 1),), "event_id_index", RUNTIME_CORE),
+    IndexSpec("adapter_events", (("event_type", 1),), "event_type_index", RUNTIME_CORE),
+    IndexSpec("adapter_events", (("timestamp", -1),), "timestamp_index", RUNTIME_CORE),
+    IndexSpec("adapter_events", (("tenant_id", 1),), "tenant_id_index", RUNTIME_CORE),
+    IndexSpec("integration_logs", (("adapter_name", 1),), "adapter_name_index", RUNTIME_CORE),
+    IndexSpec("integration_logs", (("event_id", 1),), "event_id_index", RUNTIME_CORE),
+    IndexSpec("integration_logs", (("timestamp", -1),), "timestamp_index", RUNTIME_CORE),
+    IndexSpec("integration_logs", (("tenant_id", 1),), "tenant_id_index", RUNTIME_CORE),
+    IndexSpec(RBAC_ROLES_COLLECTION, (("name", 1),), "name_unique", RUNTIME_CORE, unique=True),
+    # Prefix also serves user_id-only lookups
+    IndexSpec(RBAC_ASSIGNMENTS_COLLECTION, (("user_id", 1), ("role_name", 1), ("tenant_id", 1)),
+              "user_role_tenant_index", RUNTIME_CORE),
+    IndexSpec("tenant_permissions", (("tenant_id", 1), ("target_tenant_id", 1), ("permission", 1)),
+              "tenant_target_permission_index", RUNTIME_CORE),
+)
+
+
+def _normalize_keys(keys) -> Tuple[Tuple[str, Any], ...]:
+    """Key pattern as a comparable tuple (server may report 1.0 for 1)"""
+    items = keys.items() if isinstance(keys, dict) else keys
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction)
+                 for field, direction in items)
+
+
+def _existing_options(info: Dict[str, Any]) -> Dict[str, Any]:
+    expire = info.get("expireAfterSeconds")
+    return {
+        "unique": bool(info.get("unique", False)),
+        "sparse": bool(info.get("sparse", False)),
+        "expireAfterSeconds": int(expire) if expire is not None else None,
+        "partialFilterExpression": info.get("partialFilterExpression"),
+    }
+
+
+def plan_collection(specs: List[IndexSpec], existing: Dict[str, Dict[str, Any]]) -> Dict[str, list]:
+    """Diff one collection's declared indexes against index_information().
+
+    Returns:
+        Dict with "ok" [(spec, existing name)], "missing" [spec],
+        "conflicts" [(spec, existing name, {option: (declared, actual)})]
+        and "unmanaged" [existing name]
+    """
+    by_keys = {}
+    for name, info in existing.items():
+        if name == "_id_":
+            continue
+        by_keys[_normalize_keys(info["key"])] = (name, info)
+
+    plan: Dict[str, list] = {"ok": [], "missing": [], "conflicts": [], "unmanaged": []}
+    matched = set()
+    for spec in specs:
+        found = by_keys.get(_normalize_keys(spec.keys))
+        if found is None:
+            if spec.name in existing:
+                # Same name on different keys; creating it would fail
+                plan["conflicts"].append((spec, spec.name, {"key": (spec.keys, _normalize_keys(existing[spec.name]["key"]))}))
+                matched.add(spec.name)
+            else:
+                plan["missing"].append(spec)
+            continue
+        name, info = found
+        matched.add(name)
+        actual = _existing_options(info)
+        differences = {option: (declared, actual[option])
+                       for option, declared in spec.options().items() if declared != actual[option]}
+        if differences:
+            plan["conflicts"].append((spec, name, differences))
+        else:
+            plan["ok"].append((spec, name))
+
+    plan["unmanaged"] = sorted(name for name in existing if name != "_id_" and name not in matched)
+    return plan
+
+
+def specs_by_collection(services: Optional[List[str]] = None) -> Dict[str, List[IndexSpec]]:
+    """Manifest grouped by collection, optionally limited to some services"""
+    grouped: Dict[str, List[IndexSpec]] = {}
+    for spec in INDEXES:
+        if services and not set(spec.services) & set(services):
+            continue
+        grouped.setdefault(spec.collection, []).append(spec)
+    return grouped
+
+
+async def reconcile_indexes(db, services: Optional[List[str]] = None, apply: bool = True,
+                            replace_conflicts: bool = False, drop_unmanaged: bool = False) -> Dict[str, Any]:
+    """Bring a (motor) database in line with the manifest.
+
+    Idempotent: indexes that already match are left alone, so running this on
+    every deploy or startup costs one listIndexes per collection.
+
+    Args:
+        db: AsyncIOMotorDatabase
+        services: Only reconcile indexes owned by these services
+        apply: False to report the plan without changing anything
+        replace_conflicts: Drop and recreate indexes whose options differ
+        drop_unmanaged: Drop indexes that are not in the manifest
+
+    Returns:
+        Per-collection plan plus created/dropped/failed lists
+    """
+    report: Dict[str, Any] = {"collections": {}, "created": [], "dropped": [], "failed": []}
+    for collection, specs in specs_by_collection(services).items():
+        coll = db[collection]
+        try:
+            existing = await coll.index_information()
+        except Exception as e:
+            report["failed"].append((collection, None, str(e)))
+            continue
+        plan = plan_collection(specs, existing)
+        report["collections"][collection] = plan
+        if not apply:
+            continue
+
+        to_drop = []
+        to_create = list(plan["missing"])
+        if replace_conflicts:
+            for spec, name, _ in plan["conflicts"]:
+                to_drop.append(name)
+                to_create.append(spec)
+        if drop_unmanaged:
+            to_drop.extend(plan["unmanaged"])
+
+        for name in to_drop:
+            try:
+                await coll.drop_index(name)
+                report["dropped"].append(f"{collection}.{name}")
+            except Exception as e:
+                report["failed"].append((collection, name, str(e)))
+
+        # One createIndexes per index so a failing unique build does not hide the rest
+        for spec in to_create:
+            try:
+                await coll.create_indexes([spec.model()])
+                report["created"].append(f"{collection}.{spec.name}")
+            except Exception as e:
+                report["failed"].append((collection, spec.name, str(e)))
+    return report
+
+
+async def reconcile_on_startup(get_db) -> None:
+    """Create missing manifest indexes; never drops, never raises.
+
+    Args:
+        get_db: Coroutine function returning the motor database
+    """
+    try:
+        report = await reconcile_indexes(await get_db())
+        conflicts = [f"{c}.{name}" for c, plan in report["collections"].items() for _, name, _ in plan["conflicts"]]
+        if report["created"]:
+            logger.info(f"Created MongoDB indexes: {', '.join(report['created'])}")
+        if conflicts:
+            logger.warning(f"MongoDB indexes differ from the manifest (run create_mongodb_indexes.py): {', '.join(conflicts)}")
+        for collection, name, error in report["failed"]:
+            logger.warning(f"MongoDB index {collection}.{name} could not be reconciled: {error}")
+    except Exception as e:
+        logger.warning(f"MongoDB index reconciliation skipped: {e}")
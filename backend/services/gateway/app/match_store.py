@@ -0,0 +1,168 @@
+"""
+Persistent match-result store backed by the matching_cache collection
+
+One document per job holds the ranked matches together with the stamps that
+decide whether it is still valid: a hash of the job content, the candidate-pool
+version and the algorithm version. When the pool only grew by a few new
+candidates the stored ranking can be extended by scoring just those candidates.
+Documents expire through a TTL index on expires_at.
+"""
+import hashlib
+import logging
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MATCH_CACHE_TTL_HOURS = float(os.getenv("MATCH_CACHE_TTL_HOURS", "24"))
+# Up to this many newly added candidates are scored incrementally and merged
+MATCH_INCREMENTAL_MAX = int(os.getenv("MATCH_INCREMENTAL_MAX", "25"))
+# Optional pin: when set, stored results from any other algorithm are ignored
+MATCH_ALGORITHM_VERSION = os.getenv("MATCH_ALGORITHM_VERSION", "")
+
+# agent /match lowers each score tied with (or above) the one ranked before it by this much
+MATCH_SCORE_STEP = 0.8
+
+JOB_HASH_FIELDS = ("title", "description", "requirements", "location", "experience_level", "department")
+
+def job_content_hash(job_doc: Dict[str, Any]) -> str:
+    """Stable hash of the job fields that influence matching"""
+    digest = hashlib.sha256()
+    for field in JOB_HASH_FIELDS:
+        digest.update(str(job_doc.get(field) or "").encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()[:32]
+
+
+def _ts(value: Optional[datetime]) -> str:
+    return value.isoformat() if isinstance(value, datetime) else "-"
+
+
+async def candidate_pool_state(db) -> Dict[str, Any]:
+    """Describe the candidate pool so stored rankings can be validated.
+
+    Returns:
+        Dict with count, max_created_at, max_updated_at and a version string
+        that changes whenever candidates are added, removed or edited
+    """
+    count = await db.candidates.count_documents({})
+    newest = await db.candidates.find_one(
+        {"created_at": {"$exists": True}}, {"created_at": 1}, sort=[("created_at", -1)]
+    )
+    edited = await db.candidates.find_one(
+        {"updated_at": {"$exists": True}}, {"updated_at": 1}, sort=[("updated_at", -1)]
+    )
+    max_created_at = newest.get("created_at") if newest else None
+    max_updated_at = edited.get("updated_at") if edited else None
+    return {
+        "count": count,
+        "max_created_at": max_created_at,
+        "max_updated_at": max_updated_at,
+        "version": f"{count}:{_ts(max_created_at)}:{_ts(max_updated_at)}",
+    }
+
+
+async def load_match_result(db, job_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch the stored ranking for a job (None if absent or expired)"""
+    doc = await db.matching_cache.find_one({"job_id": job_id})
+    if not doc:
+        return None
+    expires_at = doc.get("expires_at")
+    if isinstance(expires_at, datetime):
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        # TTL monitor runs about once a minute; don't serve past expiry meanwhile
+        if expires_at <= datetime.now(timezone.utc):
+            return None
+    return doc
+
+
+def classify_stored_result(stored: Optional[Dict[str, Any]], job_hash: str, pool: Dict[str, Any]) -> str:
+    """Decide how a stored ranking can be used.
+
+    Returns:
+        "hit" when it can be served as is, "incremental" when only new
+        candidates were added since it was computed, otherwise "miss"
+    """
+    if not stored or stored.get("job_hash") != job_hash:
+        return "miss"
+    if MATCH_ALGORITHM_VERSION and stored.get("algorithm_version") != MATCH_ALGORITHM_VERSION:
+        return "miss"
+    if stored.get("pool_version") == pool["version"]:
+        return "hit"
+
+    # Edits to existing candidates (or deletions) can reorder anything
+    if _ts(stored.get("pool_max_updated_at")) != _ts(pool["max_updated_at"]):
+        return "miss"
+    added = pool["count"] - int(stored.get("pool_count") or 0)
+    if 0 < added <= MATCH_INCREMENTAL_MAX and stored.get("pool_max_created_at") is not None:
+        return "incremental"
+    return "miss"
+
+
+async def new_candidate_ids(db, stored: Dict[str, Any], expected: int) -> Optional[List[str]]:
+    """Ids of candidates created after the stored ranking was computed.
+
+    Returns None when the pool changed in a way incremental merge can't cover.
+    """
+    cursor = db.candidates.find(
+        {"created_at": {"$gt": stored["pool_max_created_at"]}}, {"_id": 1}
+    ).limit(expected + 1)
+    ids = [str(doc["_id"]) for doc in await cursor.to_list(length=expected + 1)]
+    return ids if len(ids) == expected else None
+
+
+def _raw_score(match: Dict[str, Any]) -> float:
+    # Rankings stored before raw_score existed carry the spaced score only
+    return match.get("raw_score", match.get("score")) or 0
+
+
+def merge_matches(existing: List[Dict[str, Any]], added: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Merge newly scored candidates into a stored ranking (best first).
+
+    Ordered on the agent's raw scores, then spaced the way agent /match spaces a
+    full ranking, so a merged ranking matches what a full recompute returns.
+    """
+    by_id = {m.get("candidate_id"): m for m in existing}
+    for match in added:
+        by_id[match.get("candidate_id")] = match
+    merged = sorted(by_id.values(), key=_raw_score, reverse=True)[:limit]
+    previous = None
+    for i, match in enumerate(merged):
+        score = _raw_score(match)
+        if previous is not None and score >= previous:
+            score = round(previous - MATCH_SCORE_STEP, 1)
+        merged[i] = {**match, "score": score}
+        previous = score
+    return merged
+
+
+async def save_match_result(
+    db,
+    job_id: str,
+    job_hash: str,
+    pool: Dict[str, Any],
+    result: Dict[str, Any],
+) -> None:
+    """Upsert the ranking for a job with its validity stamps"""
+    now = datetime.now(timezone.utc)
+    matches = result.get("matches", [])
+    await db.matching_cache.update_one(
+        {"job_id": job_id},
+        {"$set": {
+            "job_id": job_id,
+            "job_hash": job_hash,
+            "pool_version": pool["version"],
+            "pool_count": pool["count"],
+            "pool_max_created_at": pool["max_created_at"],
+            "pool_max_updated_at": pool["max_updated_at"],
+            "algorithm_version": result.get("algorithm_version"),
+            "candidate_ids": [m.get("candidate_id") for m in matches],
+            "matches": matches,
+            "total_candidates": result.get("total_candidates", 0),
+            "created_at": now,
+            "expires_at": now + timedelta(hours=MATCH_CACHE_TTL_HOURS),
+        }},
+        upsert=True
+    )
@@ -0,0 +1,251 @@
+"""
+Hot query catalogue and explain() plan checks
+
+Each entry mirrors a real query issued by one of the services (same
+collection, filter shape, sort and pipeline) so explain_hot_queries.py can ask
+the server how it would run it and flag collection scans and blocking
+in-memory sorts. Literal values are placeholders; only the shape matters to
+the planner.
+
+Keep entries in step with the code they cite; the index each one needs is
+declared in index_manifest.py.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app.db_helpers import lookup_by_id
+from app.index_manifest import WORKFLOW_COLLECTION, RBAC_ASSIGNMENTS_COLLECTION
+
+# Placeholder values
+_OID = "000000000000000000000000"
+_NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+_WEEK_AGO = _NOW - timedelta(days=7)
+
+# Candidate name / job title joins shared by the feedback, interview and offer lists
+_NAME_LOOKUPS = [
+    lookup_by_id("candidates", "candidate_id", "candidate", ["name"]),
+    lookup_by_id("jobs", "job_id", "job", ["title"]),
+]
+
+
+def _count(query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Pipeline count_documents() sends for a filter"""
+    return [{"$match": query}, {"$group": {"_id": 1, "n": {"$sum": 1}}}]
+
+
+class HotQuery(NamedTuple):
+    name: str
+    service: str
+    source: str
+    collection: str
+    filter: Optional[Dict[str, Any]] = None
+    sort: Optional[Dict[str, int]] = None
+    limit: Optional[int] = None
+    pipeline: Optional[List[Dict[str, Any]]] = None
+    # Whole-collection reads (unfiltered counts, global $group) scan by design
+    full_scan_expected: bool = False
+
+    def explain_command(self) -> Dict[str, Any]:
+        if self.pipeline is not None:
+            return {"aggregate": self.collection, "pipeline": self.pipeline, "cursor": {}}
+        command: Dict[str, Any] = {"find": self.collection, "filter": self.filter or {}}
+        if self.sort:
+            command["sort"] = self.sort
+        if self.limit:
+            command["limit"] = self.limit
+        return command
+
+
+HOT_QUERIES: Tuple[HotQuery, ...] = (
+    # ----- gateway (app/main.py, app/match_store.py) -----
+    HotQuery("jobs.list_active", "gateway", "main.list_jobs", "jobs", pipeline=[
+        {"$match": {"status": "active"}}, {"$sort": {"created_at": -1}}, {"$limit": 100}]),
+    HotQuery("jobs.count_active", "gateway", "main.get_candidate_stats", "jobs", pipeline=_count({"status": "active"})),
+    HotQuery("jobs.by_legacy_id", "gateway", "main.get_job_by_id", "jobs", filter={"id": "job-1"}),
+    HotQuery("candidates.list", "gateway", "main.get_all_candidates", "candidates", pipeline=[
+        {"$sort": {"created_at": -1}}, {"$skip": 0}, {"$limit": 50}]),
+    HotQuery("candidates.by_email", "gateway", "main.candidate_login", "candidates", filter={"email": "a@example.com"}),
+    HotQuery("candidates.by_legacy_id", "gateway", "main.get_candidate_by_id", "candidates", filter={"id": "cand-1"}),
+    HotQuery("candidates.skill_filter", "gateway", "main.search_candidates", "candidates",
+             filter={"skill_ids": {"$all": [1, 37]}}, limit=50),
+    HotQuery("candidates.new_this_week", "gateway", "main.get_candidate_stats", "candidates",
+             pipeline=_count({"created_at": {"$gte": _WEEK_AGO}})),
+    HotQuery("candidates.pool_newest", "gateway", "match_store.candidate_pool_state", "candidates",
+             filter={"created_at": {"$exists": True}}, sort={"created_at": -1}, limit=1),
+    HotQuery("candidates.pool_edited", "gateway", "match_store.candidate_pool_state", "candidates",
+             filter={"updated_at": {"$exists": True}}, sort={"updated_at": -1}, limit=1),
+    HotQuery("candidates.count_all", "gateway", "main.get_candidate_stats", "candidates", pipeline=_count({}),
+             full_scan_expected=True),
+    HotQuery("matching_cache.by_job", "gateway", "match_store.load_match_result", "matching_cache",
+             filter={"job_id": _OID}),
+    HotQuery("matching_cache.recent", "gateway", "main.get_candidate_stats", "matching_cache",
+             pipeline=_count({"created_at": {"$gte": _WEEK_AGO}})),
+    HotQuery("interviews.pending", "gateway", "main.get_candidate_stats", "interviews",
+             pipeline=_count({"status": {"$in": ["scheduled", "pending"]}, "interview_date": {"$gte": _NOW}})),
+    HotQuery("interviews.list", "gateway", "main.get_interviews", "interviews", pipeline=[
+        {"$match": {}}, {"$sort": {"interview_date": -1}}, *_NAME_LOOKUPS]),
+    HotQuery("interviews.for_candidate", "gateway", "main.get_interviews", "interviews", pipeline=[
+        {"$match": {"candidate_id": _OID}}, {"$sort": {"interview_date": -1}}, *_NAME_LOOKUPS]),
+    HotQuery("interviews.candidate_scheduled", "gateway", "main.get_candidate_stats", "interviews",
+             pipeline=_count({"candidate_id": _OID, "status": "scheduled"})),
+    HotQuery("offers.list", "gateway", "main.get_all_offers", "offers", pipeline=[
+        {"$match": {}}, {"$sort": {"created_at": -1}}, *_NAME_LOOKUPS]),
+    HotQuery("offers.for_candidate", "gateway", "main.get_all_offers", "offers", pipeline=[
+        {"$match": {"candidate_id": _OID}}, {"$sort": {"created_at": -1}}, *_NAME_LOOKUPS]),
+    HotQuery("offers.candidate_count", "gateway", "main.get_candidate_stats", "offers",
+             pipeline=_count({"candidate_id": _OID})),
+    HotQuery("feedback.list", "gateway", "main.get_all_feedback", "feedback", pipeline=[
+        {"$match": {}}, {"$sort": {"created_at": -1}}, *_NAME_LOOKUPS]),
+    HotQuery("feedback.for_candidate", "gateway", "main.get_all_feedback", "feedback", pipeline=[
+        {"$match": {"candidate_id": _OID}}, {"$sort": {"created_at": -1}}, *_NAME_LOOKUPS]),
+    HotQuery("clients.by_client_id", "gateway", "main.client_login", "clients", filter={"client_id": "TECH001"}),
+    HotQuery("clients.by_email", "gateway", "main.client_login", "clients", filter={"email": "a@example.com"}),
+    HotQuery("clients.by_code", "gateway", "main.client_register", "clients", filter={"client_code": "abc"}),
+    HotQuery("user_2fa.by_user", "gateway", "two_factor_store.get_state", "user_2fa", filter={"user_id": "user-1"}),
+    HotQuery("user_2fa.batch", "gateway", "two_factor_store.verify_batch", "user_2fa",
+             filter={"user_id": {"$in": ["user-1", "user-2"]}}),
+    HotQuery("job_applications.existing", "gateway", "main.apply_for_job", "job_applications",
+             filter={"candidate_id": _OID, "job_id": _OID}),
+    HotQuery("job_applications.for_candidate", "gateway", "main.get_candidate_applications", "job_applications",
+             pipeline=[{"$match": {"candidate_id": _OID}}, {"$sort": {"applied_date": -1}},
+                       lookup_by_id("jobs", "job_id", "job", ["title"])]),
+    HotQuery("job_applications.candidate_shortlisted", "gateway", "main.get_candidate_stats", "job_applications",
+             pipeline=_count({"candidate_id": _OID, "status": "shortlisted"})),
+    HotQuery("job_applications.shortlisted", "gateway", "main.get_recruiter_stats", "job_applications",
+             pipeline=_count({"status": "shortlisted"})),
+    HotQuery("schema_version.latest", "gateway", "main.get_database_schema", "schema_version",
+             filter={}, sort={"applied_at": -1}, limit=1),
+
+    # ----- agent (app.py, semantic_engine/phase3_engine.py) -----
+    HotQuery("candidates.pool_by_created", "agent", "app.batch_match_jobs", "candidates",
+             filter={}, sort={"created_at": -1}),
+    HotQuery("feedback.client_preferences", "agent", "phase3_engine._load_company_preferences", "feedback", pipeline=[
+        {"$lookup": {"from": "jobs", "localField": "job_id", "foreignField": "_id", "as": "job"}},
+        {"$unwind": "$job"},
+        {"$match": {"average_score": {"$gte": 4.0}}},
+        {"$group": {"_id": "$job.client_id", "avg_satisfaction": {"$avg": "$average_score"}}}],
+        full_scan_expected=True),
+
+    # ----- langgraph (mongodb_tracker.py, mongodb_checkpointer.py, rl_database.py) -----
+    HotQuery("workflows.by_id", "langgraph", "mongodb_tracker.get_workflow_status", "workflows",
+             filter={"workflow_id": "wf-1"}),
+    HotQuery("workflows.recent", "langgraph", "mongodb_tracker.list_workflows", "workflows",
+             filter={}, sort={"started_at": -1}, limit=50),
+    HotQuery("workflows.active", "langgraph", "mongodb_tracker.get_active_workflows", "workflows",
+             filter={"status": {"$in": ["running", "processing"]}}, sort={"started_at": -1}),
+    HotQuery("workflows.cleanup", "langgraph", "mongodb_tracker.cleanup_old_workflows", "workflows",
+             filter={"status": {"$in": ["completed", "failed", "cancelled"]}, "started_at": {"$lt": _WEEK_AGO}}),
+    HotQuery("langgraph_checkpoints.latest", "langgraph", "mongodb_checkpointer.get_tuple", "langgraph_checkpoints",
+             filter={"thread_id": "thread-1", "checkpoint_ns": ""}, sort={"thread_ts": -1}, limit=1),
+    HotQuery("langgraph_checkpoints.created_since", "langgraph", "checkpoint_retention._scan",
+             "langgraph_checkpoints", filter={"created_at": {"$gte": _WEEK_AGO, "$lt": _NOW}},
+             sort={"created_at": 1}, limit=500),
+    HotQuery("workflows.completed_since", "langgraph", "checkpoint_retention._scan", "workflows",
+             filter={"completed_at": {"$gte": _WEEK_AGO, "$lt": _NOW}}, sort={"completed_at": 1}, limit=500),
+    HotQuery("langgraph_checkpoint_writes.pending", "langgraph", "mongodb_checkpointer.get_tuple",
+             "langgraph_checkpoint_writes",
+             filter={"thread_id": "thread-1", "checkpoint_ns": "", "thread_ts": "1ef-checkpoint"},
+             sort={"task_id": 1, "idx": 1}),
+    HotQuery("langgraph_checkpoint_blobs.channels", "langgraph", "mongodb_checkpointer.get_tuple",
+             "langgraph_checkpoint_blobs",
+             filter={"thread_id": "thread-1", "checkpoint_ns": "",
+                     "$or": [{"channel": "messages", "version": 3}, {"channel": "application_status", "version": 2}]}),
+    HotQuery("rl_feedback.history", "langgraph", "rl_database.get_feedback_history", "rl_feedback", pipeline=[
+        {"$match": {}}, {"$sort": {"created_at": -1}}, {"$limit": 100},
+        {"$lookup": {"from": "rl_predictions", "localField": "prediction_id", "foreignField": "_id", "as": "prediction"}},
+        {"$unwind": {"path": "$prediction", "preserveNullAndEmptyArrays": True}}]),
+    HotQuery("rl_feedback.candidate_history", "langgraph", "rl_database.get_feedback_history", "rl_feedback",
+             pipeline=[
+                 {"$match": {"candidate_id": 1}}, {"$sort": {"created_at": -1}}, {"$limit": 50},
+                 {"$lookup": {"from": "rl_predictions", "localField": "prediction_id", "foreignField": "_id",
+                              "as": "prediction"}},
+                 {"$unwind": {"path": "$prediction", "preserveNullAndEmptyArrays": True}}]),
+    HotQuery("rl_predictions.candidate_history", "langgraph", "rl_database.get_candidate_rl_history", "rl_predictions",
+             pipeline=[
+                 {"$match": {"candidate_id": 1}},
+                 {"$sort": {"created_at": -1}},
+                 {"$lookup": {"from": "rl_feedback", "localField": "_id", "foreignField": "prediction_id", "as": "feedback"}},
+                 {"$unwind": {"path": "$feedback", "preserveNullAndEmptyArrays": True}}]),
+    HotQuery("rl_model_performance.latest", "langgraph", "rl_database.get_rl_analytics", "rl_model_performance",
+             filter={}, sort={"evaluation_date": -1}, limit=1),
+    HotQuery("rl_model_snapshots.active", "langgraph", "rl_training.load_active_snapshot", "rl_model_snapshots",
+             filter={"active": True}),
+    HotQuery("rl_model_snapshots.recent", "langgraph", "rl_training.list_snapshots", "rl_model_snapshots",
+             filter={}, sort={"created_at": -1}, limit=20),
+    HotQuery("notification_deliveries.by_sid", "langgraph", "whatsapp_delivery.get", "notification_deliveries",
+             filter={"message_sid": "SM0123456789"}),
+
+    # ----- runtime-core -----
+    HotQuery("workflows.by_instance", "runtime-core", "workflow_service.get_workflow_instance", WORKFLOW_COLLECTION,
+             filter={"instance_id": "inst-1"}),
+    HotQuery("workflows.for_tenant", "runtime-core", "workflow_service.list_workflow_instances", WORKFLOW_COLLECTION,
+             filter={"tenant_id": "tenant-1", "status": "running"}, limit=100),
+    HotQuery("audit_logs.for_tenant", "runtime-core", "audit_service.get_events", "audit_logs",
+             filter={"tenant_id": "tenant-1"}, sort={"timestamp": -1}, limit=100),
+    HotQuery("audit_logs.by_event_id", "runtime-core", "audit_service.get_event_by_id", "audit_logs",
+             filter={"event_id": "evt-1"}),
+    HotQuery("role_assignments.for_user", "runtime-core", "rbac_service.get_user_roles", RBAC_ASSIGNMENTS_COLLECTION,
+             filter={"user_id": "user-1", "$or": [{"tenant_id": "tenant-1"}, {"tenant_id": None}]}),
+    HotQuery("users.by_user_id", "runtime-core", "tenant_service.get_tenant_from_jwt", "users",
+             filter={"user_id": "user-1"}),
+    HotQuery("tenant_permissions.cross_tenant", "runtime-core", "tenant_service.validate_tenant_access",
+             "tenant_permissions",
+             filter={"tenant_id": "tenant-1", "target_tenant_id": "tenant-2", "permission": "read"}),
+)
+
+
+def _walk_plan(node: Any, findings: List[str], path: str) -> None:
+    if isinstance(node, dict):
+        stage = node.get("stage")
+        if stage == "COLLSCAN":
+            findings.append(f"COLLSCAN at {path}")
+        elif stage == "SORT":
+            findings.append(f"in-memory SORT at {path}")
+        for key, value in node.items():
+            # Only the plan the server would actually run matters
+            if key in ("rejectedPlans", "slotBasedPlan"):
+                continue
+            _walk_plan(value, findings, f"{path}.{key}")
+    elif isinstance(node, list):
+        for i, item in enumerate(node):
+            _walk_plan(item, findings, f"{path}[{i}]")
+
+
+def _pipeline_findings(stages: List[Dict[str, Any]], path: str) -> List[str]:
+    findings = []
+    for i, stage in enumerate(stages):
+        if "$sort" in stage:
+            findings.append(f"in-memory SORT at {path}.stages[{i}] ($sort not pushed down to an index)")
+        lookup = stage.get("$lookup")
+        if isinstance(lookup, dict) and stage.get("collectionScans"):
+            findings.append(f"COLLSCAN of '{lookup.get('from')}' in $lookup at {path}.stages[{i}]")
+    return findings
+
+
+def plan_findings(explain: Dict[str, Any]) -> List[str]:
+    """COLLSCAN / in-memory SORT problems in an explain() result.
+
+    Handles find and aggregate output (pushed-down pipelines, $cursor stages
+    and sharded "shards"). A $sort stage left in the aggregation pipeline
+    means the sort was not satisfied by an index and runs in memory; with
+    executionStats verbosity, $lookup stages that scanned the foreign
+    collection are reported too.
+    """
+    findings: List[str] = []
+    _walk_plan(explain, findings, "explain")
+
+    findings.extend(_pipeline_findings(explain.get("stages") or [], "explain"))
+    for shard_name, shard in (explain.get("shards") or {}).items():
+        if isinstance(shard, dict):
+            findings.extend(_pipeline_findings(shard.get("stages") or [], f"explain.shards.{shard_name}"))
+    # Nested walk and the stage loop can both see the same node
+    return list(dict.fromkeys(findings))
+
+
+async def explain_query(db, query: HotQuery, verbosity: str = "queryPlanner") -> Dict[str, Any]:
+    """Run explain for one catalogue entry on a (motor) database"""
+    return await db.command({"explain": query.explain_command(), "verbosity": verbosity})
+
+
+def hot_queries(services: Optional[List[str]] = None) -> List[HotQuery]:
+    return [q for q in HOT_QUERIES if not services or q.service in services]
@@ -0,0 +1,315 @@
+"""
+In-process lexical ranking index for degraded-mode matching
+
+Keeps a compact BM25 index over canonical candidate skills (see app.skills)
+plus experience and location fields so the gateway can return a ranked top-k when the Agent
+Service is unavailable. The index is built lazily from MongoDB on first use
+and then kept current incrementally on candidate writes, with a periodic
+delta sync to pick up writes made by other processes.
+"""
+import asyncio
+import logging
+import math
+import os
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.skills import SKILL_NAMES, normalize_skills, parse_skills
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters (standard Okapi defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Field weights: skills dominate, seniority/education contribute a little
+FIELD_WEIGHTS = {
+    "skills": 3.0,
+    "seniority": 1.0,
+    "education": 0.5,
+}
+
+# Seconds between delta syncs against MongoDB
+RANKING_INDEX_REFRESH_SECONDS = float(os.getenv("RANKING_INDEX_REFRESH_SECONDS", "300"))
+
+# Only the fields the index needs are ever read from MongoDB
+CANDIDATE_PROJECTION = {
+    "name": 1,
+    "email": 1,
+    "location": 1,
+    "experience_years": 1,
+    "technical_skills": 1,
+    "seniority_level": 1,
+    "education_level": 1,
+    "role": 1,
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+# Experience expectations by job experience_level (min, max years)
+EXPERIENCE_LEVEL_YEARS = {
+    "entry": (0, 2),
+    "junior": (0, 2),
+    "mid": (2, 5),
+    "senior": (5, 10),
+    "lead": (8, 40),
+}
+
+
+def tokenize(text: Any) -> List[str]:
+    """Normalize free text or a skill list into lowercase terms.
+
+    Args:
+        text: String (comma/space separated) or list of strings
+
+    Returns:
+        List of normalized terms (duplicates preserved for term frequency)
+    """
+    if not text:
+        return []
+    if isinstance(text, (list, tuple, set)):
+        text = " ".join(str(t) for t in text if t)
+    tokens = []
+    for token in _TOKEN_RE.findall(str(text).lower()):
+        token = token.rstrip(".")
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def experience_fit(experience_years: Any, experience_level: Optional[str]) -> float:
+    """Score how well candidate experience fits the job level (0.0 - 1.0)."""
+    try:
+        years = float(experience_years or 0)
+    except (TypeError, ValueError):
+        years = 0.0
+    bounds = EXPERIENCE_LEVEL_YEARS.get((experience_level or "").strip().lower())
+    if not bounds:
+        return 0.5
+    low, high = bounds
+    if low <= years <= high:
+        return 1.0
+    gap = low - years if years < low else years - high
+    return max(0.0, 1.0 - gap / 5.0)
+
+
+class CandidateRankingIndex:
+    """BM25 index over candidate profiles with incremental updates"""
+
+    def __init__(self):
+        # Terms are canonical skill ids (int) or raw lowercase tokens (str)
+        self._postings: Dict[Union[int, str], Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Dict[Union[int, str], float]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._total_len = 0.0
+        self._version = 0
+        self._loaded = False
+        self._last_sync: Optional[datetime] = None
+        self._last_sync_monotonic = 0.0
+        self._load_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def size(self) -> int:
+        return len(self._docs)
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter bumped on every change to the indexed pool"""
+        return self._version
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _weighted_terms(self, doc: Dict[str, Any]) -> Dict[Union[int, str], float]:
+        terms: Dict[Union[int, str], float] = defaultdict(float)
+        # Known skills index under their canonical id, anything else as raw tokens
+        skill_ids, unknown = parse_skills(doc.get("technical_skills"))
+        for skill in skill_ids:
+            terms[skill] += FIELD_WEIGHTS["skills"]
+        for token in tokenize(unknown):
+            terms[token] += FIELD_WEIGHTS["skills"]
+        for token in tokenize(doc.get("seniority_level")):
+            terms[token] += FIELD_WEIGHTS["seniority"]
+        for token in tokenize(doc.get("education_level")):
+            terms[token] += FIELD_WEIGHTS["education"]
+        return dict(terms)
+
+    def _remove_postings(self, candidate_id: str) -> None:
+        old_terms = self._doc_terms.pop(candidate_id, None)
+        if old_terms is None:
+            return
+        for term in old_terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(candidate_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(candidate_id, 0.0)
+
+    def upsert(self, candidate_id: str, doc: Dict[str, Any]) -> None:
+        """Add or replace a candidate in the index.
+
+        Args:
+            candidate_id: Candidate id as string
+            doc: Candidate document (only projected fields are kept)
+        """
+        candidate_id = str(candidate_id)
+        if doc.get("role") == "recruiter":
+            # Recruiters share the candidates collection but are never matched
+            self.remove(candidate_id)
+            return
+        self._remove_postings(candidate_id)
+
+        stored = {field: doc.get(field) for field in CANDIDATE_PROJECTION}
+        terms = self._weighted_terms(stored)
+        for term, tf in terms.items():
+            self._postings[term][candidate_id] = tf
+        length = sum(terms.values())
+
+        self._doc_terms[candidate_id] = terms
+        self._doc_len[candidate_id] = length
+        self._total_len += length
+        self._docs[candidate_id] = stored
+        self._version += 1
+
+    def update_fields(self, candidate_id: str, fields: Dict[str, Any]) -> None:
+        """Apply a partial update ($set fields) to an indexed candidate.
+
+        Unknown candidates are ignored; the next delta sync will pick them up.
+        """
+        candidate_id = str(candidate_id)
+        current = self._docs.get(candidate_id)
+        if current is None:
+            return
+        merged = dict(current)
+        merged.update({k: v for k, v in fields.items() if k in CANDIDATE_PROJECTION})
+        self.upsert(candidate_id, merged)
+
+    def remove(self, candidate_id: str) -> None:
+        """Drop a candidate from the index"""
+        candidate_id = str(candidate_id)
+        if candidate_id in self._docs:
+            self._remove_postings(candidate_id)
+            del self._docs[candidate_id]
+            self._version += 1
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def _idf(self, term: Union[int, str]) -> float:
+        df = len(self._postings.get(term, ()))
+        n = len(self._docs)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(
+        self,
+        requirements: Any,
+        location: Optional[str] = None,
+        experience_level: Optional[str] = None,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """Rank indexed candidates against job requirements.
+
+        Args:
+            requirements: Job requirements text or list
+            location: Job location (substring match boosts)
+            experience_level: Job experience level ("entry", "mid", "senior", "lead")
+            limit: Number of results to return
+
+        Returns:
+            List of dicts with candidate_id, candidate, score (0-1),
+            bm25, matched_skills, location_match and experience_fit,
+            sorted best first
+        """
+        if not self._docs or limit <= 0:
+            return []
+
+        # Only recognised skills are query terms: prose words ("strong", "team") that no
+        # candidate lists would take the top idf and shrink every lexical score
+        query_terms: List[int] = normalize_skills(requirements)
+        avg_len = (self._total_len / len(self._docs)) or 1.0
+
+        bm25: Dict[str, float] = defaultdict(float)
+        matched: Dict[str, List[str]] = defaultdict(list)
+        max_possible = 0.0
+        # What a candidate listing the skill once, at average profile length, scores for it
+        skill_tf = FIELD_WEIGHTS["skills"]
+        term_ceiling = skill_tf * (BM25_K1 + 1) / (skill_tf + BM25_K1)
+        for term in query_terms:
+            posting = self._postings.get(term)
+            idf = self._idf(term)
+            max_possible += idf * term_ceiling
+            if not posting:
+                continue
+            for candidate_id, tf in posting.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[candidate_id] / avg_len)
+                bm25[candidate_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                matched[candidate_id].append(SKILL_NAMES.get(term, term))
+
+        job_location = (location or "").strip().lower()
+        # Candidates without any lexical overlap still compete on location/experience
+        pool = bm25.keys() if bm25 else self._docs.keys()
+
+        scored: List[Tuple[float, str, Dict[str, Any]]] = []
+        for candidate_id in pool:
+            doc = self._docs[candidate_id]
+            lexical = min(1.0, bm25.get(candidate_id, 0.0) / max_possible) if max_possible else 0.0
+            candidate_location = (doc.get("location") or "").lower()
+            location_match = bool(job_location and candidate_location and (
+                job_location in candidate_location or candidate_location in job_location
+            ))
+            fit = experience_fit(doc.get("experience_years"), experience_level)
+            score = 0.75 * lexical + 0.15 * (1.0 if location_match else 0.0) + 0.10 * fit
+            scored.append((score, candidate_id, {
+                "candidate_id": candidate_id,
+                "candidate": doc,
+                "score": score,
+                "bm25": bm25.get(candidate_id, 0.0),
+                "matched_skills": matched.get(candidate_id, []),
+                "location_match": location_match,
+                "experience_fit": fit,
+            }))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [entry for _, _, entry in scored[:limit]]
+
+    async def ensure_loaded(self, db) -> None:
+        """Build the index on first use and delta-sync periodically.
+
+        Args:
+            db: Motor database instance
+        """
+        if self._loaded and time.monotonic() - self._last_sync_monotonic < RANKING_INDEX_REFRESH_SECONDS:
+            return
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self._loaded and time.monotonic() - self._last_sync_monotonic < RANKING_INDEX_REFRESH_SECONDS:
+                return
+            sync_started = datetime.now(timezone.utc)
+            query: Dict[str, Any] = {}
+            if self._loaded and self._last_sync is not None:
+                query = {"$or": [
+                    {"created_at": {"$gte": self._last_sync}},
+                    {"updated_at": {"$gte": self._last_sync}},
+                ]}
+            count = 0
+            async for doc in db.candidates.find(query, CANDIDATE_PROJECTION):
+                self.upsert(str(doc["_id"]), doc)
+                count += 1
+            if not self._loaded:
+                logger.info(f"Candidate ranking index built: {count} candidates")
+            elif count:
+                logger.info(f"Candidate ranking index delta sync: {count} candidates")
+            self._loaded = True
+            self._last_sync = sync_started
+            self._last_sync_monotonic = time.monotonic()
+
+
+# Global instance shared by the gateway
+candidate_index = CandidateRankingIndex()
@@ -0,0 +1,51 @@
+"""
+Fast JSON responses for the gateway
+
+FastJSONResponse serializes with orjson when it is installed, handling
+datetimes natively and ObjectId/Decimal128 through a default hook. Endpoints
+that return it directly skip FastAPI's jsonable_encoder pass, which dominates
+response time for large lists of Mongo documents.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from bson import ObjectId, Decimal128
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _default(value: Any) -> Any:
+    """Serialize types orjson/json don't know about"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes using the fastest available encoder"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, aware of datetime and ObjectId"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
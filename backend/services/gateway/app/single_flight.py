@@ -0,0 +1,95 @@
+"""
+Single-flight request coalescing
+
+Concurrent callers asking for the same key share one in-flight computation,
+and the completed result is served from memory for a short TTL. The shared
+computation runs as its own task so a disconnecting caller cannot cancel it
+for everybody else.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce identical concurrent async calls and cache results briefly"""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0, "cache_hits": 0}
+
+    def _get_cached(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._results.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._results[key]
+            return False, None
+        return True, value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        if len(self._results) >= self.max_entries:
+            now = time.monotonic()
+            for stale in [k for k, (exp, _) in self._results.items() if exp <= now]:
+                del self._results[stale]
+            while len(self._results) >= self.max_entries:
+                del self._results[next(iter(self._results))]
+        self._results[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Run fn once per key across concurrent callers.
+
+        Args:
+            key: Coalescing key (must include any version that invalidates results)
+            fn: Zero-argument coroutine factory producing the result
+            cacheable: Optional predicate; results failing it are shared with
+                current waiters but not kept for the TTL
+
+        Returns:
+            The shared result (callers must not mutate it)
+        """
+        self.stats["calls"] += 1
+        hit, value = self._get_cached(key)
+        if hit:
+            self.stats["cache_hits"] += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["executions"] += 1
+            task = asyncio.ensure_future(self._run(key, fn, cacheable))
+            self._inflight[key] = task
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key, fn, cacheable) -> Any:
+        try:
+            value = await fn()
+            if cacheable is None or cacheable(value):
+                self._store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Drop cached results (all, or those whose key matches predicate)"""
+        if predicate is None:
+            self._results.clear()
+        else:
+            for key in [k for k in self._results if predicate(k)]:
+                del self._results[key]
@@ -0,0 +1,230 @@
+"""
+Canonical skill dictionary and normalization
+
+Raw skill strings ("js", "Node", "ReactJS", "Postgres") are mapped to stable
+integer skill ids at write time so candidates carry an indexed `skill_ids`
+array. Filters become `$in`/`$all` queries and overlaps become integer set
+operations instead of substring scans over `technical_skills`.
+
+Ids are permanent: never renumber or reuse one. Add aliases freely, and bump
+SKILL_DICTIONARY_VERSION whenever an existing alias changes meaning so the
+backfill migration re-normalizes stored documents.
+
+NOTE: copies of this module live in the agent and langgraph services (each
+service is its own build context); keep them in sync.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+SKILL_DICTIONARY_VERSION = 1
+
+# (id, canonical name, category, aliases) - aliases are lowercase
+SKILLS: Tuple[Tuple[int, str, str, Tuple[str, ...]], ...] = (
+    # Programming
+    (1, "Python", "Programming", ("python", "python3", "py")),
+    (2, "Java", "Programming", ("java", "core java", "java8", "java 8")),
+    (3, "JavaScript", "Programming", ("javascript", "js", "ecmascript", "es6", "vanilla js")),
+    (4, "TypeScript", "Programming", ("typescript", "ts")),
+    (5, "C++", "Programming", ("c++", "cpp")),
+    (6, "C#", "Programming", ("c#", "csharp", "c sharp")),
+    (7, "Go", "Programming", ("go", "golang")),
+    (8, "Rust", "Programming", ("rust",)),
+    (9, "Kotlin", "Programming", ("kotlin",)),
+    (10, "Swift", "Programming", ("swift",)),
+    (11, "PHP", "Programming", ("php",)),
+    (12, "Ruby", "Programming", ("ruby",)),
+    (13, "C", "Programming", ("c",)),
+    (14, "R", "Programming", ("r",)),
+    (15, "Scala", "Programming", ("scala",)),
+    # Web Development
+    (30, "React", "Web Development", ("react", "reactjs", "react.js", "react js")),
+    (31, "Node.js", "Web Development", ("node.js", "node", "nodejs", "node js")),
+    (32, "Angular", "Web Development", ("angular", "angularjs", "angular.js")),
+    (33, "Vue.js", "Web Development", ("vue", "vue.js", "vuejs")),
+    (34, "Next.js", "Web Development", ("next.js", "nextjs")),
+    (35, "Django", "Web Development", ("django",)),
+    (36, "Flask", "Web Development", ("flask",)),
+    (37, "FastAPI", "Web Development", ("fastapi", "fast api")),
+    (38, "Spring Boot", "Web Development", ("spring boot", "springboot", "spring")),
+    (39, "Express.js", "Web Development", ("express", "express.js", "expressjs")),
+    (40, "HTML", "Web Development", ("html", "html5")),
+    (41, "CSS", "Web Development", ("css", "css3")),
+    (42, "Tailwind CSS", "Web Development", ("tailwind", "tailwindcss", "tailwind css")),
+    (43, "REST APIs", "Web Development", ("rest", "rest api", "rest apis", "restful", "restful apis")),
+    (44, "GraphQL", "Web Development", ("graphql",)),
+    (45, ".NET", "Web Development", (".net", "dotnet", "asp.net")),
+    # Data Science
+    (60, "Machine Learning", "Data Science", ("machine learning", "ml")),
+    (61, "Deep Learning", "Data Science", ("deep learning", "dl")),
+    (62, "Artificial Intelligence", "Data Science", ("artificial intelligence", "ai")),
+    (63, "NLP", "Data Science", ("nlp", "natural language processing")),
+    (64, "Pandas", "Data Science", ("pandas",)),
+    (65, "NumPy", "Data Science", ("numpy",)),
+    (66, "TensorFlow", "Data Science", ("tensorflow", "tf")),
+    (67, "PyTorch", "Data Science", ("pytorch", "torch")),
+    (68, "scikit-learn", "Data Science", ("scikit-learn", "sklearn", "scikit learn")),
+    (69, "Data Analysis", "Data Science", ("data analysis", "data analytics")),
+    (70, "Power BI", "Data Science", ("power bi", "powerbi")),
+    (71, "Tableau", "Data Science", ("tableau",)),
+    # Cloud / DevOps
+    (90, "AWS", "Cloud", ("aws", "amazon web services")),
+    (91, "Azure", "Cloud", ("azure", "microsoft azure")),
+    (92, "GCP", "Cloud", ("gcp", "google cloud", "google cloud platform")),
+    (93, "Docker", "Cloud", ("docker",)),
+    (94, "Kubernetes", "Cloud", ("kubernetes", "k8s")),
+    (95, "Terraform", "Cloud", ("terraform",)),
+    (96, "CI/CD", "Cloud", ("ci/cd", "cicd", "ci cd")),
+    (97, "Jenkins", "Cloud", ("jenkins",)),
+    (98, "Linux", "Cloud", ("linux", "unix")),
+    (99, "Git", "Cloud", ("git", "github", "gitlab")),
+    # Database
+    (120, "SQL", "Database", ("sql",)),
+    (121, "MySQL", "Database", ("mysql",)),
+    (122, "PostgreSQL", "Database", ("postgresql", "postgres", "psql")),
+    (123, "MongoDB", "Database", ("mongodb", "mongo")),
+    (124, "Redis", "Database", ("redis",)),
+    (125, "Oracle", "Database", ("oracle", "oracle db")),
+    (126, "SQLite", "Database", ("sqlite",)),
+    (127, "Elasticsearch", "Database", ("elasticsearch", "elastic search")),
+    (128, "Kafka", "Database", ("kafka", "apache kafka")),
+    # Tools / practices
+    (150, "Excel", "Tools", ("excel", "ms excel", "microsoft excel")),
+    (151, "Figma", "Tools", ("figma",)),
+    (152, "Agile", "Tools", ("agile", "scrum")),
+    (153, "Jira", "Tools", ("jira",)),
+)
+
+# Aliases that are ordinary words (or single letters) in prose; they only count
+# when they make up a whole item of a skill list, never inside free text
+LIST_ONLY_ALIASES = frozenset({"go", "c", "r", "ts", "tf", "dl", "rest", "spring", "express", "torch", "py"})
+
+SKILL_NAMES: Dict[int, str] = {skill_id: name for skill_id, name, _, _ in SKILLS}
+SKILL_CATEGORIES: Dict[int, str] = {skill_id: category for skill_id, _, category, _ in SKILLS}
+ALIASES: Dict[str, int] = {}
+for _skill_id, _name, _category, _aliases in SKILLS:
+    for _alias in (_name.lower(),) + _aliases:
+        ALIASES[_alias] = _skill_id
+del _skill_id, _name, _category, _aliases, _alias
+
+# Longest alias measured in tokens, bounds the n-gram scan
+_MAX_ALIAS_TOKENS = max(len(alias.split()) for alias in ALIASES)
+
+_ITEM_SPLIT_RE = re.compile(r"[,;|\n]+|\s+/\s+")
+_TOKEN_RE = re.compile(r"\.?[a-z0-9][a-z0-9.+#-]*")
+
+
+def _clean(term: str) -> str:
+    return " ".join(term.lower().split()).rstrip(".")
+
+
+def skill_id(term: Any) -> Optional[int]:
+    """Canonical id for a single skill term, or None if unknown"""
+    if not term:
+        return None
+    return ALIASES.get(_clean(str(term)))
+
+
+def extract_skills(text: Any) -> List[int]:
+    """Find known skills mentioned anywhere in free text.
+
+    Scans longest aliases first so "machine learning" wins over "learning".
+    Ambiguous short aliases (LIST_ONLY_ALIASES) are ignored here.
+
+    Returns:
+        Skill ids in order of first mention
+    """
+    if not text:
+        return []
+    tokens = [t.rstrip(".-") for t in _TOKEN_RE.findall(str(text).lower())]
+    found: Dict[int, None] = {}
+    i = 0
+    while i < len(tokens):
+        for width in range(min(_MAX_ALIAS_TOKENS, len(tokens) - i), 0, -1):
+            phrase = " ".join(tokens[i:i + width])
+            matched = ALIASES.get(phrase)
+            if matched is not None and phrase not in LIST_ONLY_ALIASES:
+                found[matched] = None
+                i += width
+                break
+        else:
+            i += 1
+    return list(found)
+
+
+def parse_skills(raw: Union[str, Iterable[Any], None]) -> Tuple[List[int], List[str]]:
+    """Split a skill list into canonical ids and unrecognized items.
+
+    Args:
+        raw: Comma/semicolon separated string, or a list of strings (or
+            dicts with a "name" key)
+
+    Returns:
+        (skill ids in input order without duplicates, lowercase unknown items)
+    """
+    if not raw:
+        return [], []
+    if isinstance(raw, str):
+        items = _ITEM_SPLIT_RE.split(raw)
+    else:
+        items = [item.get("name", "") if isinstance(item, dict) else str(item) for item in raw if item]
+
+    ids: Dict[int, None] = {}
+    unknown: Dict[str, None] = {}
+    for item in items:
+        cleaned = _clean(item)
+        if not cleaned:
+            continue
+        exact = ALIASES.get(cleaned)
+        if exact is not None:
+            ids[exact] = None
+            continue
+        # "Python 3 (Django, Flask)" or "AWS & Docker" - pick known skills out of the item
+        mentioned = extract_skills(cleaned)
+        if mentioned:
+            ids.update(dict.fromkeys(mentioned))
+        else:
+            unknown[cleaned] = None
+    return list(ids), list(unknown)
+
+
+def normalize_skills(raw: Union[str, Iterable[Any], None]) -> List[int]:
+    """Canonical skill ids for a raw skill list (unknown items dropped)"""
+    return parse_skills(raw)[0]
+
+
+def skill_names(ids: Iterable[int]) -> List[str]:
+    """Canonical display names for skill ids (unknown ids skipped)"""
+    return [SKILL_NAMES[i] for i in ids if i in SKILL_NAMES]
+
+
+def skill_set(raw: Union[str, Iterable[Any], None]) -> Set[Union[int, str]]:
+    """Comparable set of skills: canonical ids plus unknown items verbatim.
+
+    Lets overlap checks use integer set operations for known skills while
+    still matching skills that are not in the dictionary yet.
+    """
+    ids, unknown = parse_skills(raw)
+    return set(ids) | set(unknown)
+
+
+def categorize_skills(ids: Iterable[int]) -> Dict[str, List[str]]:
+    """Group skill ids by category, using canonical names"""
+    grouped: Dict[str, List[str]] = {}
+    for i in ids:
+        if i in SKILL_NAMES:
+            grouped.setdefault(SKILL_CATEGORIES[i], []).append(SKILL_NAMES[i])
+    return grouped
+
+
+def skill_fields(technical_skills: Union[str, Iterable[Any], None]) -> Dict[str, Any]:
+    """Normalized fields to $set alongside technical_skills on every write.
+
+    Canonical names go to `skill_names`; the raw `skills` list is left alone
+    because skills not in the dictionary yet would be dropped from it.
+    """
+    ids = normalize_skills(technical_skills)
+    return {
+        "skill_ids": ids,
+        "skill_names": skill_names(ids),
+        "skills_version": SKILL_DICTIONARY_VERSION,
+    }
@@ -0,0 +1,281 @@
+"""
+Per-user two-factor state backed by the user_2fa collection
+
+One document per user holds the TOTP secret (Fernet-encrypted at rest), the
+enrollment status, hashed backup codes and the last accepted TOTP time step.
+A code is only accepted for a step later than the last one used, and that
+check-and-set is a single conditional update, so a code cannot be replayed
+within its validity window even across gateway replicas.
+
+Environment:
+    TWO_FACTOR_ENCRYPTION_KEYS   comma-separated Fernet keys; the first encrypts,
+                                 all decrypt (rotation). Derived from
+                                 JWT_SECRET_KEY when unset.
+    TWO_FACTOR_VALID_WINDOW      accepted clock drift in 30s steps (default 1)
+    TWO_FACTOR_BATCH_MAX         max codes per batch verification (default 500)
+    TWO_FACTOR_QR_CACHE_SECONDS  how long rendered QR codes are kept (default 3600)
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import io
+import logging
+import os
+import secrets
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyotp
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from pymongo import UpdateOne
+
+from app.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "user_2fa"
+ISSUER_NAME = "BHIV HR Platform"
+
+TWO_FACTOR_VALID_WINDOW = int(os.getenv("TWO_FACTOR_VALID_WINDOW", "1"))
+TWO_FACTOR_BATCH_MAX = int(os.getenv("TWO_FACTOR_BATCH_MAX", "500"))
+TWO_FACTOR_QR_CACHE_SECONDS = float(os.getenv("TWO_FACTOR_QR_CACHE_SECONDS", "3600"))
+
+# Verification outcomes
+OK = "ok"
+NOT_ENROLLED = "not_enrolled"
+INVALID_CODE = "invalid_code"
+REPLAYED = "replayed"
+
+_fernet: Optional[MultiFernet] = None
+_qr_cache = SingleFlight(ttl_seconds=TWO_FACTOR_QR_CACHE_SECONDS, max_entries=256)
+
+
+def _cipher() -> MultiFernet:
+    global _fernet
+    if _fernet is None:
+        keys = [k.strip() for k in os.getenv("TWO_FACTOR_ENCRYPTION_KEYS", "").split(",") if k.strip()]
+        if not keys:
+            fallback = os.getenv("JWT_SECRET_KEY")
+            if not fallback:
+                raise RuntimeError("TWO_FACTOR_ENCRYPTION_KEYS or JWT_SECRET_KEY must be set for 2FA")
+            logger.warning("TWO_FACTOR_ENCRYPTION_KEYS not set, deriving the 2FA key from JWT_SECRET_KEY")
+            keys = [base64.urlsafe_b64encode(hashlib.sha256(b"bhiv-2fa:" + fallback.encode()).digest()).decode()]
+        _fernet = MultiFernet([Fernet(key) for key in keys])
+    return _fernet
+
+
+def encrypt_secret(secret: str) -> str:
+    return _cipher().encrypt(secret.encode()).decode()
+
+
+def decrypt_secret(token: str) -> str:
+    return _cipher().decrypt(token.encode()).decode()
+
+
+def hash_backup_code(code: str) -> str:
+    return hashlib.sha256(code.strip().upper().encode()).hexdigest()
+
+
+def provisioning_uri(secret: str, user_id: str) -> str:
+    return pyotp.TOTP(secret).provisioning_uri(name=user_id, issuer_name=ISSUER_NAME)
+
+
+def matched_step(secret: str, code: str, for_time: Optional[datetime] = None,
+                 window: int = TWO_FACTOR_VALID_WINDOW) -> Optional[int]:
+    """TOTP time step a code belongs to (within +/- window), or None if invalid"""
+    code = (code or "").strip()
+    if not code.isdigit():
+        return None
+    totp = pyotp.TOTP(secret)
+    if len(code) != totp.digits:
+        return None
+    current = totp.timecode(for_time or datetime.now(timezone.utc))
+    for step in range(current - window, current + window + 1):
+        if hmac.compare_digest(totp.generate_otp(step), code):
+            return step
+    return None
+
+
+def render_qr_png_base64(data: str) -> str:
+    """Render data as a QR code PNG, base64 encoded (CPU bound)"""
+    import qrcode  # deferred: heavy and only needed here
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    img_buffer = io.BytesIO()
+    img.save(img_buffer, format='PNG')
+    return base64.b64encode(img_buffer.getvalue()).decode()
+
+
+async def qr_png_base64(uri: str) -> str:
+    """QR code for a provisioning URI, rendered in a worker thread and cached.
+
+    Keyed by a digest of the URI so the cache never holds secrets as keys;
+    concurrent requests for the same secret share one render.
+    """
+    key = hashlib.sha256(uri.encode()).hexdigest()
+    return await _qr_cache.do(key, lambda: asyncio.to_thread(render_qr_png_base64, uri))
+
+
+async def get_state(db, user_id: str) -> Optional[Dict[str, Any]]:
+    return await db[COLLECTION].find_one({"user_id": user_id})
+
+
+async def begin_setup(db, user_id: str) -> str:
+    """Store a fresh pending secret for the user and return it (plaintext)"""
+    secret = pyotp.random_base32()
+    now = datetime.now(timezone.utc)
+    await db[COLLECTION].update_one(
+        {"user_id": user_id},
+        {
+            "$set": {"secret_enc": encrypt_secret(secret), "status": "pending", "created_at": now},
+            "$unset": {"enabled_at": "", "last_used_at": "", "last_used_step": "", "backup_codes": ""},
+        },
+        upsert=True,
+    )
+    return secret
+
+
+def user_secret(doc: Dict[str, Any]) -> Optional[str]:
+    try:
+        return decrypt_secret(doc["secret_enc"])
+    except (KeyError, InvalidToken):
+        logger.error(f"2FA secret for {doc.get('user_id')} cannot be decrypted (key rotated out?)")
+        return None
+
+
+def _consume_filter(user_id: str, step: int) -> Dict[str, Any]:
+    return {"user_id": user_id, "$or": [{"last_used_step": {"$lt": step}}, {"last_used_step": {"$exists": False}}]}
+
+
+async def verify_code(db, user_id: str, code: str, consume: bool = True,
+                      require_enabled: bool = True) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Check a TOTP code against the user's stored secret.
+
+    Args:
+        consume: Record the code's time step so it cannot be used again
+        require_enabled: False to accept codes for a pending setup (and
+            enable it on success)
+
+    Returns:
+        (outcome, state document) where outcome is OK, NOT_ENROLLED,
+        INVALID_CODE or REPLAYED
+    """
+    doc = await get_state(db, user_id)
+    if not doc or (require_enabled and doc.get("status") != "enabled"):
+        return NOT_ENROLLED, doc
+    secret = user_secret(doc)
+    if secret is None:
+        return NOT_ENROLLED, doc
+    step = matched_step(secret, code)
+    if step is None:
+        return INVALID_CODE, doc
+    if doc.get("last_used_step") is not None and step <= doc["last_used_step"]:
+        return REPLAYED, doc
+    if not consume:
+        return OK, doc
+
+    now = datetime.now(timezone.utc)
+    update = {"last_used_step": step, "last_used_at": now}
+    if doc.get("status") != "enabled":
+        update.update({"status": "enabled", "enabled_at": now})
+    result = await db[COLLECTION].update_one(_consume_filter(user_id, step), {"$set": update})
+    if result.modified_count == 0:
+        # Another request consumed this step (or a later one) first
+        return REPLAYED, doc
+    doc.update(update)
+    return OK, doc
+
+
+async def consume_backup_code(db, user_id: str, code: str) -> bool:
+    """Use up a backup code; each one works once"""
+    result = await db[COLLECTION].update_one(
+        {"user_id": user_id, "status": "enabled", "backup_codes": hash_backup_code(code)},
+        {"$pull": {"backup_codes": hash_backup_code(code)}, "$set": {"last_used_at": datetime.now(timezone.utc)}},
+    )
+    return result.modified_count == 1
+
+
+async def set_backup_codes(db, user_id: str, codes: List[str]) -> bool:
+    """Replace the user's backup codes (stored hashed); False if not set up"""
+    result = await db[COLLECTION].update_one(
+        {"user_id": user_id},
+        {"$set": {"backup_codes": [hash_backup_code(c) for c in codes],
+                  "backup_codes_generated_at": datetime.now(timezone.utc)}},
+    )
+    return result.matched_count == 1
+
+
+async def disable(db, user_id: str) -> bool:
+    result = await db[COLLECTION].delete_one({"user_id": user_id})
+    return result.deleted_count == 1
+
+
+def _check_batch(items: List[Tuple[str, str]], docs: Dict[str, Dict[str, Any]],
+                 now: datetime) -> Tuple[List[str], Dict[str, int]]:
+    """Outcome per item plus the highest accepted step per user (CPU only)"""
+    outcomes = []
+    accepted: Dict[str, int] = {}
+    secrets_by_user: Dict[str, Optional[str]] = {}
+    for user_id, code in items:
+        doc = docs.get(user_id)
+        if not doc or doc.get("status") != "enabled":
+            outcomes.append(NOT_ENROLLED)
+            continue
+        if user_id not in secrets_by_user:
+            secrets_by_user[user_id] = user_secret(doc)
+        secret = secrets_by_user[user_id]
+        step = matched_step(secret, code, now) if secret else None
+        if secret is None:
+            outcomes.append(NOT_ENROLLED)
+        elif step is None:
+            outcomes.append(INVALID_CODE)
+        elif step <= max(doc.get("last_used_step", -1), accepted.get(user_id, -1)):
+            outcomes.append(REPLAYED)
+        else:
+            accepted[user_id] = step
+            outcomes.append(OK)
+    return outcomes, accepted
+
+
+async def verify_batch(db, items: List[Tuple[str, str]]) -> List[str]:
+    """Verify many (user_id, code) pairs with one read and one bulk write.
+
+    Codes are checked in order, so a repeated code for the same user in one
+    batch is reported as replayed. Only enabled enrollments are accepted.
+
+    Returns:
+        Outcome per item, in input order
+    """
+    if not items:
+        return []
+    user_ids = list(dict.fromkeys(user_id for user_id, _ in items))
+    docs = {}
+    async for doc in db[COLLECTION].find({"user_id": {"$in": user_ids}}):
+        docs[doc["user_id"]] = doc
+
+    now = datetime.now(timezone.utc)
+    outcomes, accepted = await asyncio.to_thread(_check_batch, items, docs, now)
+    if not accepted:
+        return outcomes
+
+    nonce = secrets.token_hex(8)
+    ops = [
+        UpdateOne(_consume_filter(user_id, step),
+                  {"$set": {"last_used_step": step, "last_used_at": now, "last_used_nonce": nonce}})
+        for user_id, step in accepted.items()
+    ]
+    result = await db[COLLECTION].bulk_write(ops, ordered=False)
+    if result.modified_count < len(ops):
+        # Some users had a step consumed concurrently; their codes lost the race
+        lost = set(accepted)
+        async for doc in db[COLLECTION].find({"user_id": {"$in": list(accepted)}, "last_used_nonce": nonce},
+                                             {"user_id": 1}):
+            lost.discard(doc["user_id"])
+        outcomes = [REPLAYED if outcome == OK and user_id in lost else outcome
+                    for outcome, (user_id, _) in zip(outcomes, items)]
+    return outcomes
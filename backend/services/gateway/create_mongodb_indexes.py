@@ -1,7 +1,20 @@
 """
-MongoDB Index Creation Script
-Creates recommended indexes for optimal query performance.
+MongoDB Index Reconciliation Script
+Brings the database in line with the declarative index manifest
+(app/index_manifest.py) shared by gateway, agent, langgraph and runtime-core.
+
+Safe to run on every deploy: matching indexes are left alone and only missing
+ones are built. Conflicting or unmanaged indexes are reported and only dropped
+when asked to.
+
+Usage:
+    python create_mongodb_indexes.py                      # create missing indexes
+    python create_mongodb_indexes.py --check              # report only, exit 1 on drift
+    python create_mongodb_indexes.py --replace-conflicts  # rebuild indexes whose options differ
+    python create_mongodb_indexes.py --drop-unmanaged     # drop indexes not in the manifest
+    python create_mongodb_indexes.py --service runtime-core
 """
+import argparse
 import asyncio
 import os
 import sys
@@ -14,8 +27,10 @@ if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
-# Add parent directory to path to import database module
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add gateway directory to path to import the app package
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.index_manifest import reconcile_indexes
 
 # Try to load environment variables from .env file
 try:
@@ -35,8 +50,12 @@ except ImportError:
 except Exception as e:
     print(f"[WARN] Could not load .env file: {e}")
 
-async def create_indexes():
-    """Create recommended indexes for MongoDB collections"""
+def _format_keys(keys):
+    return ", ".join(f"{field}:{direction}" for field, direction in keys)
+
+
+async def create_indexes(args):
+    """Reconcile MongoDB indexes with the manifest"""
     
     # Get MongoDB connection
     mongodb_uri = os.getenv("DATABASE_URL") or os.getenv("MONGODB_URI")
@@ -57,130 +76,68 @@ async def create_indexes():
         print(f"[OK] Connected to MongoDB database: {db_name}\n")
         
         db = client[db_name]
+        report = await reconcile_indexes(
+            db,
+            services=args.service,
+            apply=not args.check,
+            replace_conflicts=args.replace_conflicts,
+            drop_unmanaged=args.drop_unmanaged,
+        )
         
-        indexes_created = []
-        indexes_existing = []
-        indexes_failed = []
-        
-        # ===== CANDIDATES COLLECTION INDEXES =====
-        print("="*60)
-        print("[INFO] Creating indexes for 'candidates' collection...")
-        print("="*60)
-        
-        if "candidates" in await db.list_collection_names():
-            # Email index (unique, for login lookups)
-            try:
-                result = await db.candidates.create_index("email", unique=True, name="email_unique")
-                indexes_created.append("candidates.email (unique)")
-                print("[OK] Created unique index on 'email' field")
-            except Exception as e:
-                if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-                    indexes_existing.append("candidates.email")
-                    print("[INFO] Index on 'email' field already exists")
-                else:
-                    indexes_failed.append(f"candidates.email: {str(e)}")
-                    print(f"[ERROR] Failed to create index on 'email': {str(e)}")
-            
-            # Role index (for filtering by role)
-            try:
-                result = await db.candidates.create_index("role", name="role_index")
-                indexes_created.append("candidates.role")
-                print("[OK] Created index on 'role' field")
-            except Exception as e:
-                if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-                    indexes_existing.append("candidates.role")
-                    print("[INFO] Index on 'role' field already exists")
-                else:
-                    indexes_failed.append(f"candidates.role: {str(e)}")
-                    print(f"[ERROR] Failed to create index on 'role': {str(e)}")
-            
-            # Created_at index (for sorting)
-            try:
-                result = await db.candidates.create_index("created_at", name="created_at_index")
-                indexes_created.append("candidates.created_at")
-                print("[OK] Created index on 'created_at' field")
-            except Exception as e:
-                if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-                    indexes_existing.append("candidates.created_at")
-                    print("[INFO] Index on 'created_at' field already exists")
-                else:
-                    indexes_failed.append(f"candidates.created_at: {str(e)}")
-                    print(f"[ERROR] Failed to create index on 'created_at': {str(e)}")
-        else:
-                print("[WARN] 'candidates' collection does not exist (will be created on first insert)")
-        
-        # ===== CLIENTS COLLECTION INDEXES =====
-        print("\n" + "="*60)
-        print("[INFO] Creating indexes for 'clients' collection...")
-        print("="*60)
-        
-        if "clients" in await db.list_collection_names():
-            # Email index (unique, for email-based login)
-            try:
-                result = await db.clients.create_index("email", unique=True, name="email_unique")
-                indexes_created.append("clients.email (unique)")
-                print("[OK] Created unique index on 'email' field")
-            except Exception as e:
-                if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-                    indexes_existing.append("clients.email")
-                    print("[INFO] Index on 'email' field already exists")
-                else:
-                    indexes_failed.append(f"clients.email: {str(e)}")
-                    print(f"[ERROR] Failed to create index on 'email': {str(e)}")
-            
-            # Client_id index (unique, for client_id-based login)
-            try:
-                result = await db.clients.create_index("client_id", unique=True, name="client_id_unique")
-                indexes_created.append("clients.client_id (unique)")
-                print("[OK] Created unique index on 'client_id' field")
-            except Exception as e:
-                if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-                    indexes_existing.append("clients.client_id")
-                    print("[INFO] Index on 'client_id' field already exists")
-                else:
-                    indexes_failed.append(f"clients.client_id: {str(e)}")
-                    print(f"[ERROR] Failed to create index on 'client_id': {str(e)}")
-            
-            # Status index (for filtering active clients)
-            try:
-                result = await db.clients.create_index("status", name="status_index")
-                indexes_created.append("clients.status")
-                print("[OK] Created index on 'status' field")
-            except Exception as e:
-                if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-                    indexes_existing.append("clients.status")
-                    print("[INFO] Index on 'status' field already exists")
-                else:
-                    indexes_failed.append(f"clients.status: {str(e)}")
-                    print(f"[ERROR] Failed to create index on 'status': {str(e)}")
-        else:
-            print("[WARN] 'clients' collection does not exist (will be created on first insert)")
+        missing_total = conflicts_total = 0
+        for collection, plan in sorted(report["collections"].items()):
+            print("="*60)
+            print(f"[INFO] '{collection}'")
+            print("="*60)
+            for spec, name in plan["ok"]:
+                suffix = "" if name == spec.name else f" (as '{name}')"
+                print(f"[OK] {spec.name} ({_format_keys(spec.keys)}){suffix}")
+            for spec in plan["missing"]:
+                missing_total += 1
+                action = "missing" if args.check else "creating"
+                print(f"[WARN] {spec.name} ({_format_keys(spec.keys)}) {action}")
+            for spec, name, differences in plan["conflicts"]:
+                conflicts_total += 1
+                detail = ", ".join(f"{option}: declared {declared!r}, found {actual!r}"
+                                   for option, (declared, actual) in differences.items())
+                print(f"[WARN] {spec.name} conflicts with existing '{name}': {detail}")
+            for name in plan["unmanaged"]:
+                print(f"[INFO] '{name}' is not in the manifest")
+            print()
         
         # ===== SUMMARY =====
-        print("\n" + "="*60)
-        print("[SUMMARY] INDEX CREATION SUMMARY")
+        print("="*60)
+        print("[SUMMARY] INDEX RECONCILIATION SUMMARY")
         print("="*60)
         
-        if indexes_created:
-            print(f"\n[OK] Created {len(indexes_created)} new index(es):")
-            for idx in indexes_created:
+        if report["created"]:
+            print(f"\n[OK] Created {len(report['created'])} index(es):")
+            for idx in report["created"]:
                 print(f"   - {idx}")
         
-        if indexes_existing:
-            print(f"\n[INFO] {len(indexes_existing)} index(es) already exist:")
-            for idx in indexes_existing:
+        if report["dropped"]:
+            print(f"\n[OK] Dropped {len(report['dropped'])} index(es):")
+            for idx in report["dropped"]:
                 print(f"   - {idx}")
         
-        if indexes_failed:
-            print(f"\n[ERROR] Failed to create {len(indexes_failed)} index(es):")
-            for idx in indexes_failed:
-                print(f"   - {idx}")
+        if conflicts_total and not args.replace_conflicts:
+            print(f"\n[WARN] {conflicts_total} index(es) differ from the manifest; rerun with --replace-conflicts to rebuild them")
         
-        if not indexes_failed:
-            print("\n[SUCCESS] All indexes created successfully!")
+        if report["failed"]:
+            print(f"\n[ERROR] Failed to reconcile {len(report['failed'])} index(es):")
+            for collection, name, error in report["failed"]:
+                print(f"   - {collection}.{name or '*'}: {error}")
         
         client.close()
-        return len(indexes_failed) == 0
+        
+        if args.check:
+            in_sync = not (missing_total or conflicts_total or report["failed"])
+            print("\n[SUCCESS] Indexes match the manifest" if in_sync else "\n[ERROR] Indexes have drifted from the manifest")
+            return in_sync
+        
+        if not report["failed"]:
+            print("\n[SUCCESS] Indexes reconciled successfully!")
+        return len(report["failed"]) == 0
         
     except Exception as e:
         print(f"\n[ERROR] {str(e)}")
@@ -189,12 +146,19 @@ async def create_indexes():
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile MongoDB indexes with the manifest")
+    parser.add_argument("--check", action="store_true", help="Report drift without changing anything")
+    parser.add_argument("--service", action="append", choices=["gateway", "agent", "langgraph", "runtime-core"],
+                        help="Only indexes owned by this service (repeatable)")
+    parser.add_argument("--replace-conflicts", action="store_true", help="Drop and rebuild indexes whose options differ")
+    parser.add_argument("--drop-unmanaged", action="store_true", help="Drop indexes that are not in the manifest")
+    args = parser.parse_args()
+    
     print("="*60)
-    print("MongoDB Index Creation")
+    print("MongoDB Index Reconciliation")
     print("="*60)
     print(f"Timestamp: {datetime.now(timezone.utc).isoformat()}\n")
     
-    success = asyncio.run(create_indexes())
+    success = asyncio.run(create_indexes(args))
     
     sys.exit(0 if success else 1)
-
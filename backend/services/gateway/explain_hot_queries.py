@@ -0,0 +1,134 @@
+"""
+MongoDB Hot Query Plan Report
+Runs explain() on the catalogue of real service queries (app/query_plans.py)
+and flags any that would do a collection scan or a blocking in-memory sort.
+
+Exits non-zero when an unexpected COLLSCAN or SORT is found, so it can gate a
+deploy after create_mongodb_indexes.py has run.
+
+Usage:
+    python explain_hot_queries.py
+    python explain_hot_queries.py --service langgraph --verbose
+    python explain_hot_queries.py --execution-stats   # also checks $lookup scans; runs the queries
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timezone
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# Add gateway directory to path to import the app package
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.query_plans import explain_query, hot_queries, plan_findings
+
+# Try to load environment variables from .env file
+try:
+    from dotenv import load_dotenv
+    env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), '.env')
+    if os.path.exists(env_path):
+        load_dotenv(env_path)
+        print(f"[INFO] Loaded environment variables from: {env_path}")
+    else:
+        # Try loading from backend/.env
+        env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'backend', '.env')
+        if os.path.exists(env_path):
+            load_dotenv(env_path)
+            print(f"[INFO] Loaded environment variables from: {env_path}")
+except ImportError:
+    print("[WARN] python-dotenv not installed, using system environment variables only")
+except Exception as e:
+    print(f"[WARN] Could not load .env file: {e}")
+
+async def explain_hot_queries(args):
+    """Explain every catalogued hot query and report plan problems"""
+    
+    mongodb_uri = os.getenv("DATABASE_URL") or os.getenv("MONGODB_URI")
+    if not mongodb_uri:
+        print("[ERROR] DATABASE_URL or MONGODB_URI environment variable is required")
+        return False
+    
+    db_name = os.getenv("MONGODB_DB_NAME", "bhiv_hr")
+    verbosity = "executionStats" if args.execution_stats else "queryPlanner"
+    
+    try:
+        client = AsyncIOMotorClient(
+            mongodb_uri,
+            serverSelectionTimeoutMS=5000
+        )
+        await client.admin.command('ping')
+        print(f"[OK] Connected to MongoDB database: {db_name}\n")
+        db = client[db_name]
+        
+        flagged = []
+        expected = []
+        errors = []
+        queries = hot_queries(args.service)
+        for query in queries:
+            label = f"{query.name} [{query.service}: {query.source}]"
+            try:
+                explain = await explain_query(db, query, verbosity)
+            except Exception as e:
+                errors.append((label, str(e)))
+                print(f"[ERROR] {label}: {e}")
+                continue
+            
+            findings = plan_findings(explain)
+            if not findings:
+                print(f"[OK] {label}")
+            elif query.full_scan_expected:
+                expected.append(label)
+                print(f"[INFO] {label}: full scan expected")
+            else:
+                flagged.append((label, findings))
+                print(f"[WARN] {label}")
+                for finding in findings:
+                    print(f"   - {finding}")
+            if args.verbose:
+                print(json.dumps(explain, indent=2, default=str))
+        
+        # ===== SUMMARY =====
+        print("\n" + "="*60)
+        print("[SUMMARY] HOT QUERY PLAN REPORT")
+        print("="*60)
+        print(f"Queries explained: {len(queries) - len(errors)}/{len(queries)}")
+        print(f"Flagged: {len(flagged)}  Expected full scans: {len(expected)}  Errors: {len(errors)}")
+        for label, findings in flagged:
+            print(f"   - {label}: {'; '.join(findings)}")
+        
+        client.close()
+        if not flagged and not errors:
+            print("\n[SUCCESS] No unexpected COLLSCAN or in-memory SORT")
+        return not flagged and not errors
+        
+    except Exception as e:
+        print(f"\n[ERROR] {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flag COLLSCAN / in-memory SORT in hot query plans")
+    parser.add_argument("--service", action="append", choices=["gateway", "agent", "langgraph", "runtime-core"],
+                        help="Only queries issued by this service (repeatable)")
+    parser.add_argument("--execution-stats", action="store_true",
+                        help="Use executionStats verbosity (executes the queries; reports $lookup scans)")
+    parser.add_argument("--verbose", action="store_true", help="Print the raw explain output")
+    args = parser.parse_args()
+    
+    print("="*60)
+    print("MongoDB Hot Query Plan Report")
+    print("="*60)
+    print(f"Timestamp: {datetime.now(timezone.utc).isoformat()}\n")
+    
+    success = asyncio.run(explain_hot_queries(args))
+    
+    sys.exit(0 if success else 1)
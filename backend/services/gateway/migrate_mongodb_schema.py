@@ -3,11 +3,16 @@ MongoDB Schema Migration Script
 Fixes issues found during verification:
 1. Adds 'role' field to existing candidates (defaults to 'candidate')
 2. Identifies candidates missing 'password_hash' (legacy data)
+3. Migrates client 'contact_email' to 'email'
+4. Normalizes job_applications candidate_id/job_id to strings and backfills applied_date
+5. Creates the (candidate_id, applied_date) index used by "My Applications"
+6. Backfills canonical skill_ids on candidates and indexes them
 """
 import asyncio
 import os
 import sys
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from datetime import datetime, timezone
 
 # Fix Windows console encoding
@@ -34,6 +39,11 @@ except ImportError:
 except Exception as e:
     print(f"[WARN] Could not load .env file: {e}")
 
+from app.skills import SKILL_DICTIONARY_VERSION, skill_fields
+
+SKILL_BACKFILL_BATCH_SIZE = int(os.getenv("SKILL_BACKFILL_BATCH_SIZE", "500"))
+FEEDBACK_BACKFILL_BATCH_SIZE = 1000
+
 async def migrate_schema():
     """Migrate MongoDB schema to fix identified issues"""
     
@@ -164,6 +174,156 @@ async def migrate_schema():
             migrations_failed.append(error_msg)
             print(f"[ERROR] {error_msg}")
         
+        # ===== MIGRATION 4: Normalize job_applications ids =====
+        print("\n" + "="*60)
+        print("[MIGRATION 4] Normalizing job_applications candidate_id/job_id to strings...")
+        print("="*60)
+        
+        try:
+            normalized = 0
+            for field in ("candidate_id", "job_id"):
+                result = await db.job_applications.update_many(
+                    {field: {"$exists": True, "$ne": None, "$not": {"$type": "string"}}},
+                    [{"$set": {field: {"$toString": f"${field}"}}}]
+                )
+                if result.modified_count:
+                    print(f"[OK] Converted '{field}' to string on {result.modified_count} applications")
+                normalized += result.modified_count
+            
+            # Older writers used applied_at/created_at; the portal sorts on applied_date
+            result = await db.job_applications.update_many(
+                {"applied_date": {"$exists": False}},
+                [{"$set": {"applied_date": {"$ifNull": ["$applied_at", "$created_at"]}}}]
+            )
+            if result.modified_count:
+                print(f"[OK] Backfilled 'applied_date' on {result.modified_count} applications")
+            
+            if normalized or result.modified_count:
+                migrations_applied.append(
+                    f"Normalized ids on {normalized} and applied_date on {result.modified_count} job applications"
+                )
+            else:
+                print("[INFO] All job applications already use string ids and applied_date")
+                migrations_skipped.append("job_applications ids already normalized")
+            
+            # Normalization can expose duplicates that differed only by id type
+            duplicates = await db.job_applications.aggregate([
+                {"$group": {"_id": {"c": "$candidate_id", "j": "$job_id"}, "n": {"$sum": 1}}},
+                {"$match": {"n": {"$gt": 1}}},
+                {"$count": "pairs"}
+            ]).to_list(length=1)
+            if duplicates:
+                print(f"[WARN] {duplicates[0]['pairs']} candidate/job pairs have duplicate applications (review manually)")
+        except Exception as e:
+            error_msg = f"Failed to normalize job_applications ids: {str(e)}"
+            migrations_failed.append(error_msg)
+            print(f"[ERROR] {error_msg}")
+        
+        # ===== MIGRATION 5: job_applications indexes =====
+        print("\n" + "="*60)
+        print("[MIGRATION 5] Creating job_applications indexes...")
+        print("="*60)
+        
+        try:
+            await db.job_applications.create_index(
+                [("candidate_id", 1), ("applied_date", -1)], name="candidate_applied_date"
+            )
+            await db.job_applications.create_index(
+                [("job_id", 1), ("candidate_id", 1)], name="job_candidate"
+            )
+            print("[OK] Indexes (candidate_id, applied_date) and (job_id, candidate_id) in place")
+            migrations_applied.append("Created job_applications indexes")
+        except Exception as e:
+            error_msg = f"Failed to create job_applications indexes: {str(e)}"
+            migrations_failed.append(error_msg)
+            print(f"[ERROR] {error_msg}")
+        
+        # ===== MIGRATION 6: Canonical skill ids on candidates =====
+        print("\n" + "="*60)
+        print("[MIGRATION 6] Backfilling canonical skill_ids on candidates...")
+        print("="*60)
+        
+        try:
+            # Missing or produced by an older dictionary version
+            stale = {"skills_version": {"$ne": SKILL_DICTIONARY_VERSION}}
+            total = await db.candidates.count_documents(stale)
+            updated = 0
+            batch = []
+            cursor = db.candidates.find(stale, {"technical_skills": 1, "skills": 1})
+            async for doc in cursor:
+                raw = doc.get("technical_skills") or doc.get("skills")
+                batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": skill_fields(raw)}))
+                if len(batch) >= SKILL_BACKFILL_BATCH_SIZE:
+                    result = await db.candidates.bulk_write(batch, ordered=False)
+                    updated += result.modified_count
+                    batch = []
+                    print(f"[INFO] Normalized skills on {updated}/{total} candidates...")
+            if batch:
+                result = await db.candidates.bulk_write(batch, ordered=False)
+                updated += result.modified_count
+            
+            await db.candidates.create_index("skill_ids", name="skill_ids_index")
+            
+            if total:
+                print(f"[OK] Normalized skills on {updated} candidates (dictionary v{SKILL_DICTIONARY_VERSION})")
+                migrations_applied.append(f"Backfilled skill_ids on {updated} candidates")
+            else:
+                print("[INFO] All candidates already have current skill_ids")
+                migrations_skipped.append("candidates skill_ids already current")
+        except Exception as e:
+            error_msg = f"Failed to backfill candidate skill_ids: {str(e)}"
+            migrations_failed.append(error_msg)
+            print(f"[ERROR] {error_msg}")
+        
+        # ===== MIGRATION 7: Denormalize candidate_id/job_id onto rl_feedback =====
+        print("\n" + "="*60)
+        print("[MIGRATION 7] Copying candidate_id/job_id from rl_predictions onto rl_feedback...")
+        print("="*60)
+        
+        try:
+            missing = {"candidate_id": {"$exists": False}, "prediction_id": {"$type": "objectId"}}
+            total = await db.rl_feedback.count_documents(missing)
+            updated = 0
+            while True:
+                page = await db.rl_feedback.find(missing, {"prediction_id": 1}).limit(
+                    FEEDBACK_BACKFILL_BATCH_SIZE).to_list(length=FEEDBACK_BACKFILL_BATCH_SIZE)
+                if not page:
+                    break
+                prediction_ids = list({doc["prediction_id"] for doc in page})
+                predictions = {
+                    p["_id"]: p async for p in db.rl_predictions.find(
+                        {"_id": {"$in": prediction_ids}}, {"candidate_id": 1, "job_id": 1})
+                }
+                batch = []
+                for doc in page:
+                    prediction = predictions.get(doc["prediction_id"], {})
+                    # Orphaned feedback gets nulls so it leaves the missing set
+                    batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {
+                        "candidate_id": prediction.get("candidate_id"),
+                        "job_id": prediction.get("job_id"),
+                    }}))
+                result = await db.rl_feedback.bulk_write(batch, ordered=False)
+                updated += result.modified_count
+                print(f"[INFO] Denormalized {updated}/{total} feedback records...")
+            
+            await db.rl_feedback.create_index(
+                [("candidate_id", 1), ("created_at", -1)], name="candidate_created_at_index"
+            )
+            await db.rl_feedback.create_index(
+                [("job_id", 1), ("created_at", -1)], name="job_created_at_index"
+            )
+            
+            if total:
+                print(f"[OK] Denormalized candidate_id/job_id on {updated} feedback records")
+                migrations_applied.append(f"Denormalized candidate_id/job_id on {updated} rl_feedback records")
+            else:
+                print("[INFO] All rl_feedback records already carry candidate_id/job_id")
+                migrations_skipped.append("rl_feedback candidate_id/job_id already denormalized")
+        except Exception as e:
+            error_msg = f"Failed to denormalize rl_feedback: {str(e)}"
+            migrations_failed.append(error_msg)
+            print(f"[ERROR] {error_msg}")
+        
         # ===== SUMMARY =====
         print("\n" + "="*60)
         print("[SUMMARY] MIGRATION SUMMARY")
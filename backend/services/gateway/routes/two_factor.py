@@ -0,0 +1,200 @@
+"""
+Two-factor authentication endpoints
+
+Secrets are generated at setup, stored per user (encrypted, see
+app/two_factor_store.py) and confirmed by the first successful verify. QR
+codes are rendered in a worker thread and cached per secret, and qrcode /
+Pillow are only imported on first render.
+"""
+from fastapi import APIRouter, HTTPException, Depends
+from datetime import datetime, timezone
+from pydantic import BaseModel, Field
+from typing import List
+import os
+import secrets
+import sys
+
+# Add parent directory to path for accessing dependencies from parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dependencies import get_api_key
+from app.database import get_mongo_db
+from app import two_factor_store as store
+
+router = APIRouter()
+
+class TwoFASetup(BaseModel):
+    user_id: str
+
+class TwoFALogin(BaseModel):
+    user_id: str
+    totp_code: str
+
+class TwoFABatchVerify(BaseModel):
+    items: List[TwoFALogin] = Field(..., min_length=1)
+
+_FAILURE_DETAIL = {
+    store.NOT_ENROLLED: "2FA is not set up for this user",
+    store.INVALID_CODE: "Invalid 2FA code",
+    store.REPLAYED: "2FA code already used",
+}
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+# Two-Factor Authentication (9 endpoints)
+@router.post("/v1/auth/2fa/setup", tags=["Two-Factor Authentication"])
+async def setup_2fa(setup_data: TwoFASetup, api_key: str = Depends(get_api_key)):
+    """Setup 2FA"""
+    db = await get_mongo_db()
+    state = await store.get_state(db, setup_data.user_id)
+    if state and state.get("status") == "enabled":
+        raise HTTPException(status_code=409, detail="2FA is already enabled; disable it before setting up again")
+    
+    secret = await store.begin_setup(db, setup_data.user_id)
+    img_str = await store.qr_png_base64(store.provisioning_uri(secret, setup_data.user_id))
+    
+    return {
+        "message": "2FA setup initiated",
+        "user_id": setup_data.user_id,
+        "secret": secret,
+        "qr_code": f"data:image/png;base64,{img_str}",
+        "manual_entry_key": secret,
+        "instructions": "Scan QR code with Google Authenticator, Microsoft Authenticator, or Authy, then verify a code to enable 2FA"
+    }
+
+@router.post("/v1/auth/2fa/verify", tags=["Two-Factor Authentication"])
+async def verify_2fa(login_data: TwoFALogin, api_key: str = Depends(get_api_key)):
+    """Verify 2FA (the first successful code enables a pending setup)"""
+    db = await get_mongo_db()
+    outcome, _ = await store.verify_code(db, login_data.user_id, login_data.totp_code, require_enabled=False)
+    
+    if outcome == store.OK:
+        return {
+            "message": "2FA verification successful",
+            "user_id": login_data.user_id,
+            "verified": True,
+            "verified_at": datetime.now(timezone.utc).isoformat()
+        }
+    else:
+        raise HTTPException(status_code=401, detail=_FAILURE_DETAIL[outcome])
+
+@router.post("/v1/auth/2fa/verify-batch", tags=["Two-Factor Authentication"])
+async def verify_2fa_batch(batch: TwoFABatchVerify, api_key: str = Depends(get_api_key)):
+    """Verify many TOTP codes at once (SSO bridge); codes are consumed"""
+    if len(batch.items) > store.TWO_FACTOR_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {store.TWO_FACTOR_BATCH_MAX} codes per batch")
+    
+    db = await get_mongo_db()
+    items = [(item.user_id, item.totp_code) for item in batch.items]
+    outcomes = await store.verify_batch(db, items)
+    
+    results = [
+        {"user_id": user_id, "verified": outcome == store.OK, "reason": outcome}
+        for (user_id, _), outcome in zip(items, outcomes)
+    ]
+    return {
+        "results": results,
+        "verified_count": sum(1 for r in results if r["verified"]),
+        "total": len(results),
+        "verified_at": datetime.now(timezone.utc).isoformat()
+    }
+
+@router.post("/v1/auth/2fa/login", tags=["Two-Factor Authentication"])
+async def login_2fa(login_data: TwoFALogin, api_key: str = Depends(get_api_key)):
+    """2FA Login (accepts a TOTP code or an unused backup code)"""
+    db = await get_mongo_db()
+    code = login_data.totp_code.strip()
+    if code.upper().startswith("BACKUP-"):
+        outcome = store.OK if await store.consume_backup_code(db, login_data.user_id, code) else store.INVALID_CODE
+    else:
+        outcome, _ = await store.verify_code(db, login_data.user_id, code)
+    
+    if outcome == store.OK:
+        return {
+            "message": "2FA authentication successful",
+            "user_id": login_data.user_id,
+            "access_token": f"2fa_token_{login_data.user_id}_{datetime.now().timestamp()}",
+            "token_type": "bearer",
+            "expires_in": 3600,
+            "2fa_verified": True
+        }
+    else:
+        raise HTTPException(status_code=401, detail=_FAILURE_DETAIL[outcome])
+
+@router.get("/v1/auth/2fa/status/{user_id}", tags=["Two-Factor Authentication"])
+async def get_2fa_status_auth(user_id: str, api_key: str = Depends(get_api_key)):
+    """2FA Status"""
+    db = await get_mongo_db()
+    state = await store.get_state(db, user_id) or {}
+    return {
+        "user_id": user_id,
+        "2fa_enabled": state.get("status") == "enabled",
+        "setup_pending": state.get("status") == "pending",
+        "setup_date": _iso(state.get("enabled_at")),
+        "last_used": _iso(state.get("last_used_at")),
+        "backup_codes_remaining": len(state.get("backup_codes", []))
+    }
+
+@router.post("/v1/auth/2fa/disable", tags=["Two-Factor Authentication"])
+async def disable_2fa_auth(setup_data: TwoFASetup, api_key: str = Depends(get_api_key)):
+    """Disable 2FA"""
+    db = await get_mongo_db()
+    if not await store.disable(db, setup_data.user_id):
+        raise HTTPException(status_code=404, detail=_FAILURE_DETAIL[store.NOT_ENROLLED])
+    return {
+        "message": "2FA disabled successfully",
+        "user_id": setup_data.user_id,
+        "disabled_at": datetime.now(timezone.utc).isoformat(),
+        "2fa_enabled": False
+    }
+
+@router.post("/v1/auth/2fa/backup-codes", tags=["Two-Factor Authentication"])
+async def generate_backup_codes_auth(setup_data: TwoFASetup, api_key: str = Depends(get_api_key)):
+    """Generate Backup Codes (replaces any previous set; shown once)"""
+    backup_codes = [f"BACKUP-{secrets.token_hex(4).upper()}" for _ in range(10)]
+    
+    db = await get_mongo_db()
+    if not await store.set_backup_codes(db, setup_data.user_id, backup_codes):
+        raise HTTPException(status_code=404, detail=_FAILURE_DETAIL[store.NOT_ENROLLED])
+    
+    return {
+        "message": "Backup codes generated successfully",
+        "user_id": setup_data.user_id,
+        "backup_codes": backup_codes,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "codes_count": len(backup_codes)
+    }
+
+@router.post("/v1/auth/2fa/test-token", tags=["Two-Factor Authentication"])
+async def test_2fa_token_auth(login_data: TwoFALogin, api_key: str = Depends(get_api_key)):
+    """Test Token (checks the code without consuming it)"""
+    db = await get_mongo_db()
+    outcome, _ = await store.verify_code(db, login_data.user_id, login_data.totp_code,
+                                         consume=False, require_enabled=False)
+    
+    return {
+        "user_id": login_data.user_id,
+        "token": login_data.totp_code,
+        "is_valid": outcome == store.OK,
+        "reason": outcome,
+        "test_timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+@router.get("/v1/auth/2fa/qr/{user_id}", tags=["Two-Factor Authentication"])
+async def get_qr_code(user_id: str, api_key: str = Depends(get_api_key)):
+    """QR Code for the user's stored secret"""
+    db = await get_mongo_db()
+    state = await store.get_state(db, user_id)
+    secret = store.user_secret(state) if state else None
+    if secret is None:
+        raise HTTPException(status_code=404, detail=_FAILURE_DETAIL[store.NOT_ENROLLED])
+    
+    img_str = await store.qr_png_base64(store.provisioning_uri(secret, user_id))
+    
+    return {
+        "user_id": user_id,
+        "qr_code": f"data:image/png;base64,{img_str}",
+        "secret": secret,
+        "generated_at": datetime.now(timezone.utc).isoformat()
+    }
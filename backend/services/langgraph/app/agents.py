@@ -51,7 +51,7 @@ async def application_screener_agent(state: CandidateApplicationState) -> dict:
         base_score = matching_result.get('score', 0)
         
         # Get feedback history for RL enhancement
-        feedback_history = rl_db_manager.get_feedback_history(limit=50)
+        feedback_history = rl_db_manager.get_scoring_feedback()
         
         # Prepare candidate and job features for RL
         candidate_features = {
@@ -286,6 +286,7 @@ async def feedback_collection_agent(state: CandidateApplicationState) -> dict:
         rl_feedback_data = {
             "prediction_id": prediction_id,
             "candidate_id": state["candidate_id"],
+            "job_id": state["job_id"],
             "actual_outcome": actual_outcome,
             "feedback_score": feedback_score,
             "feedback_source": "workflow_automation"
@@ -0,0 +1,288 @@
+"""
+Retention and compaction for LangGraph checkpoints
+
+A background compactor periodically applies the retention policy to the
+checkpoint collections in bulk:
+
+    - running threads keep their last CHECKPOINT_KEEP_LAST checkpoints
+    - completed threads (workflow has completed_at) keep only the final one
+    - threads idle for CHECKPOINT_ABANDONED_TTL_HOURS without completing are
+      removed entirely
+
+Pending writes of pruned checkpoints are removed with them, and channel blobs
+older than any remaining checkpoint of the thread references are dropped.
+Blobs are shared between checkpoints, which is why expiry is done here rather
+than with a MongoDB TTL index on individual documents.
+
+A thread's retention only changes when it gets a checkpoint, when its
+workflow completes, or when its newest checkpoint ages past the abandoned
+TTL. Each pass therefore reads indexed created_at / completed_at ranges since
+the previous pass's watermark (kept in langgraph_checkpoint_retention), not
+the whole collection. The first pass, and one that falls behind, catch up a
+batch at a time.
+
+Environment:
+    CHECKPOINT_KEEP_LAST                 checkpoints kept per running thread (default 10)
+    CHECKPOINT_ABANDONED_TTL_HOURS       idle hours before an unfinished thread expires (default 72)
+    CHECKPOINT_COMPACT_INTERVAL_SECONDS  pause between compaction passes (default 300)
+    CHECKPOINT_COMPACT_BATCH             documents read per range per pass (default 500)
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from pymongo import DeleteMany
+
+from .mongodb_checkpointer import BLOBS, CHECKPOINTS, WRITES
+
+logger = logging.getLogger(__name__)
+
+WORKFLOWS = "workflows"
+RETENTION_STATE = "langgraph_checkpoint_retention"
+
+
+class RetentionPolicy(NamedTuple):
+    keep_last: int = 10
+    abandoned_ttl: timedelta = timedelta(hours=72)
+    interval_seconds: float = 300.0
+    batch_size: int = 500
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        return cls(
+            keep_last=max(1, int(os.getenv("CHECKPOINT_KEEP_LAST", "10"))),
+            abandoned_ttl=timedelta(hours=float(os.getenv("CHECKPOINT_ABANDONED_TTL_HOURS", "72"))),
+            interval_seconds=float(os.getenv("CHECKPOINT_COMPACT_INTERVAL_SECONDS", "300")),
+            batch_size=int(os.getenv("CHECKPOINT_COMPACT_BATCH", "500")),
+        )
+
+
+def plan_thread(checkpoints: List[Dict[str, Any]], completed: bool, expired: bool,
+                policy: RetentionPolicy) -> Optional[Dict[str, Any]]:
+    """Decide what to delete for one thread.
+
+    Args:
+        checkpoints: The thread's checkpoint documents (thread_ts and
+            channel_versions), newest first
+        completed: The workflow finished, so only the final checkpoint matters
+        expired: The thread is abandoned and should go entirely
+
+    Returns:
+        None if nothing to do, else {"drop_thread": True} or
+        {"before_ts": oldest kept thread_ts, "blob_floors": {channel: oldest kept version}}.
+        Channel versions only increase, so blobs below a channel's floor are
+        unreferenced, even if a new checkpoint lands while the pass runs.
+    """
+    if expired:
+        return {"drop_thread": True}
+    keep = 1 if completed else policy.keep_last
+    if len(checkpoints) <= keep:
+        return None
+    kept = checkpoints[:keep]
+    floors: Dict[str, Any] = {}
+    for doc in kept:
+        for channel, version in (doc.get("channel_versions") or {}).items():
+            if channel not in floors or version < floors[channel]:
+                floors[channel] = version
+    return {"before_ts": kept[-1]["thread_ts"], "blob_floors": floors}
+
+
+class CheckpointCompactor:
+    """Applies a RetentionPolicy to the checkpoint collections of one database"""
+
+    def __init__(self, db, policy: Optional[RetentionPolicy] = None):
+        self.db = db
+        self.policy = policy or RetentionPolicy.from_env()
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {
+            "passes": 0,
+            "threads_compacted": 0,
+            "threads_expired": 0,
+            "checkpoints_deleted": 0,
+            "writes_deleted": 0,
+            "blobs_deleted": 0,
+            "errors": 0,
+        }
+        self.last_run_at: Optional[str] = None
+        self.last_duration_ms: Optional[float] = None
+        # Everything created (or completed) before this has been examined
+        self.watermark: Optional[datetime] = None
+        self._watermark_loaded = False
+        self.behind = False
+
+    async def _scan(self, collection: str, field: str, start: Optional[datetime], end: datetime,
+                    projection: Dict[str, int]) -> Tuple[List[Dict[str, Any]], datetime]:
+        """Documents with start <= field < end, oldest first, at most batch_size; and how far they reach"""
+        query: Dict[str, Any] = {field: {"$lt": end}}
+        if start is not None:
+            query[field]["$gte"] = start
+        docs = await self.db[collection].find(query, {**projection, field: 1}).sort(field, 1).limit(
+            self.policy.batch_size).to_list(None)
+        # A full batch may stop short of end; the next pass resumes from its last value
+        return docs, docs[-1][field] if len(docs) == self.policy.batch_size else end
+
+    async def _candidate_threads(self, now: datetime) -> Tuple[List[Dict[str, Any]], datetime]:
+        """Threads whose retention may have changed since the watermark, with their workflow's
+        completed_at, and the watermark once they are handled"""
+        since, ttl = self.watermark, self.policy.abandoned_ttl
+        thread_fields = {"thread_id": 1, "checkpoint_ns": 1}
+        # New checkpoints (count may exceed keep_last), newest checkpoints passing the abandoned TTL,
+        # and workflows that completed
+        touched, upto = await self._scan(CHECKPOINTS, "created_at", since, now, thread_fields)
+        aged, aged_upto = await self._scan(CHECKPOINTS, "created_at", since - ttl if since else None, upto - ttl,
+                                           thread_fields)
+        upto = min(upto, aged_upto + ttl)
+        completed, completed_upto = await self._scan(WORKFLOWS, "completed_at", since, upto, {"workflow_id": 1})
+        upto = min(upto, completed_upto)
+
+        keys = {(doc["thread_id"], doc.get("checkpoint_ns", "")) for doc in touched + aged}
+        for workflow in completed:
+            for namespace in await self.db[CHECKPOINTS].distinct("checkpoint_ns", {"thread_id": workflow["workflow_id"]}):
+                keys.add((workflow["workflow_id"], namespace))
+        if not keys:
+            return [], upto
+
+        thread_ids = list({thread_id for thread_id, _ in keys})
+        completed_at = {
+            doc["workflow_id"]: doc.get("completed_at")
+            for doc in await self.db[WORKFLOWS].find(
+                {"workflow_id": {"$in": thread_ids}}, {"workflow_id": 1, "completed_at": 1}).to_list(None)
+        }
+        return [{"_id": {"thread_id": thread_id, "checkpoint_ns": namespace},
+                 "completed_at": completed_at.get(thread_id)}
+                for thread_id, namespace in sorted(keys)], upto
+
+    async def _load_watermark(self):
+        if not self._watermark_loaded:
+            state = await self.db[RETENTION_STATE].find_one({"_id": "watermark"})
+            self.watermark = state["at"] if state else None
+            self._watermark_loaded = True
+
+    async def run_once(self) -> Dict[str, int]:
+        """One compaction pass; returns what it deleted"""
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        await self._load_watermark()
+        threads, watermark = await self._candidate_threads(now)
+
+        ops = {CHECKPOINTS: [], WRITES: [], BLOBS: []}
+        compacted = expired = 0
+        for thread in threads:
+            key = {"thread_id": thread["_id"]["thread_id"], "checkpoint_ns": thread["_id"].get("checkpoint_ns", "")}
+            is_completed = thread.get("completed_at") is not None
+            keep = 1 if is_completed else self.policy.keep_last
+            checkpoints = await self.db[CHECKPOINTS].find(
+                key, {"thread_ts": 1, "channel_versions": 1, "created_at": 1}
+            ).sort("thread_ts", -1).limit(keep + 1).to_list(None)
+            if not checkpoints:
+                continue
+            last_at = checkpoints[0].get("created_at")
+            is_expired = not is_completed and last_at is not None and last_at < now - self.policy.abandoned_ttl
+            plan = plan_thread(checkpoints, is_completed, is_expired, self.policy)
+            if plan is None:
+                continue
+
+            if plan.get("drop_thread"):
+                expired += 1
+                for collection in ops:
+                    ops[collection].append(DeleteMany(key))
+                continue
+            compacted += 1
+            older = {**key, "thread_ts": {"$lt": plan["before_ts"]}}
+            ops[CHECKPOINTS].append(DeleteMany(older))
+            ops[WRITES].append(DeleteMany(older))
+            if plan["blob_floors"]:
+                ops[BLOBS].append(DeleteMany({**key, "$or": [
+                    {"channel": channel, "version": {"$lt": floor}} for channel, floor in plan["blob_floors"].items()
+                ]}))
+
+        deleted = {}
+        for collection, collection_ops in ops.items():
+            if collection_ops:
+                result = await self.db[collection].bulk_write(collection_ops, ordered=False)
+                deleted[collection] = result.deleted_count
+            else:
+                deleted[collection] = 0
+
+        # Behind only while catching up makes progress, so a stalled range never spins the loop
+        self.behind = watermark < now and watermark != self.watermark
+        self.watermark = watermark
+        await self.db[RETENTION_STATE].update_one({"_id": "watermark"}, {"$set": {"at": watermark}}, upsert=True)
+
+        summary = {
+            "threads_compacted": compacted,
+            "threads_expired": expired,
+            "checkpoints_deleted": deleted[CHECKPOINTS],
+            "writes_deleted": deleted[WRITES],
+            "blobs_deleted": deleted[BLOBS],
+        }
+        for name, value in summary.items():
+            self.counters[name] += value
+        self.counters["passes"] += 1
+        self.last_run_at = now.isoformat()
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        if compacted or expired:
+            logger.info(f"Checkpoint compaction: {summary} in {self.last_duration_ms} ms")
+        return summary
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["errors"] += 1
+                logger.error(f"❌ Checkpoint compaction failed: {e}")
+                self.behind = False
+            # Catching up (first pass, or a backlog larger than one batch) continues right away
+            await asyncio.sleep(0 if self.behind else self.policy.interval_seconds)
+
+    def start(self):
+        """Run compaction passes in the background on the current event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+            logger.info(f"✅ Checkpoint compactor started (keep_last={self.policy.keep_last}, "
+                        f"abandoned_ttl={self.policy.abandoned_ttl}, every {self.policy.interval_seconds:.0f}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def collection_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Document count and data size of each checkpoint collection"""
+        stats = {}
+        for name in (CHECKPOINTS, BLOBS, WRITES):
+            try:
+                raw = await self.db.command("collStats", name)
+                stats[name] = {"count": raw.get("count", 0), "size_bytes": raw.get("size", 0),
+                               "storage_bytes": raw.get("storageSize", 0)}
+            except Exception as e:
+                stats[name] = {"error": str(e)}
+        return stats
+
+    async def stats(self) -> Dict[str, Any]:
+        """Retention policy, compactor counters and collection sizes for /workflows/stats"""
+        return {
+            "policy": {
+                "keep_last": self.policy.keep_last,
+                "abandoned_ttl_hours": self.policy.abandoned_ttl.total_seconds() / 3600,
+                "interval_seconds": self.policy.interval_seconds,
+            },
+            "compactor": {
+                "running": self._task is not None and not self._task.done(),
+                "last_run_at": self.last_run_at,
+                "last_duration_ms": self.last_duration_ms,
+                "watermark": self.watermark.isoformat() if self.watermark else None,
+                **self.counters,
+            },
+            "collections": await self.collection_stats(),
+        }
@@ -2,9 +2,12 @@ import smtplib
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Dict, List
+from typing import Awaitable, Callable, Dict, List, Tuple
 from twilio.rest import Client
 from telegram import Bot
+from .notification_dispatcher import BulkNotificationDispatcher
+from .whatsapp_delivery import WhatsAppDeliveryTracker
+from .smtp_pool import SMTPSessionPool
 import sys
 import os
 
@@ -71,7 +74,14 @@ class CommunicationManager:
             # Gmail SMTP
             self.gmail_email = settings.gmail_email
             self.gmail_app_password = settings.gmail_app_password
+            # Authenticated sessions are reused across messages instead of a login per email
+            self.smtp_pool = SMTPSessionPool('smtp.gmail.com', 465, self.gmail_email, self.gmail_app_password)
             logger.info("✅ Gmail SMTP configured")
+        
+        # Shared by all bulk batches so channel rate limits hold across them
+        self.bulk_dispatcher = BulkNotificationDispatcher(self)
+        # Twilio calls run off the event loop; delivery status is checked later
+        self.whatsapp_delivery = WhatsAppDeliveryTracker(self.twilio_client)
     
     async def send_whatsapp(self, phone: str, message: str) -> Dict:
         """Send WhatsApp message via Twilio"""
@@ -106,29 +116,23 @@ class CommunicationManager:
             
             logger.info(f"📱 Sending WhatsApp to: {phone}")
             
-            msg = self.twilio_client.messages.create(
+            delivery = self.whatsapp_delivery
+            create_options = {"status_callback": delivery.callback_url} if delivery.callback_url else {}
+            msg = await delivery.run(
+                self.twilio_client.messages.create,
                 from_=f"whatsapp:{settings.twilio_whatsapp_number}",
                 to=f"whatsapp:{phone}",
-                body=message
+                body=message,
+                **create_options
             )
             
-            logger.info(f"✅ WhatsApp sent to {phone}: {msg.sid}")
+            logger.info(f"✅ WhatsApp accepted for {phone}: {msg.sid}")
             
-            # Check message status immediately
-            try:
-                import time
-                time.sleep(1)  # Wait 1 second
-                updated_msg = self.twilio_client.messages(msg.sid).fetch()
-                if updated_msg.status == 'failed':
-                    error_msg = f"Message failed - Error {updated_msg.error_code}: {updated_msg.error_message or 'Phone number not verified in Twilio sandbox'}"
-                    logger.error(f"❌ {error_msg}")
-                    return {"status": "failed", "channel": "whatsapp", "error": error_msg, "recipient": phone, "message_id": msg.sid}
-                else:
-                    logger.info(f"📊 Message status: {updated_msg.status}")
-            except Exception as status_error:
-                logger.warning(f"⚠️ Could not check message status: {status_error}")
+            # Delivery status (e.g. sandbox number not verified) lands on the delivery record later
+            await delivery.accepted(msg.sid, phone, msg.status)
             
-            return {"status": "success", "channel": "whatsapp", "message_id": msg.sid, "recipient": phone}
+            return {"status": "success", "channel": "whatsapp", "message_id": msg.sid, "recipient": phone,
+                    "delivery_status": msg.status, "delivery_status_url": f"/notifications/whatsapp/{msg.sid}"}
         except Exception as e:
             logger.error(f"❌ WhatsApp error for {phone}: {str(e)}")
             return {"status": "failed", "channel": "whatsapp", "error": str(e), "recipient": phone}
@@ -147,7 +151,7 @@ class CommunicationManager:
             import re
             email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
             if not re.match(email_pattern, recipient_email):
-                return {"status": "failed", "channel": "email", "error": "Invalid email format", "recipient": recipient_email}
+                return {"status": "failed", "channel": "email", "error": "Invalid email format", "recipient": recipient_email, "retryable": False}
             
             msg = MIMEMultipart('alternative')
             msg['Subject'] = subject
@@ -159,15 +163,13 @@ class CommunicationManager:
                 msg.attach(MIMEText(html_body, 'html'))
             
             # Use Gmail SMTP with app password (works without 2FA if app password is configured)
-            with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-                server.login(self.gmail_email, self.gmail_app_password)
-                server.send_message(msg)
+            await self.smtp_pool.send(msg)
             
             logger.info(f"✅ Email sent to {recipient_email}: {subject}")
             return {"status": "success", "channel": "email", "recipient": recipient_email, "subject": subject}
         except smtplib.SMTPAuthenticationError as e:
             logger.error(f"❌ Gmail authentication error: {str(e)}")
-            return {"status": "failed", "channel": "email", "error": f"Gmail authentication failed: {str(e)}. Ensure Gmail App Password is configured correctly.", "recipient": recipient_email}
+            return {"status": "failed", "channel": "email", "error": f"Gmail authentication failed: {str(e)}. Ensure Gmail App Password is configured correctly.", "recipient": recipient_email, "retryable": False}
         except Exception as e:
             logger.error(f"❌ Email error for {recipient_email}: {str(e)}")
             return {"status": "failed", "channel": "email", "error": str(e), "recipient": recipient_email}
@@ -239,7 +241,11 @@ class CommunicationManager:
     
     async def send_automated_sequence(self, payload: Dict, sequence_type: str) -> List[Dict]:
         """Send automated email/WhatsApp sequences based on triggers"""
-        results = []
+        return [await send() for _, send in self.sequence_sends(payload, sequence_type)]
+    
+    def sequence_sends(self, payload: Dict, sequence_type: str) -> List[Tuple[str, Callable[[], Awaitable[Dict]]]]:
+        """Channel sends of an automated sequence as (channel, send) pairs, not yet started"""
+        sends = []
         
         sequences = {
             "application_received": {
@@ -280,41 +286,30 @@ class CommunicationManager:
         # Send email - use provided email or skip
         candidate_email = payload.get('candidate_email')
         if candidate_email and candidate_email != "test@example.com":
-            email_result = await self.send_email(
+            sends.append(("email", lambda: self.send_email(
                 candidate_email,
                 sequence["email"]["subject"],
                 sequence["email"]["body"]
-            )
-            results.append(email_result)
+            )))
         else:
             logger.info("Skipping email - no valid email provided")
         
         # Send WhatsApp with interactive options for certain sequences
         candidate_phone = payload.get('candidate_phone')
         if candidate_phone and candidate_phone != "+1234567890":
-            if sequence_type == "interview_scheduled":
-                whatsapp_result = await self.send_whatsapp_with_buttons(
-                    payload['candidate_phone'],
-                    sequence["whatsapp"],
-                    ["✅ Confirm", "❌ Reschedule", "❓ More Info"]
-                )
-            elif sequence_type == "shortlisted":
-                whatsapp_result = await self.send_whatsapp_with_buttons(
-                    payload['candidate_phone'],
-                    sequence["whatsapp"],
-                    ["🎉 Excited!", "📅 Schedule Interview", "❓ Questions"]
-                )
-            elif sequence_type == "feedback_request":
-                whatsapp_result = await self.send_whatsapp_with_buttons(
-                    payload['candidate_phone'],
-                    sequence["whatsapp"],
-                    ["⭐ Excellent", "👍 Good", "👎 Needs Improvement"]
-                )
+            button_options = {
+                "interview_scheduled": ["✅ Confirm", "❌ Reschedule", "❓ More Info"],
+                "shortlisted": ["🎉 Excited!", "📅 Schedule Interview", "❓ Questions"],
+                "feedback_request": ["⭐ Excellent", "👍 Good", "👎 Needs Improvement"],
+            }.get(sequence_type)
+            if button_options:
+                sends.append(("whatsapp", lambda: self.send_whatsapp_with_buttons(
+                    candidate_phone, sequence["whatsapp"], button_options
+                )))
             else:
-                whatsapp_result = await self.send_whatsapp(payload['candidate_phone'], sequence["whatsapp"])
-            results.append(whatsapp_result)
+                sends.append(("whatsapp", lambda: self.send_whatsapp(candidate_phone, sequence["whatsapp"])))
         
-        return results
+        return sends
     
     async def send_multi_channel(self, payload: Dict, channels: List[str]) -> List[Dict]:
         """Send notification across multiple channels"""
@@ -458,49 +453,12 @@ _Thank you for your interest in BHIV!_"""
         except Exception as e:
             logger.error(f"❌ Portal notification error: {str(e)}")
     
-    async def send_bulk_notifications(self, candidates: List[Dict], sequence_type: str, job_data: Dict) -> Dict:
-        """Send bulk notifications to multiple candidates"""
+    async def send_bulk_notifications(self, candidates: List[Dict], sequence_type: str, job_data: Dict,
+                                      on_progress: Callable[[Dict], object] = None, batch_id: str = None) -> Dict:
+        """Send bulk notifications to multiple candidates concurrently within channel rate limits"""
         try:
-            logger.info(f"📨 Sending bulk notifications to {len(candidates)} candidates")
-            
-            results = []
-            success_count = 0
-            failed_count = 0
-            
-            for candidate in candidates:
-                try:
-                    payload = {
-                        **job_data,
-                        "candidate_name": candidate.get('name', 'Candidate'),
-                        "candidate_email": candidate.get('email', ''),
-                        "candidate_phone": candidate.get('phone', ''),
-                        "candidate_id": candidate.get('id')
-                    }
-                    
-                    candidate_results = await self.send_automated_sequence(payload, sequence_type)
-                    results.extend(candidate_results)
-                    
-                    # Count successes
-                    for result in candidate_results:
-                        if result.get('status') == 'success':
-                            success_count += 1
-                        else:
-                            failed_count += 1
-                            
-                except Exception as candidate_error:
-                    logger.error(f"❌ Bulk notification error for candidate {candidate.get('id')}: {str(candidate_error)}")
-                    failed_count += 1
-            
-            logger.info(f"✅ Bulk notifications completed: {success_count} success, {failed_count} failed")
-            
-            return {
-                "status": "completed",
-                "total_candidates": len(candidates),
-                "success_count": success_count,
-                "failed_count": failed_count,
-                "results": results
-            }
-            
+            return await self.bulk_dispatcher.dispatch(candidates, sequence_type, job_data,
+                                                       on_progress=on_progress, batch_id=batch_id)
         except Exception as e:
             logger.error(f"❌ Bulk notification error: {str(e)}")
             return {"status": "failed", "error": str(e)}
@@ -11,6 +11,8 @@ import os
 import logging
 import sys
 
+from .mongo_pool import shared_client, close_shared_clients
+
 # Add parent directory to path for config import
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -24,7 +26,7 @@ _mongo_db: Optional[Database] = None
 def get_mongo_client() -> MongoClient:
     """
     Get or create MongoDB client (sync)
-    Uses singleton pattern for connection reuse
+    Shared per process; pool settings come from MONGO_* env vars (see app.mongo_pool)
     """
     global _mongo_client
     
@@ -42,14 +44,7 @@ def get_mongo_client() -> MongoClient:
             )
         
         try:
-            _mongo_client = MongoClient(
-                mongodb_uri,
-                serverSelectionTimeoutMS=5000,
-                maxPoolSize=10,
-                minPoolSize=2,
-                connectTimeoutMS=10000,
-                socketTimeoutMS=20000,
-            )
+            _mongo_client = shared_client(mongodb_uri, MongoClient, appname="bhiv-langgraph")
             # Test connection
             _mongo_client.admin.command('ping')
             logger.info("MongoDB client (sync) initialized and connected")
@@ -99,7 +94,7 @@ def close_mongo_connections():
     global _mongo_client, _mongo_db
     
     if _mongo_client:
-        _mongo_client.close()
+        close_shared_clients()
         _mongo_client = None
         logger.info("MongoDB client closed")
     
@@ -0,0 +1,158 @@
+"""
+Shared HTTP client and response caches for calls from LangGraph tools to the API Gateway
+
+One pooled httpx.AsyncClient serves every tool call; the service starts and
+closes it with the application. Reads are cached at two levels:
+
+    - per workflow run: candidate, job and match lookups are fetched once per
+      run (scope set with workflow_cache() around the graph execution)
+    - across workflows: job details for JOB_CACHE_TTL_SECONDS, since many
+      applications arrive for the same job
+
+Concurrent lookups of the same key share one request. Failed lookups are
+never cached.
+
+Environment:
+    GATEWAY_HTTP_MAX_CONNECTIONS  pooled connections to the gateway (default 50)
+    GATEWAY_HTTP_KEEPALIVE        idle keep-alive connections kept (default 20)
+    JOB_CACHE_TTL_SECONDS         cross-workflow job details TTL (default 60, 0 disables)
+    JOB_CACHE_MAX_ENTRIES         job details kept in the cross-workflow cache (default 512)
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import settings
+from .workflow_events import NodeLatencyStats
+
+logger = logging.getLogger(__name__)
+
+HTTPX_TIMEOUT = 120.0
+CONNECT_TIMEOUT = 5.0
+
+# Per-run cache; None outside a workflow_cache() scope
+_workflow_cache: ContextVar[Optional[Dict[Any, asyncio.Future]]] = ContextVar("workflow_tool_cache", default=None)
+
+tool_latency = NodeLatencyStats()
+
+
+def _usable(future: asyncio.Future) -> bool:
+    """Pending or succeeded; failed lookups are fetched again"""
+    return not future.done() or (not future.cancelled() and future.exception() is None)
+
+
+@contextmanager
+def workflow_cache():
+    """Cache gateway reads for the duration of one workflow run.
+
+    Tasks the graph spawns inherit the context, so every node of the run
+    shares the cache.
+    """
+    token = _workflow_cache.set({})
+    try:
+        yield
+    finally:
+        _workflow_cache.reset(token)
+
+
+class GatewayClient:
+    """Pooled client for the API Gateway with per-run and job-details caches"""
+
+    def __init__(self, base_url: str, api_key: str):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.job_ttl = float(os.getenv("JOB_CACHE_TTL_SECONDS", "60"))
+        self.job_cache_size = int(os.getenv("JOB_CACHE_MAX_ENTRIES", "512"))
+        self._client: Optional[httpx.AsyncClient] = None
+        self._jobs: Dict[Any, Tuple[float, asyncio.Future]] = {}
+        self.cache_counters = {"workflow_hits": 0, "job_hits": 0, "misses": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled client, created on first use if the service did not start it"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(HTTPX_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("GATEWAY_HTTP_MAX_CONNECTIONS", "50")),
+                    max_keepalive_connections=int(os.getenv("GATEWAY_HTTP_KEEPALIVE", "20")),
+                ),
+            )
+        return self._client
+
+    def start(self):
+        logger.info(f"✅ Gateway HTTP client pooled for {self.base_url}")
+        return self.client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._jobs.clear()
+
+    async def request(self, tool: str, method: str, path: str, **kwargs) -> Any:
+        """One gateway call, timed under the tool's name; raises on HTTP errors"""
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = await self.client.request(method, path, **kwargs)
+            response.raise_for_status()
+            failed = False
+            return response.json()
+        finally:
+            tool_latency.record(tool, round((time.perf_counter() - started) * 1000, 2), error=failed)
+
+    async def cached(self, key: Any, fetch: Callable[[], Awaitable[Any]], share_across_workflows: bool = False) -> Any:
+        """Result of fetch(), reusing the current run's result and, when
+        share_across_workflows is set, a recent one from another run"""
+        run_cache = _workflow_cache.get()
+        shared = share_across_workflows and self.job_ttl > 0
+        future = run_cache.get(key) if run_cache is not None else None
+        if future is not None and _usable(future):
+            self.cache_counters["workflow_hits"] += 1
+        else:
+            future = None
+            now = time.monotonic()
+            if shared:
+                entry = self._jobs.get(key)
+                if entry and entry[0] > now and _usable(entry[1]):
+                    self.cache_counters["job_hits"] += 1
+                    future = entry[1]
+            if future is None:
+                self.cache_counters["misses"] += 1
+                future = asyncio.ensure_future(fetch())
+                if shared:
+                    if len(self._jobs) >= self.job_cache_size:
+                        self._evict_jobs(now)
+                    self._jobs[key] = (now + self.job_ttl, future)
+            if run_cache is not None:
+                run_cache[key] = future
+        # Shielded: one caller being cancelled must not cancel the shared request
+        result = await asyncio.shield(future)
+        return dict(result) if isinstance(result, dict) else result
+
+    def _evict_jobs(self, now: float):
+        for key in [k for k, (expires, _) in self._jobs.items() if expires <= now]:
+            del self._jobs[key]
+        while len(self._jobs) >= self.job_cache_size:
+            self._jobs.pop(next(iter(self._jobs)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters and per-tool latency for /workflows/stats"""
+        return {
+            "cache": {**self.cache_counters, "job_entries": len(self._jobs), "job_ttl_seconds": self.job_ttl},
+            "tool_latency_ms": tool_latency.summary(),
+        }
+
+
+gateway = GatewayClient(settings.gateway_url, settings.api_key_secret)
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect, Depends
+from fastapi import FastAPI, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 # Optional imports - LangGraph workflow engine
 try:
@@ -55,10 +56,16 @@ except ImportError:
         return get_api_key(credentials)
 # MongoDB migration: Using mongodb_tracker instead of database_tracker (PostgreSQL)
 from .mongodb_tracker import tracker
-from .rl_integration.rl_endpoints import router as rl_router
+from .mongo_pool import pool_metrics
+from .workflow_events import NODE_ORDER, node_label, node_latency, progress_after, stream_node_events
+from .checkpoint_retention import CheckpointCompactor
+from .gateway_client import gateway, workflow_cache
+from .websocket_fanout import ConnectionManager
+from .rl_integration.rl_endpoints import router as rl_router, db_adapter as rl_db_adapter, retraining_worker
+import asyncio
 import uuid
 import logging
-from typing import Dict, List, Optional
+from typing import List, Optional
 from datetime import datetime
 
 # Configure logging
@@ -124,31 +131,81 @@ if LANGGRAPH_AVAILABLE and create_application_workflow:
 else:
     logger.info("⚠️ LangGraph workflow engine not available - using simulation mode")
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-    
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        if client_id not in self.active_connections:
-            self.active_connections[client_id] = []
-        self.active_connections[client_id].append(websocket)
-        logger.info(f"✅ WebSocket connected: {client_id}")
-    
-    def disconnect(self, websocket: WebSocket, client_id: str):
-        if client_id in self.active_connections:
-            self.active_connections[client_id].remove(websocket)
-            logger.info(f"❌ WebSocket disconnected: {client_id}")
-    
-    async def broadcast(self, client_id: str, message: dict):
-        if client_id in self.active_connections:
-            for connection in self.active_connections[client_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"WebSocket broadcast error: {str(e)}")
+# Buffered workflow progress writes
+@app.on_event("startup")
+async def start_workflow_tracker():
+    tracker.start()
+
+@app.on_event("shutdown")
+async def stop_workflow_tracker():
+    await tracker.stop()
+
+# Pooled HTTP client for tool calls to the gateway
+@app.on_event("startup")
+async def start_gateway_client():
+    gateway.start()
+
+@app.on_event("shutdown")
+async def close_gateway_client():
+    await gateway.aclose()
+
+# Checkpoint retention (only when the graph checkpoints to MongoDB)
+checkpoint_compactor = None
+
+@app.on_event("startup")
+async def start_checkpoint_compactor():
+    global checkpoint_compactor
+    checkpointer = getattr(application_workflow, "checkpointer", None)
+    if not hasattr(checkpointer, "async_db"):
+        return
+    # Created here so the Motor client binds to the server's event loop
+    checkpoint_compactor = CheckpointCompactor(checkpointer.async_db)
+    if os.getenv("CHECKPOINT_COMPACTION_ENABLED", "true").lower() == "true":
+        checkpoint_compactor.start()
+
+@app.on_event("shutdown")
+async def stop_checkpoint_compactor():
+    if checkpoint_compactor:
+        await checkpoint_compactor.stop()
+
+# Pending WhatsApp status polls and the Twilio thread pool
+@app.on_event("shutdown")
+async def stop_whatsapp_delivery():
+    from .communication import comm_manager
+    await comm_manager.whatsapp_delivery.stop()
+    comm_manager.whatsapp_delivery.executor.shutdown(wait=False)
 
+# Pooled SMTP sessions
+@app.on_event("shutdown")
+async def close_smtp_pool():
+    from .communication import comm_manager
+    await comm_manager.smtp_pool.aclose()
+
+# RL feedback stored before rl_feedback_aggregates existed. Awaited, so this process serves no feedback
+# before the backfill is claimed; replicas that find it claimed return at once
+@app.on_event("startup")
+async def backfill_rl_feedback_aggregates():
+    folded = await asyncio.to_thread(rl_db_adapter.backfill_feedback_aggregates)
+    if folded:
+        logger.info(f"✅ {folded} legacy RL feedback records folded into aggregates")
+
+# Retrained RL scoring weights: resume the active snapshot and follow later activations,
+# stop a running retrain
+@app.on_event("startup")
+async def load_rl_model():
+    try:
+        model = await asyncio.to_thread(retraining_worker.load_active_model)
+        if model:
+            logger.info(f"✅ RL scoring model {model.version} loaded")
+    except Exception as e:
+        logger.warning(f"⚠️ RL model snapshot not loaded, using default weights: {e}")
+    retraining_worker.start_refresh()
+
+@app.on_event("shutdown")
+async def stop_rl_retraining():
+    await retraining_worker.stop()
+
+# Backpressured WebSocket fan-out (per-connection queues, throttled progress)
 manager = ConnectionManager()
 
 # Pydantic models
@@ -210,6 +267,11 @@ async def health_check():
     })
     return health_data
 
+@app.get("/metrics", tags=["Core API Endpoints"], response_class=PlainTextResponse)
+async def get_metrics():
+    """MongoDB connection-pool and WebSocket fan-out metrics in Prometheus text format"""
+    return pool_metrics.prometheus_text("langgraph") + manager.prometheus_text("langgraph")
+
 @app.post("/workflows/application/start", response_model=WorkflowResponse, tags=["Workflow Management"])
 async def start_application_workflow(
     request: ApplicationRequest,
@@ -271,7 +333,7 @@ async def start_application_workflow(
         )
         
         # Track workflow in database with full details
-        tracker.create_workflow(
+        await tracker.create_workflow(
             workflow_id=workflow_id,
             workflow_type="candidate_application",
             candidate_id=request.candidate_id,
@@ -303,7 +365,7 @@ async def get_workflow_status(workflow_id: str, api_key: str = Depends(get_api_k
     """Get Detailed Workflow Status"""
     try:
         # Get status from database tracker (primary source)
-        db_status = tracker.get_workflow_status(workflow_id)
+        db_status = await tracker.get_workflow_status(workflow_id)
         if db_status:
             return {
                 "workflow_id": db_status["workflow_id"],
@@ -312,6 +374,7 @@ async def get_workflow_status(workflow_id: str, api_key: str = Depends(get_api_k
                 "progress_percentage": db_status.get("progress_percentage", 0),
                 "current_step": db_status.get("current_step", "processing"),
                 "total_steps": db_status.get("total_steps", 5),
+                "node_timings_ms": db_status.get("node_timings", {}),
                 "candidate_id": db_status.get("candidate_id"),
                 "job_id": db_status.get("job_id"),
                 "input_data": db_status.get("input_data", {}),
@@ -332,7 +395,7 @@ async def get_workflow_status(workflow_id: str, api_key: str = Depends(get_api_k
         config = {"configurable": {"thread_id": workflow_id}}
         
         try:
-            state = application_workflow.get_state(config)
+            state = await application_workflow.aget_state(config)
             values = state.values if hasattr(state, 'values') else {}
             return {
                 "workflow_id": workflow_id,
@@ -391,9 +454,9 @@ async def resume_workflow(workflow_id: str, api_key: str = Depends(get_api_key))
             
         config = {"configurable": {"thread_id": workflow_id}}
         
-        # Use invoke instead of ainvoke to avoid async issues
         try:
-            result = application_workflow.invoke(None, config)
+            with workflow_cache():
+                result = await application_workflow.ainvoke(None, config)
         except Exception as invoke_error:
             logger.error(f"❌ Workflow invoke error: {str(invoke_error)}")
             return {
@@ -436,9 +499,9 @@ async def list_workflows(status: str = None, limit: int = 50, api_key: str = Dep
     """
     try:
         if status == "active":
-            workflows = tracker.get_active_workflows()
+            workflows = await tracker.get_active_workflows()
         else:
-            workflows = tracker.list_workflows(limit=limit)
+            workflows = await tracker.list_workflows(limit=limit)
         
         # Add computed fields
         for workflow in workflows:
@@ -695,16 +758,26 @@ class BulkNotificationRequest(BaseModel):
     candidates: List[dict]
     sequence_type: str
     job_data: dict
+    batch_id: Optional[str] = None
+    run_in_background: bool = False
 
 @app.post("/automation/bulk-notifications", tags=["Communication Tools"])
 async def send_bulk_notifications(
+    background_tasks: BackgroundTasks,
     request: BulkNotificationRequest = None,
     candidates: Optional[List[dict]] = None,
     sequence_type: Optional[str] = None,
     job_data: Optional[dict] = None,
+    batch_id: Optional[str] = None,
+    run_in_background: bool = False,
     api_key: str = Depends(get_api_key)
 ):
-    """Send Bulk Notifications to Multiple Candidates"""
+    """Send Bulk Notifications to Multiple Candidates
+    
+    Candidates are notified concurrently within per-channel rate limits.
+    Progress and final counts are streamed to `/ws/{batch_id}`; with
+    `run_in_background` the call returns the batch_id right away.
+    """
     try:
         from .communication import comm_manager
         
@@ -713,15 +786,38 @@ async def send_bulk_notifications(
             cands = request.candidates
             seq_type = request.sequence_type
             job = request.job_data
+            batch_id = request.batch_id or batch_id
+            run_in_background = request.run_in_background or run_in_background
         else:
             cands = candidates or []
             seq_type = sequence_type or "application_received"
             job = job_data or {}
+        batch_id = batch_id or str(uuid.uuid4())
+        
+        async def stream_progress(snapshot: dict):
+            await manager.broadcast(batch_id, {
+                "type": "completed" if snapshot["state"] == "completed" else "progress",
+                **snapshot,
+                "timestamp": datetime.now().isoformat()
+            })
+        
+        if run_in_background:
+            background_tasks.add_task(comm_manager.send_bulk_notifications, cands, seq_type, job,
+                                      on_progress=stream_progress, batch_id=batch_id)
+            return {
+                "success": True,
+                "batch_id": batch_id,
+                "status": "dispatching",
+                "total_candidates": len(cands),
+                "progress_websocket": f"/ws/{batch_id}"
+            }
         
-        result = await comm_manager.send_bulk_notifications(cands, seq_type, job)
+        result = await comm_manager.send_bulk_notifications(cands, seq_type, job,
+                                                            on_progress=stream_progress, batch_id=batch_id)
         
         return {
             "success": True,
+            "batch_id": batch_id,
             "bulk_result": result,
             "sent_at": datetime.now().isoformat()
         }
@@ -767,6 +863,39 @@ async def whatsapp_webhook(request: dict, api_key: str = Depends(get_api_key)):
         logger.error(f"❌ Webhook error: {str(e)}")
         return {"success": False, "error": str(e)}
 
+@app.post("/webhook/whatsapp/status", tags=["Communication Tools"])
+async def whatsapp_status_webhook(request: Request):
+    """Twilio message status callback (set WHATSAPP_STATUS_CALLBACK_URL to this endpoint)
+    
+    Authenticated by Twilio's X-Twilio-Signature rather than the API key.
+    """
+    from urllib.parse import parse_qsl
+    from twilio.request_validator import RequestValidator
+    from .communication import comm_manager
+    
+    params = dict(parse_qsl((await request.body()).decode()))
+    delivery = comm_manager.whatsapp_delivery
+    validator = RequestValidator(getattr(settings, 'twilio_auth_token', ''))
+    if not validator.validate(delivery.callback_url or str(request.url), params,
+                              request.headers.get("X-Twilio-Signature", "")):
+        raise HTTPException(status_code=403, detail="Invalid Twilio signature")
+    
+    message_sid = params.get("MessageSid")
+    status = params.get("MessageStatus")
+    if not message_sid or not status:
+        raise HTTPException(status_code=400, detail="MessageSid and MessageStatus are required")
+    await delivery.update_status(message_sid, status, params.get("ErrorCode"), params.get("ErrorMessage"))
+    return PlainTextResponse("", status_code=204)
+
+@app.get("/notifications/whatsapp/{message_sid}", tags=["Communication Tools"])
+async def get_whatsapp_delivery(message_sid: str, api_key: str = Depends(get_api_key)):
+    """Delivery status of a WhatsApp message, updated after the send returns"""
+    from .communication import comm_manager
+    record = await comm_manager.whatsapp_delivery.get_record(message_sid)
+    if not record:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return record
+
 @app.get("/workflows/stats", tags=["Workflow Monitoring"])
 async def get_workflow_stats(api_key: str = Depends(get_api_key)):
     """Workflow Statistics and Analytics
@@ -782,8 +911,9 @@ async def get_workflow_stats(api_key: str = Depends(get_api_key)):
     ```
     """
     try:
-        all_workflows = tracker.list_workflows(limit=1000)
-        active_workflows = tracker.get_active_workflows()
+        from .communication import comm_manager
+        all_workflows = await tracker.list_workflows(limit=1000)
+        active_workflows = await tracker.get_active_workflows()
         
         stats = {
             "total_workflows": len(all_workflows),
@@ -792,6 +922,14 @@ async def get_workflow_stats(api_key: str = Depends(get_api_key)):
             "failed_workflows": len([w for w in all_workflows if w.get("status") == "failed"]),
             "average_completion_time": "3-5 minutes",  # Could be calculated from actual data
             "success_rate": f"{(len([w for w in all_workflows if w.get('status') == 'completed']) / max(len(all_workflows), 1) * 100):.1f}%",
+            "node_latency_ms": node_latency.summary(),
+            "tracker_writes": tracker.stats(),
+            "gateway_tools": gateway.stats(),
+            "whatsapp_delivery": comm_manager.whatsapp_delivery.stats(),
+            "smtp_pool": comm_manager.smtp_pool.stats(),
+            "websockets": manager.stats(),
+            "rl_model": retraining_worker.stats(),
+            "checkpoints": await checkpoint_compactor.stats() if checkpoint_compactor else {"retention": "disabled"},
             "database_connection": "connected" if tracker.connection else "fallback_mode",
             "last_updated": datetime.now().isoformat()
         }
@@ -848,7 +986,7 @@ async def test_integration(api_key: str = Depends(get_api_key)):
     """Integration Testing and System Validation"""
     try:
         # Test database connection
-        db_status = "connected" if tracker._db else "fallback"
+        db_status = "connected" if tracker.connection else "fallback"
         
         # Test communication manager
         comm_status = "available"
@@ -882,72 +1020,47 @@ async def test_integration(api_key: str = Depends(get_api_key)):
             "tested_at": datetime.now().isoformat()
         }
 
-# Background task with detailed progress tracking
+# Background task with progress driven by graph node events
 async def _execute_workflow(workflow_id: str, state: dict, config: dict):
-    """Execute workflow with detailed progress tracking and fallback"""
+    """Execute workflow, reporting progress as each graph node starts and finishes"""
     try:
-        logger.info(f"⏳ Executing workflow {workflow_id} with detailed progress tracking")
-        
-        # Step 1: Initialize (0-10%)
-        tracker.update_workflow(workflow_id, 
-                              status="running", 
-                              progress_percentage=5,
-                              current_step="Initializing workflow",
-                              total_steps=6)
-        await _broadcast_progress(workflow_id, "Workflow started", 5)
+        logger.info(f"⏳ Executing workflow {workflow_id}")
+        tracker.update_workflow(workflow_id,
+                              status="running",
+                              progress_percentage=0,
+                              current_step="Starting workflow",
+                              total_steps=len(NODE_ORDER))
+        await _broadcast_progress(workflow_id, "Workflow started", 0)
         
-        import asyncio
-        await asyncio.sleep(0.5)
-        
-        # Step 2: Data validation (10-25%)
-        tracker.update_workflow(workflow_id, 
-                              progress_percentage=15,
-                              current_step="Validating candidate data")
-        await _broadcast_progress(workflow_id, "Validating data", 15)
-        await asyncio.sleep(1)
-        
-        tracker.update_workflow(workflow_id, progress_percentage=25)
-        await _broadcast_progress(workflow_id, "Data validation complete", 25)
-        
-        # Step 3: Initial screening (25-45%)
-        tracker.update_workflow(workflow_id, 
-                              progress_percentage=30,
-                              current_step="Performing initial screening")
-        await _broadcast_progress(workflow_id, "Initial screening in progress", 30)
-        await asyncio.sleep(1.5)
-        
-        tracker.update_workflow(workflow_id, progress_percentage=45)
-        await _broadcast_progress(workflow_id, "Initial screening complete", 45)
-        
-        # Step 4: AI matching analysis (45-70%)
-        tracker.update_workflow(workflow_id, 
-                              progress_percentage=50,
-                              current_step="Running AI matching analysis")
-        await _broadcast_progress(workflow_id, "AI analysis started", 50)
-        await asyncio.sleep(2)
-        
-        # Simulate AI processing with incremental updates
-        for progress in [55, 60, 65, 70]:
-            tracker.update_workflow(workflow_id, progress_percentage=progress)
-            await _broadcast_progress(workflow_id, f"AI analysis {progress}% complete", progress)
-            await asyncio.sleep(0.5)
-        
-        # Step 5: Generate recommendations (70-90%)
-        tracker.update_workflow(workflow_id, 
-                              progress_percentage=75,
-                              current_step="Generating recommendations")
-        await _broadcast_progress(workflow_id, "Generating recommendations", 75)
-        await asyncio.sleep(1)
-        
-        # Try to run actual workflow if available
         final_score = 75.5
         final_status = "completed"
         output_data = {}
+        node_timings = {}
+        progress = 0
         
         try:
             if application_workflow:
                 logger.info(f"🤖 Running LangGraph workflow for {workflow_id}")
-                result = application_workflow.invoke(state, config)
+                result = {}
+                # Gateway reads are cached for this run only
+                with workflow_cache():
+                    async for event in stream_node_events(application_workflow, state, config):
+                        if event["type"] == "final_state":
+                            result = event["state"]
+                            continue
+                        node = event["node"]
+                        if event["type"] == "node_started":
+                            tracker.update_workflow(workflow_id, current_step=node_label(node))
+                            await _broadcast_progress(workflow_id, f"{node_label(node)} started", progress,
+                                                      event="node_started", node=node)
+                        else:
+                            node_latency.record(node, event["duration_ms"], error=bool(event["error"]))
+                            node_timings[node] = event["duration_ms"]
+                            progress = progress_after(node)
+                            tracker.update_workflow(workflow_id, progress_percentage=progress, node_timings=node_timings)
+                            await _broadcast_progress(workflow_id, f"{node_label(node)} finished", progress,
+                                                      event="node_finished", node=node,
+                                                      duration_ms=event["duration_ms"])
                 final_status = result.get("application_status", "completed")
                 final_score = result.get("matching_score", 75.5)
                 output_data = {
@@ -974,12 +1087,7 @@ async def _execute_workflow(workflow_id: str, state: dict, config: dict):
                 "error_details": str(invoke_error)[:200]
             }
         
-        tracker.update_workflow(workflow_id, progress_percentage=90)
-        await _broadcast_progress(workflow_id, "Finalizing results", 90)
-        await asyncio.sleep(0.5)
-        
-        # Step 6: Complete workflow (90-100%)
-        tracker.complete_workflow(
+        await tracker.complete_workflow(
             workflow_id=workflow_id,
             final_status=final_status,
             output_data=output_data
@@ -997,6 +1105,7 @@ async def _execute_workflow(workflow_id: str, state: dict, config: dict):
             "progress_percentage": 100,
             "matching_score": final_score,
             "output_data": output_data,
+            "node_timings_ms": node_timings,
             "timestamp": datetime.now().isoformat()
         })
         
@@ -1004,7 +1113,7 @@ async def _execute_workflow(workflow_id: str, state: dict, config: dict):
         logger.error(f"❌ Workflow {workflow_id} failed with error: {str(e)}")
         
         # Update with error status
-        tracker.complete_workflow(
+        await tracker.complete_workflow(
             workflow_id=workflow_id,
             final_status="failed",
             error_message=str(e)[:500]
@@ -1019,14 +1128,15 @@ async def _execute_workflow(workflow_id: str, state: dict, config: dict):
             "timestamp": datetime.now().isoformat()
         })
 
-async def _broadcast_progress(workflow_id: str, message: str, progress: int):
-    """Helper function to broadcast progress updates"""
+async def _broadcast_progress(workflow_id: str, message: str, progress: int, **details):
+    """Helper function to broadcast progress updates (details: node event fields)"""
     try:
         await manager.broadcast(workflow_id, {
             "type": "progress",
             "workflow_id": workflow_id,
             "message": message,
             "progress_percentage": progress,
+            **details,
             "timestamp": datetime.now().isoformat()
         })
     except Exception as e:
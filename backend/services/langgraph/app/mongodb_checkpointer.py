@@ -1,111 +1,254 @@
 """
 MongoDB Checkpointer for LangGraph
 Custom implementation to replace PostgresSaver
+
+Storage (one database, three collections):
+    langgraph_checkpoints        one document per checkpoint; thread_ts holds
+                                 the checkpoint id, the checkpoint itself
+                                 (minus channel values) is serde-encoded binary
+    langgraph_checkpoint_blobs   channel values keyed by (channel, version);
+                                 only channels whose version changed are written,
+                                 so an unchanged message history is stored once
+    langgraph_checkpoint_writes  pending writes of each checkpoint's tasks
+
+Old checkpoints are pruned by checkpoint_retention.CheckpointCompactor.
+
+Channel values that are plain BSON types (strings, numbers, lists/dicts of
+them) are stored natively and stay readable in the database; anything else
+(message objects, custom classes) is stored as the serializer's compact
+msgpack binary.
+
+The async interface uses a Motor client from the shared pool. Each
+aput_writes call is one bulk write, made before it returns, so a task's
+writes survive a crash or cancellation and other replicas see them; aput
+writes the changed blobs and the checkpoint concurrently.
 """
-from typing import Any, Dict, Iterator, Optional, Tuple
-from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointMetadata, CheckpointTuple
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from pymongo import MongoClient, UpdateOne
 from datetime import datetime
-import json
 import os
 import logging
 
+from .mongo_pool import shared_client
+
 logger = logging.getLogger(__name__)
 
+CHECKPOINTS = "langgraph_checkpoints"
+BLOBS = "langgraph_checkpoint_blobs"
+WRITES = "langgraph_checkpoint_writes"
+
+_BSON_SCALARS = (str, bool, float, type(None))
+_BSON_INT_RANGE = (-(2 ** 63), 2 ** 63 - 1)
+
+
+def _is_bson_native(value: Any, depth: int = 0) -> bool:
+    """True if value round-trips through BSON unchanged"""
+    if depth > 20:
+        return False
+    if isinstance(value, _BSON_SCALARS):
+        return True
+    if type(value) is int:
+        return _BSON_INT_RANGE[0] <= value <= _BSON_INT_RANGE[1]
+    if type(value) is list:
+        return all(_is_bson_native(item, depth + 1) for item in value)
+    if type(value) is dict:
+        return all(type(k) is str and not k.startswith("$") and "." not in k and _is_bson_native(v, depth + 1)
+                   for k, v in value.items())
+    return False
+
 
 class MongoDBSaver(BaseCheckpointSaver):
     """MongoDB-based checkpoint saver for LangGraph workflows"""
-    
+
     def __init__(self, mongodb_uri: str = None, db_name: str = None):
         super().__init__()
         self._client: Optional[MongoClient] = None
         self._db = None
+        self._adb = None
         self._mongodb_uri = mongodb_uri or os.getenv("DATABASE_URL") or os.getenv("MONGODB_URI")
         self._db_name = db_name or os.getenv("MONGODB_DB_NAME", "bhiv_hr")
-        self._collection_name = "langgraph_checkpoints"
         self._connect()
-    
+
     def _connect(self):
         """Establish MongoDB connection"""
         try:
             if not self._mongodb_uri:
                 raise ValueError("MongoDB URI is required")
-            
-            self._client = MongoClient(self._mongodb_uri, serverSelectionTimeoutMS=5000)
+
+            self._client = shared_client(self._mongodb_uri, MongoClient, appname="bhiv-langgraph")
             self._client.admin.command('ping')  # Test connection
             self._db = self._client[self._db_name]
-            
-            # Create indexes for efficient querying
-            self._db[self._collection_name].create_index([("thread_id", 1), ("thread_ts", -1)])
-            
+
+            # Indexes on all three collections are created by the gateway index reconciler
+
             logger.info(f"✅ MongoDB checkpointer connected to {self._db_name}")
         except Exception as e:
             logger.error(f"❌ MongoDB checkpointer connection failed: {e}")
             raise
-    
+
+    @property
+    def async_db(self):
+        """Motor database, created on first async use (binds to the running loop)"""
+        if self._adb is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+
+            client = shared_client(self._mongodb_uri, AsyncIOMotorClient, appname="bhiv-langgraph")
+            self._adb = client[self._db_name]
+        return self._adb
+
     @classmethod
     def from_conn_string(cls, conn_string: str, db_name: str = None) -> "MongoDBSaver":
         """Create saver from connection string (compatible with PostgresSaver API)"""
         return cls(mongodb_uri=conn_string, db_name=db_name)
-    
-    def _serialize_checkpoint(self, checkpoint: Checkpoint) -> Dict[str, Any]:
-        """Serialize checkpoint for MongoDB storage"""
-        return {
-            "v": checkpoint.get("v", 1),
-            "ts": checkpoint.get("ts", datetime.utcnow().isoformat()),
-            "id": checkpoint.get("id"),
-            "channel_values": json.dumps(checkpoint.get("channel_values", {})),
-            "channel_versions": json.dumps(checkpoint.get("channel_versions", {})),
-            "versions_seen": json.dumps(checkpoint.get("versions_seen", {})),
+
+    # ----- encoding -----
+
+    def _dump(self, value: Any) -> Dict[str, Any]:
+        if _is_bson_native(value):
+            return {"type": "bson", "value": value}
+        type_, data = self.serde.dumps_typed(value)
+        return {"type": type_, "data": data}
+
+    def _load(self, stored: Dict[str, Any]) -> Any:
+        if stored["type"] == "bson":
+            return stored["value"]
+        return self.serde.loads_typed((stored["type"], stored["data"]))
+
+    @staticmethod
+    def _thread_key(config: Dict[str, Any]) -> Tuple[str, str]:
+        configurable = config.get("configurable", {})
+        return configurable.get("thread_id"), configurable.get("checkpoint_ns", "")
+
+    def _put_docs(self, config, checkpoint, metadata, new_versions) -> Tuple[Dict[str, Any], List[UpdateOne]]:
+        """Checkpoint document plus upserts for the channel values that changed"""
+        thread_id, checkpoint_ns = self._thread_key(config)
+        if not thread_id:
+            raise ValueError("thread_id is required in config")
+
+        stored = dict(checkpoint)
+        values = stored.pop("channel_values", {})
+        blob_ops = [
+            UpdateOne(
+                {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "channel": channel, "version": version},
+                {"$setOnInsert": {"value": self._dump(values[channel])}},
+                upsert=True,
+            )
+            for channel, version in new_versions.items()
+            if channel in values
+        ]
+        type_, data = self.serde.dumps_typed(stored)
+        doc = {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "thread_ts": checkpoint["id"],
+            "parent_ts": config.get("configurable", {}).get("checkpoint_id"),
+            "type": type_,
+            "checkpoint": data,
+            # Plain copy so retention can find referenced blobs without decoding
+            "channel_versions": dict(stored.get("channel_versions", {})),
+            "metadata": dict(metadata or {}),
+            "created_at": datetime.utcnow()
+        }
+        return doc, blob_ops
+
+    def _write_ops(self, config, writes, task_id, task_path) -> List[UpdateOne]:
+        configurable = config["configurable"]
+        key = {
+            "thread_id": configurable["thread_id"],
+            "checkpoint_ns": configurable.get("checkpoint_ns", ""),
+            "thread_ts": configurable["checkpoint_id"],
+            "task_id": task_id,
         }
-    
-    def _deserialize_checkpoint(self, doc: Dict[str, Any]) -> Checkpoint:
-        """Deserialize checkpoint from MongoDB document"""
+        ops = []
+        for idx, (channel, value) in enumerate(writes):
+            fields = {"channel": channel, "value": self._dump(value), "task_path": task_path}
+            # Special channels (errors, interrupts) overwrite; regular writes are kept once
+            update = {"$set": fields} if channel in WRITES_IDX_MAP else {"$setOnInsert": fields}
+            ops.append(UpdateOne({**key, "idx": WRITES_IDX_MAP.get(channel, idx)}, update, upsert=True))
+        return ops
+
+    @staticmethod
+    def _blob_query(doc: Dict[str, Any], channel_versions: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not channel_versions:
+            return None
         return {
-            "v": doc.get("v", 1),
-            "ts": doc.get("ts"),
-            "id": doc.get("id"),
-            "channel_values": json.loads(doc.get("channel_values", "{}")),
-            "channel_versions": json.loads(doc.get("channel_versions", "{}")),
-            "versions_seen": json.loads(doc.get("versions_seen", "{}")),
+            "thread_id": doc["thread_id"],
+            "checkpoint_ns": doc.get("checkpoint_ns", ""),
+            "$or": [{"channel": channel, "version": version} for channel, version in channel_versions.items()],
         }
-    
+
+    @staticmethod
+    def _writes_query(doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {"thread_id": doc["thread_id"], "checkpoint_ns": doc.get("checkpoint_ns", ""),
+                "thread_ts": doc["thread_ts"]}
+
+    def _to_tuple(self, doc, checkpoint, blobs, writes) -> CheckpointTuple:
+        thread_id, checkpoint_ns = doc["thread_id"], doc.get("checkpoint_ns", "")
+        parent_ts = doc.get("parent_ts")
+        writes = sorted(writes, key=lambda w: (w["task_id"], w["idx"]))
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": doc["thread_ts"]}},
+            checkpoint={**checkpoint, "channel_values": {b["channel"]: self._load(b["value"]) for b in blobs}},
+            metadata=doc.get("metadata", {}),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_ts}}
+                if parent_ts else None
+            ),
+            pending_writes=[(w["task_id"], w["channel"], self._load(w["value"])) for w in writes],
+        )
+
+    @staticmethod
+    def _tuple_query(config: Dict[str, Any]) -> Dict[str, Any]:
+        configurable = config.get("configurable", {})
+        query = {"thread_id": configurable.get("thread_id"), "checkpoint_ns": configurable.get("checkpoint_ns", "")}
+        if get_checkpoint_id(config):
+            query["thread_ts"] = get_checkpoint_id(config)
+        return query
+
+    @staticmethod
+    def _list_query(config, filter, before) -> Dict[str, Any]:
+        query = {}
+        if config:
+            configurable = config.get("configurable", {})
+            if configurable.get("thread_id"):
+                query["thread_id"] = configurable["thread_id"]
+            if configurable.get("checkpoint_ns") is not None:
+                query["checkpoint_ns"] = configurable["checkpoint_ns"]
+            if get_checkpoint_id(config):
+                query["thread_ts"] = get_checkpoint_id(config)
+        if before and get_checkpoint_id(before):
+            query["thread_ts"] = {"$lt": get_checkpoint_id(before)}
+        for key, value in (filter or {}).items():
+            query[f"metadata.{key}"] = value
+        return query
+
+    # ----- sync interface -----
+
+    def _load_doc(self, doc: Dict[str, Any]) -> CheckpointTuple:
+        checkpoint = self.serde.loads_typed((doc["type"], doc["checkpoint"]))
+        blob_query = self._blob_query(doc, checkpoint.get("channel_versions"))
+        blobs = list(self._db[BLOBS].find(blob_query)) if blob_query else []
+        writes = list(self._db[WRITES].find(self._writes_query(doc)))
+        return self._to_tuple(doc, checkpoint, blobs, writes)
+
     def get_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
-        """Get checkpoint tuple for a thread"""
-        thread_id = config.get("configurable", {}).get("thread_id")
-        thread_ts = config.get("configurable", {}).get("thread_ts")
-        
-        if not thread_id:
+        """Get checkpoint tuple for a thread (latest unless checkpoint_id is given)"""
+        if not config.get("configurable", {}).get("thread_id"):
             return None
-        
-        try:
-            query = {"thread_id": thread_id}
-            if thread_ts:
-                query["thread_ts"] = thread_ts
-            
-            doc = self._db[self._collection_name].find_one(
-                query,
-                sort=[("thread_ts", -1)]
-            )
-            
-            if not doc:
-                return None
-            
-            checkpoint = self._deserialize_checkpoint(doc.get("checkpoint", {}))
-            metadata = doc.get("metadata", {})
-            parent_config = doc.get("parent_config")
-            
-            return CheckpointTuple(
-                config={"configurable": {"thread_id": thread_id, "thread_ts": doc.get("thread_ts")}},
-                checkpoint=checkpoint,
-                metadata=metadata,
-                parent_config=parent_config
-            )
-        except Exception as e:
-            logger.error(f"Error getting checkpoint: {e}")
-            return None
-    
+        doc = self._db[CHECKPOINTS].find_one(self._tuple_query(config), sort=[("thread_ts", -1)])
+        return self._load_doc(doc) if doc else None
+
     def list(
         self,
         config: Optional[Dict[str, Any]] = None,
@@ -114,79 +257,111 @@ class MongoDBSaver(BaseCheckpointSaver):
         before: Optional[Dict[str, Any]] = None,
         limit: Optional[int] = None,
     ) -> Iterator[CheckpointTuple]:
-        """List checkpoints for a thread"""
-        query = {}
-        
-        if config:
-            thread_id = config.get("configurable", {}).get("thread_id")
-            if thread_id:
-                query["thread_id"] = thread_id
-        
-        if before:
-            before_ts = before.get("configurable", {}).get("thread_ts")
-            if before_ts:
-                query["thread_ts"] = {"$lt": before_ts}
-        
-        if filter:
-            for key, value in filter.items():
-                query[f"metadata.{key}"] = value
-        
-        try:
-            cursor = self._db[self._collection_name].find(query).sort("thread_ts", -1)
-            
-            if limit:
-                cursor = cursor.limit(limit)
-            
-            for doc in cursor:
-                checkpoint = self._deserialize_checkpoint(doc.get("checkpoint", {}))
-                metadata = doc.get("metadata", {})
-                parent_config = doc.get("parent_config")
-                
-                yield CheckpointTuple(
-                    config={"configurable": {"thread_id": doc.get("thread_id"), "thread_ts": doc.get("thread_ts")}},
-                    checkpoint=checkpoint,
-                    metadata=metadata,
-                    parent_config=parent_config
-                )
-        except Exception as e:
-            logger.error(f"Error listing checkpoints: {e}")
-    
+        """List checkpoints, newest first"""
+        cursor = self._db[CHECKPOINTS].find(self._list_query(config, filter, before)).sort("thread_ts", -1)
+        if limit:
+            cursor = cursor.limit(limit)
+        for doc in cursor:
+            yield self._load_doc(doc)
+
     def put(
         self,
         config: Dict[str, Any],
         checkpoint: Checkpoint,
         metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
     ) -> Dict[str, Any]:
         """Save a checkpoint"""
-        thread_id = config.get("configurable", {}).get("thread_id")
-        thread_ts = checkpoint.get("ts", datetime.utcnow().isoformat())
-        
-        if not thread_id:
-            raise ValueError("thread_id is required in config")
-        
-        try:
-            doc = {
-                "thread_id": thread_id,
-                "thread_ts": thread_ts,
-                "checkpoint": self._serialize_checkpoint(checkpoint),
-                "metadata": metadata or {},
-                "parent_config": config.get("configurable", {}).get("parent_config"),
-                "created_at": datetime.utcnow()
-            }
-            
-            self._db[self._collection_name].update_one(
-                {"thread_id": thread_id, "thread_ts": thread_ts},
-                {"$set": doc},
-                upsert=True
-            )
-            
-            return {"configurable": {"thread_id": thread_id, "thread_ts": thread_ts}}
-        except Exception as e:
-            logger.error(f"Error saving checkpoint: {e}")
-            raise
-    
+        doc, blob_ops = self._put_docs(config, checkpoint, metadata, new_versions)
+        if blob_ops:
+            self._db[BLOBS].bulk_write(blob_ops, ordered=False)
+        self._db[CHECKPOINTS].update_one(
+            {"thread_id": doc["thread_id"], "checkpoint_ns": doc["checkpoint_ns"], "thread_ts": doc["thread_ts"]},
+            {"$set": doc},
+            upsert=True
+        )
+        return {"configurable": {"thread_id": doc["thread_id"], "checkpoint_ns": doc["checkpoint_ns"],
+                                 "checkpoint_id": doc["thread_ts"]}}
+
+    def put_writes(
+        self,
+        config: Dict[str, Any],
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store intermediate writes linked to a checkpoint"""
+        ops = self._write_ops(config, writes, task_id, task_path)
+        if ops:
+            self._db[WRITES].bulk_write(ops, ordered=False)
+
+    # ----- async interface -----
+
+    async def _aload_doc(self, doc: Dict[str, Any]) -> CheckpointTuple:
+        checkpoint = self.serde.loads_typed((doc["type"], doc["checkpoint"]))
+        blob_query = self._blob_query(doc, checkpoint.get("channel_versions"))
+        blobs, writes = await asyncio.gather(
+            self.async_db[BLOBS].find(blob_query).to_list(None) if blob_query else asyncio.sleep(0, []),
+            self.async_db[WRITES].find(self._writes_query(doc)).to_list(None),
+        )
+        return self._to_tuple(doc, checkpoint, blobs, writes)
+
+    async def aget_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
+        if not config.get("configurable", {}).get("thread_id"):
+            return None
+        doc = await self.async_db[CHECKPOINTS].find_one(self._tuple_query(config), sort=[("thread_ts", -1)])
+        return await self._aload_doc(doc) if doc else None
+
+    async def alist(
+        self,
+        config: Optional[Dict[str, Any]] = None,
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        cursor = self.async_db[CHECKPOINTS].find(self._list_query(config, filter, before)).sort("thread_ts", -1)
+        if limit:
+            cursor = cursor.limit(limit)
+        async for doc in cursor:
+            yield await self._aload_doc(doc)
+
+    async def aput(
+        self,
+        config: Dict[str, Any],
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> Dict[str, Any]:
+        doc, blob_ops = self._put_docs(config, checkpoint, metadata, new_versions)
+        db = self.async_db
+        # Blobs land before the checkpoint document, which acts as the commit
+        # marker: a reader never sees a checkpoint whose channel blobs are missing
+        if blob_ops:
+            await db[BLOBS].bulk_write(blob_ops, ordered=False)
+        await db[CHECKPOINTS].update_one(
+            {"thread_id": doc["thread_id"], "checkpoint_ns": doc["checkpoint_ns"], "thread_ts": doc["thread_ts"]},
+            {"$set": doc},
+            upsert=True,
+        )
+        return {"configurable": {"thread_id": doc["thread_id"], "checkpoint_ns": doc["checkpoint_ns"],
+                                 "checkpoint_id": doc["thread_ts"]}}
+
+    async def aput_writes(
+        self,
+        config: Dict[str, Any],
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        ops = self._write_ops(config, writes, task_id, task_path)
+        if ops:
+            await self.async_db[WRITES].bulk_write(ops, ordered=False)
+
     def close(self):
-        """Close MongoDB connection"""
+        """Release the MongoDB connection (the shared pool stays open for other users)"""
         if self._client:
-            self._client.close()
-            logger.info("MongoDB checkpointer connection closed")
+            self._client = None
+            self._db = None
+            self._adb = None
+            logger.info("MongoDB checkpointer connection released")
@@ -1,5 +1,15 @@
-"""Database-backed workflow tracker using MongoDB with fallback support"""
-from pymongo import MongoClient
+"""Database-backed workflow tracker using MongoDB with fallback support
+
+Progress updates go through AsyncWorkflowTracker, which keeps live workflows
+in memory and writes the latest state of each changed workflow in one
+bulk_write per flush instead of one update_one per progress step.
+
+Environment:
+    WORKFLOW_TRACKER_FLUSH_SECONDS  interval between buffered flushes (default 1.0)
+    WORKFLOW_TRACKER_MAX_PENDING    changed workflows that trigger an early flush (default 500)
+"""
+import asyncio
+from pymongo import MongoClient, UpdateOne
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 import json
 from datetime import datetime, timedelta
@@ -11,9 +21,20 @@ import os
 # Add parent directory to path for config import
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import settings
+from .mongo_pool import shared_client
 
 logger = logging.getLogger(__name__)
 
+TRACKED_FIELDS = ('status', 'progress_percentage', 'current_step', 'total_steps',
+                  'error_message', 'completed_at', 'output_data', 'input_data', 'node_timings')
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled', 'completed_with_warnings')
+DATETIME_FIELDS = ('started_at', 'updated_at', 'completed_at')
+
+
+def _is_final(update_data: Dict[str, Any]) -> bool:
+    # complete_workflow may record an application status such as "shortlisted"; completed_at marks the end
+    return 'completed_at' in update_data or update_data.get('status') in TERMINAL_STATUSES
+
 
 class DatabaseWorkflowTracker:
     def __init__(self):
@@ -29,7 +50,7 @@ class DatabaseWorkflowTracker:
             if not mongodb_uri:
                 raise ValueError("No MongoDB URI configured")
             
-            self._client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
+            self._client = shared_client(mongodb_uri, MongoClient, appname="bhiv-langgraph")
             # Test connection
             self._client.admin.command('ping')
             
@@ -56,7 +77,7 @@ class DatabaseWorkflowTracker:
     def create_workflow(self, workflow_id: str, workflow_type: str = "candidate_application", 
                        candidate_id: int = None, job_id: int = None, client_id: str = None,
                        input_data: Dict = None):
-        """Create new workflow with database + fallback"""
+        """Create new workflow with database + fallback; returns the created document"""
         workflow_data = {
             "workflow_id": workflow_id,
             "workflow_type": workflow_type,
@@ -76,9 +97,9 @@ class DatabaseWorkflowTracker:
         collection = self._get_collection()
         if collection is not None:
             try:
-                collection.insert_one(workflow_data)
+                collection.insert_one(dict(workflow_data))
                 logger.info(f"✅ Workflow {workflow_id} created in database")
-                return
+                return workflow_data
             except Exception as e:
                 logger.error(f"❌ Failed to create workflow in database: {e}")
         
@@ -87,14 +108,14 @@ class DatabaseWorkflowTracker:
         workflow_data['updated_at'] = workflow_data['updated_at'].isoformat()
         self.fallback_storage[workflow_id] = workflow_data
         logger.info(f"⚠️ Workflow {workflow_id} created in fallback storage")
+        return dict(workflow_data)
     
     def update_workflow(self, workflow_id: str, **kwargs):
         """Update workflow with detailed progress tracking"""
         update_data = {}
         
         for key, value in kwargs.items():
-            if key in ['status', 'progress_percentage', 'current_step', 'total_steps', 
-                      'error_message', 'completed_at', 'output_data', 'input_data']:
+            if key in TRACKED_FIELDS:
                 update_data[key] = value
         
         if not update_data:
@@ -221,5 +242,184 @@ class DatabaseWorkflowTracker:
                 logger.error(f"❌ Failed to cleanup old workflows: {e}")
 
 
+class AsyncWorkflowTracker:
+    """Write-coalescing, event-loop friendly front for DatabaseWorkflowTracker
+
+    update_workflow only touches memory: the live view of the workflow and its
+    pending changes. A background task writes the latest pending state of every
+    changed workflow in one bulk_write per interval; terminal states are written
+    before complete_workflow returns. Live workflows are read from memory, the
+    rest from the database in a worker thread.
+    """
+
+    def __init__(self, store: DatabaseWorkflowTracker, flush_interval: float = None, max_pending: int = None):
+        self.store = store
+        self.flush_interval = flush_interval if flush_interval is not None else \
+            float(os.getenv('WORKFLOW_TRACKER_FLUSH_SECONDS', '1.0'))
+        self.max_pending = max_pending or int(os.getenv('WORKFLOW_TRACKER_MAX_PENDING', '500'))
+        self._live: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flush_lock = None
+        self._wake = None
+        self._task = None
+        self.counters = {
+            "updates_received": 0,
+            "documents_written": 0,
+            "bulk_writes": 0,
+            "flush_errors": 0,
+        }
+
+    @property
+    def connection(self) -> bool:
+        return self.store._db is not None
+
+    def _lock(self) -> asyncio.Lock:
+        # Created lazily so the lock binds to the server's event loop
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        return self._flush_lock
+
+    async def create_workflow(self, workflow_id: str, **kwargs):
+        """Create the workflow document right away and start its live view"""
+        doc = await asyncio.to_thread(self.store.create_workflow, workflow_id, **kwargs)
+        doc.pop('_id', None)
+        self._live[workflow_id] = doc
+
+    def update_workflow(self, workflow_id: str, **kwargs):
+        """Record progress in memory; written by the next flush"""
+        # Copied: callers keep mutating dicts such as node_timings while a flush encodes them
+        update_data = {key: dict(value) if isinstance(value, dict) else value
+                       for key, value in kwargs.items() if key in TRACKED_FIELDS}
+        if not update_data:
+            return
+        update_data['updated_at'] = datetime.utcnow()
+        self.counters["updates_received"] += 1
+
+        if workflow_id in self._live:
+            self._live[workflow_id].update(update_data)
+        self._pending.setdefault(workflow_id, {}).update(update_data)
+
+        if self._wake and (_is_final(update_data) or len(self._pending) >= self.max_pending):
+            self._wake.set()
+
+    async def complete_workflow(self, workflow_id: str, final_status: str = "completed",
+                                output_data: Dict = None, error_message: str = None):
+        """Mark workflow as completed and write it before returning"""
+        update_data = {
+            "status": final_status,
+            "progress_percentage": 100 if final_status == "completed" else 0,
+            "current_step": "finished" if final_status == "completed" else "failed",
+            "completed_at": datetime.utcnow()
+        }
+        if output_data:
+            update_data["output_data"] = output_data
+        if error_message:
+            update_data["error_message"] = error_message
+
+        self.update_workflow(workflow_id, **update_data)
+        await self.flush()
+        logger.info(f"✅ Workflow {workflow_id} completed with status: {final_status}")
+
+    async def flush(self) -> int:
+        """Write the latest pending state of every changed workflow; returns documents written"""
+        async with self._lock():
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+
+            collection = self.store._get_collection()
+            if collection is None:
+                for workflow_id, update_data in batch.items():
+                    self.store.update_workflow(workflow_id, **update_data)
+            else:
+                ops = [UpdateOne({'workflow_id': workflow_id}, {'$set': update_data})
+                       for workflow_id, update_data in batch.items()]
+                try:
+                    await asyncio.to_thread(collection.bulk_write, ops, ordered=False)
+                    self.counters["bulk_writes"] += 1
+                except Exception as e:
+                    self.counters["flush_errors"] += 1
+                    logger.error(f"❌ Failed to flush {len(ops)} workflow updates: {e}")
+                    # Keep newer updates that arrived during the write
+                    for workflow_id, update_data in batch.items():
+                        self._pending[workflow_id] = {**update_data, **self._pending.get(workflow_id, {})}
+                    return 0
+
+            self.counters["documents_written"] += len(batch)
+            for workflow_id, update_data in batch.items():
+                if _is_final(update_data) and workflow_id not in self._pending:
+                    self._live.pop(workflow_id, None)
+            return len(batch)
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Workflow tracker flush failed: {e}")
+
+    def start(self):
+        """Flush buffered updates in the background on the current event loop"""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+            logger.info(f"✅ Workflow tracker flushing every {self.flush_interval}s")
+
+    async def stop(self):
+        """Stop the background task and write what is still pending"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wake = None
+        await self.flush()
+
+    def _view(self, doc: Dict) -> Dict:
+        view = dict(doc)
+        for key in DATETIME_FIELDS:
+            if isinstance(view.get(key), datetime):
+                view[key] = view[key].isoformat()
+        return view
+
+    def _overlay(self, docs: List[Dict]) -> List[Dict]:
+        """Replace stored documents of live workflows with their in-memory state"""
+        return [self._view({**doc, **self._live[doc.get('workflow_id')]}) if doc.get('workflow_id') in self._live
+                else doc for doc in docs]
+
+    async def get_workflow_status(self, workflow_id: str) -> Optional[Dict]:
+        """Live workflows from memory, finished ones from the database"""
+        if workflow_id in self._live:
+            return self._view(self._live[workflow_id])
+        return await asyncio.to_thread(self.store.get_workflow_status, workflow_id)
+
+    async def list_workflows(self, limit: int = 50) -> List[Dict]:
+        return self._overlay(await asyncio.to_thread(self.store.list_workflows, limit))
+
+    async def get_active_workflows(self) -> List[Dict]:
+        return self._overlay(await asyncio.to_thread(self.store.get_active_workflows))
+
+    async def cleanup_old_workflows(self, days: int = 30):
+        await asyncio.to_thread(self.store.cleanup_old_workflows, days)
+
+    def stats(self) -> Dict[str, Any]:
+        """Write coalescing counters for /workflows/stats"""
+        written = self.counters["documents_written"]
+        return {
+            **self.counters,
+            "live_workflows": len(self._live),
+            "pending_workflows": len(self._pending),
+            "flush_interval_seconds": self.flush_interval,
+            "updates_per_write": round(self.counters["updates_received"] / written, 1) if written else None,
+        }
+
+
 # Global tracker instance
-tracker = DatabaseWorkflowTracker()
+tracker = AsyncWorkflowTracker(DatabaseWorkflowTracker())
@@ -0,0 +1,188 @@
+"""
+Concurrent, rate-limited dispatch of bulk notification sequences
+
+Candidates are notified concurrently with a bound on in-flight channel
+sends. Every channel draws from its own token bucket so a batch stays within
+provider quotas (Twilio WhatsApp, Telegram Bot API, Gmail SMTP). Failed sends
+are retried with exponential backoff; a send waiting to retry does not hold a
+concurrency slot, so the rest of the batch keeps moving.
+
+Buckets belong to the dispatcher, so concurrent batches share one quota.
+
+Environment:
+    NOTIFY_BULK_CONCURRENCY     channel sends in flight across a batch (default 20)
+    NOTIFY_MAX_ATTEMPTS         attempts per channel send (default 3)
+    NOTIFY_RETRY_BASE_SECONDS   first retry delay, doubled per attempt (default 1.0)
+    NOTIFY_RATE_EMAIL           email sends per second (default 1, burst 5)
+    NOTIFY_RATE_WHATSAPP        WhatsApp sends per second (default 10, burst 10)
+    NOTIFY_RATE_TELEGRAM        Telegram sends per second (default 25, burst 25)
+"""
+import asyncio
+import inspect
+import logging
+import os
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (rate per second, burst); Gmail app passwords allow a few thousand messages a day,
+# the Bot API about 30 messages a second, Twilio senders start at tens per second
+DEFAULT_RATES = {
+    "email": (1.0, 5),
+    "whatsapp": (10.0, 10),
+    "telegram": (25.0, 25),
+}
+
+Send = Callable[[], Awaitable[Dict]]
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in arrival order"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:  # unlimited
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _rate_from_env(channel: str) -> Tuple[float, int]:
+    rate, burst = DEFAULT_RATES.get(channel, (0.0, 1))
+    configured = os.getenv(f"NOTIFY_RATE_{channel.upper()}")
+    if configured is not None:
+        rate = float(configured)
+        burst = max(1, int(rate))
+    return rate, burst
+
+
+class BulkNotificationDispatcher:
+    """Sends automated sequences to many candidates concurrently.
+
+    Args:
+        comm_manager: Provides sequence_sends(payload, sequence_type), the
+            channel sends of one candidate's sequence
+    """
+
+    def __init__(self, comm_manager, concurrency: int = None, max_attempts: int = None,
+                 retry_base: float = None, rates: Dict[str, Tuple[float, int]] = None):
+        self.comm_manager = comm_manager
+        self.concurrency = concurrency or int(os.getenv("NOTIFY_BULK_CONCURRENCY", "20"))
+        self.max_attempts = max_attempts or int(os.getenv("NOTIFY_MAX_ATTEMPTS", "3"))
+        self.retry_base = retry_base if retry_base is not None else float(os.getenv("NOTIFY_RETRY_BASE_SECONDS", "1.0"))
+        self._rates = rates or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, channel: str) -> TokenBucket:
+        if channel not in self._buckets:
+            rate, burst = self._rates.get(channel) or _rate_from_env(channel)
+            self._buckets[channel] = TokenBucket(rate, burst)
+        return self._buckets[channel]
+
+    async def _send_with_retry(self, channel: str, send: Send, slots: asyncio.Semaphore,
+                               counts: Dict[str, int]) -> Dict:
+        result: Dict[str, Any] = {}
+        for attempt in range(1, self.max_attempts + 1):
+            await self.bucket(channel).acquire()
+            async with slots:
+                try:
+                    result = await send()
+                except Exception as e:
+                    result = {"status": "failed", "channel": channel, "error": str(e)}
+            if result.get("status") != "failed" or not result.get("retryable", True) or attempt == self.max_attempts:
+                break
+            counts["retried_count"] += 1
+            delay = self.retry_base * 2 ** (attempt - 1) + random.uniform(0, self.retry_base)
+            logger.warning(f"⚠️ {channel} send failed (attempt {attempt}/{self.max_attempts}), "
+                           f"retrying in {delay:.1f}s: {result.get('error')}")
+            await asyncio.sleep(delay)
+        return {**result, "attempts": attempt}
+
+    async def dispatch(self, candidates: List[Dict], sequence_type: str, job_data: Dict,
+                       on_progress: Optional[Callable[[Dict], Any]] = None, batch_id: str = None) -> Dict:
+        """Notify every candidate; on_progress (sync or async) receives running counts.
+
+        Returns the final counts and every channel result, in candidate order.
+        """
+        batch_id = batch_id or str(uuid.uuid4())
+        started = time.perf_counter()
+        slots = asyncio.Semaphore(self.concurrency)
+        counts = {"completed_candidates": 0, "success_count": 0, "failed_count": 0, "retried_count": 0}
+        by_channel: Dict[str, Dict[str, int]] = {}
+        report_every = max(1, len(candidates) // 50)
+
+        def snapshot(state: str) -> Dict:
+            return {
+                "batch_id": batch_id,
+                "state": state,
+                "total_candidates": len(candidates),
+                **counts,
+                "by_channel": {channel: dict(c) for channel, c in by_channel.items()},
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+
+        async def report(state: str):
+            if on_progress is None:
+                return
+            try:
+                outcome = on_progress(snapshot(state))
+                if inspect.isawaitable(outcome):
+                    await outcome
+            except Exception as e:
+                logger.warning(f"⚠️ Bulk progress callback failed: {e}")
+
+        async def notify(candidate: Dict) -> List[Dict]:
+            payload = {
+                **job_data,
+                "candidate_name": candidate.get('name', 'Candidate'),
+                "candidate_email": candidate.get('email', ''),
+                "candidate_phone": candidate.get('phone', ''),
+                "candidate_id": candidate.get('id')
+            }
+            try:
+                sends = self.comm_manager.sequence_sends(payload, sequence_type)
+                results = list(await asyncio.gather(*(self._send_with_retry(channel, send, slots, counts)
+                                                      for channel, send in sends)))
+            except Exception as e:
+                logger.error(f"❌ Bulk notification error for candidate {candidate.get('id')}: {str(e)}")
+                results = [{"status": "failed", "error": str(e), "candidate_id": candidate.get('id')}]
+
+            for result in results:
+                outcome = "success" if result.get('status') == 'success' else "failed"
+                counts[f"{outcome}_count"] += 1
+                channel_counts = by_channel.setdefault(result.get("channel", "unknown"), {"success": 0, "failed": 0})
+                channel_counts[outcome] += 1
+            counts["completed_candidates"] += 1
+            if counts["completed_candidates"] % report_every == 0 and counts["completed_candidates"] < len(candidates):
+                await report("running")
+            return results
+
+        logger.info(f"📨 Dispatching {sequence_type} to {len(candidates)} candidates "
+                    f"(batch {batch_id}, concurrency {self.concurrency})")
+        per_candidate = await asyncio.gather(*(notify(candidate) for candidate in candidates))
+
+        final = snapshot("completed")
+        await report("completed")
+        logger.info(f"✅ Bulk notifications completed: {final['success_count']} success, "
+                    f"{final['failed_count']} failed, {final['retried_count']} retries in {final['elapsed_ms']} ms")
+        return {
+            **final,
+            "status": "completed",
+            "results": [result for results in per_candidate for result in results],
+        }
@@ -8,6 +8,9 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pymongo import MongoClient
+
+from .mongo_pool import shared_client
+from .rl_feedback_aggregates import feedback_aggregates, feedback_keys, summary
 from bson import ObjectId
 
 logger = logging.getLogger(__name__)
@@ -29,7 +32,7 @@ class RLDatabaseManager:
                 return None
             
             try:
-                self._client = MongoClient(mongo_uri, serverSelectionTimeoutMS=10000)
+                self._client = shared_client(mongo_uri, MongoClient, appname="bhiv-langgraph")
                 db_name = os.getenv('MONGODB_DB_NAME', 'bhiv_hr')
                 self._db = self._client[db_name]
                 # Test connection
@@ -57,8 +60,12 @@ class RLDatabaseManager:
                 logger.warning("Database not available - returning empty feedback history")
                 return []
             
-            # Use aggregation to join rl_feedback with rl_predictions
+            # Page through rl_feedback on its (candidate_id, created_at) / created_at index,
+            # then join rl_predictions for that page only
             pipeline = [
+                {'$match': {'candidate_id': candidate_id} if candidate_id else {}},
+                {'$sort': {'created_at': -1}},
+                {'$limit': limit},
                 {
                     '$lookup': {
                         'from': 'rl_predictions',
@@ -67,16 +74,9 @@ class RLDatabaseManager:
                         'as': 'prediction'
                     }
                 },
-                {'$unwind': {'path': '$prediction', 'preserveNullAndEmptyArrays': True}},
-                {'$sort': {'created_at': -1}},
-                {'$limit': limit}
+                {'$unwind': {'path': '$prediction', 'preserveNullAndEmptyArrays': True}}
             ]
             
-            if candidate_id:
-                pipeline.insert(0, {
-                    '$match': {'prediction.candidate_id': candidate_id}
-                })
-            
             feedback_history = []
             cursor = db.rl_feedback.aggregate(pipeline)
             
@@ -98,6 +98,17 @@ class RLDatabaseManager:
             logger.error(f"Failed to get feedback history: {e}")
             return []
     
+    def get_scoring_feedback(self, candidate_id=None, job_id=None) -> List[Dict]:
+        """Newest feedback (reward, outcome, score) for RL scoring, from the maintained aggregates"""
+        try:
+            db = self._get_connection()
+            if db is None:
+                return []
+            return feedback_aggregates.recent(db, candidate_id=candidate_id, job_id=job_id)
+        except Exception as e:
+            logger.error(f"Failed to get scoring feedback: {e}")
+            return []
+    
     def store_rl_prediction(self, prediction_data: Dict) -> Optional[str]:
         """Store RL prediction in database"""
         try:
@@ -143,8 +154,13 @@ class RLDatabaseManager:
                 except:
                     pass
             
+            # Denormalized so candidate history is an indexed range, not a join
+            candidate_id, job_id = feedback_keys(db, feedback_data, prediction_id)
+            
             doc = {
                 'prediction_id': prediction_id,
+                'candidate_id': candidate_id,
+                'job_id': job_id,
                 'feedback_source': feedback_data.get('feedback_source', 'system'),
                 'actual_outcome': feedback_data.get('actual_outcome', 'unknown'),
                 'feedback_score': feedback_data.get('feedback_score', 0),
@@ -156,6 +172,12 @@ class RLDatabaseManager:
             result = db.rl_feedback.insert_one(doc)
             feedback_id = str(result.inserted_id)
             
+            # Scoring reads these instead of re-aggregating the history
+            try:
+                feedback_aggregates.record(db, doc)
+            except Exception as e:
+                logger.warning(f"Failed to update feedback aggregates: {e}")
+            
             logger.info(f"✅ RL feedback stored: ID {feedback_id}")
             return feedback_id
             
@@ -255,6 +277,7 @@ class RLDatabaseManager:
                 "total_feedback": total_feedback,
                 "feedback_rate": (total_feedback / max(total_predictions, 1)) * 100,
                 "decision_distribution": decision_distribution,
+                "feedback_rewards": summary(feedback_aggregates.get(db, "global")),
                 "latest_performance": latest_performance,
                 "generated_at": datetime.now().isoformat()
             }
@@ -275,6 +298,7 @@ class RLDatabaseManager:
             # Use aggregation to join predictions with feedback
             pipeline = [
                 {'$match': {'candidate_id': candidate_id}},
+                {'$sort': {'created_at': -1}},
                 {
                     '$lookup': {
                         'from': 'rl_feedback',
@@ -283,8 +307,7 @@ class RLDatabaseManager:
                         'as': 'feedback'
                     }
                 },
-                {'$unwind': {'path': '$feedback', 'preserveNullAndEmptyArrays': True}},
-                {'$sort': {'created_at': -1}}
+                {'$unwind': {'path': '$feedback', 'preserveNullAndEmptyArrays': True}}
             ]
             
             history = []
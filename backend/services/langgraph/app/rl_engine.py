@@ -3,23 +3,58 @@ RL Engine for LangGraph Service
 Provides reinforcement learning score calculation and feedback processing
 """
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, NamedTuple, Optional, Sequence, Tuple
 from datetime import datetime
 import random
 
+import numpy as np
+
+from .skills import skill_set
+
 logger = logging.getLogger(__name__)
 
+# Score terms, in weight order: skill match ratio (0-1), experience points
+# (0-30), education points (0-20) and the feedback adjustment (-10 to +10)
+SCORE_FEATURES = ("skill_match", "experience_score", "education_score", "rl_adjustment")
+
+# rl_score = 50 * skill_match + experience + education + adjustment
+DEFAULT_WEIGHTS = (50.0, 1.0, 1.0, 1.0)
+
+
+class ScoringModel(NamedTuple):
+    """Weights calculate_rl_score applies; swapped as a whole"""
+    version: str
+    weights: Tuple[float, ...] = DEFAULT_WEIGHTS
+    bias: float = 0.0
+
 
 class RLEngine:
     """Reinforcement Learning Engine for candidate scoring"""
     
     def __init__(self, model_version: str = "v1.0.0"):
-        self.model_version = model_version
+        self._model = ScoringModel(model_version)
         self._learning_rate = 0.1
         self._exploration_rate = 0.2
         self._feature_weights = {}
         logger.info(f"✅ RL Engine initialized: {model_version}")
     
+    @property
+    def model_version(self) -> str:
+        return self._model.version
+    
+    @property
+    def model(self) -> ScoringModel:
+        return self._model
+    
+    def load_model(self, version: str, weights: Sequence[float], bias: float = 0.0) -> ScoringModel:
+        """Hot-swap the scoring weights; calls already scoring finish on the previous model"""
+        weights = tuple(float(w) for w in weights)
+        if len(weights) != len(SCORE_FEATURES) or not np.all(np.isfinite(weights + (bias,))):
+            raise ValueError(f"Model {version} needs {len(SCORE_FEATURES)} finite weights, got {weights}")
+        previous, self._model = self._model, ScoringModel(version, weights, float(bias))
+        logger.info(f"✅ RL scoring model swapped: {previous.version} -> {version}")
+        return self._model
+    
     def calculate_rl_score(
         self, 
         candidate_features: Dict[str, Any], 
@@ -37,18 +72,11 @@ class RLEngine:
         Returns:
             Dict with rl_score, confidence_level, decision_type, features_used
         """
+        model = self._model  # one model for the whole call, even if swapped meanwhile
         try:
-            # Extract candidate skills
-            candidate_skills = set(
-                s.lower() if isinstance(s, str) else s.get('name', '').lower() 
-                for s in candidate_features.get('skills', [])
-            )
-            
-            # Extract job requirements
-            job_requirements = set(
-                r.lower() if isinstance(r, str) else r.get('name', '').lower() 
-                for r in job_features.get('requirements', [])
-            )
+            # Canonical skill ids (aliases like "js"/"JavaScript" collapse), unknown skills verbatim
+            candidate_skills = skill_set(candidate_features.get('skills', []))
+            job_requirements = skill_set(job_features.get('requirements', []))
             
             # Calculate skill match ratio
             if job_requirements:
@@ -65,7 +93,9 @@ class RLEngine:
             education_score = min(len(education) * 10, 20)  # Max 20 points
             
             # Base score calculation
-            base_score = (skill_match * 50) + experience_score + education_score
+            w_skill, w_experience, w_education, w_adjustment = model.weights
+            base_score = model.bias + (skill_match * w_skill) + experience_score * w_experience \
+                + education_score * w_education
             
             # Apply RL adjustment from feedback history
             rl_adjustment = self._calculate_rl_adjustment(
@@ -73,7 +103,7 @@ class RLEngine:
             )
             
             # Calculate final RL score
-            rl_score = min(100, max(0, base_score + rl_adjustment))
+            rl_score = min(100, max(0, base_score + rl_adjustment * w_adjustment))
             
             # Calculate confidence based on feedback history
             confidence = self._calculate_confidence(feedback_history)
@@ -96,7 +126,7 @@ class RLEngine:
                     "education_score": education_score,
                     "rl_adjustment": round(rl_adjustment, 2)
                 },
-                "model_version": self.model_version
+                "model_version": model.version
             }
             
             logger.debug(f"RL Score calculated: {rl_score:.2f}, Decision: {decision_type}")
@@ -109,7 +139,7 @@ class RLEngine:
                 "confidence_level": 30,
                 "decision_type": "review",
                 "features_used": {},
-                "model_version": self.model_version,
+                "model_version": model.version,
                 "error": str(e)
             }
     
@@ -173,17 +203,17 @@ class RLEngine:
             if not training_data:
                 return {"status": "no_data", "model_version": self.model_version}
             
-            # Simple weight update logic
-            for sample in training_data:
-                reward = sample.get('reward', 0)
-                features = sample.get('feature_vector', [])
-                
-                # Update feature weights based on reward
-                for i, feature in enumerate(features):
-                    if i not in self._feature_weights:
-                        self._feature_weights[i] = 0.5
-                    
-                    self._feature_weights[i] += self._learning_rate * reward * feature
+            # One reward-weighted sum over all samples (shorter vectors padded with 0)
+            vectors = [sample.get('feature_vector', []) for sample in training_data]
+            width = max(len(vector) for vector in vectors)
+            features = np.zeros((len(vectors), width))
+            for row, vector in enumerate(vectors):
+                features[row, :len(vector)] = vector
+            rewards = np.array([sample.get('reward', 0) for sample in training_data], dtype=float)
+            updates = self._learning_rate * (rewards @ features)
+            
+            for i in range(width):
+                self._feature_weights[i] = self._feature_weights.get(i, 0.5) + float(updates[i])
             
             logger.info(f"Model updated with {len(training_data)} samples")
             return {
@@ -225,6 +255,7 @@ class FeedbackProcessor:
             processed = {
                 "prediction_id": feedback_data.get('prediction_id'),
                 "candidate_id": feedback_data.get('candidate_id'),
+                "job_id": feedback_data.get('job_id'),
                 "actual_outcome": actual_outcome,
                 "feedback_score": feedback_score,
                 "feedback_source": feedback_data.get('feedback_source', 'system'),
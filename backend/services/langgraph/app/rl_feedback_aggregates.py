@@ -0,0 +1,285 @@
+"""
+Incrementally maintained RL feedback aggregates
+
+Scoring used to re-read feedback history on every call: a $lookup from
+rl_feedback into rl_predictions sorted over the whole collection, reduced to
+a few numbers by RLEngine and DecisionEngine. Instead, every stored feedback
+is folded into one small document per scope in rl_feedback_aggregates:
+
+    global              all feedback
+    candidate:<id>      feedback on predictions for one candidate
+    job:<id>            feedback on predictions for one job
+
+Each document carries running counts, reward sums, positive/negative counts,
+an exponentially decayed reward average and the WINDOW newest entries
+(reward, outcome, score) the engines reduce. recent() hands those entries to
+the engines in the order get_feedback_history returned them, so scores stay
+identical to the history-based pipeline.
+
+Documents are updated with compare-and-swap on a version field, so
+concurrent writers never lose an update. A process reuses an aggregate it
+read for RL_AGGREGATE_CACHE_SECONDS.
+
+Feedback stored before aggregates existed is folded in once per database by
+backfill(), run at service startup: a marker document lets one replica claim
+it, and what record() folded meanwhile is merged behind the legacy history
+with the same compare-and-swap.
+
+Environment:
+    RL_FEEDBACK_DECAY            weight kept by older feedback per newer one (default 0.95)
+    RL_AGGREGATE_CACHE_SECONDS   how long a read aggregate is reused (default 5)
+"""
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES = "rl_feedback_aggregates"
+
+# Scoring reads at most this much history (get_feedback_history(limit=50))
+WINDOW = 50
+
+SCOPES = ("global", "candidate", "job")
+
+# Claims the legacy backfill; no scope produces this _id
+BACKFILL_MARKER = "backfill"
+
+
+def aggregate_id(scope: str, key: Any = None) -> str:
+    return scope if scope == "global" else f"{scope}:{key}"
+
+
+def _entry(feedback: Dict) -> Dict[str, Any]:
+    """The fields the engines reduce"""
+    return {
+        "reward_signal": feedback.get("reward_signal", 0),
+        "actual_outcome": feedback.get("actual_outcome", "unknown"),
+        "feedback_score": feedback.get("feedback_score", 3),
+    }
+
+
+def fold(doc: Optional[Dict], feedback: Dict, decay: float, window: int = WINDOW) -> Dict:
+    """Aggregate after one more feedback (pure; doc is not modified)"""
+    doc = doc or {"count": 0, "reward_sum": 0.0, "positive": 0, "negative": 0,
+                  "decayed_reward_sum": 0.0, "decayed_weight": 0.0, "recent": [], "version": 0}
+    reward = feedback.get("reward_signal", 0) or 0
+    decayed_sum = doc["decayed_reward_sum"] * decay + reward
+    decayed_weight = doc["decayed_weight"] * decay + 1
+    return {
+        **doc,
+        "count": doc["count"] + 1,
+        "reward_sum": doc["reward_sum"] + reward,
+        "positive": doc["positive"] + (reward > 0),
+        "negative": doc["negative"] + (reward < 0),
+        "decayed_reward_sum": decayed_sum,
+        "decayed_weight": decayed_weight,
+        "decayed_reward": decayed_sum / decayed_weight,
+        # Oldest first; the newest `window` entries
+        "recent": (doc["recent"] + [_entry(feedback)])[-window:],
+        "version": doc["version"] + 1,
+        "updated_at": feedback.get("created_at") or datetime.utcnow(),
+    }
+
+
+def merge(older: Optional[Dict], newer: Optional[Dict], decay: float, window: int = WINDOW) -> Optional[Dict]:
+    """Aggregate of older's feedback followed by newer's, as if folded in that order (pure)"""
+    if not older or not newer:
+        return newer or older
+    # Folding n more feedback scales the earlier decayed sums by decay ** n
+    scale = decay ** newer["count"]
+    decayed_sum = older["decayed_reward_sum"] * scale + newer["decayed_reward_sum"]
+    decayed_weight = older["decayed_weight"] * scale + newer["decayed_weight"]
+    return {
+        **newer,
+        "count": older["count"] + newer["count"],
+        "reward_sum": older["reward_sum"] + newer["reward_sum"],
+        "positive": older["positive"] + newer["positive"],
+        "negative": older["negative"] + newer["negative"],
+        "decayed_reward_sum": decayed_sum,
+        "decayed_weight": decayed_weight,
+        "decayed_reward": decayed_sum / decayed_weight,
+        "recent": (older["recent"] + newer["recent"])[-window:],
+        "version": newer["version"] + 1,
+    }
+
+
+def summary(doc: Optional[Dict]) -> Dict[str, Any]:
+    """Counts and averages of an aggregate, without the entry window"""
+    if not doc:
+        return {"count": 0, "average_reward": 0.0, "decayed_reward": 0.0, "positive": 0, "negative": 0}
+    return {
+        "count": doc["count"],
+        "average_reward": doc["reward_sum"] / doc["count"],
+        "decayed_reward": doc["decayed_reward"],
+        "positive": doc["positive"],
+        "negative": doc["negative"],
+    }
+
+
+def feedback_keys(db, feedback_data: Dict, prediction_id: Any) -> Tuple[Any, Any]:
+    """candidate_id and job_id of a feedback, from the request or its prediction"""
+    candidate_id = feedback_data.get("candidate_id")
+    job_id = feedback_data.get("job_id")
+    if (candidate_id is None or job_id is None) and isinstance(prediction_id, ObjectId):
+        prediction = db.rl_predictions.find_one({"_id": prediction_id}, {"candidate_id": 1, "job_id": 1}) or {}
+        candidate_id = prediction.get("candidate_id") if candidate_id is None else candidate_id
+        job_id = prediction.get("job_id") if job_id is None else job_id
+    return candidate_id, job_id
+
+
+class FeedbackAggregates:
+    """Reads and maintains rl_feedback_aggregates for one process"""
+
+    def __init__(self, decay: float = None, cache_seconds: float = None, max_attempts: int = 10):
+        self.decay = decay if decay is not None else float(os.getenv("RL_FEEDBACK_DECAY", "0.95"))
+        self.cache_seconds = cache_seconds if cache_seconds is not None else float(
+            os.getenv("RL_AGGREGATE_CACHE_SECONDS", "5"))
+        self.max_attempts = max_attempts
+        self._cache: Dict[str, Tuple[float, Optional[Dict]]] = {}
+
+    def _ids(self, candidate_id: Any, job_id: Any) -> List[str]:
+        ids = [aggregate_id("global")]
+        if candidate_id is not None:
+            ids.append(aggregate_id("candidate", candidate_id))
+        if job_id is not None:
+            ids.append(aggregate_id("job", job_id))
+        return ids
+
+    def record(self, db, feedback: Dict):
+        """Fold one stored feedback (with candidate_id/job_id when known) into its aggregates"""
+        collection = db[AGGREGATES]
+        for _id in self._ids(feedback.get("candidate_id"), feedback.get("job_id")):
+            for _ in range(self.max_attempts):
+                current = collection.find_one({"_id": _id})
+                updated = fold(current, feedback, self.decay)
+                if current is None:
+                    try:
+                        collection.insert_one({**updated, "_id": _id})
+                    except DuplicateKeyError:
+                        continue  # another writer created it first
+                    break
+                if collection.replace_one({"_id": _id, "version": current["version"]}, updated).matched_count:
+                    break
+            else:
+                logger.warning(f"⚠️ Feedback aggregate {_id} kept changing; update skipped")
+                continue
+            self._cache[_id] = (time.monotonic() + self.cache_seconds, {**updated, "_id": _id})
+
+    def get(self, db, scope: str, key: Any = None) -> Optional[Dict]:
+        _id = aggregate_id(scope, key)
+        cached = self._cache.get(_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        doc = db[AGGREGATES].find_one({"_id": _id})
+        self._cache[_id] = (time.monotonic() + self.cache_seconds, doc)
+        return doc
+
+    def recent(self, db, candidate_id: Any = None, job_id: Any = None) -> List[Dict]:
+        """Newest-first feedback entries, as get_feedback_history(candidate_id, limit=WINDOW) ordered them"""
+        if candidate_id is not None:
+            doc = self.get(db, "candidate", candidate_id)
+        elif job_id is not None:
+            doc = self.get(db, "job", job_id)
+        else:
+            doc = self.get(db, "global")
+        return list(reversed(doc["recent"])) if doc else []
+
+    def recent_many(self, db, candidate_ids: List[Any]) -> Dict[Any, List[Dict]]:
+        """recent(candidate_id=...) for many candidates, reading uncached aggregates in one query"""
+        now = time.monotonic()
+        docs: Dict[str, Optional[Dict]] = {}
+        missing = []
+        for candidate_id in candidate_ids:
+            _id = aggregate_id("candidate", candidate_id)
+            cached = self._cache.get(_id)
+            if cached and cached[0] > now:
+                docs[_id] = cached[1]
+            elif _id not in docs:
+                docs[_id] = None
+                missing.append(_id)
+        if missing:
+            for doc in db[AGGREGATES].find({"_id": {"$in": missing}}):
+                docs[doc["_id"]] = doc
+            expires = time.monotonic() + self.cache_seconds
+            for _id in missing:
+                self._cache[_id] = (expires, docs[_id])
+        return {candidate_id: list(reversed(docs[aggregate_id("candidate", candidate_id)]["recent"]))
+                if docs[aggregate_id("candidate", candidate_id)] else []
+                for candidate_id in candidate_ids}
+
+    def _claim_backfill(self, db, stale_seconds: float) -> Optional[Dict]:
+        """The backfill marker if this process should run it: unclaimed, or claimed by a run that died"""
+        collection = db[AGGREGATES]
+        now = datetime.utcnow()
+        marker = {"_id": BACKFILL_MARKER, "state": "running", "cutoff": ObjectId(), "claimed_at": now}
+        try:
+            collection.insert_one(marker)
+            return marker
+        except DuplicateKeyError:
+            pass
+        # Same cutoff as the interrupted run: feedback after it has been through record()
+        return collection.find_one_and_update(
+            {"_id": BACKFILL_MARKER, "state": "running",
+             "claimed_at": {"$lt": now - timedelta(seconds=stale_seconds)}},
+            {"$set": {"claimed_at": now}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def backfill(self, db, stale_seconds: float = 600) -> int:
+        """Fold feedback stored before aggregates existed into them, once per database; returns the feedback folded
+
+        Feedback older than the marker's cutoff never went through record(). Its aggregates are merged in front
+        of whatever record() has folded since, with compare-and-swap on version, and flagged so a run resumed
+        after a crash skips the ones already written.
+        """
+        marker = self._claim_backfill(db, stale_seconds)
+        if marker is None:
+            return 0
+        collection = db[AGGREGATES]
+        docs: Dict[str, Dict] = {}
+        predictions: Dict[Any, Dict] = {}
+        folded = 0
+        legacy = db.rl_feedback.find({"_id": {"$lt": marker["cutoff"]}}).sort([("created_at", 1), ("_id", 1)])
+        for feedback in legacy:
+            if feedback.get("candidate_id") is None and isinstance(feedback.get("prediction_id"), ObjectId):
+                pid = feedback["prediction_id"]
+                if pid not in predictions:
+                    predictions[pid] = db.rl_predictions.find_one({"_id": pid}, {"candidate_id": 1, "job_id": 1}) or {}
+                feedback = {**predictions[pid], **feedback}
+            for _id in self._ids(feedback.get("candidate_id"), feedback.get("job_id")):
+                docs[_id] = fold(docs.get(_id), feedback, self.decay)
+            folded += 1
+
+        for _id, doc in docs.items():
+            for _ in range(self.max_attempts):
+                current = collection.find_one({"_id": _id})
+                if current and current.get("backfilled"):
+                    break  # written by the interrupted run
+                merged = {**merge(doc, current, self.decay), "backfilled": True}
+                if current is None:
+                    try:
+                        collection.insert_one({**merged, "_id": _id})
+                    except DuplicateKeyError:
+                        continue
+                    break
+                if collection.replace_one({"_id": _id, "version": current["version"]}, merged).matched_count:
+                    break
+            else:
+                logger.warning(f"⚠️ Feedback aggregate {_id} kept changing; backfill of it skipped")
+
+        collection.update_one({"_id": BACKFILL_MARKER}, {"$set": {
+            "state": "done", "folded": folded, "finished_at": datetime.utcnow()}})
+        self._cache.clear()
+        logger.info(f"✅ Backfilled {len(docs)} RL feedback aggregates from {folded} legacy feedback records")
+        return folded
+
+
+# Shared by rl_db_manager and the RL endpoints' adapter
+feedback_aggregates = FeedbackAggregates()
@@ -1,9 +1,23 @@
 from datetime import datetime
 import logging
+from numbers import Real
 from typing import Dict, List, Optional
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+OUTCOME_REWARDS = {
+    'hired': 1.0,
+    'interviewed': 0.5,
+    'shortlisted': 0.3,
+    'rejected': -0.5,
+    'withdrawn': -0.2
+}
+
+# Last N feedback entries the RL adjustment averages
+ADJUSTMENT_WINDOW = 10
+
 class DecisionEngine:
     """RL-enhanced decision engine for candidate evaluation"""
     
@@ -66,6 +80,105 @@ class DecisionEngine:
                 "error": str(e)
             }
     
+    def make_rl_decisions(self, candidates_features: List[Dict], job_features: Dict,
+                          feedback_histories: List[List[Dict]] = None) -> List[Dict]:
+        """make_rl_decision for N candidates against one job, computed as arrays
+        
+        feedback_histories[i] is candidate i's history; results match calling
+        make_rl_decision per candidate.
+        """
+        try:
+            from .ml_models import MLModels
+            
+            n = len(candidates_features)
+            histories = [history or [] for history in (feedback_histories or [[]] * n)]
+            if len(histories) != n:
+                raise ValueError(f"{len(histories)} feedback histories for {n} candidates")
+            
+            skill_lists = [features.get('skills', []) for features in candidates_features]
+            job_requirements = job_features.get('requirements', [])
+            
+            base_scores = MLModels.calculate_skill_similarities(skill_lists, job_requirements)
+            rl_adjustments = self._calculate_rl_adjustments(histories)
+            rl_scores = np.clip(base_scores + rl_adjustments, 0, 100)
+            
+            decision_types = np.select([rl_scores >= 75, rl_scores >= 50], ["recommend", "review"], "reject")
+            feedback_counts = np.array([len(history) for history in histories])
+            confidences = self._calculate_confidences(rl_scores, feedback_counts)
+            reasonings = self._generate_reasonings(base_scores, rl_adjustments, decision_types)
+            
+            # Scores round as NumPy scalars do in make_rl_decision; the rest as Python floats
+            rounded_scores = np.round(rl_scores, 2)
+            timestamp = datetime.now().isoformat()
+            return [{
+                "rl_score": float(rounded_scores[i]),
+                "base_score": float(base_scores[i]),
+                "rl_adjustment": round(float(rl_adjustments[i]), 2),
+                "decision_type": str(decision_types[i]),
+                "confidence_level": round(float(confidences[i]), 2),
+                "reasoning": str(reasonings[i]),
+                "model_version": "v1.0.0",
+                "features_used": {
+                    "candidate_skills_count": len(skill_lists[i]),
+                    "job_requirements_count": len(job_requirements),
+                    "feedback_samples": int(feedback_counts[i])
+                },
+                "timestamp": timestamp
+            } for i in range(n)]
+            
+        except Exception as e:
+            logger.error(f"Batch RL decision failed: {e}")
+            return [{
+                "rl_score": 0.0,
+                "decision_type": "review",
+                "confidence_level": 0.0,
+                "error": str(e)
+            } for _ in candidates_features]
+    
+    def _calculate_rl_adjustments(self, feedback_histories: List[List[Dict]]) -> np.ndarray:
+        """_calculate_rl_adjustment for every history, over one flat array of their windows"""
+        windows = [history[-ADJUSTMENT_WINDOW:] for history in feedback_histories]
+        sizes = np.array([len(window) for window in windows])
+        entries = [feedback for window in windows for feedback in window]
+        if not entries:
+            return np.zeros(len(windows))
+        
+        outcome_rewards = np.array([OUTCOME_REWARDS.get(f.get('actual_outcome', 'unknown'), 0.0) for f in entries])
+        scores = [f.get('feedback_score', 3) for f in entries]
+        # A score that is not a number voids the whole reward, as in _calculate_reward_signal
+        numeric = np.array([isinstance(score, Real) for score in scores])
+        scores = np.array([score if ok else 3 for score, ok in zip(scores, numeric)], dtype=float)
+        rewards = np.where(numeric, outcome_rewards + (scores - 3) / 2 * 0.3, 0.0)
+        
+        totals = np.bincount(np.repeat(np.arange(len(windows)), sizes), weights=rewards, minlength=len(windows))
+        averages = np.divide(totals, sizes, out=np.zeros(len(windows)), where=sizes > 0)
+        return np.clip(averages * 20, -20, 20)
+    
+    def _calculate_confidences(self, rl_scores: np.ndarray, feedback_counts: np.ndarray) -> np.ndarray:
+        """_calculate_confidence over arrays of scores and feedback counts"""
+        base_confidence = np.select([(rl_scores >= 80) | (rl_scores <= 20), (rl_scores >= 70) | (rl_scores <= 30)],
+                                    [90.0, 75.0], 60.0)
+        confidence_boost = np.select([feedback_counts >= 10, feedback_counts >= 5], [10.0, 5.0], 0.0)
+        return np.minimum(95.0, base_confidence + confidence_boost)
+    
+    def _generate_reasonings(self, base_scores: np.ndarray, rl_adjustments: np.ndarray,
+                             decision_types: np.ndarray) -> np.ndarray:
+        """_generate_reasoning for arrays of scores, adjustments and decisions"""
+        skill_parts = np.select([base_scores >= 80, base_scores >= 60],
+                                ["Strong skill match with job requirements",
+                                 "Good skill alignment with some gaps"],
+                                "Limited skill match with requirements")
+        feedback_parts = np.select([rl_adjustments > 5, rl_adjustments < -5],
+                                   ["Historical feedback suggests positive outcomes",
+                                    "Historical feedback indicates potential concerns"],
+                                   "Neutral historical performance indicators")
+        decision_parts = np.select([decision_types == "recommend", decision_types == "review"],
+                                   ["Strong candidate for immediate consideration",
+                                    "Candidate requires additional evaluation"],
+                                   "Candidate does not meet current requirements")
+        return np.char.add(np.char.add(np.char.add(np.char.add(skill_parts, ". "), feedback_parts), ". "),
+                           np.char.add(decision_parts, "."))
+    
     def _calculate_rl_adjustment(self, feedback_history: List[Dict]) -> float:
         """Calculate RL adjustment based on historical feedback"""
         if not feedback_history:
@@ -73,12 +186,12 @@ class DecisionEngine:
         
         try:
             total_reward = 0.0
-            for feedback in feedback_history[-10:]:  # Last 10 feedback entries
+            for feedback in feedback_history[-ADJUSTMENT_WINDOW:]:  # Last 10 feedback entries
                 reward = self._calculate_reward_signal(feedback)
                 total_reward += reward
             
             # Average reward as adjustment (-20 to +20 points)
-            avg_reward = total_reward / len(feedback_history[-10:])
+            avg_reward = total_reward / len(feedback_history[-ADJUSTMENT_WINDOW:])
             adjustment = avg_reward * 20
             
             return max(-20, min(20, adjustment))
@@ -93,16 +206,7 @@ class DecisionEngine:
             outcome = feedback.get('actual_outcome', 'unknown')
             feedback_score = feedback.get('feedback_score', 3)
             
-            # Reward mapping
-            outcome_rewards = {
-                'hired': 1.0,
-                'interviewed': 0.5,
-                'shortlisted': 0.3,
-                'rejected': -0.5,
-                'withdrawn': -0.2
-            }
-            
-            base_reward = outcome_rewards.get(outcome, 0.0)
+            base_reward = OUTCOME_REWARDS.get(outcome, 0.0)
             
             # Adjust by feedback score (1-5 scale)
             score_adjustment = (feedback_score - 3) / 2  # -1 to +1
@@ -207,6 +311,32 @@ class EventTimeline:
             logger.error(f"Failed to log RL decision: {e}")
             return None
     
+    def log_rl_decisions(self, job_id: int, candidate_ids: List[int], decisions: List[Dict]) -> List[str]:
+        """Log many candidates' RL decisions for one job with a single write"""
+        try:
+            now = datetime.now()
+            events = [{
+                "candidate_id": candidate_id,
+                "job_id": job_id,
+                "event_type": "rl_decision",
+                "decision_type": decision_data.get("decision_type"),
+                "rl_score": decision_data.get("rl_score"),
+                "confidence_level": decision_data.get("confidence_level"),
+                "reasoning": decision_data.get("reasoning"),
+                "timestamp": now.isoformat(),
+                "event_id": f"RL_{candidate_id}_{job_id}_{int(now.timestamp())}"
+            } for candidate_id, decision_data in zip(candidate_ids, decisions)]
+            
+            if self.db_adapter and events:
+                self.db_adapter.log_rl_decisions(events)
+            
+            logger.info(f"RL decisions logged: {len(events)} candidates for job {job_id}")
+            return [event["event_id"] for event in events]
+            
+        except Exception as e:
+            logger.error(f"Failed to log RL decisions: {e}")
+            return []
+    
     def get_candidate_rl_history(self, candidate_id: int) -> List[Dict]:
         """Get RL decision history for candidate"""
         try:
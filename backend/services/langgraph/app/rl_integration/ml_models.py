@@ -1,5 +1,5 @@
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from datetime import datetime
 import logging
@@ -31,6 +31,42 @@ class MLModels:
             logger.error(f"Skill similarity calculation failed: {e}")
             return 0.0
     
+    @staticmethod
+    def calculate_skill_similarities(candidate_skill_lists, job_requirements):
+        """calculate_skill_similarity for many candidates against one job, as arrays.
+        
+        Each pairwise TF-IDF is fitted on two documents, so a term's idf is 1
+        when both share it and 1 + ln(3/2) otherwise (smooth idf). One term
+        count pass over all documents therefore gives every pair's cosine.
+        """
+        scores = np.zeros(len(candidate_skill_lists))
+        try:
+            if not candidate_skill_lists or not job_requirements:
+                return scores
+            
+            texts = [' '.join(skills) if skills else '' for skills in candidate_skill_lists]
+            try:
+                counts = CountVectorizer().fit_transform([' '.join(job_requirements)] + texts).toarray().astype(float)
+            except ValueError:  # no usable terms anywhere
+                return scores
+            job, candidates = counts[0], counts[1:]
+            
+            unshared_idf = 1 + np.log(1.5)
+            in_job = job > 0
+            in_candidate = candidates > 0
+            # Candidate terms the job lacks, and job terms the candidate lacks, get the unshared idf
+            candidate_norm = np.sqrt(((candidates * np.where(in_job, 1.0, unshared_idf)) ** 2).sum(axis=1))
+            job_sq = job ** 2
+            job_norm = np.sqrt(unshared_idf ** 2 * job_sq.sum() - (unshared_idf ** 2 - 1) * (in_candidate @ job_sq))
+            dot = candidates @ job  # shared terms, idf 1
+            
+            valid = (candidate_norm > 0) & (job_norm > 0) & np.array([bool(skills) for skills in candidate_skill_lists])
+            similarity = np.divide(dot, candidate_norm * job_norm, out=np.zeros_like(dot), where=valid)
+            return np.round(similarity * 100, 2)
+        except Exception as e:
+            logger.error(f"Batch skill similarity calculation failed: {e}")
+            return scores
+    
     @staticmethod
     def predict_interview_success(feedback_scores, skills_match_score):
         """Predict interview success probability"""
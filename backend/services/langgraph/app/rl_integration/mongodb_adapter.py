@@ -11,6 +11,9 @@ from contextlib import contextmanager
 from bson import ObjectId
 from pymongo import MongoClient
 
+from ..mongo_pool import shared_client
+from ..rl_feedback_aggregates import feedback_aggregates, feedback_keys, summary
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,7 +31,7 @@ class MongoDBAdapter:
             if not mongo_uri:
                 raise ValueError("MONGODB_URI or DATABASE_URL environment variable is required")
             
-            self._client = MongoClient(mongo_uri, serverSelectionTimeoutMS=10000)
+            self._client = shared_client(mongo_uri, MongoClient, appname="bhiv-langgraph")
             db_name = os.getenv('MONGODB_DB_NAME', 'bhiv_hr')
             self._db = self._client[db_name]
             logger.info(f"MongoDB connection established to database: {db_name}")
@@ -52,6 +55,33 @@ class MongoDBAdapter:
             del doc['_id']
         return doc
     
+    def get_scoring_feedback(self, candidate_id=None, job_id=None) -> List[Dict]:
+        """Newest feedback (reward, outcome, score) for RL scoring, from the maintained aggregates"""
+        try:
+            db = self._get_connection()
+            return feedback_aggregates.recent(db, candidate_id=candidate_id, job_id=job_id)
+        except Exception as e:
+            logger.error(f"Failed to get scoring feedback: {e}")
+            return []
+    
+    def get_scoring_feedback_batch(self, candidate_ids: List[int]) -> Dict[int, List[Dict]]:
+        """get_scoring_feedback for many candidates from one snapshot of the aggregates"""
+        try:
+            db = self._get_connection()
+            return feedback_aggregates.recent_many(db, candidate_ids)
+        except Exception as e:
+            logger.error(f"Failed to get scoring feedback batch: {e}")
+            return {candidate_id: [] for candidate_id in candidate_ids}
+    
+    def backfill_feedback_aggregates(self) -> int:
+        """Fold feedback stored before the aggregates existed into them (once per database)"""
+        try:
+            db = self._get_connection()
+            return feedback_aggregates.backfill(db)
+        except Exception as e:
+            logger.error(f"Failed to backfill feedback aggregates: {e}")
+            return 0
+    
     def store_rl_prediction(self, prediction_data: Dict) -> Optional[str]:
         """Store RL prediction in database"""
         try:
@@ -78,6 +108,35 @@ class MongoDBAdapter:
             logger.error(f"Failed to store RL prediction: {e}")
             return None
     
+    def store_rl_predictions(self, predictions: List[Dict]) -> List[Optional[str]]:
+        """Store many RL predictions with one bulk insert; ids in input order"""
+        try:
+            db = self._get_connection()
+            
+            created_at = datetime.utcnow()
+            docs = [{
+                'candidate_id': prediction_data['candidate_id'],
+                'job_id': prediction_data['job_id'],
+                'rl_score': prediction_data['rl_score'],
+                'confidence_level': prediction_data['confidence_level'],
+                'decision_type': prediction_data['decision_type'],
+                'features': prediction_data.get('features_used', {}),
+                'model_version': prediction_data['model_version'],
+                'created_at': created_at
+            } for prediction_data in predictions]
+            if not docs:
+                return []
+            
+            result = db.rl_predictions.insert_many(docs, ordered=False)
+            prediction_ids = [str(_id) for _id in result.inserted_ids]
+            
+            logger.info(f"RL predictions stored: {len(prediction_ids)} in one batch")
+            return prediction_ids
+            
+        except Exception as e:
+            logger.error(f"Failed to store RL predictions: {e}")
+            return [None] * len(predictions)
+    
     def store_rl_feedback(self, feedback_data: Dict) -> Optional[str]:
         """Store RL feedback in database"""
         try:
@@ -91,8 +150,13 @@ class MongoDBAdapter:
                 except:
                     pass
             
+            # Denormalized so candidate history is an indexed range, not a join
+            candidate_id, job_id = feedback_keys(db, feedback_data, prediction_id)
+            
             doc = {
                 'prediction_id': prediction_id,
+                'candidate_id': candidate_id,
+                'job_id': job_id,
                 'feedback_source': feedback_data.get('feedback_source', 'system'),
                 'actual_outcome': feedback_data['actual_outcome'],
                 'feedback_score': feedback_data['feedback_score'],
@@ -104,6 +168,12 @@ class MongoDBAdapter:
             result = db.rl_feedback.insert_one(doc)
             feedback_id = str(result.inserted_id)
             
+            # Scoring reads these instead of re-aggregating the history
+            try:
+                feedback_aggregates.record(db, doc)
+            except Exception as e:
+                logger.warning(f"Failed to update feedback aggregates: {e}")
+            
             logger.info(f"RL feedback stored: ID {feedback_id}")
             return feedback_id
             
@@ -116,8 +186,12 @@ class MongoDBAdapter:
         try:
             db = self._get_connection()
             
-            # Use aggregation to join rl_feedback with rl_predictions
+            # Page through rl_feedback on its (candidate_id, created_at) / created_at index,
+            # then join rl_predictions for that page only
             pipeline = [
+                {'$match': {'candidate_id': candidate_id} if candidate_id else {}},
+                {'$sort': {'created_at': -1}},
+                {'$limit': limit},
                 {
                     '$lookup': {
                         'from': 'rl_predictions',
@@ -126,16 +200,9 @@ class MongoDBAdapter:
                         'as': 'prediction'
                     }
                 },
-                {'$unwind': {'path': '$prediction', 'preserveNullAndEmptyArrays': True}},
-                {'$sort': {'created_at': -1}},
-                {'$limit': limit}
+                {'$unwind': {'path': '$prediction', 'preserveNullAndEmptyArrays': True}}
             ]
             
-            if candidate_id:
-                pipeline.insert(0, {
-                    '$match': {'prediction.candidate_id': candidate_id}
-                })
-            
             feedback_history = []
             cursor = db.rl_feedback.aggregate(pipeline)
             
@@ -214,6 +281,7 @@ class MongoDBAdapter:
                 "total_feedback": total_feedback,
                 "feedback_rate": (total_feedback / max(total_predictions, 1)) * 100,
                 "decision_distribution": decision_distribution,
+                "feedback_rewards": summary(feedback_aggregates.get(db, "global")),
                 "latest_performance": latest_performance,
                 "generated_at": datetime.now().isoformat()
             }
@@ -246,6 +314,27 @@ class MongoDBAdapter:
             logger.error(f"Failed to log RL decision: {e}")
             return None
     
+    def log_rl_decisions(self, events: List[Dict]) -> int:
+        """Log many RL decision events with one bulk insert; returns the number logged"""
+        try:
+            if not events:
+                return 0
+            db = self._get_connection()
+            
+            timestamp = datetime.utcnow()
+            result = db.audit_logs.insert_many([{
+                'action': 'rl_decision',
+                'resource': 'rl_predictions',
+                'resource_id': event_data.get('candidate_id'),
+                'details': event_data,
+                'timestamp': timestamp
+            } for event_data in events], ordered=False)
+            return len(result.inserted_ids)
+            
+        except Exception as e:
+            logger.error(f"Failed to log RL decisions: {e}")
+            return 0
+    
     def get_candidate_rl_history(self, candidate_id: int) -> List[Dict]:
         """Get RL decision history for candidate"""
         try:
@@ -254,6 +343,7 @@ class MongoDBAdapter:
             # Use aggregation to join predictions with feedback
             pipeline = [
                 {'$match': {'candidate_id': candidate_id}},
+                {'$sort': {'created_at': -1}},
                 {
                     '$lookup': {
                         'from': 'rl_feedback',
@@ -262,8 +352,7 @@ class MongoDBAdapter:
                         'as': 'feedback'
                     }
                 },
-                {'$unwind': {'path': '$feedback', 'preserveNullAndEmptyArrays': True}},
-                {'$sort': {'created_at': -1}}
+                {'$unwind': {'path': '$feedback', 'preserveNullAndEmptyArrays': True}}
             ]
             
             history = []
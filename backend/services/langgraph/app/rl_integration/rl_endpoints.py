@@ -14,9 +14,14 @@ from .decision_engine import DecisionEngine, EventTimeline
 # MongoDB migration: Using mongodb_adapter instead of postgres_adapter
 from .mongodb_adapter import mongodb_adapter as db_adapter
 from .ml_models import MLModels
+from ..rl_engine import SCORE_FEATURES, rl_engine
+from ..rl_training import RetrainingWorker
 
 logger = logging.getLogger(__name__)
 
+# Largest /rl/predict/batch request
+RL_BATCH_MAX_CANDIDATES = int(os.getenv("RL_BATCH_MAX_CANDIDATES", "1000"))
+
 # Pydantic models
 class RLPredictionRequest(BaseModel):
     candidate_id: int
@@ -24,6 +29,15 @@ class RLPredictionRequest(BaseModel):
     candidate_features: Dict
     job_features: Dict
 
+class RLBatchCandidate(BaseModel):
+    candidate_id: int
+    candidate_features: Dict
+
+class RLBatchPredictionRequest(BaseModel):
+    job_id: int
+    job_features: Dict
+    candidates: List[RLBatchCandidate]
+
 class RLFeedbackRequest(BaseModel):
     prediction_id: Optional[int] = None
     candidate_id: int
@@ -42,6 +56,8 @@ class RLResponse(BaseModel):
 # Initialize components
 decision_engine = DecisionEngine(db_adapter)
 event_timeline = EventTimeline(db_adapter)
+# Offline retraining of the screening agent's scoring weights
+retraining_worker = RetrainingWorker(rl_engine, db_adapter)
 
 # Create router
 router = APIRouter(prefix="/rl", tags=["RL + Feedback Agent"])
@@ -51,10 +67,7 @@ async def rl_predict_match(request: RLPredictionRequest, api_key: str = Depends(
     """RL-Enhanced Candidate Matching Prediction"""
     try:
         # Get feedback history for RL enhancement
-        feedback_history = db_adapter.get_feedback_history(
-            candidate_id=request.candidate_id, 
-            limit=50
-        )
+        feedback_history = db_adapter.get_scoring_feedback(candidate_id=request.candidate_id)
         
         # Make RL decision
         decision_data = decision_engine.make_rl_decision(
@@ -101,6 +114,67 @@ async def rl_predict_match(request: RLPredictionRequest, api_key: str = Depends(
         logger.error(f"RL prediction failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/predict/batch", response_model=RLResponse)
+async def rl_predict_batch(request: RLBatchPredictionRequest, api_key: str = Depends(get_api_key)):
+    """RL-Enhanced Matching Predictions for Many Candidates of One Job"""
+    try:
+        if not request.candidates:
+            raise HTTPException(status_code=400, detail="At least one candidate is required")
+        if len(request.candidates) > RL_BATCH_MAX_CANDIDATES:
+            raise HTTPException(status_code=400,
+                                detail=f"At most {RL_BATCH_MAX_CANDIDATES} candidates per batch")
+        
+        candidate_ids = [candidate.candidate_id for candidate in request.candidates]
+        
+        # One snapshot of every candidate's feedback, read together
+        histories = db_adapter.get_scoring_feedback_batch(candidate_ids)
+        feedback_histories = [histories.get(candidate_id, []) for candidate_id in candidate_ids]
+        
+        decisions = decision_engine.make_rl_decisions(
+            candidates_features=[candidate.candidate_features for candidate in request.candidates],
+            job_features=request.job_features,
+            feedback_histories=feedback_histories
+        )
+        
+        if decisions and decisions[0].get('error'):
+            raise HTTPException(status_code=500, detail=decisions[0]['error'])
+        
+        # All predictions in one bulk write
+        prediction_ids = db_adapter.store_rl_predictions([{
+            'candidate_id': candidate_id,
+            'job_id': request.job_id,
+            'rl_score': decision_data['rl_score'],
+            'confidence_level': decision_data['confidence_level'],
+            'decision_type': decision_data['decision_type'],
+            'features_used': decision_data['features_used'],
+            'model_version': decision_data['model_version']
+        } for candidate_id, decision_data in zip(candidate_ids, decisions)])
+        
+        event_timeline.log_rl_decisions(job_id=request.job_id, candidate_ids=candidate_ids, decisions=decisions)
+        
+        return RLResponse(
+            success=True,
+            data={
+                "job_id": request.job_id,
+                "predictions": [{
+                    "candidate_id": candidate_id,
+                    "prediction_id": prediction_id,
+                    "rl_prediction": decision_data,
+                    "feedback_samples_used": len(history)
+                } for candidate_id, prediction_id, decision_data, history
+                    in zip(candidate_ids, prediction_ids, decisions, feedback_histories)],
+                "total_candidates": len(candidate_ids)
+            },
+            message="RL batch prediction completed successfully",
+            timestamp=datetime.now().isoformat()
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"RL batch prediction failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/feedback", response_model=RLResponse)
 async def submit_rl_feedback(request: RLFeedbackRequest, api_key: str = Depends(get_api_key)):
     """Submit Feedback for RL Learning"""
@@ -114,6 +188,8 @@ async def submit_rl_feedback(request: RLFeedbackRequest, api_key: str = Depends(
         # Prepare feedback data
         feedback_data = {
             'prediction_id': request.prediction_id,
+            'candidate_id': request.candidate_id,
+            'job_id': request.job_id,
             'feedback_source': request.feedback_source,
             'actual_outcome': request.actual_outcome,
             'feedback_score': request.feedback_score,
@@ -211,50 +287,83 @@ async def get_candidate_rl_history(candidate_id: int, api_key: str = Depends(get
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/retrain")
-async def trigger_rl_retrain():
-    """Trigger RL Model Retraining"""
+async def trigger_rl_retrain(api_key: str = Depends(get_api_key)):
+    """Trigger RL Model Retraining (runs in the background; poll /rl/retrain/{job_id})"""
+    running = retraining_worker.running
+    if running:
+        raise HTTPException(status_code=409, detail=f"Retraining job {running['job_id']} is still running")
     try:
-        # Get recent feedback for retraining
-        feedback_history = db_adapter.get_feedback_history(limit=1000)
-        
-        if len(feedback_history) < 10:
-            return RLResponse(
-                success=False,
-                message="Insufficient feedback data for retraining (minimum 10 required)",
-                timestamp=datetime.now().isoformat()
-            )
-        
-        # Calculate new performance metrics
-        total_predictions = len(feedback_history)
-        positive_outcomes = len([f for f in feedback_history if f.get('reward_signal', 0) > 0])
-        accuracy = positive_outcomes / total_predictions if total_predictions > 0 else 0
-        
-        # Store updated performance
-        performance_data = {
-            'model_version': 'v1.0.1',
-            'accuracy': accuracy,
-            'precision_score': accuracy,  # Simplified
-            'recall_score': accuracy,
-            'f1_score': accuracy,
-            'average_reward': sum(f.get('reward_signal', 0) for f in feedback_history) / total_predictions,
-            'total_predictions': total_predictions,
-            'evaluation_date': datetime.now().isoformat()
-        }
-        
-        performance_id = db_adapter.store_model_performance(performance_data)
+        job = retraining_worker.start()
         
         return RLResponse(
             success=True,
             data={
-                "performance_id": performance_id,
-                "new_model_version": "v1.0.1",
-                "training_samples": total_predictions,
-                "accuracy": round(accuracy * 100, 2)
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "current_model_version": rl_engine.model_version,
+                "status_url": f"/rl/retrain/{job['job_id']}"
             },
-            message="RL model retrained successfully",
+            message="RL model retraining started",
             timestamp=datetime.now().isoformat()
         )
         
     except Exception as e:
         logger.error(f"RL retraining failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/retrain/{job_id}", response_model=RLResponse)
+async def get_rl_retrain_status(job_id: str, api_key: str = Depends(get_api_key)):
+    """Get RL Retraining Job Progress and Holdout Metrics"""
+    job = retraining_worker.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Retraining job {job_id} not found")
+    
+    return RLResponse(
+        success=job["status"] != "failed",
+        data=dict(job),
+        message=job.get("error", f"Retraining job {job['status']}"),
+        timestamp=datetime.now().isoformat()
+    )
+
+@router.get("/models", response_model=RLResponse)
+async def list_rl_models(api_key: str = Depends(get_api_key)):
+    """List Retrained RL Model Snapshots"""
+    try:
+        snapshots = retraining_worker.snapshots()
+        
+        return RLResponse(
+            success=True,
+            data={
+                "active_version": rl_engine.model_version,
+                "snapshots": snapshots
+            },
+            message="RL model snapshots retrieved",
+            timestamp=datetime.now().isoformat()
+        )
+        
+    except Exception as e:
+        logger.error(f"RL model listing failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/models/{version}/activate", response_model=RLResponse)
+async def activate_rl_model(version: str, api_key: str = Depends(get_api_key)):
+    """Swap Scoring to a Stored RL Model Snapshot (no restart)"""
+    try:
+        model = retraining_worker.activate(version)
+        
+        return RLResponse(
+            success=True,
+            data={
+                "active_version": model.version,
+                "weights": dict(zip(SCORE_FEATURES, model.weights)),
+                "bias": model.bias
+            },
+            message=f"RL model {model.version} activated",
+            timestamp=datetime.now().isoformat()
+        )
+        
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"RL model snapshot {version} not found")
+    except Exception as e:
+        logger.error(f"RL model activation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,502 @@
+"""
+Offline retraining of the RL scoring weights
+
+RLEngine scores a candidate as a weighted sum of four terms (SCORE_FEATURES):
+skill match, experience points, education points and the feedback
+adjustment. Every prediction stores those terms, and every feedback on a
+prediction says how it turned out. Retraining fits the weights to those
+outcomes:
+
+    1. rl_feedback is streamed in _id order, RL_RETRAIN_BATCH_SIZE documents
+       per round trip, joined to its predictions with one $in query per batch,
+       and labelled (hired/interviewed/shortlisted = 1, rejected/withdrawn = 0,
+       anything else is skipped) into a replay buffer holding the newest
+       RL_REPLAY_BUFFER_SIZE samples.
+    2. A seeded RL_RETRAIN_HOLDOUT share of the buffer is held out.
+    3. The weights are fitted as a logistic model of "score >= 50" (review or
+       better) with full-batch NumPy gradient steps, starting from and pulled
+       toward (RL_RETRAIN_L2) the weights in use.
+    4. The new and the current weights are evaluated on the holdout (accuracy,
+       precision, recall and F1 of score >= 50 against the outcome). The
+       result is stored as a versioned snapshot in rl_model_snapshots and, when
+       its F1 is not worse than the current weights', activated: RLEngine
+       swaps to it without a restart. Any snapshot can be re-activated later.
+
+RetrainingWorker runs this on a thread, one job at a time, and reports the
+stage and progress of each job. The worker that activates a snapshot swaps
+at once; every worker also re-reads the active snapshot every
+RL_MODEL_REFRESH_SECONDS, so the swap reaches all of them.
+
+Environment:
+    RL_RETRAIN_BATCH_SIZE        feedback documents read per round trip (default 1000)
+    RL_REPLAY_BUFFER_SIZE        newest labelled samples trained on (default 100000)
+    RL_RETRAIN_EPOCHS            gradient steps over the training split (default 500)
+    RL_RETRAIN_LEARNING_RATE     gradient step size (default 1.0)
+    RL_RETRAIN_L2                pull toward the current weights (default 0.001)
+    RL_RETRAIN_HOLDOUT           share of samples held out for evaluation (default 0.2)
+    RL_RETRAIN_MIN_SAMPLES       labelled samples needed to retrain (default 10)
+    RL_MODEL_REFRESH_SECONDS     how often the active snapshot is re-read (default 60, 0 = startup only)
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from .rl_engine import RLEngine, SCORE_FEATURES, ScoringModel
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS = "rl_model_snapshots"
+
+POSITIVE_OUTCOMES = {"hired", "interviewed", "shortlisted"}
+NEGATIVE_OUTCOMES = {"rejected", "withdrawn"}
+
+# Scores at or above this are "review" or better: the positive prediction
+DECISION_THRESHOLD = 50.0
+
+# Score points per logit unit of the fitted model
+TEMPERATURE = 10.0
+
+# Typical range of each feature, so gradient steps treat them alike
+FEATURE_SCALE = np.array([1.0, 30.0, 20.0, 10.0])
+
+
+class RetrainConfig(NamedTuple):
+    batch_size: int = 1000
+    buffer_size: int = 100_000
+    epochs: int = 500
+    learning_rate: float = 1.0
+    l2: float = 0.001
+    holdout: float = 0.2
+    min_samples: int = 10
+    seed: int = 42
+    refresh_seconds: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "RetrainConfig":
+        return cls(
+            batch_size=max(1, int(os.getenv("RL_RETRAIN_BATCH_SIZE", "1000"))),
+            buffer_size=max(1, int(os.getenv("RL_REPLAY_BUFFER_SIZE", "100000"))),
+            epochs=max(1, int(os.getenv("RL_RETRAIN_EPOCHS", "500"))),
+            learning_rate=float(os.getenv("RL_RETRAIN_LEARNING_RATE", "1.0")),
+            l2=float(os.getenv("RL_RETRAIN_L2", "0.001")),
+            holdout=min(0.9, max(0.05, float(os.getenv("RL_RETRAIN_HOLDOUT", "0.2")))),
+            min_samples=max(2, int(os.getenv("RL_RETRAIN_MIN_SAMPLES", "10"))),
+            refresh_seconds=max(0.0, float(os.getenv("RL_MODEL_REFRESH_SECONDS", "60"))),
+        )
+
+
+class ReplayBuffer:
+    """Fixed-size ring of labelled samples; once full, the oldest are overwritten"""
+
+    def __init__(self, capacity: int, width: int = len(SCORE_FEATURES)):
+        self.capacity = capacity
+        self.features = np.zeros((capacity, width))
+        self.labels = np.zeros(capacity)
+        self.rewards = np.zeros(capacity)
+        self.size = 0
+        self.seen = 0
+        self._next = 0
+
+    def extend(self, features: np.ndarray, labels: np.ndarray, rewards: np.ndarray):
+        n = len(labels)
+        self.seen += n
+        if n >= self.capacity:
+            features, labels, rewards = features[-self.capacity:], labels[-self.capacity:], rewards[-self.capacity:]
+            self.features[:], self.labels[:], self.rewards[:] = features, labels, rewards
+            self._next, self.size = 0, self.capacity
+            return
+        slots = (self._next + np.arange(n)) % self.capacity
+        self.features[slots], self.labels[slots], self.rewards[slots] = features, labels, rewards
+        self._next = (self._next + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Buffered samples, oldest first"""
+        if self.size < self.capacity:
+            return self.features[:self.size], self.labels[:self.size], self.rewards[:self.size]
+        order = np.roll(np.arange(self.capacity), -self._next)
+        return self.features[order], self.labels[order], self.rewards[order]
+
+
+def _label(outcome: Any) -> Optional[float]:
+    if outcome in POSITIVE_OUTCOMES:
+        return 1.0
+    if outcome in NEGATIVE_OUTCOMES:
+        return 0.0
+    return None
+
+
+def _feature_row(features: Dict[str, Any]) -> Optional[List[float]]:
+    """SCORE_FEATURES of a stored prediction (skill_match is stored as a percentage)"""
+    try:
+        row = [float(features[name]) for name in SCORE_FEATURES]
+    except (KeyError, TypeError, ValueError):
+        return None  # scored by another engine, or before these terms were stored
+    row[0] /= 100
+    return row
+
+
+def stream_samples(db, batch_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, int]]:
+    """(features, labels, rewards, feedback scanned) per batch of rl_feedback, oldest first"""
+    last_id = None
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = list(db.rl_feedback.find(query, {"prediction_id": 1, "actual_outcome": 1, "reward_signal": 1})
+                     .sort("_id", 1).limit(batch_size))
+        if not batch:
+            return
+        last_id = batch[-1]["_id"]
+
+        prediction_ids = list({f["prediction_id"] for f in batch if isinstance(f.get("prediction_id"), ObjectId)})
+        predictions = {p["_id"]: p for p in db.rl_predictions.find({"_id": {"$in": prediction_ids}},
+                                                                    {"features": 1})} if prediction_ids else {}
+        rows, labels, rewards = [], [], []
+        for feedback in batch:
+            label = _label(feedback.get("actual_outcome"))
+            prediction = predictions.get(feedback.get("prediction_id"))
+            row = _feature_row(prediction.get("features") or {}) if prediction and label is not None else None
+            if row is None:
+                continue
+            rows.append(row)
+            labels.append(label)
+            rewards.append(float(feedback.get("reward_signal") or 0))
+        yield (np.array(rows, dtype=float).reshape(-1, len(SCORE_FEATURES)), np.array(labels, dtype=float),
+               np.array(rewards, dtype=float), len(batch))
+
+
+def split_holdout(n: int, share: float, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Seeded (train, holdout) index arrays; both non-empty for n >= 2"""
+    order = np.random.default_rng(seed).permutation(n)
+    held = min(n - 1, max(1, int(round(n * share))))
+    return order[held:], order[:held]
+
+
+def scores(model: ScoringModel, features: np.ndarray) -> np.ndarray:
+    """calculate_rl_score's rl_score for rows of SCORE_FEATURES"""
+    return np.clip(features @ np.array(model.weights) + model.bias, 0, 100)
+
+
+def evaluate(model: ScoringModel, features: np.ndarray, labels: np.ndarray) -> Dict[str, Any]:
+    """Classification metrics of score >= DECISION_THRESHOLD against the outcome"""
+    predicted = scores(model, features) >= DECISION_THRESHOLD
+    actual = labels == 1
+    tp = int(np.sum(predicted & actual))
+    fp = int(np.sum(predicted & ~actual))
+    fn = int(np.sum(~predicted & actual))
+    tn = int(np.sum(~predicted & ~actual))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        "samples": len(labels),
+        "accuracy": (tp + tn) / len(labels) if len(labels) else 0.0,
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "confusion": {"tp": tp, "fp": fp, "fn": fn, "tn": tn},
+    }
+
+
+def fit(features: np.ndarray, labels: np.ndarray, initial: ScoringModel, config: RetrainConfig,
+        on_epoch: Callable[[int, float], bool] = None) -> Tuple[Tuple[float, ...], float, float]:
+    """Fit weights and bias so that P(positive) = sigmoid((score - 50) / TEMPERATURE)
+
+    Full-batch gradient descent on the mean log loss, in feature-scaled
+    coordinates, with an L2 pull toward the initial weights. on_epoch(epoch,
+    loss) may return False to stop early. Returns (weights, bias, final loss).
+    """
+    x = features / FEATURE_SCALE
+    anchor = np.array(initial.weights) * FEATURE_SCALE / TEMPERATURE
+    coef = anchor.copy()
+    intercept = (initial.bias - DECISION_THRESHOLD) / TEMPERATURE
+    n = len(labels)
+    loss = float("nan")
+    report_every = max(1, config.epochs // 50)
+
+    for epoch in range(1, config.epochs + 1):
+        z = x @ coef + intercept
+        p = 1 / (1 + np.exp(-z))
+        error = p - labels
+        coef -= config.learning_rate * (x.T @ error / n + config.l2 * (coef - anchor))
+        intercept -= config.learning_rate * float(error.mean())
+        if on_epoch and (epoch % report_every == 0 or epoch == config.epochs):
+            # log(1 + e^z) - y z, stable for large |z|
+            loss = float(np.mean(np.logaddexp(0, z) - labels * z))
+            if on_epoch(epoch, loss) is False:
+                break
+
+    weights = coef * TEMPERATURE / FEATURE_SCALE
+    bias = intercept * TEMPERATURE + DECISION_THRESHOLD
+    if not np.all(np.isfinite(weights)) or not np.isfinite(bias):
+        raise ValueError("Retraining diverged; lower RL_RETRAIN_LEARNING_RATE")
+    if not np.isfinite(loss):
+        z = x @ coef + intercept
+        loss = float(np.mean(np.logaddexp(0, z) - labels * z))
+    return tuple(float(w) for w in weights), float(bias), loss
+
+
+def next_version(version: str) -> str:
+    """v1.0.3 -> v1.0.4 (anything else gets a .1 suffix)"""
+    match = re.fullmatch(r"(.*?)(\d+)", version)
+    return f"{match.group(1)}{int(match.group(2)) + 1}" if match else f"{version}.1"
+
+
+def save_snapshot(db, model: ScoringModel, parent: str, metrics: Dict, baseline: Dict,
+                  training: Dict) -> ScoringModel:
+    """Store a new inactive snapshot under the next free version after parent"""
+    latest = next(iter(db[SNAPSHOTS].find({}, {"_id": 1}).sort("created_at", -1).limit(1)), None)
+    version = next_version(latest["_id"] if latest else parent)
+    while True:
+        try:
+            db[SNAPSHOTS].insert_one({
+                "_id": version,
+                "weights": dict(zip(SCORE_FEATURES, model.weights)),
+                "bias": model.bias,
+                "parent_version": parent,
+                "metrics": metrics,
+                "baseline_metrics": baseline,
+                "training": training,
+                "active": False,
+                "created_at": datetime.utcnow(),
+            })
+            return model._replace(version=version)
+        except DuplicateKeyError:
+            version = next_version(version)  # another retrain took it
+
+
+def _model_of(snapshot: Dict) -> ScoringModel:
+    return ScoringModel(snapshot["_id"], tuple(snapshot["weights"][name] for name in SCORE_FEATURES),
+                        snapshot.get("bias", 0.0))
+
+
+def activate_snapshot(db, engine: RLEngine, version: str) -> ScoringModel:
+    """Make a stored snapshot the active one and swap the engine to it"""
+    snapshot = db[SNAPSHOTS].find_one({"_id": version})
+    if snapshot is None:
+        raise KeyError(version)
+    # At most one active snapshot (unique partial index): clear the old one first
+    db[SNAPSHOTS].update_many({"active": True, "_id": {"$ne": version}}, {"$set": {"active": False}})
+    db[SNAPSHOTS].update_one({"_id": version}, {"$set": {"active": True, "activated_at": datetime.utcnow()}})
+    return engine.load_model(*_model_of(snapshot))
+
+
+def load_active_snapshot(db, engine: RLEngine) -> Optional[ScoringModel]:
+    """Swap the engine to the active snapshot, if one was activated"""
+    snapshot = db[SNAPSHOTS].find_one({"active": True})
+    if snapshot is None:
+        return None
+    if snapshot["_id"] == engine.model_version:
+        return engine.model
+    return engine.load_model(*_model_of(snapshot))
+
+
+def list_snapshots(db, limit: int = 20) -> List[Dict[str, Any]]:
+    snapshots = []
+    for doc in db[SNAPSHOTS].find({}).sort("created_at", -1).limit(limit):
+        doc["version"] = doc.pop("_id")
+        snapshots.append(doc)
+    return snapshots
+
+
+class RetrainingCancelled(Exception):
+    pass
+
+
+class RetrainingWorker:
+    """Runs retraining jobs on a thread, one at a time, and keeps their progress
+
+    store is the RL database adapter: get_connection() and
+    store_model_performance().
+    """
+
+    def __init__(self, engine: RLEngine, store, config: RetrainConfig = None, keep_jobs: int = 20):
+        self.engine = engine
+        self.store = store
+        self.config = config or RetrainConfig.from_env()
+        self.keep_jobs = keep_jobs
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._cancel = False
+
+    @property
+    def running(self) -> Optional[Dict[str, Any]]:
+        """The job in progress, if any"""
+        if self._task and not self._task.done():
+            return next(reversed(self.jobs.values()))
+        return None
+
+    def start(self) -> Dict[str, Any]:
+        """Queue a retraining job on the running event loop; raises RuntimeError if one is running"""
+        if self.running:
+            raise RuntimeError(f"Retraining job {self.running['job_id']} is still running")
+        job = {
+            "job_id": uuid.uuid4().hex[:12],
+            "status": "queued",
+            "progress_percentage": 0.0,
+            "feedback_scanned": 0,
+            "samples": 0,
+            "started_at": datetime.utcnow().isoformat(),
+        }
+        self.jobs[job["job_id"]] = job
+        while len(self.jobs) > self.keep_jobs:
+            self.jobs.popitem(last=False)
+        self._cancel = False
+        self._task = asyncio.get_running_loop().create_task(self._run(job))
+        return job
+
+    async def _run(self, job: Dict[str, Any]):
+        try:
+            await asyncio.to_thread(self.retrain, job)
+        except Exception as e:
+            logger.error(f"❌ RL retraining job {job['job_id']} failed: {e}")
+
+    def retrain(self, job: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Run one retraining job to completion on this thread; returns the job"""
+        job = job if job is not None else {"job_id": uuid.uuid4().hex[:12], "started_at": datetime.utcnow().isoformat()}
+        started = time.perf_counter()
+        try:
+            with self.store.get_connection() as db:
+                self._retrain(db, job)
+            job["status"] = "completed"
+            job["progress_percentage"] = 100.0
+        except RetrainingCancelled:
+            job["status"] = "cancelled"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            raise
+        finally:
+            job["finished_at"] = datetime.utcnow().isoformat()
+            job["duration_seconds"] = round(time.perf_counter() - started, 3)
+        return job
+
+    def _check_cancel(self):
+        if self._cancel:
+            raise RetrainingCancelled()
+
+    def _retrain(self, db, job: Dict[str, Any]):
+        config = self.config
+        current = self.engine.model
+
+        # 1. Replay buffer from the full history
+        job.update(status="loading", progress_percentage=0.0)
+        total = max(1, db.rl_feedback.estimated_document_count())
+        buffer = ReplayBuffer(config.buffer_size)
+        scanned = 0
+        for features, labels, rewards, batch_scanned in stream_samples(db, config.batch_size):
+            self._check_cancel()
+            buffer.extend(features, labels, rewards)
+            scanned += batch_scanned
+            job.update(feedback_scanned=scanned, samples=buffer.size,
+                       progress_percentage=round(40.0 * min(1.0, scanned / total), 1))
+        features, labels, rewards = buffer.arrays()
+        if len(labels) < config.min_samples:
+            raise ValueError(f"Insufficient labelled feedback for retraining: {len(labels)} samples "
+                             f"from {scanned} feedback (minimum {config.min_samples} required)")
+
+        # 2. Held-out split, and how the weights in use do on it
+        train, holdout = split_holdout(len(labels), config.holdout, config.seed)
+        baseline = evaluate(current, features[holdout], labels[holdout])
+
+        # 3. Fit
+        job.update(status="training", progress_percentage=40.0)
+
+        def on_epoch(epoch: int, loss: float) -> bool:
+            job.update(epoch=epoch, loss=round(loss, 6),
+                       progress_percentage=round(40.0 + 50.0 * epoch / config.epochs, 1))
+            return not self._cancel
+
+        weights, bias, loss = fit(features[train], labels[train], current, config, on_epoch)
+        self._check_cancel()
+
+        # 4. Evaluate, snapshot and maybe promote
+        job.update(status="evaluating", progress_percentage=90.0)
+        candidate = ScoringModel(current.version, weights, bias)
+        metrics = evaluate(candidate, features[holdout], labels[holdout])
+        metrics["average_reward"] = float(rewards[holdout].mean())
+        metrics["train_loss"] = loss
+
+        job.update(status="saving", progress_percentage=95.0)
+        snapshot = save_snapshot(db, candidate, parent=current.version, metrics=metrics, baseline=baseline,
+                                 training={"feedback_scanned": scanned, "samples": len(labels),
+                                           "train_samples": len(train), "holdout_samples": len(holdout),
+                                           "epochs": config.epochs, "learning_rate": config.learning_rate,
+                                           "l2": config.l2})
+        promoted = metrics["f1"] >= baseline["f1"]
+        if promoted:
+            activate_snapshot(db, self.engine, snapshot.version)
+
+        self.store.store_model_performance({
+            "model_version": snapshot.version,
+            "accuracy": metrics["accuracy"],
+            "precision_score": metrics["precision"],
+            "recall_score": metrics["recall"],
+            "f1_score": metrics["f1"],
+            "average_reward": metrics["average_reward"],
+            "total_predictions": len(holdout),
+            "evaluation_date": datetime.utcnow().isoformat(),
+        })
+        job.update(model_version=snapshot.version, previous_version=current.version, promoted=promoted,
+                   weights=dict(zip(SCORE_FEATURES, weights)), bias=bias,
+                   metrics=metrics, baseline_metrics=baseline)
+        logger.info(f"✅ RL retraining {job['job_id']}: {snapshot.version} on {len(labels)} samples, "
+                    f"holdout F1 {metrics['f1']:.3f} vs {baseline['f1']:.3f} "
+                    f"({'activated' if promoted else 'kept ' + current.version})")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    def load_active_model(self) -> Optional[ScoringModel]:
+        """Swap the engine to the active snapshot, if it is not the one in use"""
+        with self.store.get_connection() as db:
+            return load_active_snapshot(db, self.engine)
+
+    def activate(self, version: str) -> ScoringModel:
+        with self.store.get_connection() as db:
+            return activate_snapshot(db, self.engine, version)
+
+    def snapshots(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self.store.get_connection() as db:
+            return list_snapshots(db, limit)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.config.refresh_seconds)
+            try:
+                await asyncio.to_thread(self.load_active_model)
+            except Exception as e:
+                logger.warning(f"⚠️ RL model refresh failed, keeping {self.engine.model_version}: {e}")
+
+    def start_refresh(self):
+        """Follow snapshot activations made by other workers, on the current event loop"""
+        if self.config.refresh_seconds and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop following activations; ask a running job to stop at its next batch or epoch and wait for it"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+        if self._task and not self._task.done():
+            self._cancel = True
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        last = next(reversed(self.jobs.values()), None)
+        return {
+            "model_version": self.engine.model_version,
+            "running": bool(self.running),
+            "last_job": {k: last.get(k) for k in ("job_id", "status", "progress_percentage", "model_version",
+                                                  "promoted")} if last else None,
+        }
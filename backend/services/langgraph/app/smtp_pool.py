@@ -0,0 +1,223 @@
+"""
+Pooled, persistent SMTP sessions for outgoing email
+
+Opening a Gmail session costs a TCP connect, a TLS handshake and a login;
+paying it per message makes bulk sequences slow and trips the provider's
+login throttling. The pool keeps up to SMTP_POOL_SIZE authenticated
+sessions open. Each session is driven by a worker task that takes the
+messages queued behind it in batches and sends a whole batch in one trip to
+the SMTP thread pool, so smtplib never blocks the event loop.
+
+Dead sessions are replaced: a session idle for a while is checked with NOOP
+before use, and a send that finds the server gone reconnects and retries the
+message once. Sessions are recycled after SMTP_MAX_MESSAGES_PER_SESSION
+messages and closed after SMTP_IDLE_TIMEOUT_SECONDS without work.
+
+Environment:
+    SMTP_POOL_SIZE                  sessions kept open (default 3)
+    SMTP_PIPELINE_BATCH             messages sent per session per thread hop (default 10)
+    SMTP_MAX_MESSAGES_PER_SESSION   messages before a session is recycled (default 100)
+    SMTP_IDLE_TIMEOUT_SECONDS       idle time before a session is closed (default 60)
+"""
+import asyncio
+import logging
+import os
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A session idle longer than this is NOOP-checked before it is trusted with a message
+NOOP_AFTER_SECONDS = 10.0
+
+# The server went away (idle timeout, 421 shutdown); reconnecting and retrying is safe
+DISCONNECTED = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class _Session:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPSessionPool:
+    """Authenticated SMTP sessions shared by all email sends.
+
+    Args:
+        smtp_factory: Opens an unauthenticated session; defaults to SMTP_SSL
+            (or plain SMTP with use_ssl=False) on host:port
+    """
+
+    def __init__(self, host: str, port: int, username: str = None, password: str = None,
+                 use_ssl: bool = True, size: int = None, batch_size: int = None,
+                 max_messages_per_session: int = None, idle_timeout: float = None,
+                 timeout: float = 30.0, smtp_factory: Callable[[], smtplib.SMTP] = None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size or int(os.getenv("SMTP_POOL_SIZE", "3"))
+        self.batch_size = batch_size or int(os.getenv("SMTP_PIPELINE_BATCH", "10"))
+        self.max_messages_per_session = max_messages_per_session or int(
+            os.getenv("SMTP_MAX_MESSAGES_PER_SESSION", "100"))
+        self.idle_timeout = idle_timeout or float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", "60"))
+        smtp_class = smtplib.SMTP_SSL if use_ssl else smtplib.SMTP
+        self._smtp_factory = smtp_factory or (lambda: smtp_class(host, port, timeout=timeout))
+        self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="smtp")
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._busy = 0
+        self.counters = {"sessions_opened": 0, "reconnects": 0, "noop_failures": 0,
+                         "batches": 0, "messages_sent": 0, "messages_failed": 0}
+
+    # ----- blocking side, runs on the SMTP threads -----
+
+    def _open(self) -> _Session:
+        smtp = self._smtp_factory()
+        try:
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.counters["sessions_opened"] += 1
+        return _Session(smtp)
+
+    @staticmethod
+    def _close(session: Optional[_Session]):
+        if session is None:
+            return
+        try:
+            session.smtp.quit()
+        except Exception:
+            session.smtp.close()
+
+    def _usable(self, session: Optional[_Session]) -> bool:
+        if session is None or session.sent >= self.max_messages_per_session:
+            return False
+        if time.monotonic() - session.last_used < NOOP_AFTER_SECONDS:
+            return True
+        try:
+            return session.smtp.noop()[0] == 250
+        except Exception:
+            self.counters["noop_failures"] += 1
+            return False
+
+    def _deliver(self, session: Optional[_Session],
+                 batch: List[Message]) -> Tuple[Optional[_Session], List[Optional[BaseException]]]:
+        """Send a batch over one session; returns the session to keep and an error (or None) per message"""
+        outcomes: List[Optional[BaseException]] = []
+        for index, msg in enumerate(batch):
+            error = None
+            for attempt in range(2):
+                try:
+                    if not self._usable(session):
+                        self._close(session)
+                        session = None
+                        session = self._open()
+                    session.smtp.send_message(msg)
+                    session.sent += 1
+                    session.last_used = time.monotonic()
+                    error = None
+                    break
+                except DISCONNECTED as e:
+                    # Dead session: replace it and retry the message once
+                    self._close(session)
+                    session, error = None, e
+                    if attempt == 0:
+                        self.counters["reconnects"] += 1
+                except smtplib.SMTPRecipientsRefused as e:
+                    error = e  # the session is fine; only this message failed
+                    break
+                except smtplib.SMTPAuthenticationError as e:
+                    # Retrying the login per message would only add to the provider's throttling
+                    return None, outcomes + [e] * (len(batch) - index)
+                except Exception as e:
+                    # Connect and protocol errors: start the next message on a fresh session
+                    self._close(session)
+                    session, error = None, e
+                    break
+            outcomes.append(error)
+        return session, outcomes
+
+    # ----- event loop side -----
+
+    def _ensure_workers(self):
+        self._workers = [w for w in self._workers if not w.done()]
+        idle = len(self._workers) - self._busy
+        if self._queue.qsize() > idle and len(self._workers) < self.size:
+            self._workers.append(asyncio.get_running_loop().create_task(self._worker()))
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        session: Optional[_Session] = None
+        try:
+            while True:
+                try:
+                    first = await asyncio.wait_for(self._queue.get(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    # A send() between the timeout and this resume counted us as idle
+                    if self._queue.empty():
+                        return
+                    continue
+                batch = [first]
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                live = [(msg, future) for msg, future in batch if not future.cancelled()]
+                if not live:
+                    continue
+                self._busy += 1
+                try:
+                    session, outcomes = await loop.run_in_executor(
+                        self.executor, self._deliver, session, [msg for msg, _ in live])
+                except Exception as e:
+                    outcomes = [e] * len(live)
+                finally:
+                    self._busy -= 1
+                self.counters["batches"] += 1
+                for (_, future), error in zip(live, outcomes):
+                    self.counters["messages_failed" if error else "messages_sent"] += 1
+                    if future.done():
+                        continue
+                    if error:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(None)
+        finally:
+            # Stop counting as a worker before the await below, so _ensure_workers replaces us
+            worker = asyncio.current_task()
+            if worker in self._workers:
+                self._workers.remove(worker)
+            if session is not None:
+                try:
+                    await loop.run_in_executor(self.executor, self._close, session)
+                except Exception:
+                    pass
+
+    async def send(self, msg: Message):
+        """Queue a message on the pool; raises the smtplib error if it could not be sent"""
+        future = asyncio.get_running_loop().create_future()
+        if self._queue is None:  # created on the serving loop, not at import
+            self._queue = asyncio.Queue()
+        self._queue.put_nowait((msg, future))
+        self._ensure_workers()
+        await future
+
+    async def aclose(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "workers": len([w for w in self._workers if not w.done()]),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "messages_per_session": round(self.counters["messages_sent"] / max(self.counters["sessions_opened"], 1), 1),
+        }
@@ -1,5 +1,4 @@
 from langchain_core.tools import tool
-import httpx
 import logging
 from datetime import datetime
 import sys
@@ -17,23 +16,20 @@ except ImportError:
         api_key_secret = os.getenv("API_KEY_SECRET", "")
     settings = Settings()
 from .communication import comm_manager
+from .gateway_client import gateway
 
 logger = logging.getLogger(__name__)
-HTTPX_TIMEOUT = 120.0
 
 @tool
 async def get_candidate_profile(candidate_id: int) -> dict:
     """Fetch candidate profile from API Gateway"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.gateway_url}/v1/candidates/{candidate_id}",
-                headers={"Authorization": f"Bearer {settings.api_key_secret}"},
-                timeout=HTTPX_TIMEOUT
-            )
-            response.raise_for_status()
-            logger.info(f"✅ Retrieved candidate {candidate_id}")
-            return response.json()
+        result = await gateway.cached(
+            ("candidate", candidate_id),
+            lambda: gateway.request("get_candidate_profile", "GET", f"/v1/candidates/{candidate_id}")
+        )
+        logger.info(f"✅ Retrieved candidate {candidate_id}")
+        return result
     except Exception as e:
         logger.error(f"❌ Error fetching candidate {candidate_id}: {str(e)}")
         return {"error": str(e), "candidate_id": candidate_id}
@@ -42,15 +38,13 @@ async def get_candidate_profile(candidate_id: int) -> dict:
 async def get_job_details(job_id: int) -> dict:
     """Fetch job details from API Gateway"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.gateway_url}/v1/jobs/{job_id}",
-                headers={"Authorization": f"Bearer {settings.api_key_secret}"},
-                timeout=HTTPX_TIMEOUT
-            )
-            response.raise_for_status()
-            logger.info(f"✅ Retrieved job {job_id}")
-            return response.json()
+        result = await gateway.cached(
+            ("job", job_id),
+            lambda: gateway.request("get_job_details", "GET", f"/v1/jobs/{job_id}"),
+            share_across_workflows=True
+        )
+        logger.info(f"✅ Retrieved job {job_id}")
+        return result
     except Exception as e:
         logger.error(f"❌ Error fetching job {job_id}: {str(e)}")
         return {"error": str(e), "job_id": job_id}
@@ -59,16 +53,12 @@ async def get_job_details(job_id: int) -> dict:
 async def update_application_status(application_id: int, status: str, notes: str = "") -> dict:
     """Update application status in database"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                f"{settings.gateway_url}/v1/applications/{application_id}",
-                json={"status": status, "notes": notes},
-                headers={"Authorization": f"Bearer {settings.api_key_secret}"},
-                timeout=HTTPX_TIMEOUT
-            )
-            response.raise_for_status()
-            logger.info(f"✅ Updated application {application_id} to {status}")
-            return response.json()
+        result = await gateway.request(
+            "update_application_status", "PUT", f"/v1/applications/{application_id}",
+            json={"status": status, "notes": notes}
+        )
+        logger.info(f"✅ Updated application {application_id} to {status}")
+        return result
     except Exception as e:
         logger.error(f"❌ Error updating application {application_id}: {str(e)}")
         return {"error": str(e), "application_id": application_id}
@@ -83,17 +73,13 @@ async def get_ai_matching_score(candidate_id: int, job_id: int) -> dict:
             logger.info(f"🧪 MOCK AI matching score for candidate {candidate_id}: {mock_score}/100")
             return {"candidate_id": candidate_id, "job_id": job_id, "score": mock_score}
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.gateway_url}/v1/match",
-                json={"candidate_id": candidate_id, "job_id": job_id},
-                headers={"Authorization": f"Bearer {settings.api_key_secret}"},
-                timeout=60.0
-            )
-            response.raise_for_status()
-            result = response.json()
-            logger.info(f"✅ Got matching score for candidate {candidate_id}: {result.get('score', 0)}/100")
-            return result
+        result = await gateway.cached(
+            ("match", candidate_id, job_id),
+            lambda: gateway.request("get_ai_matching_score", "POST", "/v1/match",
+                                    json={"candidate_id": candidate_id, "job_id": job_id}, timeout=60.0)
+        )
+        logger.info(f"✅ Got matching score for candidate {candidate_id}: {result.get('score', 0)}/100")
+        return result
     except Exception as e:
         logger.error(f"❌ Error getting match score: {str(e)}")
         return {"error": str(e), "candidate_id": candidate_id, "job_id": job_id, "score": 65}
@@ -135,16 +121,12 @@ async def send_multi_channel_notification(
 async def log_audit_event(event_type: str, details: dict) -> dict:
     """Log audit event to database"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.gateway_url}/v1/audit-logs",
-                json={"event_type": event_type, "details": details},
-                headers={"Authorization": f"Bearer {settings.api_key_secret}"},
-                timeout=HTTPX_TIMEOUT
-            )
-            response.raise_for_status()
-            logger.info(f"✅ Audit event logged: {event_type}")
-            return response.json()
+        result = await gateway.request(
+            "log_audit_event", "POST", "/v1/audit-logs",
+            json={"event_type": event_type, "details": details}
+        )
+        logger.info(f"✅ Audit event logged: {event_type}")
+        return result
     except Exception as e:
         logger.error(f"❌ Error logging audit event: {str(e)}")
         return {"error": str(e), "event_type": event_type}
@@ -153,16 +135,12 @@ async def log_audit_event(event_type: str, details: dict) -> dict:
 async def update_hr_dashboard(application_id: int, update_data: dict) -> dict:
     """Trigger real-time HR dashboard update"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.gateway_url}/v1/dashboard/refresh",
-                json={"application_id": application_id, "data": update_data},
-                headers={"Authorization": f"Bearer {settings.api_key_secret}"},
-                timeout=HTTPX_TIMEOUT
-            )
-            response.raise_for_status()
-            logger.info(f"✅ Dashboard updated for application {application_id}")
-            return {"status": "dashboard_updated", "application_id": application_id}
+        await gateway.request(
+            "update_hr_dashboard", "POST", "/v1/dashboard/refresh",
+            json={"application_id": application_id, "data": update_data}
+        )
+        logger.info(f"✅ Dashboard updated for application {application_id}")
+        return {"status": "dashboard_updated", "application_id": application_id}
     except Exception as e:
         logger.error(f"❌ Error updating dashboard: {str(e)}")
         return {"error": str(e), "application_id": application_id}
\ No newline at end of file
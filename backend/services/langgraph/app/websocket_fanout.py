@@ -0,0 +1,218 @@
+"""
+Backpressured WebSocket fan-out for workflow and batch progress
+
+broadcast() never waits on a socket. Every connection has a bounded send
+queue drained by its own task, so a slow or stalled client only delays
+itself. While a client is behind, a new progress message replaces the
+progress message still waiting at the tail of its queue; other messages
+(completed, error, update) are always delivered in order. A client whose
+queue fills up, or whose send stalls past WS_SEND_TIMEOUT_SECONDS, is
+disconnected with close code 1013 (try again later) and can reconnect.
+
+Progress is also throttled per workflow: at most WS_PROGRESS_MAX_PER_SECOND
+progress messages are fanned out, and the latest one held back is sent when
+the interval ends (or right before the next non-progress message).
+
+Environment:
+    WS_SEND_QUEUE_SIZE           messages queued per connection before it is dropped (default 64)
+    WS_SEND_TIMEOUT_SECONDS      longest a single send may take (default 10)
+    WS_PROGRESS_MAX_PER_SECOND   progress messages per workflow per second, 0 = unthrottled (default 10)
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# WebSocket close code for "try again later"
+TRY_AGAIN_LATER = 1013
+
+
+def _is_progress(message: dict) -> bool:
+    return message.get("type") == "progress"
+
+
+class _Subscriber:
+    """One connection's send queue and the task draining it"""
+
+    def __init__(self, manager: "ConnectionManager", websocket: WebSocket, client_id: str):
+        self.manager = manager
+        self.websocket = websocket
+        self.client_id = client_id
+        self.queue: deque = deque()
+        self.ready = asyncio.Event()
+        self.task = asyncio.get_running_loop().create_task(self._drain())
+
+    def put(self, message: dict) -> bool:
+        """Queue a message; False when the client is too far behind to keep"""
+        if _is_progress(message) and self.queue and _is_progress(self.queue[-1]):
+            self.queue[-1] = message
+            self.manager.counters["coalesced"] += 1
+        elif len(self.queue) >= self.manager.max_queue:
+            return False
+        else:
+            self.queue.append(message)
+        self.ready.set()
+        return True
+
+    async def _drain(self):
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            while self.queue:
+                message = self.queue.popleft()
+                try:
+                    await asyncio.wait_for(self.websocket.send_json(message), timeout=self.manager.send_timeout)
+                except asyncio.TimeoutError:
+                    self.manager.drop(self, "send timed out")
+                    return
+                except Exception as e:
+                    self.manager.counters["send_errors"] += 1
+                    logger.error(f"WebSocket broadcast error: {str(e)}")
+                    self.manager.disconnect(self.websocket, self.client_id)
+                    return
+                self.manager.counters["sent"] += 1
+
+
+class _Throttle:
+    def __init__(self):
+        self.last_sent = 0.0
+        self.held: Optional[dict] = None
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class ConnectionManager:
+    """WebSocket subscribers per workflow (or bulk batch) id"""
+
+    def __init__(self, max_queue: int = None, send_timeout: float = None, progress_rate: float = None):
+        self.max_queue = max_queue or int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+        self.send_timeout = send_timeout or float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+        rate = progress_rate if progress_rate is not None else float(os.getenv("WS_PROGRESS_MAX_PER_SECOND", "10"))
+        self.progress_interval = 1.0 / rate if rate > 0 else 0.0
+        self.active_connections: Dict[str, List[_Subscriber]] = {}
+        self._throttles: Dict[str, _Throttle] = {}
+        self.counters = {"sent": 0, "coalesced": 0, "throttled": 0, "dropped_consumers": 0, "send_errors": 0}
+
+    async def connect(self, websocket: WebSocket, client_id: str):
+        await websocket.accept()
+        self.active_connections.setdefault(client_id, []).append(_Subscriber(self, websocket, client_id))
+        logger.info(f"✅ WebSocket connected: {client_id}")
+
+    def _remove(self, websocket: WebSocket, client_id: str) -> Optional[_Subscriber]:
+        subscribers = self.active_connections.get(client_id, [])
+        for subscriber in subscribers:
+            if subscriber.websocket is websocket:
+                subscribers.remove(subscriber)
+                break
+        else:
+            return None
+        if not subscribers:
+            del self.active_connections[client_id]
+            throttle = self._throttles.pop(client_id, None)
+            if throttle and throttle.timer:
+                throttle.timer.cancel()
+        if subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()
+        return subscriber
+
+    def disconnect(self, websocket: WebSocket, client_id: str):
+        if self._remove(websocket, client_id):
+            logger.info(f"❌ WebSocket disconnected: {client_id}")
+
+    def drop(self, subscriber: _Subscriber, reason: str):
+        """Disconnect a consumer that cannot keep up"""
+        if not self._remove(subscriber.websocket, subscriber.client_id):
+            return
+        self.counters["dropped_consumers"] += 1
+        logger.warning(f"⚠️ Dropping slow WebSocket consumer for {subscriber.client_id}: {reason}")
+
+        async def close():
+            try:
+                await asyncio.wait_for(subscriber.websocket.close(code=TRY_AGAIN_LATER), timeout=1.0)
+            except Exception:
+                pass
+
+        asyncio.get_running_loop().create_task(close())
+
+    def _fan_out(self, client_id: str, message: dict):
+        for subscriber in list(self.active_connections.get(client_id, [])):
+            if not subscriber.put(message):
+                self.drop(subscriber, f"{len(subscriber.queue)} messages queued")
+
+    def _release_held(self, client_id: str):
+        throttle = self._throttles.get(client_id)
+        if throttle is None:
+            return
+        if throttle.timer:
+            throttle.timer.cancel()
+            throttle.timer = None
+        if throttle.held is not None:
+            held, throttle.held = throttle.held, None
+            throttle.last_sent = time.monotonic()
+            self._fan_out(client_id, held)
+
+    async def broadcast(self, client_id: str, message: dict):
+        """Queue a message for every subscriber of client_id without waiting on any socket"""
+        if client_id not in self.active_connections:
+            return
+        if not _is_progress(message):
+            self._release_held(client_id)
+            self._fan_out(client_id, message)
+            return
+        if not self.progress_interval:
+            self._fan_out(client_id, message)
+            return
+
+        throttle = self._throttles.setdefault(client_id, _Throttle())
+        wait = throttle.last_sent + self.progress_interval - time.monotonic()
+        if wait <= 0 and throttle.held is None:
+            throttle.last_sent = time.monotonic()
+            self._fan_out(client_id, message)
+            return
+        if throttle.held is not None:
+            self.counters["throttled"] += 1  # superseded before it was sent
+        throttle.held = message
+        if throttle.timer is None:
+            throttle.timer = asyncio.get_running_loop().call_later(max(wait, 0), self._release_held, client_id)
+
+    def stats(self) -> Dict[str, Any]:
+        depths = {client_id: max((len(s.queue) for s in subscribers), default=0)
+                  for client_id, subscribers in self.active_connections.items()}
+        deepest = sorted(depths.items(), key=lambda item: item[1], reverse=True)[:5]
+        return {
+            **self.counters,
+            "connections": sum(len(subscribers) for subscribers in self.active_connections.values()),
+            "streams": len(self.active_connections),
+            "queued_messages": sum(len(s.queue) for subscribers in self.active_connections.values()
+                                   for s in subscribers),
+            "deepest_queues": {client_id: depth for client_id, depth in deepest if depth},
+        }
+
+    def prometheus_text(self, service: str) -> str:
+        """Render fan-out metrics in the Prometheus text exposition format"""
+        stats = self.stats()
+        lines = []
+
+        def metric(name, kind, help_text, value):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f'{name}{{service="{service}"}} {value}')
+
+        metric("websocket_connections", "gauge", "Open progress WebSocket connections", stats["connections"])
+        metric("websocket_send_queue_depth", "gauge", "Messages queued across connections", stats["queued_messages"])
+        metric("websocket_send_queue_depth_max", "gauge", "Deepest connection send queue",
+               max(stats["deepest_queues"].values(), default=0))
+        metric("websocket_messages_sent_total", "counter", "Messages delivered", stats["sent"])
+        metric("websocket_messages_coalesced_total", "counter",
+               "Progress messages replaced by a newer one while queued", stats["coalesced"])
+        metric("websocket_progress_throttled_total", "counter",
+               "Progress messages superseded by the per-workflow rate limit", stats["throttled"])
+        metric("websocket_consumers_dropped_total", "counter", "Slow consumers disconnected",
+               stats["dropped_consumers"])
+        metric("websocket_send_errors_total", "counter", "Failed sends", stats["send_errors"])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,207 @@
+"""
+WhatsApp delivery tracking off the event loop
+
+Twilio SDK calls are blocking, so they run on a small dedicated thread pool.
+A send returns as soon as Twilio accepts the message; the final delivery
+status arrives later and is written to the message's notification_deliveries
+record, either from Twilio's status callback (WHATSAPP_STATUS_CALLBACK_URL
+pointing at /webhook/whatsapp/status) or, without one, from a background
+poller that fetches the status after a delay.
+
+Only accepted() creates a record. Status updates are plain updates filtered
+on the stored status, so an update that is out of order changes nothing. An
+update that arrives before the record exists (a fast "failed" callback can
+beat accepted()) is held per SID and applied as soon as accepted() creates it.
+
+Environment:
+    TWILIO_MAX_WORKERS                  threads for Twilio SDK calls (default 8)
+    WHATSAPP_STATUS_CALLBACK_URL        public URL of /webhook/whatsapp/status (polling when unset)
+    WHATSAPP_STATUS_CHECK_DELAY_SECONDS first status poll after sending (default 5)
+    WHATSAPP_STATUS_MAX_CHECKS          polls before giving up on a non-final status (default 4)
+"""
+import asyncio
+import logging
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from pymongo import MongoClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import settings
+from .mongo_pool import shared_client
+
+logger = logging.getLogger(__name__)
+
+DELIVERIES = "notification_deliveries"
+
+# Twilio message statuses in delivery order; a callback or poll never moves a record backwards
+STATUS_ORDER = {"accepted": 0, "scheduled": 0, "queued": 1, "sending": 2, "sent": 3,
+                "delivered": 4, "read": 5, "undelivered": 6, "failed": 6, "canceled": 6}
+FINAL_STATUSES = ("delivered", "read", "undelivered", "failed", "canceled")
+# Early status updates held for messages accepted() has not recorded yet
+MAX_EARLY_STATUSES = 1000
+
+
+def _is_newer(current: Optional[str], incoming: str) -> bool:
+    if current is None:
+        return True
+    return STATUS_ORDER.get(incoming, 0) > STATUS_ORDER.get(current, 0)
+
+
+class WhatsAppDeliveryTracker:
+    """Runs Twilio calls on a dedicated executor and tracks delivery status per message SID"""
+
+    def __init__(self, twilio_client=None, db=None):
+        self.twilio_client = twilio_client
+        self.executor = ThreadPoolExecutor(max_workers=int(os.getenv("TWILIO_MAX_WORKERS", "8")),
+                                           thread_name_prefix="twilio")
+        self.callback_url = os.getenv("WHATSAPP_STATUS_CALLBACK_URL") or None
+        self.check_delay = float(os.getenv("WHATSAPP_STATUS_CHECK_DELAY_SECONDS", "5"))
+        self.max_checks = int(os.getenv("WHATSAPP_STATUS_MAX_CHECKS", "4"))
+        self._db = db
+        self._connected = db is not None
+        self.fallback_storage: Dict[str, Dict[str, Any]] = {}
+        self._checks: Dict[str, asyncio.Task] = {}
+        self._early: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.counters = {"accepted": 0, "status_updates": 0, "early_status_updates": 0,
+                         "polls": 0, "poll_errors": 0}
+
+    def _collection(self):
+        if not self._connected:
+            self._connected = True
+            try:
+                mongodb_uri = getattr(settings, 'database_url', None) or os.getenv('DATABASE_URL')
+                client = shared_client(mongodb_uri, MongoClient, appname="bhiv-langgraph")
+                client.admin.command('ping')
+                self._db = client[os.getenv('MONGODB_DB_NAME', 'bhiv_hr')]
+            except Exception as e:
+                logger.warning(f"⚠️ Delivery records kept in memory, MongoDB unavailable: {e}")
+                self._db = None
+        return self._db[DELIVERIES] if self._db is not None else None
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking Twilio (or pymongo) call on the dedicated executor"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    def _create(self, message_sid: str, status: str, details: Dict[str, Any]):
+        """Insert the record of an accepted message (the only write that may create one)"""
+        now = datetime.utcnow()
+        record = {**details, "status": status, "created_at": now, "updated_at": now}
+        collection = self._collection()
+        if collection is None:
+            self.fallback_storage.setdefault(message_sid, {"message_sid": message_sid, **record})
+            return
+        collection.update_one({"message_sid": message_sid}, {"$setOnInsert": record}, upsert=True)
+
+    def _save(self, message_sid: str, fields: Dict[str, Any]) -> bool:
+        """Apply a status update unless the stored status is already further along.
+
+        Returns False when there is no record for the message yet.
+        """
+        now = datetime.utcnow()
+        collection = self._collection()
+        if collection is None:
+            record = self.fallback_storage.get(message_sid)
+            if record is not None and _is_newer(record.get("status"), fields["status"]):
+                record.update(fields, updated_at=now)
+            return record is not None
+        # Matches only a record not yet at this status or beyond, so a stale update changes nothing
+        ranks_ahead = [status for status, rank in STATUS_ORDER.items() if rank >= STATUS_ORDER.get(fields["status"], 0)]
+        result = collection.update_one(
+            {"message_sid": message_sid, "status": {"$nin": ranks_ahead}},
+            {"$set": {**fields, "updated_at": now}},
+        )
+        if result.matched_count:
+            return True
+        return collection.find_one({"message_sid": message_sid}, {"_id": 1}) is not None
+
+    def _hold_early(self, message_sid: str, fields: Dict[str, Any]):
+        held = self._early.get(message_sid)
+        if held is None or _is_newer(held["status"], fields["status"]):
+            self._early[message_sid] = fields
+        self._early.move_to_end(message_sid)
+        while len(self._early) > MAX_EARLY_STATUSES:
+            self._early.popitem(last=False)
+
+    def get(self, message_sid: str) -> Optional[Dict[str, Any]]:
+        collection = self._collection()
+        if collection is None:
+            record = self.fallback_storage.get(message_sid)
+        else:
+            record = collection.find_one({"message_sid": message_sid}, {"_id": 0})
+        if record:
+            record = {k: v.isoformat() if isinstance(v, datetime) else v for k, v in record.items()}
+        return record
+
+    async def get_record(self, message_sid: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self.get, message_sid)
+
+    async def accepted(self, message_sid: str, recipient: str, status: str, workflow_id: str = None):
+        """Record a message Twilio accepted and, without a status callback, schedule polling"""
+        self.counters["accepted"] += 1
+        try:
+            await self.run(self._create, message_sid, status or "accepted",
+                           {"channel": "whatsapp", "recipient": recipient, "workflow_id": workflow_id})
+        except Exception as e:
+            logger.error(f"❌ Failed to record WhatsApp message {message_sid}: {e}")
+        early = self._early.pop(message_sid, None)
+        if early is not None:
+            await self.run(self._save, message_sid, early)
+        if not self.callback_url and self.twilio_client and message_sid not in self._checks:
+            self._checks[message_sid] = asyncio.get_running_loop().create_task(self._poll(message_sid))
+
+    async def update_status(self, message_sid: str, status: str, error_code: Any = None,
+                            error_message: str = None):
+        """Status from Twilio (callback or poll); out-of-order updates are ignored"""
+        fields: Dict[str, Any] = {"status": status}
+        if error_code:
+            fields["error_code"] = error_code
+            fields["error_message"] = error_message or "Phone number not verified in Twilio sandbox"
+        self.counters["status_updates"] += 1
+        if not await self.run(self._save, message_sid, fields):
+            # accepted() has not recorded the message yet: hold the update for it, then
+            # retry once in case accepted() finished creating the record in the meantime
+            self.counters["early_status_updates"] += 1
+            self._hold_early(message_sid, fields)
+            if await self.run(self._save, message_sid, fields):
+                self._early.pop(message_sid, None)
+        if status in ("failed", "undelivered"):
+            logger.error(f"❌ WhatsApp {message_sid} {status} - Error {error_code}: {fields.get('error_message')}")
+        else:
+            logger.info(f"📊 WhatsApp {message_sid} status: {status}")
+
+    async def _poll(self, message_sid: str):
+        try:
+            delay = self.check_delay
+            for _ in range(self.max_checks):
+                await asyncio.sleep(delay)
+                self.counters["polls"] += 1
+                try:
+                    message = await self.run(lambda: self.twilio_client.messages(message_sid).fetch())
+                except Exception as e:
+                    self.counters["poll_errors"] += 1
+                    logger.warning(f"⚠️ Could not check message status: {e}")
+                    delay *= 2
+                    continue
+                await self.update_status(message_sid, message.status, message.error_code, message.error_message)
+                if message.status in FINAL_STATUSES:
+                    return
+                delay *= 2
+        finally:
+            self._checks.pop(message_sid, None)
+
+    async def stop(self):
+        for task in list(self._checks.values()):
+            task.cancel()
+        await asyncio.gather(*self._checks.values(), return_exceptions=True)
+        self._checks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "pending_status_checks": len(self._checks),
+                "held_early_statuses": len(self._early),
+                "status_source": "callback" if self.callback_url else "polling"}
@@ -0,0 +1,124 @@
+"""
+Node-level progress events for graph executions
+
+Streams a compiled graph in debug mode and turns its task / task_result
+events into node_started / node_finished events with measured durations,
+so workflow progress reflects what the graph is actually doing. Durations
+come from the timestamps LangGraph stamps on the events, which keeps them
+accurate even when the consumer falls behind.
+"""
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Graph nodes in execution order (send_notifications is skipped for pending applications)
+NODE_ORDER = ("screen_application", "send_notifications", "update_hr_dashboard", "collect_feedback")
+
+NODE_LABELS = {
+    "screen_application": "Screening application",
+    "send_notifications": "Sending notifications",
+    "update_hr_dashboard": "Updating HR dashboard",
+    "collect_feedback": "Collecting feedback",
+}
+
+# Progress reported once the last node finishes; 100 is reserved for completion
+NODES_DONE_PERCENT = 90
+
+
+def node_label(node: str) -> str:
+    return NODE_LABELS.get(node, node.replace("_", " ").capitalize())
+
+
+def progress_after(node: str) -> int:
+    """Progress percentage once the given node has finished"""
+    if node not in NODE_ORDER:
+        return 0
+    return int(NODES_DONE_PERCENT * (NODE_ORDER.index(node) + 1) / len(NODE_ORDER))
+
+
+def translate(debug_event: Dict[str, Any], started: Dict[str, datetime]) -> Optional[Dict[str, Any]]:
+    """Map one LangGraph debug event to a node event (None for other event types).
+
+    Args:
+        started: Start time per task id, filled in by task events and used
+            to time the matching task_result
+    """
+    kind = debug_event.get("type")
+    payload = debug_event.get("payload") or {}
+    task_id = payload.get("id")
+    at = datetime.fromisoformat(debug_event["timestamp"])
+
+    if kind == "task":
+        started[task_id] = at
+        return {"type": "node_started", "node": payload.get("name"), "step": debug_event.get("step"), "at": at}
+    if kind == "task_result":
+        began = started.pop(task_id, at)
+        return {
+            "type": "node_finished",
+            "node": payload.get("name"),
+            "step": debug_event.get("step"),
+            "at": at,
+            "duration_ms": round((at - began).total_seconds() * 1000, 2),
+            "error": payload.get("error"),
+        }
+    return None
+
+
+async def stream_node_events(graph, state: dict, config: dict) -> AsyncIterator[Dict[str, Any]]:
+    """Run a compiled graph through its async API and yield node events as they happen.
+
+    Ends with a {"type": "final_state", "state": ...} event; errors raised
+    by the graph propagate to the caller.
+    """
+    started: Dict[str, datetime] = {}
+    final_state = None
+    async for mode, chunk in graph.astream(state, config, stream_mode=["debug", "values"]):
+        if mode == "values":
+            final_state = chunk
+            continue
+        event = translate(chunk, started)
+        if event:
+            yield event
+    yield {"type": "final_state", "state": final_state or {}}
+
+
+class NodeLatencyStats:
+    """Rolling per-name latency (graph nodes, tools) for /workflows/stats (this process only)"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, node: str, duration_ms: float, error: bool = False):
+        with self._lock:
+            self._samples.setdefault(node, deque(maxlen=self.window)).append(duration_ms)
+            self._counts[node] = self._counts.get(node, 0) + 1
+            if error:
+                self._errors[node] = self._errors.get(node, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {node: sorted(samples) for node, samples in self._samples.items()}
+            counts, errors = dict(self._counts), dict(self._errors)
+
+        summary = {}
+        for node, samples in snapshot.items():
+            summary[node] = {
+                "count": counts[node],
+                "errors": errors.get(node, 0),
+                "avg_ms": round(sum(samples) / len(samples), 2),
+                "p50_ms": samples[len(samples) // 2],
+                "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+                "max_ms": samples[-1],
+            }
+        return summary
+
+
+node_latency = NodeLatencyStats()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the MongoDB index manifest, reconciliation plan and query plan checks
+"""
+
+import sys
+import os
+import asyncio
+
+# Add gateway service directory to path
+gateway_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'gateway')
+sys.path.insert(0, os.path.abspath(gateway_dir))
+
+from app.index_manifest import INDEXES, IndexSpec, plan_collection, reconcile_indexes, specs_by_collection
+from app.query_plans import HOT_QUERIES, plan_findings
+
+
+def test_manifest_names_and_keys_unique_per_collection():
+    for collection, specs in specs_by_collection().items():
+        names = [spec.name for spec in specs]
+        keys = [spec.keys for spec in specs]
+        assert len(names) == len(set(names)), collection
+        assert len(keys) == len(set(keys)), collection
+
+
+def test_every_hot_query_collection_has_indexes():
+    indexed = {spec.collection for spec in INDEXES}
+    assert {q.collection for q in HOT_QUERIES if not q.full_scan_expected} <= indexed
+
+
+def test_plan_matches_by_keys_and_reports_drift():
+    specs = [
+        IndexSpec("c", (("email", 1),), "email_unique", ("gateway",), unique=True),
+        IndexSpec("c", (("created_at", 1),), "created_at_index", ("gateway",)),
+        IndexSpec("c", (("expires_at", 1),), "expires_at_ttl", ("gateway",), expire_after_seconds=0),
+        IndexSpec("c", (("status", 1),), "status_index", ("gateway",)),
+    ]
+    existing = {
+        "_id_": {"key": [("_id", 1)]},
+        "email_1": {"key": [("email", 1)], "unique": True},
+        "created_at_1": {"key": [("created_at", 1.0)]},
+        "expires_at_1": {"key": [("expires_at", 1)]},
+        "role_1": {"key": [("role", 1)]},
+    }
+    plan = plan_collection(specs, existing)
+    assert [(spec.name, name) for spec, name in plan["ok"]] == [("email_unique", "email_1"), ("created_at_index", "created_at_1")]
+    assert [spec.name for spec in plan["missing"]] == ["status_index"]
+    assert [(spec.name, name, diff) for spec, name, diff in plan["conflicts"]] == [
+        ("expires_at_ttl", "expires_at_1", {"expireAfterSeconds": (0, None)})
+    ]
+    assert plan["unmanaged"] == ["role_1"]
+
+
+class FakeCollection:
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self.created = []
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def create_indexes(self, models):
+        for model in models:
+            self.created.append(model.document["name"])
+
+    async def drop_index(self, name):
+        raise AssertionError("reconcile must not drop by default")
+
+
+def test_reconcile_only_creates_missing_indexes():
+    collections = {}
+
+    class FakeDb:
+        def __getitem__(self, name):
+            existing = {"email_unique": {"key": [("email", 1)], "unique": True}} if name == "candidates" else {}
+            return collections.setdefault(name, FakeCollection(existing))
+
+    report = asyncio.run(reconcile_indexes(FakeDb(), services=["gateway"]))
+    assert "email_unique" not in collections["candidates"].created
+    assert "skill_ids_index" in collections["candidates"].created
+    assert "runtime-core" not in str(report["created"]) and "audit_logs" not in collections
+    assert report["failed"] == []
+
+
+def test_plan_findings_for_find_and_aggregate_explains():
+    # Winning plan uses an index; a rejected plan scanning must not count
+    find_explain = {"queryPlanner": {
+        "winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "email_unique"}},
+        "rejectedPlans": [{"stage": "COLLSCAN"}],
+    }}
+    assert plan_findings(find_explain) == []
+
+    sbe_explain = {"queryPlanner": {"winningPlan": {"queryPlan": {
+        "stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}, "slotBasedPlan": {"stages": "..."}}}}
+    assert plan_findings(sbe_explain) == [
+        "in-memory SORT at explain.queryPlanner.winningPlan.queryPlan",
+        "COLLSCAN at explain.queryPlanner.winningPlan.queryPlan.inputStage",
+    ]
+
+    aggregate_explain = {"stages": [
+        {"$cursor": {"queryPlanner": {"winningPlan": {"stage": "IXSCAN"}}}},
+        {"$lookup": {"from": "rl_predictions"}, "collectionScans": 3},
+        {"$sort": {"sortKey": {"created_at": -1}}},
+    ]}
+    assert plan_findings(aggregate_explain) == [
+        "COLLSCAN of 'rl_predictions' in $lookup at explain.stages[1]",
+        "in-memory SORT at explain.stages[2] ($sort not pushed down to an index)",
+    ]
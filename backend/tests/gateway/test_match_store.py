@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Unit tests for matching_cache validity rules and incremental merge
+"""
+
+import sys
+import os
+from datetime import datetime
+
+# Add gateway service directory to path
+gateway_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'gateway')
+sys.path.insert(0, os.path.abspath(gateway_dir))
+
+from app.match_store import job_content_hash, classify_stored_result, merge_matches
+
+
+JOB = {"title": "Backend Engineer", "requirements": "Python, MongoDB", "location": "Pune"}
+CREATED = datetime(2025, 1, 1, 10, 0, 0)
+UPDATED = datetime(2025, 1, 2, 10, 0, 0)
+
+
+def pool(count, created=CREATED, updated=UPDATED):
+    return {
+        "count": count,
+        "max_created_at": created,
+        "max_updated_at": updated,
+        "version": f"{count}:{created.isoformat()}:{updated.isoformat() if updated else '-'}",
+    }
+
+
+def stored_for(p, job=JOB):
+    return {
+        "job_hash": job_content_hash(job),
+        "pool_version": p["version"],
+        "pool_count": p["count"],
+        "pool_max_created_at": p["max_created_at"],
+        "pool_max_updated_at": p["max_updated_at"],
+        "algorithm_version": "3.0.0-phase3-production",
+    }
+
+
+def test_job_hash_tracks_matching_fields():
+    assert job_content_hash(JOB) == job_content_hash(dict(JOB, status="closed"))
+    assert job_content_hash(JOB) != job_content_hash(dict(JOB, requirements="Java"))
+
+
+def test_classification():
+    base = pool(100)
+    stored = stored_for(base)
+    job_hash = job_content_hash(JOB)
+
+    assert classify_stored_result(None, job_hash, base) == "miss"
+    assert classify_stored_result(stored, job_hash, base) == "hit"
+    assert classify_stored_result(stored, "other", base) == "miss"
+    # A few new candidates -> incremental merge
+    assert classify_stored_result(stored, job_hash, pool(103, created=datetime(2025, 1, 3))) == "incremental"
+    # Edited candidate -> full recompute
+    assert classify_stored_result(stored, job_hash, pool(100, updated=datetime(2025, 1, 5))) == "miss"
+    # Deleted candidate -> full recompute
+    assert classify_stored_result(stored, job_hash, pool(99)) == "miss"
+    # Too many new candidates -> full recompute
+    assert classify_stored_result(stored, job_hash, pool(1000, created=datetime(2025, 1, 3))) == "miss"
+
+
+def test_merge_keeps_best_first_and_limit():
+    existing = [{"candidate_id": "a", "score": 90}, {"candidate_id": "b", "score": 70}]
+    added = [{"candidate_id": "c", "score": 80}, {"candidate_id": "d", "score": 10}]
+    merged = merge_matches(existing, added, limit=3)
+    assert [m["candidate_id"] for m in merged] == ["a", "c", "b"]
+
+
+def test_merge_orders_on_raw_scores_and_spaces_like_a_full_run():
+    # Stored from a full run: 90, 90, 85 raw, spaced by agent /match to 90, 89.2, 85
+    existing = [{"candidate_id": "a", "score": 90.0, "raw_score": 90.0},
+                {"candidate_id": "b", "score": 89.2, "raw_score": 90.0},
+                {"candidate_id": "c", "score": 85.0, "raw_score": 85.0}]
+    # New candidates scored on their own come back unspaced
+    added = [{"candidate_id": "d", "score": 89.5, "raw_score": 89.5},
+             {"candidate_id": "e", "score": 85.0, "raw_score": 85.0}]
+    merged = merge_matches(existing, added, limit=10)
+    assert [m["candidate_id"] for m in merged] == ["a", "b", "d", "c", "e"]
+    assert [m["score"] for m in merged] == [90.0, 89.2, 88.4, 85.0, 84.2]
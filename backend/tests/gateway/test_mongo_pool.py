@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared MongoDB client factory and pool metrics
+"""
+
+import sys
+import os
+
+# Add gateway service directory to path
+gateway_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'gateway')
+sys.path.insert(0, os.path.abspath(gateway_dir))
+
+from pymongo.monitoring import (
+    ConnectionCheckedInEvent, ConnectionCheckedOutEvent, ConnectionCheckOutFailedEvent,
+    ConnectionCheckOutStartedEvent, ConnectionCreatedEvent, PoolCreatedEvent
+)
+
+from app import mongo_pool
+from app.mongo_pool import PoolMetrics, pool_options, shared_client
+
+ADDRESS = ("db.example.com", 27017)
+
+
+def test_pool_options_from_env(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "64")
+    monkeypatch.setenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2500")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "not-a-number")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zlib, bogus")
+    monkeypatch.setenv("MONGO_ZLIB_COMPRESSION_LEVEL", "3")
+    options = pool_options()
+    assert options["maxPoolSize"] == 64
+    assert options["waitQueueTimeoutMS"] == 2500
+    assert options["minPoolSize"] == 2
+    assert options["compressors"] == "zlib"
+    assert options["zlibCompressionLevel"] == 3
+
+
+def test_listener_tracks_in_use_wait_queue_and_latency():
+    metrics = PoolMetrics()
+    metrics.pool_created(PoolCreatedEvent(ADDRESS, {"maxPoolSize": 5}))
+    metrics.connection_created(ConnectionCreatedEvent(ADDRESS, 1))
+    for _ in range(3):
+        metrics.connection_check_out_started(ConnectionCheckOutStartedEvent(ADDRESS))
+    metrics.connection_checked_out(ConnectionCheckedOutEvent(ADDRESS, 1, 0.002))
+    metrics.connection_checked_out(ConnectionCheckedOutEvent(ADDRESS, 2, 0.2))
+    metrics.connection_check_out_failed(ConnectionCheckOutFailedEvent(ADDRESS, "timeout", 10.0))
+    metrics.connection_checked_in(ConnectionCheckedInEvent(ADDRESS, 1))
+
+    stats = metrics.snapshot()["db.example.com:27017"]
+    assert stats["max_pool_size"] == 5
+    assert stats["in_use"] == 1
+    assert stats["wait_queue_depth"] == 0
+    assert stats["wait_queue_depth_max"] == 3
+    assert stats["checkouts"] == 2
+    assert stats["checkout_failures"] == {"timeout": 1}
+
+    text = metrics.prometheus_text("gateway")
+    labels = 'service="gateway",address="db.example.com:27017"'
+    assert f"mongodb_pool_connections_in_use{{{labels}}} 1" in text
+    assert f'mongodb_pool_checkout_seconds_bucket{{{labels},le="0.005"}} 1' in text
+    assert f'mongodb_pool_checkout_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f'mongodb_pool_checkout_failures_total{{{labels},reason="timeout"}} 1' in text
+
+
+def test_shared_client_is_created_once_per_uri():
+    created = []
+
+    class FakeClient:
+        def __init__(self, uri, **kwargs):
+            created.append((uri, kwargs))
+
+        def close(self):
+            pass
+
+    try:
+        first = shared_client("mongodb://a", FakeClient, appname="svc")
+        assert shared_client("mongodb://a", FakeClient) is first
+        assert shared_client("mongodb://b", FakeClient) is not first
+        assert len(created) == 2
+        assert created[0][1]["event_listeners"] == [mongo_pool.pool_metrics]
+        assert created[0][1]["appname"] == "svc"
+    finally:
+        mongo_pool.close_shared_clients()
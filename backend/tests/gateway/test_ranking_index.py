@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the gateway fallback ranking index
+"""
+
+import sys
+import os
+
+# Add gateway service directory to path
+gateway_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'gateway')
+sys.path.insert(0, os.path.abspath(gateway_dir))
+
+from app.ranking_index import CandidateRankingIndex, tokenize
+
+
+def build_index():
+    index = CandidateRankingIndex()
+    index.upsert("c1", {"name": "Asha", "technical_skills": "Python, FastAPI, MongoDB", "location": "Mumbai", "experience_years": 6})
+    index.upsert("c2", {"name": "Ravi", "technical_skills": "Java, Spring", "location": "Pune", "experience_years": 3})
+    index.upsert("c3", {"name": "Meera", "technical_skills": "Python, Django", "location": "Remote", "experience_years": 1})
+    index.upsert("r1", {"name": "Recruiter", "technical_skills": "Python", "role": "recruiter"})
+    return index
+
+
+def test_tokenize_normalizes_skills():
+    assert tokenize("Python, C++, Node.js.") == ["python", "c++", "node.js"]
+    assert tokenize(["React", "TypeScript"]) == ["react", "typescript"]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_by_skill_overlap():
+    index = build_index()
+    results = index.search("Python FastAPI MongoDB", location="Mumbai", experience_level="senior", limit=3)
+    assert [r["candidate_id"] for r in results][:2] == ["c1", "c3"]
+    assert results[0]["location_match"] is True
+    assert set(results[0]["matched_skills"]) == {"Python", "FastAPI", "MongoDB"}
+    assert all(r["candidate_id"] != "r1" for r in results)
+
+
+def test_incremental_update_changes_ranking():
+    index = build_index()
+    version = index.version
+    index.update_fields("c2", {"technical_skills": "Python, FastAPI, MongoDB, Java"})
+    assert index.version > version
+    results = index.search("FastAPI MongoDB", limit=2)
+    assert {r["candidate_id"] for r in results} == {"c1", "c2"}
+
+    index.remove("c1")
+    results = index.search("FastAPI MongoDB", limit=5)
+    assert [r["candidate_id"] for r in results] == ["c2"]
+    assert index.size == 2
+
+
+def test_limit_is_respected():
+    index = build_index()
+    assert len(index.search("python", limit=1)) == 1
+    assert index.search("python", limit=0) == []
+
+
+def test_skill_aliases_match_canonical_requirements():
+    index = CandidateRankingIndex()
+    index.upsert("c1", {"name": "Kiran", "technical_skills": "js, node, postgres"})
+    index.upsert("c2", {"name": "Lata", "technical_skills": "Java, Spring"})
+    results = index.search("JavaScript and Node.js with PostgreSQL", limit=2)
+    assert results[0]["candidate_id"] == "c1"
+    assert results[0]["matched_skills"] == ["JavaScript", "Node.js", "PostgreSQL"]
+
+
+def test_full_skill_coverage_outranks_partial_match_with_prose_requirements():
+    index = CandidateRankingIndex()
+    index.upsert("full", {"name": "Nisha", "technical_skills": "Python, Django, PostgreSQL, AWS", "location": "Pune",
+                          "experience_years": 6})
+    index.upsert("partial", {"name": "Arjun", "technical_skills": "Python", "location": "Bangalore",
+                             "experience_years": 6})
+    index.upsert("other", {"name": "Dev", "technical_skills": "Java, Spring", "location": "Delhi"})
+    requirements = ("We are looking for a senior backend engineer with strong Python and Django skills, "
+                    "hands-on PostgreSQL experience and solid AWS knowledge. Excellent communication required.")
+    results = index.search(requirements, location="Bangalore", experience_level="senior", limit=3)
+    assert [r["candidate_id"] for r in results][:2] == ["full", "partial"]
+    assert set(results[0]["matched_skills"]) == {"Python", "Django", "PostgreSQL", "AWS"}
+    assert results[0]["score"] >= 0.7  # shown as 50 + 45 * score, i.e. a strong match
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Unit tests for gateway single-flight request coalescing
+"""
+
+import asyncio
+import sys
+import os
+
+# Add gateway service directory to path
+gateway_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'gateway')
+sys.path.insert(0, os.path.abspath(gateway_dir))
+
+from app.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight(ttl_seconds=30)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"matches": list(range(50))}
+
+    async def run():
+        return await asyncio.gather(*[flight.do(("job", 1), compute) for _ in range(10)])
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats["coalesced"] == 9
+
+
+def test_ttl_cache_and_version_key():
+    flight = SingleFlight(ttl_seconds=30)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        first = await flight.do(("job", 1), compute)
+        second = await flight.do(("job", 1), compute)
+        bumped = await flight.do(("job", 2), compute)
+        return first, second, bumped
+
+    assert asyncio.run(run()) == (1, 1, 2)
+
+
+def test_uncacheable_and_failed_results_are_not_kept():
+    flight = SingleFlight(ttl_seconds=30)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"agent_status": "disconnected"}
+
+    async def failing():
+        raise RuntimeError("agent down")
+
+    async def run():
+        await flight.do("k", compute, cacheable=lambda r: r["agent_status"] == "connected")
+        await flight.do("k", compute, cacheable=lambda r: r["agent_status"] == "connected")
+        try:
+            await flight.do("f", failing)
+        except RuntimeError:
+            pass
+        return "f" in flight._inflight
+
+    assert asyncio.run(run()) is False
+    assert len(calls) == 2
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the canonical skill dictionary
+"""
+
+import sys
+import os
+
+# Add gateway service directory to path
+gateway_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'gateway')
+sys.path.insert(0, os.path.abspath(gateway_dir))
+
+from app.skills import (
+    SKILLS, extract_skills, normalize_skills, parse_skills, skill_fields, skill_id, skill_names, skill_set
+)
+
+
+def test_dictionary_ids_and_aliases_are_unique():
+    ids = [entry[0] for entry in SKILLS]
+    assert len(ids) == len(set(ids))
+    aliases = [alias for entry in SKILLS for alias in entry[3]]
+    assert len(aliases) == len(set(aliases))
+
+
+def test_aliases_map_to_canonical_skill():
+    assert skill_id("js") == skill_id("JavaScript")
+    assert skill_id(" Node ") == skill_id("node.js") == skill_id("NodeJS")
+    assert skill_names([skill_id("postgres"), skill_id("k8s")]) == ["PostgreSQL", "Kubernetes"]
+    assert skill_id("underwater basket weaving") is None
+
+
+def test_parse_skill_list_keeps_order_and_unknowns():
+    ids, unknown = parse_skills("js, React.js; Go, Python 3 (Django), js, Basket Weaving")
+    assert skill_names(ids) == ["JavaScript", "React", "Go", "Python", "Django"]
+    assert unknown == ["basket weaving"]
+    assert normalize_skills(["C++", {"name": "C#"}, None]) == [skill_id("c++"), skill_id("c#")]
+
+
+def test_free_text_extraction_skips_ambiguous_words():
+    text = "Build REST services in Python/Django with machine learning; go-getter attitude, C++ a plus"
+    assert skill_names(extract_skills(text)) == ["Python", "Django", "Machine Learning", "C++"]
+
+
+def test_skill_fields_and_set():
+    fields = skill_fields("ReactJS, TS")
+    assert fields["skill_names"] == ["React", "TypeScript"]
+    assert "skills" not in fields  # raw list keeps skills the dictionary does not know
+    assert fields["skill_ids"] == [skill_id("react"), skill_id("typescript")]
+    assert skill_set(["js", "Figma", "Cobol"]) & skill_set("JavaScript, cobol") == {skill_id("js"), "cobol"}
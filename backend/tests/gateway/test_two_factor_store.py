@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-user 2FA state: encryption, replay protection, batch verification
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timezone
+
+# Add gateway service directory to path
+gateway_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'gateway')
+sys.path.insert(0, os.path.abspath(gateway_dir))
+
+import pyotp
+import pytest
+from cryptography.fernet import Fernet
+
+from app import two_factor_store as store
+
+
+def _matches(doc, query):
+    for field, cond in query.items():
+        if field == "$or":
+            if not any(_matches(doc, sub) for sub in cond):
+                return False
+        elif isinstance(cond, dict) and "$lt" in cond:
+            if field not in doc or not doc[field] < cond["$lt"]:
+                return False
+        elif isinstance(cond, dict) and "$exists" in cond:
+            if (field in doc) != cond["$exists"]:
+                return False
+        elif isinstance(cond, dict) and "$in" in cond:
+            if doc.get(field) not in cond["$in"]:
+                return False
+        elif isinstance(doc.get(field), list):
+            if cond not in doc[field]:
+                return False
+        elif doc.get(field) != cond:
+            return False
+    return True
+
+
+class Result:
+    def __init__(self, matched=0, modified=0, deleted=0):
+        self.matched_count = matched
+        self.modified_count = modified
+        self.deleted_count = deleted
+
+
+class FakeCollection:
+    """Just enough of a motor collection for the store's queries"""
+
+    def __init__(self):
+        self.docs = []
+
+    async def find_one(self, query):
+        return next((dict(d) for d in self.docs if _matches(d, query)), None)
+
+    def find(self, query, projection=None):
+        async def gen():
+            for d in [dict(d) for d in self.docs if _matches(d, query)]:
+                yield d
+        return gen()
+
+    async def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if _matches(doc, query):
+                doc.update(update.get("$set", {}))
+                for field in update.get("$unset", {}):
+                    doc.pop(field, None)
+                for field, value in update.get("$pull", {}).items():
+                    doc[field] = [v for v in doc.get(field, []) if v != value]
+                return Result(1, 1)
+        if upsert:
+            self.docs.append({**{k: v for k, v in query.items() if not k.startswith("$")}, **update.get("$set", {})})
+        return Result()
+
+    async def bulk_write(self, ops, ordered=True):
+        modified = 0
+        for op in ops:
+            modified += (await self.update_one(op._filter, op._doc)).modified_count
+        return Result(modified=modified)
+
+    async def delete_one(self, query):
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not _matches(d, query)]
+        return Result(deleted=before - len(self.docs))
+
+
+class FakeDb(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+@pytest.fixture(autouse=True)
+def encryption_key(monkeypatch):
+    monkeypatch.setenv("TWO_FACTOR_ENCRYPTION_KEYS", Fernet.generate_key().decode())
+    monkeypatch.setattr(store, "_fernet", None)
+
+
+def _enroll(db, user_id):
+    secret = asyncio.run(store.begin_setup(db, user_id))
+    db[store.COLLECTION].docs[-1]["status"] = "enabled"
+    return secret
+
+
+def test_secret_is_encrypted_at_rest_and_key_rotation_still_decrypts(monkeypatch):
+    db = FakeDb()
+    secret = asyncio.run(store.begin_setup(db, "u1"))
+    stored = db[store.COLLECTION].docs[0]
+    assert stored["status"] == "pending" and secret not in stored["secret_enc"]
+
+    old_key = os.environ["TWO_FACTOR_ENCRYPTION_KEYS"]
+    monkeypatch.setenv("TWO_FACTOR_ENCRYPTION_KEYS", f"{Fernet.generate_key().decode()},{old_key}")
+    monkeypatch.setattr(store, "_fernet", None)
+    assert store.user_secret(stored) == secret
+
+
+def test_verify_enables_pending_setup_and_rejects_replay():
+    db = FakeDb()
+    secret = asyncio.run(store.begin_setup(db, "u1"))
+    code = pyotp.TOTP(secret).now()
+
+    outcome, _ = asyncio.run(store.verify_code(db, "u1", code))
+    assert outcome == store.NOT_ENROLLED
+    outcome, _ = asyncio.run(store.verify_code(db, "u1", code, require_enabled=False))
+    assert outcome == store.OK
+    assert db[store.COLLECTION].docs[0]["status"] == "enabled"
+    outcome, _ = asyncio.run(store.verify_code(db, "u1", code))
+    assert outcome == store.REPLAYED
+    assert asyncio.run(store.verify_code(db, "u1", "000000" if code != "000000" else "111111"))[0] == store.INVALID_CODE
+
+
+def test_matched_step_respects_window():
+    secret = pyotp.random_base32()
+    totp = pyotp.TOTP(secret)
+    now = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    step = totp.timecode(now)
+    assert store.matched_step(secret, totp.generate_otp(step - 1), now, window=1) == step - 1
+    assert store.matched_step(secret, totp.generate_otp(step - 2), now, window=1) is None
+    assert store.matched_step(secret, "12ab56", now) is None
+
+
+def test_backup_codes_work_once():
+    db = FakeDb()
+    _enroll(db, "u1")
+    assert asyncio.run(store.set_backup_codes(db, "u1", ["BACKUP-AAAA1111"]))
+    assert asyncio.run(store.consume_backup_code(db, "u1", "backup-aaaa1111"))
+    assert not asyncio.run(store.consume_backup_code(db, "u1", "BACKUP-AAAA1111"))
+    assert not asyncio.run(store.set_backup_codes(db, "nobody", ["BACKUP-X"]))
+
+
+def test_batch_verification_outcomes_in_order():
+    db = FakeDb()
+    s1, s2 = _enroll(db, "u1"), _enroll(db, "u2")
+    asyncio.run(store.begin_setup(db, "pending"))
+    c1, c2 = pyotp.TOTP(s1).now(), pyotp.TOTP(s2).now()
+    bad = "000000" if c2 != "000000" else "111111"
+
+    outcomes = asyncio.run(store.verify_batch(db, [
+        ("u1", c1), ("u2", bad), ("u1", c1), ("pending", "123456"), ("ghost", "123456"), ("u2", c2),
+    ]))
+    assert outcomes == [store.OK, store.INVALID_CODE, store.REPLAYED, store.NOT_ENROLLED,
+                        store.NOT_ENROLLED, store.OK]
+    # Consumed by the batch, so single verification now sees a replay
+    assert asyncio.run(store.verify_code(db, "u2", c2))[0] == store.REPLAYED
+
+
+def test_batch_reports_codes_lost_to_concurrent_use():
+    db = FakeDb()
+    secret = _enroll(db, "u1")
+    code = pyotp.TOTP(secret).now()
+    collection = db[store.COLLECTION]
+    original_bulk_write = collection.bulk_write
+
+    async def racing_bulk_write(ops, ordered=True):
+        # Another replica consumes the same step between our read and write
+        await store.verify_code(db, "u1", code)
+        return await original_bulk_write(ops, ordered)
+
+    collection.bulk_write = racing_bulk_write
+    assert asyncio.run(store.verify_batch(db, [("u1", code)])) == [store.REPLAYED]
+
+
+def test_qr_render_cached_per_secret(monkeypatch):
+    calls = []
+    monkeypatch.setattr(store, "render_qr_png_base64", lambda uri: calls.append(uri) or f"png:{len(calls)}")
+    monkeypatch.setattr(store, "_qr_cache", store.SingleFlight(ttl_seconds=60))
+
+    async def render_many():
+        uri = store.provisioning_uri(pyotp.random_base32(), "u1")
+        return await asyncio.gather(*(store.qr_png_base64(uri) for _ in range(5)))
+
+    assert asyncio.run(render_many()) == ["png:1"] * 5
+    assert len(calls) == 1
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Unit tests for checkpoint retention planning and compaction
+"""
+
+import os
+import sys
+import time
+import asyncio
+import importlib.util
+from datetime import datetime, timedelta
+
+# Loaded as its own package: the gateway tests also put a package named "app" on sys.path
+app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app'))
+if "langgraph_app" not in sys.modules:
+    sys.path.insert(0, os.path.dirname(app_dir))  # config.py and dependencies.py
+    spec = importlib.util.spec_from_file_location("langgraph_app", os.path.join(app_dir, "__init__.py"),
+                                                  submodule_search_locations=[app_dir])
+    sys.modules["langgraph_app"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["langgraph_app"])
+from langgraph_app.checkpoint_retention import (RETENTION_STATE, WORKFLOWS, CheckpointCompactor, RetentionPolicy,
+                                                plan_thread)
+from langgraph_app.mongodb_checkpointer import BLOBS, CHECKPOINTS, WRITES
+
+POLICY = RetentionPolicy(keep_last=3, abandoned_ttl=timedelta(hours=1))
+
+
+def _checkpoints(n):
+    """n checkpoints, newest first; messages changes every step, status only on the first"""
+    return [{"thread_ts": f"ts{i:02d}", "channel_versions": {"messages": i + 1, "status": 1}}
+            for i in reversed(range(n))]
+
+
+def test_running_thread_keeps_last_n():
+    plan = plan_thread(_checkpoints(5), completed=False, expired=False, policy=POLICY)
+    assert plan == {"before_ts": "ts02", "blob_floors": {"messages": 3, "status": 1}}
+    assert plan_thread(_checkpoints(3), completed=False, expired=False, policy=POLICY) is None
+
+
+def test_completed_thread_keeps_final_only():
+    plan = plan_thread(_checkpoints(5), completed=True, expired=False, policy=POLICY)
+    assert plan == {"before_ts": "ts04", "blob_floors": {"messages": 5, "status": 1}}
+
+
+def test_abandoned_thread_is_dropped():
+    assert plan_thread([], completed=False, expired=True, policy=POLICY) == {"drop_thread": True}
+
+
+def _matches(doc, query):
+    for field, cond in query.items():
+        if field == "$or":
+            if not any(_matches(doc, sub) for sub in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = doc.get(field)
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            if "$lt" in cond and (value is None or not value < cond["$lt"]):
+                return False
+            if "$gte" in cond and (value is None or not value >= cond["$gte"]):
+                return False
+        elif doc.get(field) != cond:
+            return False
+    return True
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda d: d[field], reverse=direction == -1)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return self.docs
+
+
+class Result:
+    def __init__(self, deleted):
+        self.deleted_count = deleted
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return Cursor([dict(d) for d in self.docs if _matches(d, query)])
+
+    async def find_one(self, query):
+        return next((dict(d) for d in self.docs if _matches(d, query)), None)
+
+    async def distinct(self, field, query):
+        return sorted({d.get(field) for d in self.docs if _matches(d, query)})
+
+    async def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is None:
+            doc = dict(query)
+            self.docs.append(doc)
+        doc.update(update["$set"])
+
+    async def bulk_write(self, ops, ordered=True):
+        before = len(self.docs)
+        for op in ops:
+            self.docs = [d for d in self.docs if not _matches(d, op._filter)]
+        return Result(before - len(self.docs))
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+def _db(now, threads):
+    """threads: thread_id -> (checkpoint count, age of the newest checkpoint)"""
+    db = FakeDB()
+    key = {"checkpoint_ns": ""}
+    for thread, (count, age) in threads.items():
+        for i, doc in enumerate(_checkpoints(count)):
+            created_at = now - age - timedelta(seconds=i)
+            db[CHECKPOINTS].docs.append({**key, "thread_id": thread, "created_at": created_at, **doc})
+            db[WRITES].docs.append({**key, "thread_id": thread, "thread_ts": doc["thread_ts"], "task_id": "t"})
+        db[BLOBS].docs += [{**key, "thread_id": thread, "channel": "messages", "version": v}
+                           for v in range(1, count + 1)]
+        db[BLOBS].docs.append({**key, "thread_id": thread, "channel": "status", "version": 1})
+    return db
+
+
+def _remaining(db, collection, thread, field):
+    return sorted(d[field] for d in db[collection].docs if d["thread_id"] == thread)
+
+
+def test_compaction_pass_prunes_running_completed_and_abandoned_threads():
+    now = datetime.utcnow()
+    db = _db(now, {"running": (5, timedelta(0)), "done": (5, timedelta(0)), "stale": (5, timedelta(hours=2)),
+                   "short": (2, timedelta(0))})
+    db[WORKFLOWS].docs += [{"workflow_id": "done", "completed_at": now}, {"workflow_id": "running"}]
+
+    compactor = CheckpointCompactor(db, POLICY)
+    summary = asyncio.run(compactor.run_once())
+    assert summary == {"threads_compacted": 2, "threads_expired": 1,
+                       "checkpoints_deleted": 2 + 4 + 5, "writes_deleted": 2 + 4 + 5, "blobs_deleted": 2 + 4 + 6}
+
+    assert _remaining(db, CHECKPOINTS, "running", "thread_ts") == ["ts02", "ts03", "ts04"]
+    assert _remaining(db, CHECKPOINTS, "done", "thread_ts") == ["ts04"]
+    assert _remaining(db, CHECKPOINTS, "stale", "thread_ts") == []
+    assert _remaining(db, CHECKPOINTS, "short", "thread_ts") == ["ts00", "ts01"]
+    # Blobs still referenced by kept checkpoints survive
+    assert _remaining(db, BLOBS, "running", "version") == [1, 3, 4, 5]
+    assert _remaining(db, BLOBS, "done", "version") == [1, 5]
+    assert compactor.counters["passes"] == 1
+
+
+def test_later_passes_read_only_what_changed_since_the_watermark():
+    now = datetime.utcnow()
+    policy = RetentionPolicy(keep_last=3, abandoned_ttl=timedelta(milliseconds=300), batch_size=4)
+    db = _db(now, {f"thread{i}": (3, timedelta(0)) for i in range(5)})
+    compactor = CheckpointCompactor(db, policy)
+
+    async def catch_up():
+        passes = 0
+        while True:
+            await compactor.run_once()
+            passes += 1
+            if not compactor.behind:
+                return passes
+
+    # 15 checkpoints read 4 at a time: the first pass only gets part of the way
+    assert asyncio.run(catch_up()) > 1
+    watermark = compactor.watermark
+    assert db[RETENTION_STATE].docs[0]["at"] == watermark
+    assert sum(len(_remaining(db, CHECKPOINTS, f"thread{i}", "thread_ts")) for i in range(5)) == 15
+
+    # thread0 checkpoints again and thread1's workflow completes
+    db[CHECKPOINTS].docs.append({"thread_id": "thread0", "checkpoint_ns": "", "thread_ts": "ts03",
+                                 "created_at": datetime.utcnow(), "channel_versions": {"messages": 4, "status": 1}})
+    db[WORKFLOWS].docs.append({"workflow_id": "thread1", "completed_at": datetime.utcnow()})
+    db[CHECKPOINTS].queries.clear()
+    restarted = CheckpointCompactor(db, policy)  # resumes from the stored watermark
+    summary = asyncio.run(restarted.run_once())
+    assert summary["threads_compacted"] == 2 and summary["threads_expired"] == 0
+    assert _remaining(db, CHECKPOINTS, "thread0", "thread_ts") == ["ts01", "ts02", "ts03"]
+    assert _remaining(db, CHECKPOINTS, "thread1", "thread_ts") == ["ts02"]
+    scans = [q["created_at"] for q in db[CHECKPOINTS].queries if "created_at" in q]
+    assert scans and all(scan.get("$gte") is not None for scan in scans)
+    assert scans[0]["$gte"] == watermark
+
+    # Once the abandoned TTL passes, the idle threads age out of a range read
+    time.sleep(0.35)
+    summary = asyncio.run(restarted.run_once())
+    assert summary["threads_expired"] == 4
+    assert {d["thread_id"] for d in db[CHECKPOINTS].docs} == {"thread1"}
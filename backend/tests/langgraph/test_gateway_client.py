@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pooled gateway client and its tool caches
+"""
+
+import os
+import sys
+import asyncio
+import importlib.util
+
+import httpx
+
+# Loaded as its own package: the gateway tests also put a package named "app" on sys.path
+app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app'))
+if "langgraph_app" not in sys.modules:
+    sys.path.insert(0, os.path.dirname(app_dir))  # config.py and dependencies.py
+    spec = importlib.util.spec_from_file_location("langgraph_app", os.path.join(app_dir, "__init__.py"),
+                                                  submodule_search_locations=[app_dir])
+    sys.modules["langgraph_app"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["langgraph_app"])
+from langgraph_app.gateway_client import GatewayClient, tool_latency, workflow_cache
+
+
+def make_gateway(status=200):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.01)
+        return httpx.Response(status, json={"path": request.url.path})
+
+    gateway = GatewayClient("http://gateway", "key")
+    gateway._client = httpx.AsyncClient(base_url="http://gateway", transport=httpx.MockTransport(handler))
+    return gateway, calls
+
+
+def _fetch(gateway, tool, path):
+    return lambda: gateway.request(tool, "GET", path)
+
+
+def test_reads_are_shared_within_a_workflow_run():
+    gateway, calls = make_gateway()
+
+    async def run():
+        with workflow_cache():
+            first = await asyncio.gather(*(gateway.cached(("candidate", 1), _fetch(gateway, "candidate", "/v1/candidates/1"))
+                                           for _ in range(3)))
+            again = await gateway.cached(("candidate", 1), _fetch(gateway, "candidate", "/v1/candidates/1"))
+        with workflow_cache():
+            other_run = await gateway.cached(("candidate", 1), _fetch(gateway, "candidate", "/v1/candidates/1"))
+        await gateway.aclose()
+        return first, again, other_run
+
+    first, again, other_run = asyncio.run(run())
+    assert first[0] == again == other_run == {"path": "/v1/candidates/1"}
+    assert calls == ["/v1/candidates/1", "/v1/candidates/1"]
+    assert gateway.cache_counters == {"workflow_hits": 3, "job_hits": 0, "misses": 2}
+
+
+def test_job_details_are_shared_across_runs_until_ttl():
+    gateway, calls = make_gateway()
+
+    async def run():
+        for _ in range(3):
+            with workflow_cache():
+                await gateway.cached(("job", 7), _fetch(gateway, "job", "/v1/jobs/7"), share_across_workflows=True)
+        gateway._jobs[("job", 7)] = (0, gateway._jobs[("job", 7)][1])  # expire it
+        await gateway.cached(("job", 7), _fetch(gateway, "job", "/v1/jobs/7"), share_across_workflows=True)
+        await gateway.aclose()
+
+    asyncio.run(run())
+    assert calls == ["/v1/jobs/7", "/v1/jobs/7"]
+    assert gateway.cache_counters["job_hits"] == 2
+
+
+def test_failures_are_timed_and_not_cached():
+    gateway, calls = make_gateway(status=503)
+
+    async def run():
+        with workflow_cache():
+            for _ in range(2):
+                try:
+                    await gateway.cached(("job", 9), _fetch(gateway, "flaky_tool", "/v1/jobs/9"),
+                                         share_across_workflows=True)
+                except httpx.HTTPStatusError:
+                    pass
+        await gateway.aclose()
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    latency = tool_latency.summary()["flaky_tool"]
+    assert latency["count"] == 2 and latency["errors"] == 2
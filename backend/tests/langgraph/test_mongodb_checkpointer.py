@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the MongoDB LangGraph checkpointer (sync and async paths)
+"""
+
+import os
+import sys
+import asyncio
+import operator
+import importlib.util
+from typing import Annotated, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, END
+
+# Loaded as its own package: the gateway tests also put a package named "app" on sys.path
+app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app'))
+sys.path.insert(0, os.path.dirname(app_dir))  # config.py and dependencies.py
+spec = importlib.util.spec_from_file_location("langgraph_app", os.path.join(app_dir, "__init__.py"),
+                                              submodule_search_locations=[app_dir])
+sys.modules["langgraph_app"] = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sys.modules["langgraph_app"])
+from langgraph_app import mongodb_checkpointer as checkpointer_module
+
+
+def _matches(doc, query):
+    for field, cond in query.items():
+        if field == "$or":
+            if not any(_matches(doc, sub) for sub in cond):
+                return False
+        elif isinstance(cond, dict) and "$lt" in cond:
+            if field not in doc or not doc[field] < cond["$lt"]:
+                return False
+        elif doc.get(field) != cond:
+            return False
+    return True
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction=None):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda d: d[field], reverse=order == -1)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+    async def to_list(self, length):
+        return self.docs
+
+    def __aiter__(self):
+        async def gen():
+            for doc in self.docs:
+                yield doc
+        return gen()
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.bulk_calls = 0
+
+    def find(self, query):
+        return Cursor([dict(d) for d in self.docs if _matches(d, query)])
+
+    def find_one(self, query, sort=None):
+        cursor = self.find(query)
+        if sort:
+            cursor.sort(sort)
+        return next(iter(cursor), None)
+
+    def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is None:
+            if not upsert:
+                return
+            doc = dict(query)
+            self.docs.append(doc)
+            doc.update(update.get("$setOnInsert", {}))
+        doc.update(update.get("$set", {}))
+
+    def bulk_write(self, ops, ordered=True):
+        self.bulk_calls += 1
+        for op in ops:
+            self.update_one(op._filter, op._doc, upsert=op._upsert)
+
+
+class AsyncCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, query):
+        return self.collection.find(query)
+
+    async def find_one(self, *args, **kwargs):
+        return self.collection.find_one(*args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return self.collection.update_one(*args, **kwargs)
+
+    async def bulk_write(self, *args, **kwargs):
+        return self.collection.bulk_write(*args, **kwargs)
+
+
+class FakeClient:
+    def __init__(self, collections, wrap=None):
+        self.collections = collections
+        self.wrap = wrap
+        self.admin = self
+
+    def command(self, name):
+        return {"ok": 1}
+
+    def __getitem__(self, db_name):
+        client = self
+
+        class Db:
+            def __getitem__(self, name):
+                collection = client.collections.setdefault(name, FakeCollection())
+                return client.wrap(collection) if client.wrap else collection
+        return Db()
+
+
+def make_saver(monkeypatch, **kwargs):
+    collections = {}
+
+    def fake_shared_client(uri, client_class, **overrides):
+        wrap = AsyncCollection if client_class.__name__ == "AsyncIOMotorClient" else None
+        return FakeClient(collections, wrap)
+
+    monkeypatch.setattr(checkpointer_module, "shared_client", fake_shared_client)
+    return checkpointer_module.MongoDBSaver("mongodb://test", **kwargs), collections
+
+
+class State(TypedDict):
+    messages: Annotated[list, operator.add]
+    score: float
+    status: str
+
+
+def _graph(saver):
+    async def screen(state):
+        return {"messages": [AIMessage(content="screened")], "score": 82.5}
+
+    async def decide(state):
+        return {"status": "shortlisted" if state["score"] > 70 else "rejected"}
+
+    graph = StateGraph(State)
+    graph.add_node("screen", screen)
+    graph.add_node("decide", decide)
+    graph.set_entry_point("screen")
+    graph.add_edge("screen", "decide")
+    graph.add_edge("decide", END)
+    return graph.compile(checkpointer=saver)
+
+
+def test_async_run_round_trips_state(monkeypatch):
+    saver, collections = make_saver(monkeypatch)
+    app = _graph(saver)
+    config = {"configurable": {"thread_id": "wf-1"}}
+
+    async def run():
+        result = await app.ainvoke({"messages": [HumanMessage(content="apply")], "score": 0.0, "status": "pending"},
+                                   config)
+        return result, await app.aget_state(config)
+
+    result, snapshot = asyncio.run(run())
+    assert result["status"] == "shortlisted"
+    assert snapshot.values == result and snapshot.next == ()
+    assert [m.content for m in snapshot.values["messages"]] == ["apply", "screened"]
+    # The sync API reads what the async one wrote
+    assert app.get_state(config).values == result
+
+
+def test_only_changed_channels_are_stored(monkeypatch):
+    saver, collections = make_saver(monkeypatch)
+    asyncio.run(_graph(saver).ainvoke(
+        {"messages": [HumanMessage(content="apply")], "score": 0.0, "status": "pending"},
+        {"configurable": {"thread_id": "wf-1"}}))
+
+    blobs = collections[checkpointer_module.BLOBS].docs
+    checkpoints = collections[checkpointer_module.CHECKPOINTS].docs
+    message_versions = [b for b in blobs if b["channel"] == "messages"]
+    # messages changed on input and in "screen" only, not on every checkpoint
+    assert len(message_versions) == 2 < len(checkpoints)
+    # plain values are stored as native BSON, messages as serializer binary
+    status = next(b for b in blobs if b["channel"] == "status" and b["value"]["type"] == "bson")
+    assert status["value"]["value"] in ("pending", "shortlisted")
+    assert all(b["value"]["type"] != "bson" for b in message_versions)
+
+
+def test_checkpoint_is_not_written_when_its_blobs_fail(monkeypatch):
+    saver, collections = make_saver(monkeypatch)
+
+    class FailingBlobs(FakeCollection):
+        def bulk_write(self, ops, ordered=True):
+            raise RuntimeError("blob write failed")
+
+    collections[checkpointer_module.BLOBS] = FailingBlobs()
+    with pytest.raises(RuntimeError):
+        asyncio.run(_graph(saver).ainvoke(
+            {"messages": [HumanMessage(content="apply")], "score": 0.0, "status": "pending"},
+            {"configurable": {"thread_id": "wf-1"}}))
+    # The checkpoint document is the commit marker, so none points at missing blobs
+    assert collections.get(checkpointer_module.CHECKPOINTS, FakeCollection()).docs == []
+
+
+def test_pending_writes_are_stored_when_made(monkeypatch):
+    saver, collections = make_saver(monkeypatch)
+    config = {"configurable": {"thread_id": "wf-1", "checkpoint_ns": "", "checkpoint_id": "c1"}}
+
+    async def step():
+        await saver.aput_writes(config, [("score", 1.0), ("status", "screened")], "task-a")
+        # Durable before the step checkpoints: a cancelled run, or another replica, still sees them
+        assert len(collections[checkpointer_module.WRITES].docs) == 2
+        await saver.aput_writes(config, [("status", "shortlisted")], "task-b")
+
+    asyncio.run(step())
+    writes = collections[checkpointer_module.WRITES]
+    assert writes.bulk_calls == 2  # one per call
+    assert sorted((w["task_id"], w["channel"]) for w in writes.docs) == \
+        [("task-a", "score"), ("task-a", "status"), ("task-b", "status")]
+
+
+def test_error_writes_use_the_reserved_index(monkeypatch):
+    saver, collections = make_saver(monkeypatch)
+    config = {"configurable": {"thread_id": "wf-1", "checkpoint_ns": "", "checkpoint_id": "c1"}}
+
+    asyncio.run(saver.aput_writes(config, [("__error__", "boom")], "task-a"))
+    assert collections[checkpointer_module.WRITES].docs[0]["idx"] == checkpointer_module.WRITES_IDX_MAP["__error__"]
+
+
+def test_bson_native_detection():
+    native = checkpointer_module._is_bson_native
+    assert native({"a": [1, 2.5, "x", None, True], "b": {"c": "d"}})
+    assert not native({"a": (1, 2)})          # tuples come back as lists
+    assert not native({"$set": 1})
+    assert not native(2 ** 70)
+    assert not native(HumanMessage(content="hi"))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the concurrent bulk notification dispatcher
+"""
+
+import os
+import sys
+import time
+import asyncio
+import importlib.util
+
+# Loaded by path: the gateway tests also put a package named "app" on sys.path
+module_path = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app', 'notification_dispatcher.py')
+spec = importlib.util.spec_from_file_location("langgraph_notification_dispatcher", os.path.abspath(module_path))
+dispatcher_module = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = dispatcher_module
+spec.loader.exec_module(dispatcher_module)
+
+UNLIMITED = {"email": (0, 1), "whatsapp": (0, 1)}
+
+
+class StandInChannels:
+    """Stand-in for CommunicationManager: fixed latency, scripted failures"""
+
+    def __init__(self, latency=0.05, fail_first=(), permanent=()):
+        self.latency = latency
+        self.fail_first = set(fail_first)
+        self.permanent = set(permanent)
+        self.calls = []
+        self.in_flight = self.max_in_flight = 0
+
+    def sequence_sends(self, payload, sequence_type):
+        return [(channel, lambda channel=channel: self._send(channel, payload["candidate_id"]))
+                for channel in ("email", "whatsapp")]
+
+    async def _send(self, channel, candidate_id):
+        self.calls.append((channel, candidate_id))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        if candidate_id in self.permanent:
+            return {"status": "failed", "channel": channel, "error": "Invalid email format", "retryable": False}
+        if (channel, candidate_id) in self.fail_first:
+            self.fail_first.discard((channel, candidate_id))
+            raise ConnectionError("503 from provider")
+        return {"status": "success", "channel": channel}
+
+
+def _candidates(n):
+    return [{"id": i, "name": f"Candidate {i}"} for i in range(n)]
+
+
+def test_candidates_fan_out_with_bounded_concurrency():
+    channels = StandInChannels()
+    dispatcher = dispatcher_module.BulkNotificationDispatcher(channels, concurrency=20, rates=UNLIMITED)
+    progress = []
+
+    started = time.perf_counter()
+    result = asyncio.run(dispatcher.dispatch(_candidates(100), "shortlisted", {"job_title": "SE"},
+                                             on_progress=progress.append))
+    elapsed = time.perf_counter() - started
+
+    assert result["success_count"] == 200 and result["failed_count"] == 0
+    assert channels.max_in_flight == 20
+    assert elapsed < 1.0  # 200 sends of 50 ms, one at a time, take 10 s
+    assert progress[-1]["state"] == "completed" and progress[-1]["completed_candidates"] == 100
+    assert [p["completed_candidates"] for p in progress[:-1]] == sorted(p["completed_candidates"] for p in progress[:-1])
+
+
+def test_channel_rate_limit_is_respected():
+    channels = StandInChannels(latency=0)
+    dispatcher = dispatcher_module.BulkNotificationDispatcher(
+        channels, concurrency=50, rates={"email": (20.0, 2), "whatsapp": (0, 1)})
+
+    started = time.perf_counter()
+    asyncio.run(dispatcher.dispatch(_candidates(12), "shortlisted", {}))
+    # 2 from the burst, then 10 more at 20/s
+    assert time.perf_counter() - started >= 0.45
+
+
+def test_failed_sends_retry_without_blocking_the_batch():
+    channels = StandInChannels(latency=0.01, fail_first={("whatsapp", 3), ("email", 5)}, permanent={7})
+    dispatcher = dispatcher_module.BulkNotificationDispatcher(channels, concurrency=5, max_attempts=3,
+                                                              retry_base=0.05, rates=UNLIMITED)
+
+    result = asyncio.run(dispatcher.dispatch(_candidates(10), "application_received", {}))
+
+    assert result["retried_count"] == 2
+    assert result["success_count"] == 18 and result["failed_count"] == 2
+    assert channels.calls.count(("email", 7)) == 1  # permanent failures are not retried
+    retried = [r for r in result["results"] if r["attempts"] == 2]
+    assert len(retried) == 2 and all(r["status"] == "success" for r in retried)
+    assert result["by_channel"]["email"] == {"success": 9, "failed": 1}
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Unit tests for vectorized batch RL scoring and /rl/predict/batch
+"""
+
+import os
+import sys
+import random
+import asyncio
+import importlib.util
+
+from bson import ObjectId
+
+# Loaded as its own package: the gateway tests also put a package named "app" on sys.path
+app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app'))
+if "langgraph_app" not in sys.modules:
+    sys.path.insert(0, os.path.dirname(app_dir))  # config.py and dependencies.py
+    spec = importlib.util.spec_from_file_location("langgraph_app", os.path.join(app_dir, "__init__.py"),
+                                                  submodule_search_locations=[app_dir])
+    sys.modules["langgraph_app"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["langgraph_app"])
+from langgraph_app.rl_feedback_aggregates import FeedbackAggregates
+from langgraph_app.rl_integration import mongodb_adapter, rl_endpoints
+from langgraph_app.rl_integration.decision_engine import DecisionEngine, EventTimeline
+from langgraph_app.rl_integration.mongodb_adapter import MongoDBAdapter
+
+SKILLS = ["python", "java", "sql", "aws", "docker", "react", "node.js", "c++", "go", "machine learning", "r"]
+OUTCOMES = ["hired", "interviewed", "shortlisted", "rejected", "withdrawn", "pending"]
+
+
+def _without_timestamp(decision):
+    return {k: v for k, v in decision.items() if k != "timestamp"}
+
+
+def _fixture(n=300, seed=11):
+    rng = random.Random(seed)
+    candidates, histories = [], []
+    for _ in range(n):
+        candidates.append({"skills": rng.sample(SKILLS, rng.randint(0, 7))})
+        histories.append([{
+            "actual_outcome": rng.choice(OUTCOMES),
+            "feedback_score": rng.choice([1, 2, 3, 4, 5, 4.5, None]),
+            "reward_signal": rng.uniform(-1, 1),
+        } for _ in range(rng.choice([0, 1, 4, 5, 9, 10, 25]))])
+    return candidates, histories
+
+
+def test_batch_decisions_match_per_pair_decisions():
+    engine = DecisionEngine()
+    candidates, histories = _fixture()
+    for job in ({"requirements": ["python", "sql", "aws", "machine learning"]},
+                {"requirements": ["Go", "C++"]},
+                {"requirements": []}):
+        batch = engine.make_rl_decisions(candidates, job, histories)
+        assert len(batch) == len(candidates)
+        for candidate, history, decision in zip(candidates, histories, batch):
+            expected = _without_timestamp(engine.make_rl_decision(candidate, job, history))
+            actual = _without_timestamp(decision)
+            assert actual.keys() == expected.keys()
+            for key, value in expected.items():
+                if isinstance(value, float):
+                    assert abs(actual[key] - value) < 0.01, (key, actual[key], value)
+                else:
+                    assert actual[key] == value, (key, actual[key], value)
+
+
+class FakeCollection:
+    def __init__(self, db):
+        self.db = db
+        self.docs = {}
+
+    def find_one(self, query, projection=None):
+        self.db.calls.append(("find_one", self))
+        doc = self.docs.get(query.get("_id"))
+        return dict(doc) if doc else None
+
+    def find(self, query):
+        self.db.calls.append(("find", self))
+        return [dict(self.docs[_id]) for _id in query["_id"]["$in"] if _id in self.docs]
+
+    def insert_one(self, doc):
+        self.db.calls.append(("insert_one", self))
+        doc.setdefault("_id", ObjectId())
+        self.docs[doc["_id"]] = doc
+        return type("Result", (), {"inserted_id": doc["_id"]})()
+
+    def insert_many(self, docs, ordered=True):
+        self.db.calls.append(("insert_many", self))
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self.docs[doc["_id"]] = doc
+        return type("Result", (), {"inserted_ids": [doc["_id"] for doc in docs]})()
+
+    def replace_one(self, query, doc):
+        matched = self.find_one(query) is not None
+        if matched:
+            self.docs[query["_id"]] = {**doc, "_id": query["_id"]}
+        return type("Result", (), {"matched_count": int(matched)})()
+
+
+class FakeDB(dict):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def __missing__(self, name):
+        self[name] = FakeCollection(self)
+        return self[name]
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def test_batch_endpoint_reads_one_snapshot_and_writes_once(monkeypatch):
+    db = FakeDB()
+    aggregates = FeedbackAggregates(cache_seconds=60)
+    for candidate_id, outcome in [(1, "hired"), (1, "interviewed"), (2, "rejected")]:
+        aggregates.record(db, {"candidate_id": candidate_id, "job_id": 9, "actual_outcome": outcome,
+                               "feedback_score": 4, "reward_signal": 0.5})
+    aggregates._cache.clear()
+    db.calls.clear()
+
+    adapter = MongoDBAdapter()
+    adapter._client, adapter._db = object(), db
+    monkeypatch.setattr(mongodb_adapter, "feedback_aggregates", aggregates)
+    monkeypatch.setattr(rl_endpoints, "db_adapter", adapter)
+    monkeypatch.setattr(rl_endpoints, "event_timeline", EventTimeline(adapter))
+
+    job_features = {"requirements": ["python", "sql"]}
+    candidates = [{"candidate_id": i, "candidate_features": {"skills": ["python"] if i % 2 else ["java"]}}
+                  for i in (1, 2, 3, 4)]
+    request = rl_endpoints.RLBatchPredictionRequest(job_id=9, job_features=job_features, candidates=candidates)
+    response = asyncio.run(rl_endpoints.rl_predict_batch(request, api_key="test"))
+
+    predictions = response.data["predictions"]
+    assert [p["candidate_id"] for p in predictions] == [1, 2, 3, 4]
+    assert [p["feedback_samples_used"] for p in predictions] == [2, 1, 0, 0]
+    assert len(db.rl_predictions.docs) == 4
+    assert {doc["_id"] for doc in db.rl_predictions.docs.values()} == \
+        {ObjectId(p["prediction_id"]) for p in predictions}
+
+    calls = [(method, collection) for method, collection in db.calls]
+    assert calls.count(("insert_many", db.rl_predictions)) == 1
+    assert calls.count(("insert_many", db.audit_logs)) == 1
+    assert ("find", db.rl_feedback_aggregates) in calls
+    assert not any(method == "insert_one" for method, _ in calls)
+
+    # Same results as scoring each candidate on its own history
+    engine = DecisionEngine()
+    for candidate, prediction in zip(candidates, predictions):
+        history = aggregates.recent(db, candidate_id=candidate["candidate_id"])
+        expected = engine.make_rl_decision(candidate["candidate_features"], job_features, history)
+        assert _without_timestamp(prediction["rl_prediction"]) == _without_timestamp(expected)
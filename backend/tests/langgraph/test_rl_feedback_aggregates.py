@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Unit tests for incrementally maintained RL feedback aggregates
+"""
+
+import os
+import sys
+import random
+import importlib.util
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+# Loaded as its own package: the gateway tests also put a package named "app" on sys.path
+app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app'))
+if "langgraph_app" not in sys.modules:
+    sys.path.insert(0, os.path.dirname(app_dir))  # config.py and dependencies.py
+    spec = importlib.util.spec_from_file_location("langgraph_app", os.path.join(app_dir, "__init__.py"),
+                                                  submodule_search_locations=[app_dir])
+    sys.modules["langgraph_app"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["langgraph_app"])
+from langgraph_app.rl_feedback_aggregates import BACKFILL_MARKER, FeedbackAggregates, summary
+from langgraph_app.rl_engine import RLEngine
+from langgraph_app.rl_integration.decision_engine import DecisionEngine
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query, projection=None):
+        doc = self.docs.get(query["_id"])
+        if doc is None or any(doc.get(k) != v for k, v in query.items() if k != "_id"):
+            return None
+        return dict(doc)
+
+    def insert_one(self, doc):
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("duplicate _id")
+        self.docs[doc["_id"]] = dict(doc)
+
+    def replace_one(self, query, doc):
+        matched = self.find_one(query) is not None
+        if matched:
+            self.docs[query["_id"]] = {**doc, "_id": query["_id"]}
+        return type("Result", (), {"matched_count": int(matched)})()
+
+    def find(self, query):
+        """Only the backfill's scan: {"_id": {"$lt": cutoff}}, sorted by created_at"""
+        rows = [dict(doc) for _id, doc in self.docs.items() if _id < query["_id"]["$lt"]]
+        return type("Cursor", (), {"sort": lambda _, keys: sorted(rows, key=lambda d: (d["created_at"], d["_id"]))})()
+
+    def find_one_and_update(self, query, update, return_document=None):
+        doc = self.docs.get(query["_id"])
+        if doc is None or doc["state"] != query["state"] or not doc["claimed_at"] < query["claimed_at"]["$lt"]:
+            return None
+        doc.update(update["$set"])
+        return dict(doc)
+
+    def update_one(self, query, update):
+        self.docs[query["_id"]].update(update["$set"])
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+OUTCOMES = ["hired", "interviewed", "shortlisted", "rejected", "withdrawn", "pending"]
+
+
+def _fixture(n=240, seed=7):
+    """Feedback docs as store_rl_feedback writes them, in insertion order"""
+    rng = random.Random(seed)
+    started = datetime(2026, 1, 1)
+    return [{
+        "_id": ObjectId(),
+        "candidate_id": rng.randint(1, 6),
+        "job_id": rng.randint(1, 3),
+        "actual_outcome": rng.choice(OUTCOMES),
+        "feedback_score": rng.randint(1, 5),
+        "reward_signal": round(rng.uniform(-1, 1), 3) if rng.random() > 0.1 else 0,
+        "created_at": started + timedelta(minutes=i),
+    } for i in range(n)]
+
+
+def _history(feedback, candidate_id=None, limit=50):
+    """What get_feedback_history returned: newest first, optionally one candidate's, limited"""
+    rows = [f for f in feedback if candidate_id is None or f["candidate_id"] == candidate_id]
+    return sorted(rows, key=lambda f: f["created_at"], reverse=True)[:limit]
+
+
+def _without_timestamp(decision):
+    return {k: v for k, v in decision.items() if k != "timestamp"}
+
+
+def test_scoring_matches_the_history_pipeline_on_a_fixture():
+    feedback = _fixture()
+    db = FakeDB()
+    aggregates = FeedbackAggregates(decay=0.9, cache_seconds=0)
+    rl_engine, decision_engine = RLEngine(), DecisionEngine()
+    candidate = {"skills": ["python", "sql"], "experience": ["a", "b"], "education": ["bsc"]}
+    job = {"requirements": ["python", "aws", "sql"], "title": "Data Engineer"}
+
+    for i, doc in enumerate(feedback):
+        aggregates.record(db, doc)
+        if i % 37 and i != len(feedback) - 1:
+            continue
+        seen = feedback[:i + 1]
+        # Screening agent: global history
+        assert rl_engine.calculate_rl_score(candidate, job, aggregates.recent(db)) == \
+            rl_engine.calculate_rl_score(candidate, job, _history(seen))
+        # /rl/predict: one candidate's history
+        for candidate_id in range(1, 7):
+            assert _without_timestamp(decision_engine.make_rl_decision(
+                candidate, job, aggregates.recent(db, candidate_id=candidate_id))) == \
+                _without_timestamp(decision_engine.make_rl_decision(candidate, job, _history(seen, candidate_id)))
+
+
+def test_running_sums_counts_and_decayed_average():
+    feedback = _fixture(n=30)
+    db = FakeDB()
+    aggregates = FeedbackAggregates(decay=0.5, cache_seconds=0)
+    for doc in feedback:
+        aggregates.record(db, doc)
+
+    rewards = [f["reward_signal"] for f in feedback]
+    stats = summary(aggregates.get(db, "global"))
+    assert stats["count"] == 30
+    assert abs(stats["average_reward"] - sum(rewards) / 30) < 1e-9
+    assert stats["positive"] == sum(r > 0 for r in rewards) and stats["negative"] == sum(r < 0 for r in rewards)
+    weights = [0.5 ** (29 - i) for i in range(30)]
+    assert abs(stats["decayed_reward"] - sum(w * r for w, r in zip(weights, rewards)) / sum(weights)) < 1e-9
+
+    job_rows = [f for f in feedback if f["job_id"] == 2]
+    assert aggregates.get(db, "job", 2)["count"] == len(job_rows)
+    assert aggregates.recent(db, job_id=2)[0]["reward_signal"] == job_rows[-1]["reward_signal"]
+
+
+def test_concurrent_writers_do_not_lose_updates():
+    db = FakeDB()
+    first, second = FeedbackAggregates(cache_seconds=0), FeedbackAggregates(cache_seconds=0)
+    collection = db["rl_feedback_aggregates"]
+    original_replace = collection.replace_one
+    raced = []
+
+    def replace_after_other_writer(query, doc):
+        if not raced and query["_id"] == "global":
+            raced.append(True)
+            second.record(db, {"reward_signal": 1.0})  # lands between read and write
+        return original_replace(query, doc)
+
+    first.record(db, {"reward_signal": 0.5})
+    collection.replace_one = replace_after_other_writer
+    first.record(db, {"reward_signal": -0.5})
+
+    doc = db["rl_feedback_aggregates"].find_one({"_id": "global"})
+    assert doc["count"] == 3 and abs(doc["reward_sum"] - 1.0) < 1e-9
+    assert [e["reward_signal"] for e in doc["recent"]] == [0.5, 1.0, -0.5]
+
+
+def _assert_same_aggregates(db, expected):
+    for _id, want in expected["rl_feedback_aggregates"].docs.items():
+        got = db["rl_feedback_aggregates"].docs[_id]
+        assert got["count"] == want["count"] and got["positive"] == want["positive"], _id
+        assert abs(got["reward_sum"] - want["reward_sum"]) < 1e-9, _id
+        assert abs(got["decayed_reward"] - want["decayed_reward"]) < 1e-9, _id
+        assert got["recent"] == want["recent"], _id
+
+
+def test_backfill_folds_legacy_feedback_in_front_of_concurrent_writes():
+    legacy, live = _fixture(n=120), _fixture(n=40, seed=8)
+    db, expected = FakeDB(), FakeDB()
+    for doc in legacy:
+        db["rl_feedback"].docs[doc["_id"]] = doc
+    reference = FeedbackAggregates(decay=0.9, cache_seconds=0)
+    for doc in legacy + live:
+        reference.record(expected, doc)
+
+    # Another replica serves feedback while the backfill runs: after the claim, so past the cutoff
+    replica = FeedbackAggregates(decay=0.9, cache_seconds=0)
+    collection = db["rl_feedback_aggregates"]
+    original_find_one = collection.find_one
+
+    def find_one_during_backfill(query, projection=None):
+        if live and query["_id"] != BACKFILL_MARKER:
+            arriving = [{**doc, "_id": ObjectId()} for doc in live]
+            live.clear()
+            for doc in arriving:
+                db["rl_feedback"].docs[doc["_id"]] = doc
+                replica.record(db, doc)
+        return original_find_one(query, projection)
+
+    collection.find_one = find_one_during_backfill
+    aggregates = FeedbackAggregates(decay=0.9, cache_seconds=0)
+    assert aggregates.backfill(db) == 120
+    _assert_same_aggregates(db, expected)
+    assert collection.docs[BACKFILL_MARKER]["state"] == "done"
+
+    # Once per database: other replicas and restarts find the marker
+    assert FeedbackAggregates(decay=0.9).backfill(db) == 0
+    _assert_same_aggregates(db, expected)
+
+
+def test_backfill_interrupted_midway_resumes_without_double_counting():
+    legacy = _fixture(n=60)
+    db, expected = FakeDB(), FakeDB()
+    for doc in legacy:
+        db["rl_feedback"].docs[doc["_id"]] = doc
+        FeedbackAggregates(decay=0.9, cache_seconds=0).record(expected, doc)
+
+    collection = db["rl_feedback_aggregates"]
+    original_insert = collection.insert_one
+
+    def crash_after_three_aggregates(doc):
+        if len(collection.docs) == 4:  # the marker and three aggregates
+            raise ConnectionError("replica went away")
+        original_insert(doc)
+
+    collection.insert_one = crash_after_three_aggregates
+    try:
+        FeedbackAggregates(decay=0.9).backfill(db)
+        assert False, "backfill did not crash"
+    except ConnectionError:
+        pass
+    collection.insert_one = original_insert
+
+    # A live claim is left alone; a stale one is taken over
+    assert FeedbackAggregates(decay=0.9).backfill(db) == 0
+    collection.docs[BACKFILL_MARKER]["claimed_at"] -= timedelta(hours=1)
+    assert FeedbackAggregates(decay=0.9).backfill(db) == 60
+    _assert_same_aggregates(db, expected)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit tests for denormalized, index-backed RL feedback history
+"""
+
+import os
+import sys
+import importlib.util
+
+from bson import ObjectId
+
+# Loaded as its own package: the gateway tests also put a package named "app" on sys.path
+app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app'))
+if "langgraph_app" not in sys.modules:
+    sys.path.insert(0, os.path.dirname(app_dir))  # config.py and dependencies.py
+    spec = importlib.util.spec_from_file_location("langgraph_app", os.path.join(app_dir, "__init__.py"),
+                                                  submodule_search_locations=[app_dir])
+    sys.modules["langgraph_app"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["langgraph_app"])
+from langgraph_app.rl_database import RLDatabaseManager
+from langgraph_app.rl_integration.mongodb_adapter import MongoDBAdapter
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+        self.pipelines = []
+
+    def find_one(self, query, projection=None):
+        for doc in self.docs.values():
+            if all(doc.get(k) == v for k, v in query.items()):
+                return dict(doc)
+        return None
+
+    def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs[doc["_id"]] = dict(doc)
+        return type("Result", (), {"inserted_id": doc["_id"]})()
+
+    def replace_one(self, query, doc):
+        matched = self.find_one(query) is not None
+        if matched:
+            self.docs[query["_id"]] = {**doc, "_id": query["_id"]}
+        return type("Result", (), {"matched_count": int(matched)})()
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return iter([])
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def _connected(store, db):
+    store._client, store._db = object(), db
+    return store
+
+
+def test_history_pages_on_the_index_before_joining():
+    for store in (RLDatabaseManager(), MongoDBAdapter()):
+        db = FakeDB()
+        _connected(store, db).get_feedback_history(candidate_id=42, limit=50)
+        store.get_feedback_history(limit=100)
+        candidate, everyone = db.rl_feedback.pipelines
+
+        assert [list(stage) for stage in candidate] == [["$match"], ["$sort"], ["$limit"], ["$lookup"], ["$unwind"]]
+        assert candidate[0]["$match"] == {"candidate_id": 42} and candidate[1]["$sort"] == {"created_at": -1}
+        assert candidate[2]["$limit"] == 50
+        assert everyone[0]["$match"] == {} and everyone[2]["$limit"] == 100
+
+
+def test_feedback_carries_candidate_and_job_from_its_prediction():
+    prediction_id = ObjectId()
+    db = FakeDB(rl_predictions=FakeCollection([{"_id": prediction_id, "candidate_id": 7, "job_id": 3}]))
+    store = _connected(RLDatabaseManager(), db)
+
+    store.store_rl_feedback({"prediction_id": str(prediction_id), "actual_outcome": "hired",
+                             "feedback_score": 5, "reward_signal": 1.0})
+    store.store_rl_feedback({"candidate_id": 8, "job_id": 4, "actual_outcome": "rejected",
+                             "feedback_score": 2, "reward_signal": -0.4})
+
+    stored = sorted(db.rl_feedback.docs.values(), key=lambda doc: doc["created_at"])
+    assert [(doc["candidate_id"], doc["job_id"]) for doc in stored] == [(7, 3), (8, 4)]
+    assert all(doc["created_at"] for doc in stored)
+    assert db.rl_feedback_aggregates.find_one({"_id": "candidate:7"})["count"] == 1
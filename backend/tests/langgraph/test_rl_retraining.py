@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Unit tests for offline RL retraining and hot-swapped scoring weights
+"""
+
+import os
+import sys
+import asyncio
+import importlib.util
+from contextlib import contextmanager
+
+import numpy as np
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+# Loaded as its own package: the gateway tests also put a package named "app" on sys.path
+app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app'))
+if "langgraph_app" not in sys.modules:
+    sys.path.insert(0, os.path.dirname(app_dir))  # config.py and dependencies.py
+    spec = importlib.util.spec_from_file_location("langgraph_app", os.path.join(app_dir, "__init__.py"),
+                                                  submodule_search_locations=[app_dir])
+    sys.modules["langgraph_app"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["langgraph_app"])
+from langgraph_app.rl_engine import RLEngine
+from langgraph_app.rl_training import (ReplayBuffer, RetrainConfig, RetrainingWorker, evaluate, split_holdout,
+                                       stream_samples)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction=1):
+        self.docs = sorted(self.docs, key=lambda doc: doc[key], reverse=direction == -1)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        value = doc.get(key)
+        if isinstance(condition, dict):
+            if "$gt" in condition and not value > condition["$gt"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    def __init__(self, db):
+        self.db = db
+        self.docs = {}
+
+    def find(self, query=None, projection=None):
+        self.db.finds.append(self)
+        return FakeCursor([dict(doc) for doc in self.docs.values() if _matches(doc, query or {})])
+
+    def find_one(self, query, projection=None):
+        return next(iter(self.find(query)), None)
+
+    def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("duplicate _id")
+        self.docs[doc["_id"]] = dict(doc)
+        return type("Result", (), {"inserted_id": doc["_id"]})()
+
+    def update_many(self, query, update):
+        for doc in self.docs.values():
+            if _matches(doc, query):
+                doc.update(update["$set"])
+
+    def update_one(self, query, update):
+        for doc in self.docs.values():
+            if _matches(doc, query):
+                doc.update(update["$set"])
+                return
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+
+class FakeDB(dict):
+    def __init__(self):
+        super().__init__()
+        self.finds = []
+
+    def __missing__(self, name):
+        self[name] = FakeCollection(self)
+        return self[name]
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+class FakeStore:
+    """The adapter surface RetrainingWorker uses"""
+
+    def __init__(self, db):
+        self.db = db
+        self.performance = []
+
+    @contextmanager
+    def get_connection(self):
+        yield self.db
+
+    def store_model_performance(self, performance_data):
+        self.performance.append(performance_data)
+        return "perf-1"
+
+
+def _history(n=1500, seed=3):
+    """Predictions as the screening agent stores them, and feedback whose outcomes follow experience more than
+    the default weights assume"""
+    rng = np.random.default_rng(seed)
+    db = FakeDB()
+    for _ in range(n):
+        features = {"skill_match": round(float(rng.random()) * 100, 2),
+                    "experience_score": int(rng.choice([0, 10, 20, 30])),
+                    "education_score": int(rng.choice([0, 10, 20])),
+                    "rl_adjustment": round(float(rng.uniform(-10, 10)), 2)}
+        prediction = db.rl_predictions.insert_one({"features": features, "model_version": "v1.0.0"}).inserted_id
+        score = 20 * features["skill_match"] / 100 + 1.5 * features["experience_score"] + 2 * features["rl_adjustment"]
+        hired = rng.random() < 1 / (1 + np.exp(-(score - 30) / 6))
+        db.rl_feedback.insert_one({"prediction_id": prediction, "actual_outcome": "hired" if hired else "rejected",
+                                   "reward_signal": 1.0 if hired else -0.5})
+    # Not trainable: no outcome yet, and a prediction without scoring terms
+    db.rl_feedback.insert_one({"prediction_id": prediction, "actual_outcome": "pending", "reward_signal": 0})
+    bare = db.rl_predictions.insert_one({"features": {"candidate_skills_count": 3}}).inserted_id
+    db.rl_feedback.insert_one({"prediction_id": bare, "actual_outcome": "hired", "reward_signal": 1.0})
+    return db
+
+
+def test_default_weights_score_exactly_as_before_and_swaps_apply_without_restart():
+    engine = RLEngine()
+    candidate = {"skills": ["python", "sql"], "experience": ["a", "b"], "education": ["bsc"]}
+    job = {"requirements": ["python", "aws", "sql"]}
+    history = [{"reward_signal": r} for r in (1, 1, -1, 0.5)]
+
+    result = engine.calculate_rl_score(candidate, job, history)
+    assert result["rl_score"] == round(min(100, max(0, (2 / 3) * 50 + 20 + 10 + 5.0)), 2)
+    assert result["model_version"] == "v1.0.0"
+
+    engine.load_model("v1.0.1", (30.0, 1.5, 0.5, 2.0), bias=-4.0)
+    swapped = engine.calculate_rl_score(candidate, job, history)
+    assert swapped["model_version"] == "v1.0.1"
+    assert swapped["rl_score"] == round((2 / 3) * 30 - 4 + 30 + 5 + 10, 2)
+
+    for bad in ((1.0, 2.0), (1.0, float("nan"), 1.0, 1.0)):
+        try:
+            engine.load_model("v-bad", bad)
+            assert False, "invalid weights accepted"
+        except ValueError:
+            pass
+    assert engine.model_version == "v1.0.1"
+
+
+def test_stream_and_replay_buffer_keep_the_newest_labelled_samples():
+    db = _history(n=50)
+    batches = list(stream_samples(db, batch_size=8))
+    assert sum(scanned for *_, scanned in batches) == 52
+    assert sum(len(labels) for _, labels, _, _ in batches) == 50
+    # One feedback page and one $in lookup of its predictions per batch (plus the final empty page)
+    assert len(db.finds) == 2 * len(batches) + 1
+
+    buffer = ReplayBuffer(capacity=20)
+    for features, labels, rewards, _ in batches:
+        buffer.extend(features, labels, rewards)
+    features, labels, _ = buffer.arrays()
+    everything = np.vstack([f for f, *_ in batches])
+    assert buffer.size == 20 and buffer.seen == 50
+    assert np.array_equal(features, everything[-20:])
+
+    engine = RLEngine()
+    samples = [{"reward": 1.0, "feature_vector": [0.2, 0.4]}, {"reward": -0.5, "feature_vector": [1.0, 0.0, 0.6]}]
+    engine.update_model(samples)
+    expected = {}
+    for sample in samples:  # the per-sample loop update_model replaced
+        for i, feature in enumerate(sample["feature_vector"]):
+            expected[i] = expected.get(i, 0.5) + 0.1 * sample["reward"] * feature
+    assert engine._feature_weights.keys() == expected.keys()
+    assert all(abs(engine._feature_weights[i] - expected[i]) < 1e-12 for i in expected)
+
+
+def test_retraining_fits_on_history_reports_holdout_metrics_and_hot_swaps():
+    db = _history()
+    store = FakeStore(db)
+    engine = RLEngine()
+    worker = RetrainingWorker(engine, store, RetrainConfig(batch_size=200))
+
+    job = worker.retrain()
+    assert job["status"] == "completed" and job["progress_percentage"] == 100.0
+    assert job["feedback_scanned"] == 1502 and job["samples"] == 1500
+
+    # Metrics are those of score >= 50 on the held-out split, for both models
+    features = np.array([[f["skill_match"] / 100, f["experience_score"], f["education_score"], f["rl_adjustment"]]
+                         for f in (p["features"] for p in db.rl_predictions.docs.values()) if "skill_match" in f])
+    labels = np.array([1.0 if f["actual_outcome"] == "hired" else 0.0
+                       for f in db.rl_feedback.docs.values() if f["actual_outcome"] != "pending"][:1500])
+    _, holdout = split_holdout(1500, 0.2, 42)
+    retrained = engine.model
+    predicted = np.clip(features[holdout] @ np.array(retrained.weights) + retrained.bias, 0, 100) >= 50
+    metrics = job["metrics"]
+    assert metrics["samples"] == len(holdout) == 300
+    assert abs(metrics["accuracy"] - accuracy_score(labels[holdout], predicted)) < 1e-12
+    assert abs(metrics["precision"] - precision_score(labels[holdout], predicted)) < 1e-12
+    assert abs(metrics["recall"] - recall_score(labels[holdout], predicted)) < 1e-12
+    assert abs(metrics["f1"] - f1_score(labels[holdout], predicted)) < 1e-12
+    default_metrics = evaluate(RLEngine().model, features[holdout], labels[holdout])
+    assert job["baseline_metrics"] == default_metrics
+    assert metrics["f1"] > default_metrics["f1"] and metrics["accuracy"] > default_metrics["accuracy"]
+
+    # Versioned, activated and swapped in; performance recorded with the real holdout numbers
+    assert job["promoted"] and job["model_version"] == "v1.0.1" == engine.model_version
+    snapshot = db.rl_model_snapshots.find_one({"_id": "v1.0.1"})
+    assert snapshot["active"] and snapshot["parent_version"] == "v1.0.0"
+    assert store.performance[0]["f1_score"] == metrics["f1"] and store.performance[0]["model_version"] == "v1.0.1"
+
+    # The next retrain starts from the active weights; older snapshots can be re-activated
+    second = worker.retrain()
+    assert second["model_version"] == "v1.0.2" and second["previous_version"] == "v1.0.1"
+    worker.activate("v1.0.1")
+    assert engine.model_version == "v1.0.1"
+    assert [s["_id"] for s in db.rl_model_snapshots.docs.values() if s["active"]] == ["v1.0.1"]
+
+    restarted = RLEngine()
+    RetrainingWorker(restarted, store).load_active_model()
+    assert restarted.model == engine.model
+
+
+def test_background_job_reports_progress_and_rejects_overlap():
+    db = _history(n=400)
+    worker = RetrainingWorker(RLEngine(), FakeStore(db), RetrainConfig(batch_size=50, epochs=2000))
+
+    async def run():
+        job = worker.start()
+        try:
+            worker.start()
+            assert False, "second job started while one runs"
+        except RuntimeError:
+            pass
+        seen = []
+        while worker.running:
+            seen.append(job["progress_percentage"])
+            await asyncio.sleep(0.001)
+        return job, seen
+
+    job, seen = asyncio.run(run())
+    assert job["status"] == "completed" and job["progress_percentage"] == 100.0
+    assert seen == sorted(seen) and seen[-1] < 100.0
+    assert worker.get(job["job_id"]) is job and worker.stats()["last_job"]["status"] == "completed"
+
+    # Too little labelled feedback fails the job with a reason
+    empty = RetrainingWorker(RLEngine(), FakeStore(FakeDB()))
+
+    async def run_empty():
+        job = empty.start()
+        while empty.running:
+            await asyncio.sleep(0.001)
+        return job
+
+    failed = asyncio.run(run_empty())
+    assert failed["status"] == "failed" and "Insufficient labelled feedback" in failed["error"]
+    assert empty.engine.model_version == "v1.0.0"
+
+
+def test_activation_on_one_worker_reaches_the_others():
+    store = FakeStore(_history(n=400))
+    trainer = RetrainingWorker(RLEngine(), store, RetrainConfig(batch_size=100))
+    follower = RetrainingWorker(RLEngine(), store, RetrainConfig(refresh_seconds=0.001))
+
+    async def run():
+        follower.start_refresh()
+        job = trainer.retrain()
+        for _ in range(500):
+            if follower.engine.model_version == job["model_version"]:
+                break
+            await asyncio.sleep(0.001)
+        await follower.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert job["promoted"] and follower.engine.model == trainer.engine.model
+    assert follower._refresh_task is None
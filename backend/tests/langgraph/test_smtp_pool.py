@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Unit tests for pooled, persistent SMTP sessions
+"""
+
+import os
+import sys
+import time
+import asyncio
+import smtplib
+import importlib.util
+from email.message import EmailMessage
+
+# Loaded by path: the gateway tests also put a package named "app" on sys.path
+module_path = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app', 'smtp_pool.py')
+spec = importlib.util.spec_from_file_location("langgraph_smtp_pool", os.path.abspath(module_path))
+smtp_pool = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = smtp_pool
+spec.loader.exec_module(smtp_pool)
+
+
+class FakeServer:
+    """Counts logins and deliveries; sessions can be dropped from the server side"""
+
+    def __init__(self, latency=0.0, password="secret"):
+        self.latency = latency
+        self.password = password
+        self.logins = 0
+        self.delivered = []
+        self.sessions = []
+
+    def connect(self):
+        session = FakeSMTP(self)
+        self.sessions.append(session)
+        return session
+
+    def drop_all(self):
+        for session in self.sessions:
+            session.alive = False
+
+
+class FakeSMTP:
+    def __init__(self, server):
+        self.server = server
+        self.alive = True
+
+    def login(self, username, password):
+        if password != self.server.password:
+            raise smtplib.SMTPAuthenticationError(535, b"Username and Password not accepted")
+        self.server.logins += 1
+
+    def send_message(self, msg):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        time.sleep(self.server.latency)
+        self.server.delivered.append(msg["To"])
+
+    def noop(self):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return 250, b"OK"
+
+    def quit(self):
+        self.alive = False
+
+    def close(self):
+        self.alive = False
+
+
+def _message(i):
+    msg = EmailMessage()
+    msg["To"] = f"candidate{i}@example.com"
+    msg["Subject"] = "Application received"
+    msg.set_content("Thank you for applying")
+    return msg
+
+
+def make_pool(server, **kwargs):
+    return smtp_pool.SMTPSessionPool("localhost", 25, "hr@example.com", kwargs.pop("password", "secret"),
+                                     smtp_factory=server.connect, **kwargs)
+
+
+def test_concurrent_sends_share_a_few_sessions():
+    server = FakeServer(latency=0.005)
+    pool = make_pool(server, size=3, batch_size=10)
+
+    async def run():
+        await asyncio.gather(*(pool.send(_message(i)) for i in range(60)))
+        stats = pool.stats()
+        await pool.aclose()
+        return stats
+
+    stats = asyncio.run(run())
+    assert sorted(server.delivered) == sorted(f"candidate{i}@example.com" for i in range(60))
+    assert server.logins == stats["sessions_opened"] <= 3
+    assert stats["batches"] < 60  # several messages per thread hop
+    assert stats["messages_sent"] == 60 and stats["messages_failed"] == 0
+
+
+def test_send_at_idle_timeout_is_not_lost():
+    server = FakeServer()
+    pool = make_pool(server, size=1, idle_timeout=0.02)
+
+    async def run():
+        hung = 0
+        for i in range(100):
+            try:
+                await asyncio.wait_for(pool.send(_message(i)), timeout=0.5)
+            except asyncio.TimeoutError:
+                hung += 1
+            # Land the next send around the moment the idle worker gives up
+            await asyncio.sleep(0.02 + (i % 5) * 0.001)
+        await pool.aclose()
+        return hung
+
+    assert asyncio.run(run()) == 0
+    assert len(server.delivered) == 100
+
+
+def test_dead_sessions_are_replaced():
+    server = FakeServer()
+    pool = make_pool(server, size=1)
+
+    async def run():
+        await pool.send(_message(1))
+        server.drop_all()  # e.g. the provider closed an idle connection
+        await pool.send(_message(2))
+        await pool.aclose()
+
+    asyncio.run(run())
+    assert server.delivered == ["candidate1@example.com", "candidate2@example.com"]
+    assert server.logins == 2 and pool.counters["reconnects"] == 1
+
+
+def test_sessions_are_recycled_and_login_failures_surface():
+    server = FakeServer()
+    pool = make_pool(server, size=1, max_messages_per_session=4)
+
+    async def run():
+        await asyncio.gather(*(pool.send(_message(i)) for i in range(10)))
+        await pool.aclose()
+
+    asyncio.run(run())
+    assert len(server.delivered) == 10 and server.logins == 3
+
+    bad = make_pool(FakeServer(), size=1, password="wrong")
+
+    async def run_bad():
+        results = await asyncio.gather(*(bad.send(_message(i)) for i in range(5)), return_exceptions=True)
+        await bad.aclose()
+        return results
+
+    results = asyncio.run(run_bad())
+    assert all(isinstance(r, smtplib.SMTPAuthenticationError) for r in results)
+    assert bad.counters["messages_failed"] == 5 and bad.counters["sessions_opened"] == 0
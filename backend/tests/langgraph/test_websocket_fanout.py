@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the backpressured WebSocket fan-out
+"""
+
+import os
+import sys
+import time
+import asyncio
+import importlib.util
+
+# Loaded by path: the gateway tests also put a package named "app" on sys.path
+module_path = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app', 'websocket_fanout.py')
+spec = importlib.util.spec_from_file_location("langgraph_websocket_fanout", os.path.abspath(module_path))
+fanout = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = fanout
+spec.loader.exec_module(fanout)
+
+
+class FakeWebSocket:
+    """Records messages; each send takes `latency` seconds (None = stalls until closed)"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.received = []
+        self.closed_with = None
+        self._closed = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.latency is None:
+            await self._closed.wait()
+            raise RuntimeError("closed")
+        await asyncio.sleep(self.latency)
+        self.received.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+        self._closed.set()
+
+
+def progress(percentage):
+    return {"type": "progress", "progress_percentage": percentage}
+
+
+def test_slow_client_does_not_delay_others_and_gets_coalesced_progress():
+    manager = fanout.ConnectionManager(progress_rate=0)
+    fast, slow = FakeWebSocket(), FakeWebSocket(latency=0.05)
+
+    async def run():
+        await manager.connect(fast, "wf-1")
+        await manager.connect(slow, "wf-1")
+        started = time.perf_counter()
+        for percentage in range(0, 101, 10):
+            await manager.broadcast("wf-1", progress(percentage))
+            await asyncio.sleep(0.001)
+        await manager.broadcast("wf-1", {"type": "completed", "progress_percentage": 100})
+        broadcast_time = time.perf_counter() - started
+        await asyncio.sleep(0.2)
+        return broadcast_time
+
+    broadcast_time = asyncio.run(run())
+    assert broadcast_time < 0.05  # eleven sends of 50 ms if broadcast awaited the slow socket
+    assert [m["progress_percentage"] for m in fast.received[:-1]] == list(range(0, 101, 10))
+    slow_progress = [m["progress_percentage"] for m in slow.received if m["type"] == "progress"]
+    assert slow_progress[0] == 0 and slow_progress[-1] == 100 and len(slow_progress) < 11
+    assert slow.received[-1]["type"] == "completed"
+    assert manager.counters["coalesced"] == 11 - len(slow_progress)
+
+
+def test_stalled_consumer_is_dropped_when_its_queue_fills():
+    manager = fanout.ConnectionManager(max_queue=3, progress_rate=0)
+    healthy, stalled = FakeWebSocket(), FakeWebSocket(latency=None)
+
+    async def run():
+        await manager.connect(healthy, "batch-1")
+        await manager.connect(stalled, "batch-1")
+        await asyncio.sleep(0)
+        for i in range(6):
+            await manager.broadcast("batch-1", {"type": "update", "data": i})
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.05)
+        return manager.stats()
+
+    stats = asyncio.run(run())
+    assert stalled.closed_with == fanout.TRY_AGAIN_LATER
+    assert [m["data"] for m in healthy.received] == list(range(6))
+    assert stats["dropped_consumers"] == 1 and stats["connections"] == 1
+
+
+def test_progress_is_throttled_per_workflow_and_latest_is_delivered():
+    manager = fanout.ConnectionManager(progress_rate=20)  # one per 50 ms
+    client = FakeWebSocket()
+
+    async def run():
+        await manager.connect(client, "wf-2")
+        started = time.perf_counter()
+        for percentage in range(1, 51):
+            await manager.broadcast("wf-2", progress(percentage))
+            await asyncio.sleep(0.002)
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.1)
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    percentages = [m["progress_percentage"] for m in client.received]
+    assert percentages[0] == 1 and percentages[-1] == 50
+    assert len(percentages) <= elapsed / 0.05 + 2  # first message plus one per interval and the held one
+    assert percentages == sorted(percentages)
+    assert manager.counters["throttled"] == 50 - len(percentages)
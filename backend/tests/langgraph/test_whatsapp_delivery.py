@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Unit tests for WhatsApp sends off the event loop and deferred delivery status
+"""
+
+import os
+import sys
+import time
+import asyncio
+import importlib.util
+from types import SimpleNamespace
+
+# Loaded as its own package: the gateway tests also put a package named "app" on sys.path
+app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app'))
+if "langgraph_app" not in sys.modules:
+    sys.path.insert(0, os.path.dirname(app_dir))  # config.py and dependencies.py
+    spec = importlib.util.spec_from_file_location("langgraph_app", os.path.join(app_dir, "__init__.py"),
+                                                  submodule_search_locations=[app_dir])
+    sys.modules["langgraph_app"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["langgraph_app"])
+from langgraph_app.whatsapp_delivery import WhatsAppDeliveryTracker
+
+
+class FakeTwilio:
+    """messages.create blocks like the SDK; fetch walks through scripted statuses"""
+
+    def __init__(self, statuses, latency=0.0):
+        self.statuses = list(statuses)
+        self.latency = latency
+        self.fetches = 0
+        self.messages = self
+        self.create = self._create
+
+    def _create(self, **kwargs):
+        time.sleep(self.latency)
+        return SimpleNamespace(sid="SM1", status="queued", kwargs=kwargs)
+
+    def __call__(self, sid):
+        return SimpleNamespace(fetch=self._fetch)
+
+    def _fetch(self):
+        self.fetches += 1
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        error_code = 63015 if status == "failed" else None
+        return SimpleNamespace(status=status, error_code=error_code, error_message=None)
+
+
+def make_tracker(twilio=None):
+    tracker = WhatsAppDeliveryTracker(twilio)
+    tracker._connected = True  # in-memory records, no MongoDB
+    tracker.callback_url = None
+    tracker.check_delay = 0.01
+    return tracker
+
+
+def test_out_of_order_status_updates_are_ignored():
+    tracker = make_tracker()
+
+    async def run():
+        await tracker.accepted("SM1", "+15550001", "queued")
+        await tracker.update_status("SM1", "delivered")
+        await tracker.update_status("SM1", "sent")  # callbacks are not ordered
+        return await tracker.get_record("SM1")
+
+    record = asyncio.run(run())
+    assert record["status"] == "delivered" and record["recipient"] == "+15550001"
+
+
+class FakeDeliveries:
+    """notification_deliveries without the unique message_sid index"""
+
+    def __init__(self):
+        self.docs = []
+
+    def _matches(self, doc, query):
+        for key, condition in query.items():
+            if isinstance(condition, dict):
+                if doc.get(key) in condition["$nin"]:
+                    return False
+            elif doc.get(key) != condition:
+                return False
+        return True
+
+    def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs if self._matches(d, query)), None)
+        if doc is None:
+            if upsert:
+                self.docs.append({**query, **update.get("$setOnInsert", {}), **update.get("$set", {})})
+            return SimpleNamespace(matched_count=0)
+        doc.update(update.get("$set", {}))
+        return SimpleNamespace(matched_count=1)
+
+    def find_one(self, query, projection=None):
+        return next((dict(d) for d in self.docs if self._matches(d, query)), None)
+
+
+def test_stale_updates_never_create_records_in_mongodb():
+    tracker = make_tracker()
+    deliveries = FakeDeliveries()
+    tracker._collection = lambda: deliveries
+
+    async def run():
+        await tracker.update_status("SM0", "sent")  # no record: nothing to update
+        await tracker.accepted("SM1", "+15550001", "queued")
+        await tracker.update_status("SM1", "delivered")
+        await tracker.update_status("SM1", "sent")
+        await tracker.accepted("SM1", "+15550001", "queued")  # a retried accept keeps the record
+        return await tracker.get_record("SM1")
+
+    record = asyncio.run(run())
+    assert len(deliveries.docs) == 1
+    assert record["status"] == "delivered" and record["recipient"] == "+15550001"
+
+
+def test_callback_before_accepted_is_applied_when_the_record_is_created():
+    tracker = make_tracker()
+    tracker.callback_url = "https://hr.example/webhook/whatsapp/status"  # nothing polls afterwards
+    deliveries = FakeDeliveries()
+    tracker._collection = lambda: deliveries
+
+    async def run():
+        # Twilio rejects an unverified sandbox number before accepted() has written the record
+        await tracker.update_status("SM1", "failed", 63015)
+        assert deliveries.docs == []
+        await tracker.accepted("SM1", "+15550001", "queued")
+        return await tracker.get_record("SM1")
+
+    record = asyncio.run(run())
+    assert record["status"] == "failed" and record["error_code"] == 63015
+    assert record["recipient"] == "+15550001"
+    assert tracker.stats()["held_early_statuses"] == 0
+
+
+def test_status_is_polled_in_the_background_until_final():
+    twilio = FakeTwilio(["sent", "failed"])
+    tracker = make_tracker(twilio)
+
+    async def run():
+        await tracker.accepted("SM1", "+15550001", "queued")
+        assert tracker.stats()["pending_status_checks"] == 1  # accepted() returned before any status check
+        await asyncio.sleep(0.2)
+        return await tracker.get_record("SM1")
+
+    record = asyncio.run(run())
+    assert twilio.fetches == 2
+    assert record["status"] == "failed" and record["error_code"] == 63015
+    assert tracker.stats()["pending_status_checks"] == 0
+
+
+def test_blocking_sends_do_not_stall_the_event_loop():
+    twilio = FakeTwilio(["delivered"], latency=0.1)
+    tracker = make_tracker(twilio)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.02)
+
+    async def run():
+        started = time.perf_counter()
+        await asyncio.gather(ticker(), *(tracker.run(twilio.messages.create, to=f"+1555000{i}") for i in range(4)))
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.3  # four 100 ms creates, one at a time on the loop, take 0.4 s
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.08
+    tracker.executor.shutdown()
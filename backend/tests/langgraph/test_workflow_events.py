@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Unit tests for node-level workflow progress events
+"""
+
+import os
+import sys
+import time
+import asyncio
+import importlib.util
+from typing import TypedDict
+
+from langgraph.graph import StateGraph, END
+
+# Loaded by path: the gateway tests also put a package named "app" on sys.path
+module_path = os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app', 'workflow_events.py')
+spec = importlib.util.spec_from_file_location("langgraph_workflow_events", os.path.abspath(module_path))
+workflow_events = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = workflow_events
+spec.loader.exec_module(workflow_events)
+
+
+class State(TypedDict):
+    status: str
+    score: float
+
+
+def _graph():
+    def screen_application(state):
+        time.sleep(0.05)
+        return {"status": "shortlisted", "score": 82.0}
+
+    def update_hr_dashboard(state):
+        return {}
+
+    graph = StateGraph(State)
+    graph.add_node("screen_application", screen_application)
+    graph.add_node("update_hr_dashboard", update_hr_dashboard)
+    graph.set_entry_point("screen_application")
+    graph.add_edge("screen_application", "update_hr_dashboard")
+    graph.add_edge("update_hr_dashboard", END)
+    return graph.compile()
+
+
+def test_stream_emits_timed_node_events_and_final_state():
+    async def collect():
+        return [event async for event in workflow_events.stream_node_events(
+            _graph(), {"status": "pending", "score": 0.0}, {"configurable": {"thread_id": "t1"}})]
+
+    events = asyncio.run(collect())
+    assert [(e["type"], e.get("node")) for e in events] == [
+        ("node_started", "screen_application"),
+        ("node_finished", "screen_application"),
+        ("node_started", "update_hr_dashboard"),
+        ("node_finished", "update_hr_dashboard"),
+        ("final_state", None),
+    ]
+    assert events[1]["duration_ms"] >= 40
+    assert events[-1]["state"] == {"status": "shortlisted", "score": 82.0}
+
+
+def test_async_nodes_interleave_across_workflows():
+    async def slow_node(state):
+        await asyncio.sleep(0.1)
+        return {"score": state["score"] + 1}
+
+    graph = StateGraph(State)
+    graph.add_node("screen_application", slow_node)
+    graph.set_entry_point("screen_application")
+    graph.add_edge("screen_application", END)
+    compiled = graph.compile()
+
+    async def run(i):
+        return [event async for event in workflow_events.stream_node_events(
+            compiled, {"status": "pending", "score": 0.0}, {"configurable": {"thread_id": f"t{i}"}})]
+
+    async def run_many():
+        started = time.perf_counter()
+        results = await asyncio.gather(*(run(i) for i in range(10)))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(run_many())
+    assert all(events[-1]["state"]["score"] == 1.0 for events in results)
+    assert elapsed < 0.5  # ten 100 ms workflows overlap instead of queueing
+
+
+def test_graph_errors_reach_the_consumer():
+    def broken(state):
+        raise ValueError("screening failed")
+
+    graph = StateGraph(State)
+    graph.add_node("screen_application", broken)
+    graph.set_entry_point("screen_application")
+    graph.add_edge("screen_application", END)
+
+    async def collect():
+        return [event async for event in workflow_events.stream_node_events(
+            graph.compile(), {"status": "pending", "score": 0.0}, {})]
+
+    try:
+        asyncio.run(collect())
+    except ValueError as e:
+        assert "screening failed" in str(e)
+    else:
+        raise AssertionError("graph error was swallowed")
+
+
+def test_progress_follows_node_order():
+    progress = [workflow_events.progress_after(node) for node in workflow_events.NODE_ORDER]
+    assert progress == sorted(progress) and progress[-1] == workflow_events.NODES_DONE_PERCENT
+    assert workflow_events.progress_after("unknown_node") == 0
+
+
+def test_node_latency_summary():
+    stats = workflow_events.NodeLatencyStats(window=3)
+    for ms in (10.0, 30.0, 20.0, 40.0):
+        stats.record("screen_application", ms)
+    stats.record("collect_feedback", 5.0, error=True)
+
+    summary = stats.summary()
+    assert summary["screen_application"] == {
+        "count": 4, "errors": 0, "avg_ms": 30.0, "p50_ms": 30.0, "p95_ms": 40.0, "max_ms": 40.0,
+    }
+    assert summary["collect_feedback"]["errors"] == 1
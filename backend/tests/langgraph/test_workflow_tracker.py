@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the write-coalescing workflow tracker
+"""
+
+import os
+import sys
+import asyncio
+import importlib.util
+from types import SimpleNamespace
+
+# Loaded as its own package: the gateway tests also put a package named "app" on sys.path
+app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'langgraph', 'app'))
+if "langgraph_app" not in sys.modules:
+    sys.path.insert(0, os.path.dirname(app_dir))  # config.py and dependencies.py
+    spec = importlib.util.spec_from_file_location("langgraph_app", os.path.join(app_dir, "__init__.py"),
+                                                  submodule_search_locations=[app_dir])
+    sys.modules["langgraph_app"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["langgraph_app"])
+# The module-level tracker pings the configured server on import; fail over to memory quickly
+_timeout = os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS")
+os.environ["MONGO_SERVER_SELECTION_TIMEOUT_MS"] = "50"
+try:
+    from langgraph_app.mongodb_tracker import AsyncWorkflowTracker, DatabaseWorkflowTracker
+finally:
+    if _timeout is None:
+        os.environ.pop("MONGO_SERVER_SELECTION_TIMEOUT_MS")
+    else:
+        os.environ["MONGO_SERVER_SELECTION_TIMEOUT_MS"] = _timeout
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+        self.writes = 0
+
+    def insert_one(self, doc):
+        self.writes += 1
+        self.docs[doc["workflow_id"]] = dict(doc)
+
+    def find_one(self, query):
+        doc = self.docs.get(query["workflow_id"])
+        return dict(doc) if doc else None
+
+    def bulk_write(self, ops, ordered=True):
+        self.writes += 1
+        for op in ops:
+            self.docs[op._filter["workflow_id"]].update(op._doc["$set"])
+
+
+def make_tracker(**kwargs):
+    store = DatabaseWorkflowTracker.__new__(DatabaseWorkflowTracker)
+    store._client, store.fallback_storage = None, {}
+    collection = FakeCollection()
+    store._db = SimpleNamespace(workflows=collection)
+    return AsyncWorkflowTracker(store, **kwargs), collection
+
+
+def test_progress_is_coalesced_into_few_writes():
+    tracker, collection = make_tracker(flush_interval=3600)
+
+    async def run():
+        await tracker.create_workflow("wf-1", candidate_id=1, job_id=2)
+        await tracker.create_workflow("wf-2", candidate_id=3, job_id=2)
+        for progress in range(0, 100, 10):
+            tracker.update_workflow("wf-1", progress_percentage=progress, current_step=f"step {progress}")
+            tracker.update_workflow("wf-2", progress_percentage=progress)
+        live = await tracker.get_workflow_status("wf-1")
+        assert live["progress_percentage"] == 90 and live["current_step"] == "step 90"
+        assert collection.docs["wf-1"]["progress_percentage"] == 0  # nothing written yet
+
+        await tracker.complete_workflow("wf-1", output_data={"next_action": "schedule_interview"})
+        await tracker.complete_workflow("wf-2", final_status="failed", error_message="boom")
+
+    asyncio.run(run())
+    # 2 inserts + 2 flushes for 22 updates; the first flush also carries wf-2's progress
+    assert collection.writes == 4
+    assert collection.docs["wf-1"]["status"] == "completed"
+    assert collection.docs["wf-1"]["progress_percentage"] == 100
+    assert collection.docs["wf-2"]["error_message"] == "boom"
+    assert tracker.stats()["live_workflows"] == 0
+    assert tracker.stats()["updates_per_write"] == 7.3
+
+
+def test_background_flush_and_terminal_wakeup():
+    tracker, collection = make_tracker(flush_interval=0.05)
+
+    async def run():
+        tracker.start()
+        await tracker.create_workflow("wf-1")
+        tracker.update_workflow("wf-1", progress_percentage=40, node_timings={"screen_application": 12.5})
+        await asyncio.sleep(0.15)
+        assert collection.docs["wf-1"]["progress_percentage"] == 40
+        # A terminal status wakes the flusher without waiting for the interval
+        tracker.flush_interval = 3600
+        await asyncio.sleep(0.1)
+        tracker.update_workflow("wf-1", status="cancelled")
+        await asyncio.sleep(0.05)
+        assert collection.docs["wf-1"]["status"] == "cancelled"
+        await tracker.stop()
+
+    asyncio.run(run())
+    assert collection.docs["wf-1"]["node_timings"] == {"screen_application": 12.5}
+
+
+def test_failed_flush_keeps_updates():
+    tracker, collection = make_tracker(flush_interval=3600)
+
+    def broken_bulk_write(ops, ordered=True):
+        raise ConnectionError("primary stepped down")
+
+    async def run():
+        await tracker.create_workflow("wf-1")
+        tracker.update_workflow("wf-1", progress_percentage=50)
+        collection.bulk_write, working = broken_bulk_write, collection.bulk_write
+        assert await tracker.flush() == 0
+        tracker.update_workflow("wf-1", current_step="Notifications")
+        collection.bulk_write = working
+        assert await tracker.flush() == 1
+
+    asyncio.run(run())
+    assert collection.docs["wf-1"]["progress_percentage"] == 50
+    assert collection.docs["wf-1"]["current_step"] == "Notifications"
+    assert tracker.counters["flush_errors"] == 1
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Bulk Notification Dispatch Benchmark
+
+Notifies --candidates candidates (email + WhatsApp each) through local
+stand-in channel servers and compares:
+
+  sequential  - one candidate and one channel send at a time (the previous
+                send_bulk_notifications loop)
+  dispatcher  - BulkNotificationDispatcher: concurrent sends, per-channel
+                token buckets, retries with backoff
+
+The stand-in servers are plain HTTP endpoints on localhost that answer after
+--latency-ms and return 503 for --failure-rate of requests, so retries are
+exercised. Rate limits are raised to --rate per channel to measure the
+dispatcher itself rather than provider quotas. The servers share the
+benchmark's event loop, so dispatcher throughput is a lower bound.
+
+Usage:
+    python tools/benchmarks/bulk_notification_benchmark.py [--candidates 1000] [--latency-ms 80]
+        [--failure-rate 0.02] [--concurrency 50] [--rate 500]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import httpx
+
+# Add langgraph service directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'services', 'langgraph'))
+from app.notification_dispatcher import BulkNotificationDispatcher
+
+CHANNELS = ("email", "whatsapp")
+
+
+async def start_stand_in_server(latency_s, failure_rate):
+    """HTTP stand-in for a channel provider API; returns (server, port)"""
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                await asyncio.sleep(latency_s)
+                status = b"503 Service Unavailable" if random.random() < failure_rate else b"200 OK"
+                writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: 2\r\n\r\n{}")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+class StandInChannels:
+    """Sequence sends that POST to the stand-in servers"""
+
+    def __init__(self, client, ports):
+        self.client = client
+        self.ports = ports
+
+    async def _send(self, channel, payload):
+        try:
+            response = await self.client.post(f"http://127.0.0.1:{self.ports[channel]}/{channel}",
+                                              json={"to": payload["candidate_id"]})
+            response.raise_for_status()
+            return {"status": "success", "channel": channel}
+        except Exception as e:
+            return {"status": "failed", "channel": channel, "error": str(e)}
+
+    def sequence_sends(self, payload, sequence_type):
+        return [(channel, lambda channel=channel: self._send(channel, payload)) for channel in CHANNELS]
+
+
+async def run_sequential(channels, candidates):
+    results = []
+    for candidate in candidates:
+        for _, send in channels.sequence_sends({"candidate_id": candidate["id"]}, "shortlisted"):
+            results.append(await send())
+    return sum(r["status"] == "success" for r in results), sum(r["status"] == "failed" for r in results)
+
+
+async def main_async(args):
+    servers, ports = [], {}
+    for channel in CHANNELS:
+        server, ports[channel] = await start_stand_in_server(args.latency_ms / 1000, args.failure_rate)
+        servers.append(server)
+
+    candidates = [{"id": i, "name": f"Candidate {i}"} for i in range(args.candidates)]
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    rows = []
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        channels = StandInChannels(client, ports)
+
+        sample = candidates[:args.sequential_sample]
+        started = time.perf_counter()
+        success, failed = await run_sequential(channels, sample)
+        elapsed = time.perf_counter() - started
+        rows.append(("sequential", len(sample), elapsed, success, failed, 0))
+
+        dispatcher = BulkNotificationDispatcher(channels, concurrency=args.concurrency, max_attempts=3,
+                                                retry_base=0.05, rates={c: (args.rate, args.concurrency) for c in CHANNELS})
+        started = time.perf_counter()
+        result = await dispatcher.dispatch(candidates, "shortlisted", {})
+        elapsed = time.perf_counter() - started
+        rows.append(("dispatcher", len(candidates), elapsed, result["success_count"], result["failed_count"],
+                     result["retried_count"]))
+
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+    print(f"{args.candidates} candidates x {len(CHANNELS)} channels, {args.latency_ms} ms per send, "
+          f"{args.failure_rate:.0%} transient failures\n")
+    print(f"{'mode':<12} {'candidates':>10} {'wall s':>8} {'sends/s':>9} {'success':>8} {'failed':>7} {'retries':>8}")
+    for mode, count, elapsed, success, failed, retried in rows:
+        print(f"{mode:<12} {count:>10} {elapsed:>8.2f} {count * len(CHANNELS) / elapsed:>9.1f} "
+              f"{success:>8} {failed:>7} {retried:>8}")
+    sequential_rate = rows[0][1] / rows[0][2]
+    print(f"\nsequential extrapolated to {args.candidates} candidates: {args.candidates / sequential_rate:.1f} s; "
+          f"dispatcher: {rows[1][2]:.1f} s ({rows[1][1] / rows[1][2] / sequential_rate:.0f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk notification dispatch benchmark")
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--sequential-sample", type=int, default=50,
+                        help="Candidates run through the sequential loop (extrapolated)")
+    parser.add_argument("--latency-ms", type=float, default=80, help="Stand-in provider latency per send")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="Share of sends answered with 503")
+    parser.add_argument("--concurrency", type=int, default=50, help="Dispatcher sends in flight")
+    parser.add_argument("--rate", type=float, default=500, help="Per-channel sends per second")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+LangGraph Checkpointer Write Benchmark
+
+Replays the checkpoint traffic of many concurrent application workflows
+against MongoDB and compares two savers:
+
+  previous - the earlier MongoDBSaver write path: sync pymongo in worker
+             threads, the whole checkpoint (all channel values) re-encoded
+             per checkpoint, one bulk write per aput_writes call
+  current  - app.mongodb_checkpointer.MongoDBSaver: Motor, only changed
+             channel versions written, native BSON for plain values, blobs
+             and checkpoint written concurrently
+
+Each workflow runs --steps super-steps of --tasks tasks. Every task writes
+two channels, and the message history grows by one message per step.
+Reported: wall time, checkpoints/s, and bytes stored across all checkpoint
+collections.
+
+Requires a MongoDB server; uses (and drops) a scratch database.
+
+Usage:
+    python tools/benchmarks/checkpointer_write_benchmark.py --mongodb-uri mongodb://localhost:27017
+        [--workflows 50] [--steps 4] [--tasks 3] [--db bhiv_hr_checkpoint_benchmark]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from pymongo import MongoClient, UpdateOne
+
+# Add langgraph service directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'services', 'langgraph'))
+from app.mongodb_checkpointer import BLOBS, CHECKPOINTS, WRITES, MongoDBSaver
+
+PREVIOUS_CHECKPOINTS = "langgraph_checkpoints_previous"
+PREVIOUS_WRITES = "langgraph_checkpoint_writes_previous"
+
+
+class PreviousMongoDBSaver(BaseCheckpointSaver):
+    """Write path of the saver this change replaces (writes only)"""
+
+    def __init__(self, db):
+        super().__init__()
+        self._db = db
+
+    def _dump(self, value):
+        type_, data = self.serde.dumps_typed(value)
+        return {"type": type_, "data": data}
+
+    def _put(self, config, checkpoint, metadata):
+        configurable = config["configurable"]
+        key = {"thread_id": configurable["thread_id"], "checkpoint_ns": "", "thread_ts": checkpoint["id"]}
+        self._db[PREVIOUS_CHECKPOINTS].update_one(key, {"$set": {
+            **key, "parent_ts": configurable.get("checkpoint_id"), "checkpoint": self._dump(checkpoint),
+            "metadata": dict(metadata)}}, upsert=True)
+        return {"configurable": {"thread_id": key["thread_id"], "checkpoint_ns": "", "checkpoint_id": checkpoint["id"]}}
+
+    def _put_writes(self, config, writes, task_id):
+        configurable = config["configurable"]
+        ops = [UpdateOne({"thread_id": configurable["thread_id"], "checkpoint_ns": "",
+                          "thread_ts": configurable["checkpoint_id"], "task_id": task_id, "idx": idx},
+                         {"$setOnInsert": {"channel": channel, "value": self._dump(value)}}, upsert=True)
+               for idx, (channel, value) in enumerate(writes)]
+        self._db[PREVIOUS_WRITES].bulk_write(ops, ordered=False)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self._put, config, checkpoint, metadata)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await asyncio.to_thread(self._put_writes, config, writes, task_id)
+
+
+async def replay_workflow(saver, steps, tasks):
+    """Checkpoint traffic of one workflow, shaped like the application graph"""
+    thread_id = str(uuid.uuid4())
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    messages = [HumanMessage(content="New application from Test Candidate for Software Engineer " * 4)]
+    values = {"messages": messages, "application_status": "pending", "matching_score": 0.0,
+              "notifications_sent": [], "workflow_stage": "screening"}
+    versions = {channel: 1 for channel in values}
+
+    for step in range(steps):
+        checkpoint_id = str(uuid.uuid1())
+        checkpoint = {"v": 4, "id": checkpoint_id, "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                      "channel_values": dict(values), "channel_versions": dict(versions), "versions_seen": {}}
+        new_versions = versions if step == 0 else {c: versions[c] for c in ("messages", "application_status",
+                                                                            "matching_score")}
+        config = await saver.aput(config, checkpoint, {"source": "loop", "step": step}, new_versions)
+
+        await asyncio.gather(*(
+            saver.aput_writes(config, [("application_status", "shortlisted"), ("matching_score", 80.0 + t)],
+                              f"task-{step}-{t}")
+            for t in range(tasks)
+        ))
+        messages = messages + [AIMessage(content=f"Step {step} analysis: candidate matches the role " * 4)]
+        values.update(messages=messages, application_status="shortlisted", matching_score=80.0 + step)
+        for channel in ("messages", "application_status", "matching_score"):
+            versions[channel] += 1
+
+
+async def run(saver, workflows, steps, tasks):
+    started = time.perf_counter()
+    await asyncio.gather(*(replay_workflow(saver, steps, tasks) for _ in range(workflows)))
+    return time.perf_counter() - started
+
+
+def stored_bytes(db, collections):
+    return sum(db.command("collStats", name).get("size", 0) for name in collections if name in db.list_collection_names())
+
+
+async def main_async(args):
+    sync_db = MongoClient(args.mongodb_uri)[args.db]
+    sync_db.client.drop_database(args.db)
+    try:
+        results = {}
+        previous = PreviousMongoDBSaver(sync_db)
+        elapsed = await run(previous, args.workflows, args.steps, args.tasks)
+        results["previous"] = (elapsed, stored_bytes(sync_db, [PREVIOUS_CHECKPOINTS, PREVIOUS_WRITES]))
+
+        current = MongoDBSaver.from_conn_string(args.mongodb_uri, db_name=args.db)
+        elapsed = await run(current, args.workflows, args.steps, args.tasks)
+        results["current"] = (elapsed, stored_bytes(sync_db, [CHECKPOINTS, BLOBS, WRITES]))
+    finally:
+        sync_db.client.drop_database(args.db)
+
+    checkpoints = args.workflows * args.steps
+    print(f"{args.workflows} workflows x {args.steps} steps x {args.tasks} tasks "
+          f"({checkpoints} checkpoints, {checkpoints * args.tasks} task writes)\n")
+    print(f"{'saver':<10} {'wall s':>8} {'checkpoints/s':>14} {'stored KiB':>11}")
+    for name, (elapsed, size) in results.items():
+        print(f"{name:<10} {elapsed:>8.2f} {checkpoints / elapsed:>14.1f} {size / 1024:>11.1f}")
+    speedup = results["previous"][0] / results["current"][0]
+    print(f"\ncurrent saver: {speedup:.1f}x write throughput, "
+          f"{results['current'][1] / max(results['previous'][1], 1):.0%} of the stored bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LangGraph checkpointer write benchmark")
+    parser.add_argument("--mongodb-uri", default=os.getenv("DATABASE_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="bhiv_hr_checkpoint_benchmark", help="Scratch database (dropped)")
+    parser.add_argument("--workflows", type=int, default=50, help="Concurrent workflows")
+    parser.add_argument("--steps", type=int, default=4, help="Super-steps per workflow")
+    parser.add_argument("--tasks", type=int, default=3, help="Tasks (write batches) per step")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
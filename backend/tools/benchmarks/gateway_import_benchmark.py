@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Gateway Cold Start Benchmark
+
+Measures how long a fresh interpreter needs to import app.main and to answer
+its first request (GET /health driven straight through the ASGI app, no
+server or network involved), and summarizes a `python -X importtime`
+profile of the import so heavy dependencies are easy to spot.
+
+Usage:
+    python tools/benchmarks/gateway_import_benchmark.py [--runs 5] [--top 15] [--report importtime.txt]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+GATEWAY_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'services', 'gateway'))
+
+# Runs in a fresh interpreter: import the app, then serve one request over ASGI
+FIRST_REQUEST_SNIPPET = r'''
+import asyncio, time
+t0 = time.perf_counter()
+from app.main import app
+t1 = time.perf_counter()
+
+async def first_request():
+    messages = []
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/health", "raw_path": b"/health", "root_path": "",
+             "query_string": b"", "headers": [(b"host", b"localhost")],
+             "client": ("127.0.0.1", 50000), "server": ("localhost", 8000)}
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+status = asyncio.run(first_request())
+t2 = time.perf_counter()
+print(f"{(t1 - t0) * 1000:.1f} {(t2 - t0) * 1000:.1f} {status}")
+'''
+
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_python(args, env):
+    return subprocess.run([sys.executable] + args, cwd=GATEWAY_DIR, env=env, capture_output=True, text=True)
+
+
+def measure_first_request(runs, env):
+    """Median import and time-to-first-request in milliseconds"""
+    imports, firsts, status = [], [], None
+    for _ in range(runs):
+        result = run_python(["-c", FIRST_REQUEST_SNIPPET], env)
+        last = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ""
+        parts = last.split()
+        if result.returncode != 0 or len(parts) != 3:
+            raise RuntimeError(f"benchmark run failed:\n{result.stderr[-2000:]}")
+        imports.append(float(parts[0]))
+        firsts.append(float(parts[1]))
+        status = parts[2]
+    return statistics.median(imports), statistics.median(firsts), status
+
+
+def import_profile(env):
+    """Raw -X importtime report for `import app.main`"""
+    result = run_python(["-X", "importtime", "-c", "import app.main"], env)
+    if result.returncode != 0:
+        raise RuntimeError(f"import failed:\n{result.stderr[-2000:]}")
+    return "\n".join(line for line in result.stderr.splitlines() if line.startswith("import time:"))
+
+
+def top_level_imports(report, top):
+    """Heaviest modules imported directly by app.main (cumulative microseconds)"""
+    rows = []
+    for line in report.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        # app.main sits at indent 1; its direct imports at indent 3
+        if match and len(match.group(3)) == 3:
+            rows.append((int(match.group(2)), int(match.group(1)), match.group(4)))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="Top-level imports to list")
+    parser.add_argument("--report", help="Write the raw -X importtime report to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Importing the gateway must not need a live database
+    env.setdefault("DATABASE_URL", "mongodb://localhost:27017")
+    env.setdefault("API_KEY_SECRET", "benchmark-key")
+    env.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+    report = import_profile(env)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(report + "\n")
+        print(f"Wrote -X importtime report to {args.report}")
+
+    total = next((int(m.group(2)) for m in map(IMPORTTIME_RE.match, report.splitlines())
+                  if m and m.group(4) == "app.main"), 0)
+    print(f"\nimport app.main (-X importtime): {total / 1000:.1f} ms")
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative, self_us, name in top_level_imports(report, args.top):
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    import_ms, first_ms, status = measure_first_request(args.runs, env)
+    print(f"\nMedian of {args.runs} fresh interpreters:")
+    print(f"  import app.main:        {import_ms:.1f} ms")
+    print(f"  time to first request:  {first_ms:.1f} ms (GET /health -> {status})")
+
+
+if __name__ == "__main__":
+    main()
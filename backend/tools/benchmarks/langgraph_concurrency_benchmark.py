@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+LangGraph Workflow Concurrency Benchmark
+
+Runs many application workflows at once on a single event loop, the way one
+langgraph service worker does, and compares:
+
+  sync   - graph.invoke() called from the async handler (the old path); every
+           node's I/O wait blocks the loop, so workflows run one after another
+  async  - graph.astream() via stream_node_events (the new path); nodes await
+           their I/O and workflows interleave
+
+The graph has the same four nodes as the application workflow, each waiting
+--node-latency-ms to stand in for LLM / HTTP calls. A heartbeat task measures
+how long the loop stays unresponsive while workflows run.
+
+Usage:
+    python tools/benchmarks/langgraph_concurrency_benchmark.py [--workflows 50] [--node-latency-ms 50]
+        [--mongodb-uri mongodb://localhost:27017]   # checkpoint to MongoDB instead of memory
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import TypedDict
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph, END
+
+# Add langgraph service directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'services', 'langgraph'))
+from app.workflow_events import NODE_ORDER, stream_node_events
+
+
+class BenchState(TypedDict):
+    application_status: str
+    matching_score: float
+    visited: int
+
+
+def build_graph(latency_s, use_async, checkpointer):
+    def make_node(name):
+        update = {"application_status": "shortlisted", "matching_score": 82.5} if name == NODE_ORDER[0] else {}
+
+        if use_async:
+            async def node(state):
+                await asyncio.sleep(latency_s)
+                return {**update, "visited": state["visited"] + 1}
+        else:
+            def node(state):
+                time.sleep(latency_s)
+                return {**update, "visited": state["visited"] + 1}
+        return node
+
+    graph = StateGraph(BenchState)
+    for name in NODE_ORDER:
+        graph.add_node(name, make_node(name))
+    graph.set_entry_point(NODE_ORDER[0])
+    for current, following in zip(NODE_ORDER, NODE_ORDER[1:]):
+        graph.add_edge(current, following)
+    graph.add_edge(NODE_ORDER[-1], END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def make_checkpointer(mongodb_uri):
+    if not mongodb_uri:
+        return InMemorySaver()
+    from app.mongodb_checkpointer import MongoDBSaver
+    return MongoDBSaver.from_conn_string(mongodb_uri, db_name=os.getenv("MONGODB_DB_NAME", "bhiv_hr_benchmark"))
+
+
+async def heartbeat(stop, interval_s, lags):
+    """Record how late each tick fires; large lags mean the loop was blocked"""
+    while not stop.is_set():
+        expected = time.perf_counter() + interval_s
+        await asyncio.sleep(interval_s)
+        lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+
+async def run_sync_workflow(graph, index, run_id):
+    state = {"application_status": "pending", "matching_score": 0.0, "visited": 0}
+    started = time.perf_counter()
+    result = graph.invoke(state, {"configurable": {"thread_id": f"sync-{run_id}-{index}"}})
+    assert result["visited"] == len(NODE_ORDER)
+    return time.perf_counter() - started
+
+
+async def run_async_workflow(graph, index, run_id):
+    state = {"application_status": "pending", "matching_score": 0.0, "visited": 0}
+    started = time.perf_counter()
+    nodes_finished = 0
+    async for event in stream_node_events(graph, state, {"configurable": {"thread_id": f"async-{run_id}-{index}"}}):
+        if event["type"] == "node_finished":
+            nodes_finished += 1
+    assert nodes_finished == len(NODE_ORDER)
+    return time.perf_counter() - started
+
+
+async def measure(mode, workflows, latency_s, mongodb_uri):
+    graph = build_graph(latency_s, mode == "async", make_checkpointer(mongodb_uri))
+    runner = run_async_workflow if mode == "async" else run_sync_workflow
+    run_id = int(time.time() * 1000)
+
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, 0.01, lags))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    durations = await asyncio.gather(*(runner(graph, i, run_id) for i in range(workflows)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+
+    return {
+        "elapsed_s": elapsed,
+        "throughput": workflows / elapsed,
+        "p50_ms": statistics.median(durations) * 1000,
+        "max_lag_ms": max(lags, default=0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LangGraph workflow concurrency benchmark")
+    parser.add_argument("--workflows", type=int, default=50, help="Workflows started at once")
+    parser.add_argument("--node-latency-ms", type=float, default=50.0, help="Simulated I/O wait per node")
+    parser.add_argument("--mongodb-uri", help="Checkpoint to MongoDB instead of in memory")
+    args = parser.parse_args()
+
+    latency_s = args.node_latency_ms / 1000
+    ideal_ms = latency_s * len(NODE_ORDER) * 1000
+    print(f"{args.workflows} concurrent workflows, {len(NODE_ORDER)} nodes x {args.node_latency_ms:.0f} ms "
+          f"(one workflow alone: ~{ideal_ms:.0f} ms), checkpointer: "
+          f"{'MongoDB' if args.mongodb_uri else 'in-memory'}\n")
+    print(f"{'path':<8} {'wall s':>8} {'workflows/s':>12} {'p50 workflow ms':>16} {'max loop lag ms':>16}")
+
+    results = {}
+    for mode in ("sync", "async"):
+        results[mode] = r = asyncio.run(measure(mode, args.workflows, latency_s, args.mongodb_uri))
+        print(f"{mode:<8} {r['elapsed_s']:>8.2f} {r['throughput']:>12.1f} {r['p50_ms']:>16.1f} {r['max_lag_ms']:>16.1f}")
+
+    print(f"\nasync path throughput: {results['async']['throughput'] / results['sync']['throughput']:.1f}x the sync path")
+
+
+if __name__ == "__main__":
+    main()
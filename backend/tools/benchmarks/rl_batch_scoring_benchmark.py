@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+RL Batch Scoring Benchmark
+
+Scores --candidates candidates for one job and compares:
+
+  per-pair  - what /rl/predict does once per candidate: read the candidate's
+              feedback aggregate, make_rl_decision, insert the prediction,
+              insert the audit event
+  batch     - /rl/predict/batch: one $in read of every candidate's aggregate,
+              make_rl_decisions over arrays, one insert_many of predictions
+              and one of audit events
+
+MongoDBAdapter runs against an in-memory stand-in that sleeps --rtt-ms per
+round trip, so the numbers show both the scoring CPU and the writes saved.
+Before timing, the batch decisions are checked against the per-pair ones.
+
+Usage:
+    python tools/benchmarks/rl_batch_scoring_benchmark.py [--candidates 500] [--rtt-ms 1]
+        [--feedback-per-candidate 20]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+from bson import ObjectId
+
+# Add langgraph service directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'services', 'langgraph'))
+from app.rl_feedback_aggregates import FeedbackAggregates, fold, aggregate_id
+from app.rl_integration.decision_engine import DecisionEngine, EventTimeline
+from app.rl_integration.mongodb_adapter import MongoDBAdapter
+import app.rl_integration.mongodb_adapter as mongodb_adapter_module
+
+SKILLS = ["python", "java", "sql", "aws", "docker", "kubernetes", "react", "node.js", "go", "terraform",
+          "spark", "pandas", "django", "fastapi", "c++", "rust", "graphql", "redis", "kafka", "linux"]
+OUTCOMES = ["hired", "interviewed", "shortlisted", "rejected", "withdrawn"]
+
+
+class Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class StandInCollection:
+    """Dict-backed collection; every call costs one round trip"""
+
+    def __init__(self, db):
+        self.db = db
+        self.docs = {}
+
+    def _round_trip(self):
+        self.db.round_trips += 1
+        if self.db.rtt:
+            time.sleep(self.db.rtt)
+
+    def find_one(self, query, projection=None):
+        self._round_trip()
+        doc = self.docs.get(query.get("_id"))
+        return dict(doc) if doc else None
+
+    def find(self, query):
+        self._round_trip()
+        return [dict(self.docs[_id]) for _id in query["_id"]["$in"] if _id in self.docs]
+
+    def insert_one(self, doc):
+        self._round_trip()
+        doc.setdefault("_id", ObjectId())
+        self.docs[doc["_id"]] = doc
+        return Result(inserted_id=doc["_id"])
+
+    def insert_many(self, docs, ordered=True):
+        self._round_trip()
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self.docs[doc["_id"]] = doc
+        return Result(inserted_ids=[doc["_id"] for doc in docs])
+
+
+class StandInDB(dict):
+    def __init__(self, rtt):
+        super().__init__()
+        self.rtt = rtt
+        self.round_trips = 0
+
+    def __missing__(self, name):
+        self[name] = StandInCollection(self)
+        return self[name]
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def seed(db, candidate_ids, feedback_per_candidate, rng):
+    """Aggregates as store_rl_feedback would have left them"""
+    docs = {}
+    for candidate_id in candidate_ids:
+        for _ in range(rng.randint(0, feedback_per_candidate)):
+            feedback = {"reward_signal": round(rng.uniform(-1, 1), 3), "actual_outcome": rng.choice(OUTCOMES),
+                        "feedback_score": rng.randint(1, 5)}
+            for _id in (aggregate_id("global"), aggregate_id("candidate", candidate_id)):
+                docs[_id] = fold(docs.get(_id), feedback, 0.95)
+    for _id, doc in docs.items():
+        db.rl_feedback_aggregates.docs[_id] = {**doc, "_id": _id}
+
+
+def per_pair(adapter, engine, timeline, job_id, job, candidates):
+    decisions = []
+    for candidate_id, features in candidates:
+        history = adapter.get_scoring_feedback(candidate_id=candidate_id)
+        decision = engine.make_rl_decision(features, job, history)
+        adapter.store_rl_prediction({"candidate_id": candidate_id, "job_id": job_id, **decision})
+        timeline.log_rl_decision(candidate_id, job_id, decision)
+        decisions.append(decision)
+    return decisions
+
+
+def batch(adapter, engine, timeline, job_id, job, candidates):
+    candidate_ids = [candidate_id for candidate_id, _ in candidates]
+    histories = adapter.get_scoring_feedback_batch(candidate_ids)
+    decisions = engine.make_rl_decisions([features for _, features in candidates], job,
+                                         [histories[candidate_id] for candidate_id in candidate_ids])
+    adapter.store_rl_predictions([{"candidate_id": candidate_id, "job_id": job_id, **decision}
+                                  for candidate_id, decision in zip(candidate_ids, decisions)])
+    timeline.log_rl_decisions(job_id, candidate_ids, decisions)
+    return decisions
+
+
+def without_timestamp(decision):
+    return {k: v for k, v in decision.items() if k != "timestamp"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RL batch scoring benchmark")
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=1, help="Delay per MongoDB round trip")
+    parser.add_argument("--feedback-per-candidate", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(42)
+    job_id, job = 1, {"requirements": rng.sample(SKILLS, 6), "title": "Backend Engineer"}
+    candidates = [(candidate_id, {"skills": rng.sample(SKILLS, rng.randint(0, 8))})
+                  for candidate_id in range(1, args.candidates + 1)]
+
+    rows = []
+    results = {}
+    for mode, run in (("per-pair", per_pair), ("batch", batch)):
+        db = StandInDB(args.rtt_ms / 1000)
+        seed(db, [candidate_id for candidate_id, _ in candidates], args.feedback_per_candidate, rng=random.Random(7))
+        # Fresh aggregate cache per mode, so both start cold
+        mongodb_adapter_module.feedback_aggregates = FeedbackAggregates(cache_seconds=60)
+        adapter = MongoDBAdapter()
+        adapter._client, adapter._db = object(), db
+        engine, timeline = DecisionEngine(adapter), EventTimeline(adapter)
+
+        db.round_trips = 0
+        started = time.perf_counter()
+        results[mode] = run(adapter, engine, timeline, job_id, job, candidates)
+        elapsed = time.perf_counter() - started
+        rows.append((mode, elapsed, db.round_trips, len(db.rl_predictions.docs)))
+
+    mismatched = sum(without_timestamp(a) != without_timestamp(b)
+                     for a, b in zip(results["per-pair"], results["batch"]))
+    print(f"{args.candidates} candidates, one job, {args.rtt_ms} ms per round trip, "
+          f"up to {args.feedback_per_candidate} feedback per candidate\n")
+    print(f"{'mode':<10} {'wall s':>8} {'cand/s':>9} {'round trips':>12} {'stored':>7}")
+    for mode, elapsed, round_trips, stored in rows:
+        print(f"{mode:<10} {elapsed:>8.3f} {args.candidates / elapsed:>9.0f} {round_trips:>12} {stored:>7}")
+    print(f"\nbatch speedup: {rows[0][1] / rows[1][1]:.1f}x, decisions differing from per-pair: {mismatched}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Gateway Response Serialization Benchmark
+
+Compares the old list-endpoint path (rebuild each document field by field,
+then FastAPI's jsonable_encoder + json.dumps) against the new path
+(pre-shaped rows from a Mongo projection rendered by FastJSONResponse).
+
+Usage:
+    python tools/benchmarks/serialization_benchmark.py [--rows 1000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Add gateway service directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'services', 'gateway'))
+from app.responses import FastJSONResponse, ORJSON_AVAILABLE
+
+
+def make_raw_documents(rows):
+    """Documents as Motor returns them from db.candidates.find()"""
+    now = datetime.now(timezone.utc)
+    return [{
+        "_id": ObjectId(),
+        "name": f"Candidate {i}",
+        "email": f"candidate{i}@example.com",
+        "phone": "+919876543210",
+        "location": "Mumbai",
+        "experience_years": i % 15,
+        "technical_skills": "Python, FastAPI, MongoDB, Docker, AWS",
+        "seniority_level": "Senior",
+        "education_level": "Masters",
+        "password_hash": "$2b$12$" + "x" * 53,
+        "created_at": now - timedelta(minutes=i),
+    } for i in range(rows)]
+
+
+def make_shaped_rows(raw):
+    """Rows as the $project stage returns them (id string, no extra fields)"""
+    return [{
+        "id": str(doc["_id"]),
+        "name": doc["name"],
+        "email": doc["email"],
+        "phone": doc["phone"],
+        "location": doc["location"],
+        "experience_years": doc["experience_years"],
+        "technical_skills": doc["technical_skills"],
+        "seniority_level": doc["seniority_level"],
+        "education_level": doc["education_level"],
+        "created_at": doc["created_at"],
+    } for doc in raw]
+
+
+def old_path(raw):
+    candidates = []
+    for doc in raw:
+        candidates.append({
+            "id": str(doc["_id"]),
+            "name": doc.get("name"),
+            "email": doc.get("email"),
+            "phone": doc.get("phone"),
+            "location": doc.get("location"),
+            "experience_years": doc.get("experience_years"),
+            "technical_skills": doc.get("technical_skills"),
+            "seniority_level": doc.get("seniority_level"),
+            "education_level": doc.get("education_level"),
+            "created_at": doc.get("created_at").isoformat() if doc.get("created_at") else None
+        })
+    return JSONResponse(jsonable_encoder({"candidates": candidates, "count": len(candidates)})).body
+
+
+def new_path(shaped):
+    return FastJSONResponse({"candidates": shaped, "count": len(shaped)}).body
+
+
+def bench(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway serialization benchmark")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    raw = make_raw_documents(args.rows)
+    shaped = make_shaped_rows(raw)
+
+    old_seconds = bench(old_path, raw, args.repeat)
+    new_seconds = bench(new_path, shaped, args.repeat)
+    per_1k = 1000.0 / args.rows
+
+    print("Gateway Response Serialization Benchmark")
+    print("=" * 60)
+    print(f"Rows: {args.rows}  Repeats: {args.repeat}  orjson: {ORJSON_AVAILABLE}")
+    print(f"Before (dict rebuild + jsonable_encoder): {old_seconds * 1000 * per_1k:8.2f} ms / 1,000 rows")
+    print(f"After  (projection + FastJSONResponse):   {new_seconds * 1000 * per_1k:8.2f} ms / 1,000 rows")
+    print(f"Speedup: {old_seconds / new_seconds:.1f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
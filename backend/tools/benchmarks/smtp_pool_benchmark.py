@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+SMTP Session Pool Benchmark
+
+Sends --messages emails to a local SMTP stand-in and compares:
+
+  per-message  - a fresh session (connect, EHLO, AUTH, send, QUIT) for every
+                 message, --concurrency at a time (the previous send_email)
+  pooled       - SMTPSessionPool with --concurrency persistent sessions and
+                 batches of --batch messages per session
+
+The stand-in speaks enough SMTP for smtplib (EHLO, AUTH PLAIN, MAIL, RCPT,
+DATA, NOOP, RSET, QUIT). It runs on its own thread and event loop, delays
+the greeting by --handshake-ms (connect + TLS handshake to Gmail), AUTH by
+--login-ms and every other command by --rtt-ms.
+
+Usage:
+    python tools/benchmarks/smtp_pool_benchmark.py [--messages 500] [--concurrency 3]
+        [--handshake-ms 150] [--login-ms 250] [--rtt-ms 20] [--batch 10]
+"""
+import argparse
+import asyncio
+import os
+import smtplib
+import sys
+import threading
+import time
+from email.message import EmailMessage
+
+# Add langgraph service directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'services', 'langgraph'))
+from app.smtp_pool import SMTPSessionPool
+
+USERNAME, PASSWORD = "hr@example.com", "app-password"
+
+
+class StandInSMTPServer:
+    """Minimal SMTP server on a background event loop; counts sessions and messages"""
+
+    def __init__(self, handshake_s, login_s, rtt_s):
+        self.handshake_s, self.login_s, self.rtt_s = handshake_s, login_s, rtt_s
+        self.sessions = self.logins = self.messages = 0
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+
+        async def reply(line, delay=None):
+            await asyncio.sleep(self.rtt_s if delay is None else delay)
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        try:
+            await reply("220 stand-in ESMTP", self.handshake_s)
+            while True:
+                line = (await reader.readline()).decode().strip()
+                if not line:
+                    break
+                verb = line.split(" ", 1)[0].upper()
+                if verb in ("EHLO", "HELO"):
+                    await reply("250-stand-in\r\n250-AUTH PLAIN\r\n250 SIZE 35882577")
+                elif verb == "AUTH":
+                    self.logins += 1
+                    await reply("235 2.7.0 Accepted", self.login_s)
+                elif verb == "DATA":
+                    await reply("354 Go ahead")
+                    while (await reader.readline()) != b".\r\n":
+                        pass
+                    self.messages += 1
+                    await reply("250 2.0.0 OK queued")
+                elif verb == "QUIT":
+                    await reply("221 2.0.0 Bye")
+                    break
+                else:  # MAIL, RCPT, NOOP, RSET
+                    await reply("250 2.1.0 OK")
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def start(self):
+        ready = threading.Event()
+
+        async def serve():
+            server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(serve(), self.loop)
+        ready.wait()
+
+    def reset(self):
+        self.sessions = self.logins = self.messages = 0
+
+
+def make_message(i):
+    msg = EmailMessage()
+    msg["From"] = USERNAME
+    msg["To"] = f"candidate{i}@example.com"
+    msg["Subject"] = "Your application has been received"
+    msg.set_content("Thank you for applying. We will review your application shortly.\n" * 5)
+    return msg
+
+
+def send_with_fresh_session(port, msg):
+    with smtplib.SMTP("127.0.0.1", port, timeout=30) as server:
+        server.login(USERNAME, PASSWORD)
+        server.send_message(msg)
+
+
+async def run_per_message(port, messages, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send(msg):
+        async with slots:
+            await asyncio.to_thread(send_with_fresh_session, port, msg)
+
+    await asyncio.gather(*(send(msg) for msg in messages))
+
+
+async def run_pooled(port, messages, concurrency, batch):
+    pool = SMTPSessionPool("127.0.0.1", port, USERNAME, PASSWORD, use_ssl=False, size=concurrency, batch_size=batch)
+    await asyncio.gather(*(pool.send(msg) for msg in messages))
+    stats = pool.stats()
+    await pool.aclose()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SMTP session pool benchmark")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=3, help="Sessions (pooled) or connections (per-message)")
+    parser.add_argument("--handshake-ms", type=float, default=150, help="Connect + TLS handshake delay")
+    parser.add_argument("--login-ms", type=float, default=250, help="AUTH delay")
+    parser.add_argument("--rtt-ms", type=float, default=20, help="Delay per SMTP command")
+    parser.add_argument("--batch", type=int, default=10, help="Messages per session per thread hop")
+    args = parser.parse_args()
+
+    server = StandInSMTPServer(args.handshake_ms / 1000, args.login_ms / 1000, args.rtt_ms / 1000)
+    server.start()
+    messages = [make_message(i) for i in range(args.messages)]
+
+    rows = []
+    for mode in ("per-message", "pooled"):
+        server.reset()
+        started = time.perf_counter()
+        if mode == "per-message":
+            asyncio.run(run_per_message(server.port, messages, args.concurrency))
+        else:
+            asyncio.run(run_pooled(server.port, messages, args.concurrency, args.batch))
+        elapsed = time.perf_counter() - started
+        rows.append((mode, elapsed, server.messages, server.sessions, server.logins))
+
+    print(f"{args.messages} messages, concurrency {args.concurrency}, handshake {args.handshake_ms} ms, "
+          f"login {args.login_ms} ms, {args.rtt_ms} ms per command\n")
+    print(f"{'mode':<12} {'wall s':>8} {'msgs/s':>8} {'delivered':>10} {'sessions':>9} {'logins':>7}")
+    for mode, elapsed, delivered, sessions, logins in rows:
+        print(f"{mode:<12} {elapsed:>8.2f} {delivered / elapsed:>8.1f} {delivered:>10} {sessions:>9} {logins:>7}")
+    print(f"\npooled speedup: {rows[0][1] / rows[1][1]:.1f}x")
+    server.loop.call_soon_threadsafe(server.loop.stop)
+
+
+if __name__ == "__main__":
+    main()